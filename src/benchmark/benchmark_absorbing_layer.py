@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the absorbing layer versus padding and windowing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+NUM_DIMENSIONS = (2, 3)
+END_POINT = {2: 0.1, 3: 0.08}
+
+
+def _run(num_dimensions, perfect_matching_layer):
+    control = get_test_control('benchmark_absorbing_layer',
+                               num_dimensions=num_dimensions,
+                               end_point=END_POINT[num_dimensions],
+                               grid_size_policy=SMOOTH_GRID_SIZE,
+                               perfect_matching_layer=perfect_matching_layer)
+    if num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return control, rms_profile[..., 0], elapsed_time
+
+
+def _crop_to_interior(control, reference_control):
+    """
+    Returns the interior indexes of the grid with the absorbing layer and their offsets
+    in the reference grid.
+    """
+    layer_x = int(numpy.ceil(control.domain.perfect_matching_layer_width /
+                             control.signal.resolution_x))
+    num_points_x = control.domain.num_points_x
+    offset_x = reference_control.domain.num_points_x // 2 - num_points_x // 2
+    index_x = numpy.arange(layer_x, num_points_x - layer_x)
+    if control.num_dimensions == 3:
+        layer_y = int(numpy.ceil(control.domain.perfect_matching_layer_width /
+                                 control.signal.resolution_y))
+        num_points_y = control.domain.num_points_y
+        offset_y = reference_control.domain.num_points_y // 2 - num_points_y // 2
+        index_y = numpy.arange(layer_y, num_points_y - layer_y)
+    else:
+        offset_y = 0
+        index_y = numpy.arange(1)
+
+    return index_y, index_x, offset_y, offset_x
+
+
+if __name__ == '__main__':
+    for num_dimensions in NUM_DIMENSIONS:
+        reference_control, reference_profile, reference_time = _run(num_dimensions, False)
+        layer_control, layer_profile, layer_time = _run(num_dimensions, True)
+
+        index_y, index_x, offset_y, offset_x = _crop_to_interior(layer_control,
+                                                                 reference_control)
+        interior = layer_profile[numpy.ix_(index_y, index_x)]
+        reference = reference_profile[numpy.ix_(index_y + offset_y, index_x + offset_x)]
+        error = numpy.linalg.norm(interior - reference) / numpy.linalg.norm(reference)
+        error_max = numpy.max(numpy.abs(interior - reference)) / numpy.max(reference)
+
+        print('{}D, padding and window: {} points, {:.2f} sec'.format(
+            num_dimensions,
+            (reference_control.domain.num_points_x, reference_control.domain.num_points_y),
+            reference_time))
+        print('{}D, absorbing layer   : {} points, {:.2f} sec'.format(
+            num_dimensions,
+            (layer_control.domain.num_points_x, layer_control.domain.num_points_y),
+            layer_time))
+        print('    speedup {:.2f}, relative RMS profile error {:.2e} (max {:.2e})'.format(
+            reference_time / layer_time, error, error_max))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the adaptive sample rate versus the fixed sample rate
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE, BURGERS_SOLVER, HARMONIC_SOLVER
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+# (name, nonlinear_solver, pulse_amplitude, end_point)
+CASES = [('2D Burgers, weakly nonlinear', BURGERS_SOLVER, 5e-7, 0.02),
+         ('2D harmonic, weakly nonlinear', HARMONIC_SOLVER, 5e-7, 0.06)]
+
+
+def _run(nonlinear_solver, pulse_amplitude, end_point, adaptive_sample_rate):
+    control = get_test_control('benchmark_adaptive_sample_rate',
+                               non_linearity=True,
+                               harmonic=2,
+                               pulse_amplitude=pulse_amplitude,
+                               end_point=end_point,
+                               grid_size_policy=SMOOTH_GRID_SIZE,
+                               nonlinear_solver=nonlinear_solver,
+                               adaptive_sample_rate=adaptive_sample_rate)
+    wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return rms_profile, elapsed_time
+
+
+if __name__ == '__main__':
+    for name, nonlinear_solver, pulse_amplitude, end_point in CASES:
+        reference_profile, reference_time = _run(nonlinear_solver,
+                                                 pulse_amplitude,
+                                                 end_point,
+                                                 False)
+        adaptive_profile, adaptive_time = _run(nonlinear_solver, pulse_amplitude, end_point, True)
+
+        print(name)
+        print('    fixed sample rate   : {:.2f} sec'.format(reference_time))
+        print('    adaptive sample rate: {:.2f} sec, speedup {:.2f}'.format(
+            adaptive_time, reference_time / adaptive_time))
+        for harmonic_index in range(reference_profile.shape[-1]):
+            reference = reference_profile[..., harmonic_index]
+            error = numpy.linalg.norm(adaptive_profile[..., harmonic_index] - reference) / \
+                numpy.linalg.norm(reference)
+            print('    relative RMS profile error of component {}: {:.2e}'.format(
+                harmonic_index, error))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the adaptive time window versus the fixed time window
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+# (name, num_dimensions, non_linearity, end_point)
+CASES = [('2D linear', 2, False, 0.1),
+         ('2D nonlinear', 2, True, 0.02),
+         ('3D linear', 3, False, 0.08)]
+
+
+def _run(num_dimensions, non_linearity, end_point, adaptive_time_window):
+    control = get_test_control('benchmark_adaptive_time_window',
+                               num_dimensions=num_dimensions,
+                               non_linearity=non_linearity,
+                               harmonic=2 if non_linearity else 1,
+                               end_point=end_point,
+                               grid_size_policy=SMOOTH_GRID_SIZE,
+                               adaptive_time_window=adaptive_time_window)
+    if num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return rms_profile, elapsed_time
+
+
+if __name__ == '__main__':
+    for name, num_dimensions, non_linearity, end_point in CASES:
+        reference_profile, reference_time = _run(num_dimensions, non_linearity, end_point, False)
+        adaptive_profile, adaptive_time = _run(num_dimensions, non_linearity, end_point, True)
+
+        print(name)
+        print('    fixed window   : {:.2f} sec'.format(reference_time))
+        print('    adaptive window: {:.2f} sec, speedup {:.2f}'.format(
+            adaptive_time, reference_time / adaptive_time))
+        for harmonic_index in range(reference_profile.shape[-1]):
+            reference = reference_profile[..., harmonic_index]
+            error = numpy.linalg.norm(adaptive_profile[..., harmonic_index] - reference) / \
+                numpy.linalg.norm(reference)
+            print('    relative RMS profile error of component {}: {:.2e}'.format(
+                harmonic_index, error))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of band-limited versus full-spectrum linear propagation
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+NUM_DIMENSIONS = (2, 3)
+END_POINT = {2: 0.1, 3: 0.08}
+
+
+def _run(num_dimensions, band_limited):
+    control = get_test_control('benchmark_band_limited',
+                               num_dimensions=num_dimensions,
+                               end_point=END_POINT[num_dimensions],
+                               grid_size_policy=SMOOTH_GRID_SIZE,
+                               band_limited=band_limited)
+    if num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return rms_profile[..., 0], elapsed_time
+
+
+if __name__ == '__main__':
+    for num_dimensions in NUM_DIMENSIONS:
+        reference_profile, reference_time = _run(num_dimensions, False)
+        band_limited_profile, band_limited_time = _run(num_dimensions, True)
+
+        error = numpy.linalg.norm(band_limited_profile - reference_profile) / \
+            numpy.linalg.norm(reference_profile)
+        error_max = numpy.max(numpy.abs(band_limited_profile - reference_profile)) / \
+            numpy.max(reference_profile)
+
+        print('{}D, full spectrum: {:.2f} sec'.format(num_dimensions, reference_time))
+        print('{}D, band-limited : {:.2f} sec'.format(num_dimensions, band_limited_time))
+        print('    speedup {:.2f}, relative RMS profile error {:.2e} (max {:.2e})'.format(
+            reference_time / band_limited_time, error, error_max))
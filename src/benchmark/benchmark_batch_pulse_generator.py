@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of generating a batch of transmits at once versus one transmit at a time
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from system.transducer.pulse_generator import batch_pulse_generator, pulse_generator
+
+FOCAL_DEPTHS = numpy.arange(16, 65, 8) * 1.25e-3
+
+
+def _get_control(focus_azimuth=0.06):
+    return get_test_control('benchmark_batch_pulse_generator',
+                            num_dimensions=3,
+                            non_linearity=True,
+                            focus_azimuth=focus_azimuth,
+                            harmonic=2)
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    wave_fields = numpy.stack([pulse_generator(_get_control(focal_depth), 'transducer',
+                                               apodization=[0, 0])[0]
+                               for focal_depth in FOCAL_DEPTHS])
+    loop_time = time.time() - start_time
+
+    start_time = time.time()
+    batch_wave_fields, _ = batch_pulse_generator(_get_control(), FOCAL_DEPTHS)
+    batch_time = time.time() - start_time
+
+    print('{} transmits, one at a time: {:.2f} sec'.format(FOCAL_DEPTHS.size, loop_time))
+    print('{} transmits, as a batch   : {:.2f} sec'.format(FOCAL_DEPTHS.size, batch_time))
+    print('    speedup {:.2f}, max relative error {:.1e}'.format(
+        loop_time / batch_time,
+        numpy.max(numpy.abs(batch_wave_fields - wave_fields)) / numpy.max(numpy.abs(wave_fields))))
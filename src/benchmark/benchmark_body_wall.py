@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the body wall with fused delay screens and cached operators
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.beam_simulation.aberration import aberration
+from simulation.beam_simulation.body_wall import body_wall_steps, get_body_wall_steps
+from simulation.controls.consts import ABERRATION_FROM_DELAY_SCREEN_BODY_WALL, \
+    PROFILE_HISTORY
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.post_processing.export_beam_profile import export_beam_profile
+from simulation.propagation.propagate import propagate
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control(num_dimensions):
+    return get_test_control('benchmark_body_wall',
+                            num_dimensions=num_dimensions,
+                            heterogeneous_medium=ABERRATION_FROM_DELAY_SCREEN_BODY_WALL,
+                            history=PROFILE_HISTORY,
+                            end_point=0.04)
+
+
+def _get_wave_field(control):
+    if control.num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+    return wave_field
+
+
+def _get_profiles(control):
+    num_sub_steps, _ = get_body_wall_steps(control)
+    num_steps = control.material.num_screens * num_sub_steps + 1
+    shape = (control.domain.num_points_y, control.domain.num_points_x, num_steps,
+             control.harmonic + 1)
+    return (numpy.zeros(shape), numpy.zeros(shape),
+            numpy.zeros((control.domain.num_points_t, num_steps)), numpy.zeros(num_steps))
+
+
+def _get_state(control, step_size):
+    state = SimulationState(control)
+    state.step_size = step_size
+    return state
+
+
+def _run_body_wall(num_dimensions):
+    control = _get_control(num_dimensions)
+    wave_field = _get_wave_field(control)
+    rms_profile, max_profile, ax_pulse, z_coordinate = _get_profiles(control)
+    state = SimulationState(control)
+
+    start_time = time.time()
+    for step, wave_field in enumerate(body_wall_steps(control, wave_field, 1, state=state), 1):
+        export_beam_profile(control, wave_field, rms_profile, max_profile, ax_pulse,
+                            z_coordinate, step, state=state)
+
+    return wave_field, time.time() - start_time
+
+
+def _run_reference(num_dimensions):
+    """
+    The body wall with the operator built for each sub-step, and each delay screen applied as
+    a separate time shift.
+    """
+    control = _get_control(num_dimensions)
+    wave_field = _get_wave_field(control)
+    rms_profile, max_profile, ax_pulse, z_coordinate = _get_profiles(control)
+    num_sub_steps, sub_step_size = get_body_wall_steps(control)
+
+    start_time = time.time()
+    delta = aberration(control)
+    state = _get_state(control, sub_step_size)
+    num_points_t = control.domain.num_points_t
+    w = 2.0 * numpy.pi * numpy.fft.rfftfreq(num_points_t, control.signal.resolution_t)
+    step = 0
+    for screen_index in range(control.material.num_screens):
+        for _ in range(num_sub_steps):
+            step = step + 1
+            wave_numbers = get_wave_numbers(control, True, state=_get_state(control, sub_step_size))
+            wave_field = propagate(control, wave_field, 1, True, wave_numbers, state=state)
+            if step % num_sub_steps == 0:
+                phase = numpy.exp(-1j * w.reshape((-1,) + (1,) * (wave_field.ndim - 1)) *
+                                  delta[screen_index].reshape(wave_field.shape[1:]))
+                wave_field = numpy.fft.irfft(numpy.fft.rfft(wave_field, axis=0) * phase,
+                                             num_points_t, axis=0)
+            export_beam_profile(control, wave_field, rms_profile, max_profile, ax_pulse,
+                                z_coordinate, step, state=state)
+
+    return wave_field, time.time() - start_time
+
+
+if __name__ == '__main__':
+    for _num_dimensions in (2, 3):
+        reference, reference_time = _run_reference(_num_dimensions)
+        result, elapsed_time = _run_body_wall(_num_dimensions)
+        difference = numpy.linalg.norm(result - reference) / numpy.linalg.norm(reference)
+        print('{}D body wall: separate screens {:.2f} sec, fused {:.2f} sec, speedup {:.2f}, '
+              'relative difference {:.1e}'.format(_num_dimensions, reference_time, elapsed_time,
+                                                  reference_time / elapsed_time, difference))
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of extending a simulation from a checkpoint versus from the transducer
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import tempfile
+import time
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation_steps
+from system.transducer.pulse_generator import pulse_generator
+
+SHORT_END_POINT = 0.06
+END_POINT = 0.1
+CHECKPOINT_INTERVAL = 0.01
+
+
+def _get_control(end_point, cache_directory=None):
+    return get_test_control('benchmark_checkpoints',
+                            non_linearity=True,
+                            harmonic=2,
+                            end_point=end_point,
+                            cache_directory=cache_directory,
+                            checkpoint_interval=CHECKPOINT_INTERVAL)
+
+
+def _run(end_point, wave_field, use_cache, cache_directory):
+    """
+    Runs a simulation, keeping the profiles of each step only.
+    """
+    start_time = time.time()
+    profiles = []
+    num_restored_steps = 0
+    for step in simulation_steps(_get_control(end_point, cache_directory), wave_field,
+                                 use_cache=use_cache):
+        profiles.append(step.rms_profile[..., 0])
+        num_restored_steps = num_restored_steps + step.restored
+    elapsed_time = time.time() - start_time
+
+    return numpy.stack(profiles, axis=-1), num_restored_steps, elapsed_time
+
+
+if __name__ == '__main__':
+    wave_field, _ = pulse_generator(_get_control(END_POINT), 'transducer')
+    with tempfile.TemporaryDirectory() as directory:
+        _, _, short_time = _run(SHORT_END_POINT, wave_field, True, directory)
+        reference_profile, _, reference_time = _run(END_POINT, wave_field, False, directory)
+        resumed_profile, num_restored_steps, resumed_time = _run(END_POINT, wave_field, True,
+                                                                 directory)
+
+    print('{:.0f} mm, from the transducer : {:.2f} sec'.format(SHORT_END_POINT * 1e3, short_time))
+    print('{:.0f} mm, from the transducer: {:.2f} sec'.format(END_POINT * 1e3, reference_time))
+    print('{:.0f} mm, from a checkpoint  : {:.2f} sec, {} of {} steps restored'.format(
+        END_POINT * 1e3, resumed_time, num_restored_steps, resumed_profile.shape[-1]))
+    print('    speedup {:.2f}, profiles identical: {}'.format(
+        reference_time / resumed_time, numpy.array_equal(reference_profile, resumed_profile)))
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of direct-jump versus sequential linear propagation
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+NUM_DIMENSIONS = (2, 3)
+END_POINT = {2: 0.1, 3: 0.08}
+
+
+def _run(num_dimensions, direct_jump):
+    control = get_test_control('benchmark_direct_jump',
+                               num_dimensions=num_dimensions,
+                               end_point=END_POINT[num_dimensions],
+                               grid_size_policy=SMOOTH_GRID_SIZE,
+                               direct_jump=direct_jump)
+    if num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return rms_profile[..., 0], elapsed_time
+
+
+if __name__ == '__main__':
+    for num_dimensions in NUM_DIMENSIONS:
+        reference_profile, reference_time = _run(num_dimensions, False)
+        direct_jump_profile, direct_jump_time = _run(num_dimensions, True)
+
+        # the sequential run tapers the field to zero close to the boundaries
+        num_points_y, num_points_x = reference_profile.shape[:2]
+        interior = (slice(num_points_y // 4, num_points_y - num_points_y // 4) if
+                    num_points_y > 1 else slice(None),
+                    slice(num_points_x // 4, num_points_x - num_points_x // 4))
+        error = numpy.linalg.norm(direct_jump_profile - reference_profile) / \
+            numpy.linalg.norm(reference_profile)
+        error_interior = numpy.max(numpy.abs(direct_jump_profile[interior] -
+                                             reference_profile[interior])) / \
+            numpy.max(reference_profile)
+
+        print('{}D, sequential : {:.2f} sec'.format(num_dimensions, reference_time))
+        print('{}D, direct jump: {:.2f} sec'.format(num_dimensions, direct_jump_time))
+        print('    speedup {:.2f}, relative RMS profile error {:.2e} '
+              '(max in the central half {:.2e})'.format(reference_time / direct_jump_time,
+                                                        error,
+                                                        error_interior))
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the on-disk cache of the radial eigen decompositions
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import tempfile
+import time
+
+from simulation.propagation import pseudo_differential
+from simulation.propagation.pseudo_differential import get_radial_eigen_decomposition
+
+RESOLUTION = 1.2e-4
+
+
+def _time_decomposition(num_points, cache_directory):
+    # a new process starts without the decompositions in memory
+    pseudo_differential._eigen_decompositions.clear()
+    start_time = time.time()
+    get_radial_eigen_decomposition(num_points, RESOLUTION, cache_directory=cache_directory)
+    return time.time() - start_time
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as _cache_directory:
+        for _num_points in (256, 512, 1024, 2048):
+            decomposition_time = _time_decomposition(_num_points, _cache_directory)
+            load_time = _time_decomposition(_num_points, _cache_directory)
+            print('nr = {:4d}: decomposition {:.3f} sec, memory mapped load {:.4f} sec, '
+                  'speedup {:.0f}'.format(_num_points, decomposition_time, load_time,
+                                          decomposition_time / load_time))
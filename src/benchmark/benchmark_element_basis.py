@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of synthesizing transmits from an element basis versus simulating each transmit
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.element_basis import ElementBasis
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+# on the grid of the main steps, 1.25 mm
+FOCAL_DEPTHS = numpy.arange(16, 65, 4) * 1.25e-3
+
+
+def _get_control(focal_depth):
+    return get_test_control('benchmark_element_basis',
+                            end_point=0.08,
+                            focus_azimuth=focal_depth,
+                            num_elements_azimuth=16,
+                            elements_size_azimuth=1.4e-3)
+
+
+if __name__ == '__main__':
+    transmits = [pulse_generator(_get_control(focal_depth), 'transducer')
+                 for focal_depth in FOCAL_DEPTHS]
+
+    start_time = time.time()
+    expected = [simulation(_get_control(focal_depth), wave_field, use_cache=False)[1]
+                for focal_depth, (wave_field, _) in zip(FOCAL_DEPTHS, transmits)]
+    simulation_time = time.time() - start_time
+
+    start_time = time.time()
+    basis = ElementBasis(_get_control(FOCAL_DEPTHS[0]))
+    basis_time = time.time() - start_time
+
+    start_time = time.time()
+    delays = numpy.stack([basis.get_element_delays(delta_focus) for _, delta_focus in transmits])
+    rms_profiles, _ = basis.get_profiles(delays)
+    synthesis_time = time.time() - start_time
+    error = max(numpy.max(numpy.abs(rms_profile[..., 1] - _expected[..., 1])) /
+                numpy.max(_expected[..., 1])
+                for rms_profile, _expected in zip(rms_profiles, expected))
+
+    print('{} transmits, simulated  : {:.2f} sec'.format(FOCAL_DEPTHS.size, simulation_time))
+    print('element basis of {} elements: {:.2f} sec, {:.1f} MB'.format(
+        basis.num_elements[1], basis_time, basis.size / 1e6))
+    print('{} transmits, synthesized: {:.2f} sec, max relative error {:.1e}'.format(
+        FOCAL_DEPTHS.size, synthesis_time, error))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of banded finite difference diffraction versus the angular spectrum
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.diffraction.diffraction import ExactDiffraction, \
+    FiniteDifferenceTimeDifferenceReduced
+from system.transducer.pulse_generator import pulse_generator
+
+END_POINT = 0.04
+
+
+def _run(diffraction_type):
+    control = get_test_control('benchmark_finite_difference',
+                               diffraction_type=diffraction_type,
+                               end_point=END_POINT)
+    wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+
+    return rms_profile, time.time() - start_time
+
+
+if __name__ == '__main__':
+    reference_profile, reference_time = _run(ExactDiffraction)
+    profile, elapsed_time = _run(FiniteDifferenceTimeDifferenceReduced)
+    difference = numpy.linalg.norm(profile - reference_profile) / \
+        numpy.linalg.norm(reference_profile)
+    print('angular spectrum:  {:.2f} sec'.format(reference_time))
+    print('finite difference: {:.2f} sec, speedup {:.2f}'.format(
+        elapsed_time, reference_time / elapsed_time))
+    print('relative RMS profile difference: {:.2e}'.format(difference))
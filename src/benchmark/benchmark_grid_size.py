@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of power of two versus 5-smooth grid sizes
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+from simulation.controls.consts import LOG2_GRID_SIZE, SMOOTH_GRID_SIZE
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.propagate import propagate
+from system.transducer.pulse_generator import pulse_generator
+
+# (name, num_dimensions, num_elements_azimuth, elements_size_azimuth, image_frequency)
+PROBE_GEOMETRIES = [('2D phased array 64 x 0.35 mm, 3.0 MHz', 2, 64, 3.5e-4, 3.0e6),
+                    ('2D linear array 128 x 0.30 mm, 2.5 MHz', 2, 128, 3.0e-4, 2.5e6),
+                    ('3D phased array 64 x 0.35 mm, 3.0 MHz', 3, 64, 3.5e-4, 3.0e6),
+                    ('3D phased array 96 x 0.22 mm, 3.5 MHz', 3, 96, 2.2e-4, 3.5e6)]
+NUM_STEPS = 3
+
+
+def _time_propagation(num_dimensions,
+                      num_elements_azimuth,
+                      elements_size_azimuth,
+                      image_frequency,
+                      grid_size_policy):
+    control = get_test_control('benchmark_grid_size',
+                               num_dimensions=num_dimensions,
+                               image_frequency=image_frequency,
+                               num_elements_azimuth=num_elements_azimuth,
+                               elements_size_azimuth=elements_size_azimuth,
+                               grid_size_policy=grid_size_policy)
+    if num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+    wave_numbers = get_wave_numbers(control, True)
+
+    start_time = time.time()
+    for _ in range(NUM_STEPS):
+        wave_field = propagate(control, wave_field, 1, True, wave_numbers)
+    elapsed_time = (time.time() - start_time) / NUM_STEPS
+
+    domain = control.domain
+    return (domain.num_points_x, domain.num_points_y, domain.num_points_t), elapsed_time
+
+
+if __name__ == '__main__':
+    for name, num_dimensions, num_elements, element_size, frequency in PROBE_GEOMETRIES:
+        log2_size, log2_time = _time_propagation(num_dimensions,
+                                                 num_elements,
+                                                 element_size,
+                                                 frequency,
+                                                 LOG2_GRID_SIZE)
+        smooth_size, smooth_time = _time_propagation(num_dimensions,
+                                                     num_elements,
+                                                     element_size,
+                                                     frequency,
+                                                     SMOOTH_GRID_SIZE)
+        print(name)
+        print('    power of two: {} points, {:.3f} sec per step'.format(log2_size, log2_time))
+        print('    5-smooth    : {} points, {:.3f} sec per step'.format(smooth_size, smooth_time))
+        print('    speedup     : {:.2f}'.format(log2_time / smooth_time))
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the harmonic solver versus the Burgers solver
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE, BURGERS_SOLVER, HARMONIC_SOLVER, \
+    SCALE_FOR_SPATIAL_VARIABLES_Z, SCALE_FOR_TEMPORAL_VARIABLE
+from simulation.controls.testing import get_test_control
+from simulation.propagation.propagate import propagate
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+SOLVERS = {BURGERS_SOLVER: 'Burgers solver ', HARMONIC_SOLVER: 'harmonic solver'}
+# weakly nonlinear, the plane wave shock distance is about 9 cm
+PULSE_AMPLITUDE = 5e-7
+NUM_PLANE_WAVE_STEPS = 16
+END_POINT = 0.02
+
+
+def _get_control(nonlinear_solver, attenuation):
+    return get_test_control('benchmark_harmonic_solver',
+                            non_linearity=True,
+                            attenuation=attenuation,
+                            harmonic=2,
+                            pulse_amplitude=PULSE_AMPLITUDE,
+                            end_point=END_POINT,
+                            grid_size_policy=SMOOTH_GRID_SIZE,
+                            nonlinear_solver=nonlinear_solver)
+
+
+def _get_harmonics(control, pulse):
+    """
+    Returns the spectral peaks of the fundamental and the 2nd to 4th harmonic of the pulse.
+    """
+    num_points_t = pulse.size
+    spectrum = numpy.abs(numpy.fft.rfft(pulse))
+    index = control.signal.transmit_frequency * control.signal.resolution_t * num_points_t
+    return numpy.array([numpy.max(spectrum[int(n * index) - 2:int(n * index) + 3])
+                        for n in range(1, 5)])
+
+
+def _run_plane_wave(nonlinear_solver):
+    """
+    Propagates a plane wave without attenuation and compares the harmonics with the exact
+    solution p(z, t) = p(0, t + eps_n * z * p) of the Burgers equation before shock formation.
+    """
+    control = _get_control(nonlinear_solver, False)
+    num_points_t = control.domain.num_points_t
+    frequency = control.signal.transmit_frequency
+
+    def _pulse(t):
+        return PULSE_AMPLITUDE * numpy.exp(-(t * frequency / 2.0) ** 2) * \
+            numpy.cos(2.0 * numpy.pi * frequency * t)
+
+    t = (numpy.arange(num_points_t) - num_points_t // 2) * control.signal.resolution_t
+    wave = numpy.repeat(_pulse(t)[:, numpy.newaxis], 8, axis=1)
+    start_time = time.time()
+    for _ in range(NUM_PLANE_WAVE_STEPS):
+        wave = propagate(control, wave, 1, True)
+    elapsed_time = time.time() - start_time
+
+    up_sampling = 64
+    t = (numpy.arange(num_points_t * up_sampling) - num_points_t * up_sampling // 2) * \
+        control.signal.resolution_t / up_sampling
+    pulse = _pulse(t)
+    t = t / SCALE_FOR_TEMPORAL_VARIABLE
+    z = NUM_PLANE_WAVE_STEPS * control.simulation.step_size / SCALE_FOR_SPATIAL_VARIABLES_Z
+    reference = numpy.interp(t, t - control.material.material.eps_n * z * pulse, pulse)
+
+    reference = _get_harmonics(control, reference[::up_sampling])
+    error = numpy.abs(_get_harmonics(control, wave[:, 0]) - reference) / reference
+
+    return error, elapsed_time
+
+
+def _run_beam(nonlinear_solver):
+    control = _get_control(nonlinear_solver, True)
+    wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return rms_profile, elapsed_time
+
+
+if __name__ == '__main__':
+    print('Plane wave, {} steps'.format(NUM_PLANE_WAVE_STEPS))
+    for solver, name in SOLVERS.items():
+        plane_wave_error, plane_wave_time = _run_plane_wave(solver)
+        print('    {}: {:.2f} sec, relative error of harmonics 1-4: {}'.format(
+            name, plane_wave_time, ', '.join('{:.1e}'.format(e) for e in plane_wave_error)))
+
+    print('2D beam to {} m'.format(END_POINT))
+    reference_profile, reference_time = _run_beam(BURGERS_SOLVER)
+    harmonic_profile, harmonic_time = _run_beam(HARMONIC_SOLVER)
+    print('    {}: {:.2f} sec'.format(SOLVERS[BURGERS_SOLVER], reference_time))
+    print('    {}: {:.2f} sec, speedup {:.2f}'.format(
+        SOLVERS[HARMONIC_SOLVER], harmonic_time, reference_time / harmonic_time))
+    for harmonic_index in range(reference_profile.shape[-1]):
+        reference = reference_profile[..., harmonic_index]
+        difference = numpy.linalg.norm(harmonic_profile[..., harmonic_index] - reference) / \
+            numpy.linalg.norm(reference)
+        print('    relative RMS profile difference of component {}: {:.2e}'.format(
+            harmonic_index, difference))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the nonlinear and attenuation split of layered tissue
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+# nonlinear_propagate is imported through propagate
+from simulation.propagation import propagate  # noqa: F401
+from simulation.propagation.nonlinear.nonlinear_propagate import _nonlinear_attenuation_split
+from system.material.aberration_phantom import AberrationPhantom
+from system.material.fat import Fat
+from system.material.material_map import MaterialMap
+from system.material.muscle import Muscle
+
+NUM_POINTS_T = 256
+NUM_POINTS_X = 64
+NUM_POINTS_Y = 16
+RESOLUTION_T = 0.02
+RESOLUTION_Z = 0.05
+SHOCK_STEP = 0.5
+
+
+def _get_wave_field():
+    t = numpy.linspace(RESOLUTION_T, (NUM_POINTS_T + 1) * RESOLUTION_T, NUM_POINTS_T)
+    _t = t - numpy.mean(t)
+    pulse = numpy.exp(-(_t / 0.5) ** 2) * numpy.sin(4.0 * numpy.pi * _t)
+    amplitude = numpy.random.RandomState(0).uniform(0.2, 1.0, (NUM_POINTS_Y, NUM_POINTS_X))
+    return t, pulse[:, numpy.newaxis, numpy.newaxis] * amplitude * 2e-3
+
+
+def _per_column_split(t, wave_field, materials, labels):
+    # one column at a time with the coefficients of its material
+    _wave_field = wave_field.reshape((NUM_POINTS_T, -1)).copy()
+    for index, label in enumerate(labels.reshape(-1)):
+        _wave_field[:, index:index + 1] = _nonlinear_attenuation_split(
+            t, _wave_field[:, index:index + 1], RESOLUTION_Z, SHOCK_STEP, materials[label])
+    return _wave_field.reshape(wave_field.shape)
+
+
+if __name__ == '__main__':
+    _t, _wave_field = _get_wave_field()
+    _materials = [Muscle(37.0), Fat(37.0), AberrationPhantom(37.0)]
+    # fat and phantom inclusions in muscle
+    _labels = numpy.zeros((NUM_POINTS_Y, NUM_POINTS_X), dtype=int)
+    _labels[:, :NUM_POINTS_X // 3] = 1
+    _labels[NUM_POINTS_Y // 4:NUM_POINTS_Y // 2, NUM_POINTS_X // 2:] = 2
+
+    start_time = time.time()
+    _reference = _per_column_split(_t, _wave_field, _materials, _labels)
+    column_time = time.time() - start_time
+
+    start_time = time.time()
+    _material_map = MaterialMap(_materials, _labels)
+    _grouped = _nonlinear_attenuation_split(_t, _wave_field.copy(), RESOLUTION_Z, SHOCK_STEP,
+                                            _material_map)
+    grouped_time = time.time() - start_time
+
+    print('{} x {} columns of {} samples, {} materials'.format(NUM_POINTS_Y, NUM_POINTS_X,
+                                                               NUM_POINTS_T, len(_materials)))
+    print('max relative difference {:.1e}'.format(numpy.max(numpy.abs(_grouped - _reference)) /
+                                                  numpy.max(numpy.abs(_reference))))
+    print('per column {:.2f} sec, grouped {:.2f} sec, speedup {:.1f}'.format(
+        column_time, grouped_time, column_time / grouped_time))
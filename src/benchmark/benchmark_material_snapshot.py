@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the material snapshots
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from system.material.material_snapshot import MaterialSnapshot, get_material_snapshots
+from system.material.muscle import Muscle
+
+NUM_READS = 2000
+NUM_TEMPERATURES = 500
+
+
+def _time_reads(material):
+    start_time = time.time()
+    for _ in range(NUM_READS):
+        _ = material.sound_speed, material.eps_n, material.eps_a, material.eps_b
+    return time.time() - start_time
+
+
+if __name__ == '__main__':
+    _material = Muscle(37.0)
+    material_time = _time_reads(_material)
+    snapshot_time = _time_reads(MaterialSnapshot.from_material(_material))
+    print('{} reads of c, eps_n, eps_a and eps_b: material {:.3f} sec, snapshot {:.5f} sec, '
+          'speedup {:.0f}'.format(NUM_READS, material_time, snapshot_time,
+                                  material_time / snapshot_time))
+
+    _temperatures = numpy.linspace(30.0, 45.0, NUM_TEMPERATURES)
+    start_time = time.time()
+    for _temperature in _temperatures:
+        MaterialSnapshot.from_material(Muscle(_temperature))
+    loop_time = time.time() - start_time
+    start_time = time.time()
+    get_material_snapshots(Muscle, _temperatures)
+    sweep_time = time.time() - start_time
+    print('{} temperatures: one at a time {:.3f} sec, one pass {:.4f} sec, '
+          'speedup {:.0f}'.format(NUM_TEMPERATURES, loop_time, sweep_time,
+                                  loop_time / sweep_time))
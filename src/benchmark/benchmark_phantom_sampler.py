@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the gridded sampling of sphere phantoms
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from system.material.sphere_phantom import SpherePhantom
+
+NUM_SPHERES = 400
+NUM_POINTS_X = 128
+NUM_POINTS_Y = 128
+NUM_PLANES = 16
+RESOLUTION = 2e-4
+THICKNESS = 0.02
+SOUND_SPEED = 1540.0
+
+
+def _get_spheres():
+    random = numpy.random.RandomState(0)
+    half_width = NUM_POINTS_X // 2 * RESOLUTION
+    return numpy.column_stack((random.uniform(-half_width, half_width, NUM_SPHERES),
+                               random.uniform(-half_width, half_width, NUM_SPHERES),
+                               random.uniform(0.0, THICKNESS, NUM_SPHERES),
+                               random.uniform(5e-4, 2e-3, NUM_SPHERES)))
+
+
+def _point_by_point(spheres, sound_speed, x, y, z):
+    # a phantom called once for each grid point, testing all spheres
+    result = numpy.empty((z.size, y.size, x.size))
+    for index_z, _z in enumerate(z):
+        for index_y, _y in enumerate(y):
+            for index_x, _x in enumerate(x):
+                value = SOUND_SPEED
+                for (sphere_x, sphere_y, sphere_z, radius), c in zip(spheres, sound_speed):
+                    if (_x - sphere_x) ** 2 + (_y - sphere_y) ** 2 + (_z - sphere_z) ** 2 <= \
+                            radius ** 2:
+                        value = c
+                result[index_z, index_y, index_x] = value
+    return result
+
+
+if __name__ == '__main__':
+    _spheres = _get_spheres()
+    _sound_speed = numpy.random.RandomState(1).uniform(1450.0, 1650.0, NUM_SPHERES)
+    _x = (numpy.arange(NUM_POINTS_X) - NUM_POINTS_X // 2) * RESOLUTION
+    _y = (numpy.arange(NUM_POINTS_Y) - NUM_POINTS_Y // 2) * RESOLUTION
+    _z = (numpy.arange(NUM_PLANES) + 0.5) * THICKNESS / 8 / NUM_PLANES
+    _phantom = SpherePhantom(_spheres, _sound_speed, SOUND_SPEED)
+
+    # point by point on one row, scaled to the slab
+    start_time = time.time()
+    _row = _point_by_point(_spheres, _sound_speed, _x, _y[:1], _z[:1])
+    point_time = (time.time() - start_time) * NUM_PLANES * NUM_POINTS_Y
+
+    start_time = time.time()
+    _vectorized = _phantom(_x[numpy.newaxis, numpy.newaxis, :],
+                           _y[numpy.newaxis, :, numpy.newaxis],
+                           _z[:, numpy.newaxis, numpy.newaxis])
+    vectorized_time = time.time() - start_time
+
+    start_time = time.time()
+    _grid = _phantom.sample_grid(_x, _y, _z)
+    grid_time = time.time() - start_time
+
+    assert numpy.array_equal(_vectorized, _grid)
+    assert numpy.array_equal(_row[0, 0], _grid[0, 0])
+    print('Slab of {} x {} x {} points, {} spheres'.format(NUM_PLANES,
+                                                           NUM_POINTS_Y,
+                                                           NUM_POINTS_X,
+                                                           NUM_SPHERES))
+    print('point by point (estimated) {:.2f} sec'.format(point_time))
+    print('vectorized call {:.4f} sec, speedup {:.0f}'.format(vectorized_time,
+                                                              point_time / vectorized_time))
+    print('rasterized grid {:.4f} sec, speedup {:.0f}'.format(grid_time,
+                                                              point_time / grid_time))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the axisymmetric solver versus the angular spectrum on a full 3D grid
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.propagation.propagate import propagate
+
+NUM_POINTS_T = 128
+NUM_POINTS_R = 128
+NUM_STEPS = 10
+BEAM_RADIUS = 2e-3
+
+
+def _get_beam(control, r):
+    frequency = control.signal.transmit_frequency
+    t = (numpy.arange(NUM_POINTS_T) - NUM_POINTS_T // 2) * control.signal.resolution_t
+    pulse = numpy.exp(-(t * frequency / 1.5) ** 2) * numpy.cos(2.0 * numpy.pi * frequency * t)
+    return pulse.reshape((-1,) + (1,) * r.ndim) * numpy.exp(-(r / BEAM_RADIUS) ** 2)
+
+
+def _run_radial(control):
+    wave = _get_beam(control, numpy.arange(NUM_POINTS_R) * control.signal.resolution_x)
+    start_time = time.time()
+    for _ in range(NUM_STEPS):
+        wave = propagate(control, wave, 1, True)
+    return wave, time.time() - start_time
+
+
+def _run_full(control):
+    """
+    Propagates the same beam with the angular spectrum on a square grid of 2 * NUM_POINTS_R
+    points in x and y.
+    """
+    resolution = control.signal.resolution_x
+    x = (numpy.arange(2 * NUM_POINTS_R) - NUM_POINTS_R) * resolution
+    wave = _get_beam(control, numpy.hypot(x[:, numpy.newaxis], x))
+
+    start_time = time.time()
+    kt = 2.0 * numpy.pi * numpy.fft.fftfreq(NUM_POINTS_T, control.signal.resolution_t) / \
+        control.material.material.sound_speed
+    kx = 2.0 * numpy.pi * numpy.fft.fftfreq(2 * NUM_POINTS_R, resolution)
+    kt = kt[:, numpy.newaxis, numpy.newaxis]
+    kz = numpy.sqrt((kt ** 2 - kx[:, numpy.newaxis] ** 2 - kx ** 2).astype(complex))
+    kz = numpy.sign(kt) * kz.real - 1j * kz.imag - kt
+    operator = numpy.exp(-1j * kz * control.simulation.step_size)
+    for _ in range(NUM_STEPS):
+        wave = numpy.fft.ifftn(numpy.fft.fftn(wave) * operator).real
+    elapsed_time = time.time() - start_time
+
+    return wave[:, NUM_POINTS_R, NUM_POINTS_R:], elapsed_time, operator.nbytes
+
+
+if __name__ == '__main__':
+    _control = get_test_control('benchmark_pseudo_differential',
+                                attenuation=False,
+                                annular_transducer=True)
+    reference, reference_time, reference_bytes = _run_full(_control)
+    radial, radial_time = _run_radial(_control)
+    radial_bytes = NUM_POINTS_T * NUM_POINTS_R * 16 + 2 * NUM_POINTS_R ** 2 * 8
+    difference = numpy.linalg.norm(radial - reference) / numpy.linalg.norm(reference)
+    print('{} steps of {} samples in time'.format(NUM_STEPS, NUM_POINTS_T))
+    print('full 3D angular spectrum, {}x{} points: {:.2f} sec, operator {:.1f} MB'.format(
+        2 * NUM_POINTS_R, 2 * NUM_POINTS_R, reference_time, reference_bytes / 1e6))
+    print('axisymmetric, {} points:               {:.2f} sec, operators {:.1f} MB'.format(
+        NUM_POINTS_R, radial_time, radial_bytes / 1e6))
+    print('speedup {:.1f}, relative difference on the radial line {:.2e}'.format(
+        reference_time / radial_time, difference))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of pruned versus full angular spectrum in band-limited and direct-jump propagation
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import time
+
+import numpy
+
+from simulation.controls.consts import SMOOTH_GRID_SIZE
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+NUM_DIMENSIONS = (2, 3)
+END_POINT = {2: 0.1, 3: 0.08}
+MODES = ('band_limited', 'direct_jump')
+
+
+def _run(num_dimensions, mode, spectral_pruning):
+    control = get_test_control('benchmark_spectral_pruning',
+                               num_dimensions=num_dimensions,
+                               end_point=END_POINT[num_dimensions],
+                               grid_size_policy=SMOOTH_GRID_SIZE,
+                               band_limited=mode == 'band_limited',
+                               direct_jump=mode == 'direct_jump',
+                               spectral_pruning=spectral_pruning)
+    if num_dimensions == 3:
+        wave_field, _ = pulse_generator(control, 'transducer', [0, 1])
+    else:
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+    start_time = time.time()
+    _, rms_profile, _, _, _ = simulation(control, wave_field, use_cache=False)
+    elapsed_time = time.time() - start_time
+
+    return rms_profile[..., 0], elapsed_time
+
+
+if __name__ == '__main__':
+    for num_dimensions in NUM_DIMENSIONS:
+        for mode in MODES:
+            reference_profile, reference_time = _run(num_dimensions, mode, False)
+            pruned_profile, pruned_time = _run(num_dimensions, mode, True)
+
+            error = numpy.linalg.norm(pruned_profile - reference_profile) / \
+                numpy.linalg.norm(reference_profile)
+
+            print('{}D {}, full angular spectrum  : {:.2f} sec'.format(num_dimensions,
+                                                                       mode,
+                                                                       reference_time))
+            print('{}D {}, pruned angular spectrum: {:.2f} sec'.format(num_dimensions,
+                                                                       mode,
+                                                                       pruned_time))
+            print('    speedup {:.2f}, relative RMS profile error {:.2e}'.format(
+                reference_time / pruned_time, error))
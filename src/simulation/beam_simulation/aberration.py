@@ -9,6 +9,7 @@ from typing import Optional
 
 import numpy
 
+from simulation.beam_simulation.phantom_sampler import PhantomSampler
 from simulation.controls import consts
 from simulation.controls.main_control import MainControl
 from system.material.aberration_phantom import AberrationPhantom
@@ -21,22 +22,69 @@ def aberration(control: MainControl,
 
     :param control: control
     :param phantom:
-        Optional. The aberration phantom as an (num spheres x 4) array
-        where the columns are sorted as [x y z R].
+        Optional. The aberration phantom, a vectorized function of (x, y, z) returning the
+        sound speed, e.g. a SpherePhantom of an (num spheres x 4) array where the columns are
+        sorted as [x y z R].
     :return:  A set of time delays
+        For delay screens, the delays of all control.material.num_screens screens as an
+        (num_screens x ny x nx) array in seconds.
+        For phantoms, the delays of each of the control.material.num_screens slabs of the body
+        wall in the same layout.
     """
     heterogeneous_medium = control.heterogeneous_medium
     if phantom is None:
         heterogeneous_medium = consts.ABERRATION_FROM_DELAY_SCREEN_BODY_WALL
 
     # pylint: disable=no-else-raise
-    if heterogeneous_medium in (consts.ABERRATION_FROM_DELAY_SCREEN_BODY_WALL,
-                                consts.ABERRATION_FROM_FILE):
+    if heterogeneous_medium == consts.ABERRATION_FROM_DELAY_SCREEN_BODY_WALL:
+        delta = get_delay_screens(control)
+    elif heterogeneous_medium == consts.ABERRATION_FROM_FILE:
         raise NotImplementedError
         # pylint: disable=no-else-raise
     elif heterogeneous_medium is consts.ABERRATION_PHANTOM:
-        raise NotImplementedError
+        if not callable(phantom):
+            raise NotImplementedError
+        with PhantomSampler(control, phantom) as sampler:
+            delta = numpy.stack([sampler.get_delays(index)
+                                 for index in range(sampler.num_slabs)])
     else:
         delta = numpy.array(0.0)
 
     return delta
+
+
+def get_delay_screens(control: MainControl) -> numpy.ndarray:
+    """
+    Creates all delay screens of the body wall in one pass. Each screen is Gaussian noise,
+    seeded by control.material.delay_screens_seed, filtered to a Gaussian correlation function
+    with the correlation lengths (x, y) given by control.material.delay_screens_length, and
+    scaled to the RMS path length given by control.material.delay_screens_amplitude.
+    The path lengths are converted to time delays by the sound speed of the material.
+    :param control: The controls.
+    :return: The time delays of the screens as an (num_screens x ny x nx) array.
+    """
+    material = control.material
+    num_screens = material.num_screens
+    num_points_x = control.domain.num_points_x
+    num_points_y = control.domain.num_points_y
+
+    noise = numpy.stack([numpy.random.RandomState(seed).standard_normal((num_points_y,
+                                                                         num_points_x))
+                         for seed in material.delay_screens_seed])
+
+    # correlation function exp(-(x / lx)^2 - (y / ly)^2) of all screens
+    kx = 2.0 * numpy.pi * numpy.fft.fftfreq(num_points_x, control.signal.resolution_x)
+    ky = 2.0 * numpy.pi * numpy.fft.fftfreq(num_points_y, control.signal.resolution_y)
+    length_x = material.delay_screens_length[:, 0].reshape((num_screens, 1, 1))
+    length_y = material.delay_screens_length[:, 1].reshape((num_screens, 1, 1))
+    screen_filter = numpy.exp(-(kx * length_x) ** 2 / 8.0 -
+                              (ky[:, numpy.newaxis] * length_y) ** 2 / 8.0)
+    screens = numpy.fft.ifftn(numpy.fft.fftn(noise, axes=(1, 2)) * screen_filter,
+                              axes=(1, 2)).real
+
+    # scale to the RMS amplitude of each screen
+    rms = numpy.sqrt(numpy.mean(screens ** 2, axis=(1, 2), keepdims=True))
+    amplitude = material.delay_screens_amplitude.reshape((num_screens, 1, 1))
+    screens = screens * (amplitude / rms)
+
+    return screens / material.material.sound_speed
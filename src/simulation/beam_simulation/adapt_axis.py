@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+    adapt_axis.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Tuple
+
+import numpy
+
+from simulation.controls.smooth_round_off import smooth_round_off
+
+
+def adapt_axis(energy: numpy.ndarray,
+               offset: int,
+               num_points: int,
+               guard_points: int,
+               energy_fraction: float,
+               shrink_ratio: float,
+               outer_only: bool) -> Tuple[int, int]:
+    """
+    Function that finds the offset and number of points of a grid following the energy
+    footprint along one axis. The footprint is the smallest region containing energy_fraction
+    of the energy. The grid is kept as long as the footprint and guard_points on each side fit
+    inside it and the smallest smooth FFT size holding them is not below shrink_ratio times the
+    current size. Otherwise the grid is re-centered around the footprint with that size.
+    The grid is always a sub-grid of the full grid of num_points points.
+    :param energy: Energy along the axis of the current grid.
+    :param offset: Offset of the current grid in the full grid.
+    :param num_points: Number of points of the full grid.
+    :param guard_points: Number of points to keep on each side of the footprint.
+    :param energy_fraction: Fraction of the energy defining the footprint.
+    :param shrink_ratio: The grid is only cropped when it shrinks below this ratio.
+    :param outer_only: The axis is radial and always starts at the first point.
+    :return: Offset and number of points of the new grid along the axis.
+    """
+    current_num_points = energy.size
+    if num_points == 1:
+        return 0, 1
+
+    first, last = _find_footprint(energy, energy_fraction)
+    if outer_only:
+        first = 0
+        required_num_points = last + 1 + guard_points
+    else:
+        required_num_points = last - first + 1 + 2 * guard_points
+
+    # keep the grid as long as the footprint and guard band fit inside it
+    fits = first - guard_points >= 0 and last + guard_points < current_num_points
+    if outer_only:
+        fits = last + guard_points < current_num_points
+    new_num_points = min(int(smooth_round_off(required_num_points)), num_points)
+    if fits and new_num_points > shrink_ratio * current_num_points:
+        return offset, current_num_points
+
+    # center the new grid around the footprint
+    if outer_only:
+        new_offset = 0
+    else:
+        center = offset + (first + last) // 2
+        new_offset = int(numpy.clip(center - new_num_points // 2, 0, num_points - new_num_points))
+
+    return new_offset, new_num_points
+
+
+def _find_footprint(energy: numpy.ndarray,
+                    energy_fraction: float) -> Tuple[int, int]:
+    """
+    Finds the first and last index of the smallest centered region containing
+    energy_fraction of the energy.
+    :param energy: Energy along an axis.
+    :param energy_fraction: Fraction of the energy.
+    :return: First and last index of the region.
+    """
+    total_energy = numpy.sum(energy)
+    if total_energy <= 0.0:
+        center = energy.size // 2
+        return center, center
+
+    cumulative_energy = numpy.cumsum(energy) / total_energy
+    tail = (1.0 - energy_fraction) / 2.0
+    first = int(numpy.searchsorted(cumulative_energy, tail))
+    last = int(numpy.searchsorted(cumulative_energy, 1.0 - tail))
+
+    return first, min(last, energy.size - 1)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+    adapt_lateral_domain.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Tuple
+
+import numpy
+
+from simulation.beam_simulation.adapt_axis import adapt_axis
+
+
+def adapt_lateral_domain(wave_field: numpy.ndarray,
+                         offset: Tuple[int, int],
+                         num_points: Tuple[int, int],
+                         guard_points: Tuple[int, int],
+                         energy_fraction: float = 1.0 - 1e-6,
+                         shrink_ratio: float = 0.75,
+                         annular_transducer: bool = False) \
+        -> Tuple[numpy.ndarray, Tuple[int, int], bool]:
+    """
+    Function that crops or grows the lateral grid to follow the footprint of the beam.
+    The footprint is the smallest lateral region containing energy_fraction of the energy
+    of the wave field. The grid is re-gridded to the smallest smooth FFT size containing the
+    footprint and guard_points on each side when the beam reaches the guard band, or when the
+    new grid is smaller than shrink_ratio times the current grid. The current grid is always
+    a sub-grid of the full grid given by num_points.
+    :param wave_field: Wave field on the current grid. Either (nt, nx) or (nt, ny, nx).
+    :param offset: Index (x, y) of the first point of the current grid in the full grid.
+    :param num_points: Number of points (nx, ny) of the full grid.
+    :param guard_points: Number of points (x, y) to keep on each side of the footprint.
+    :param energy_fraction: Fraction of the energy defining the footprint.
+    :param shrink_ratio: The grid is only cropped when it shrinks below this ratio.
+    :param annular_transducer: Flag for annular transducer. The radial axis of 2D
+        axi-symmetric simulations always starts at the axis of symmetry.
+    :return: Wave field on the new grid,
+             Offset (x, y) of the new grid in the full grid,
+             True if the grid was changed.
+    """
+    if wave_field.ndim == 3:
+        energy = numpy.sum(wave_field ** 2, axis=0)
+        energy_x = numpy.sum(energy, axis=0)
+        energy_y = numpy.sum(energy, axis=1)
+    else:
+        energy_x = numpy.sum(wave_field ** 2, axis=0)
+        energy_y = numpy.ones(1)
+
+    offset_x, size_x = adapt_axis(energy_x,
+                                  offset[0],
+                                  num_points[0],
+                                  guard_points[0],
+                                  energy_fraction,
+                                  shrink_ratio,
+                                  annular_transducer and wave_field.ndim == 2)
+    offset_y, size_y = adapt_axis(energy_y,
+                                  offset[1],
+                                  num_points[1],
+                                  guard_points[1],
+                                  energy_fraction,
+                                  shrink_ratio,
+                                  False)
+
+    if (offset_x, offset_y) == tuple(offset) and (size_x, size_y) == (energy_x.size, energy_y.size):
+        return wave_field, (offset_x, offset_y), False
+
+    _wave_field = regrid_lateral_domain(wave_field, offset, (offset_x, offset_y), (size_x, size_y))
+
+    return _wave_field, (offset_x, offset_y), True
+
+
+def regrid_lateral_domain(wave_field: numpy.ndarray,
+                          offset: Tuple[int, int],
+                          new_offset: Tuple[int, int],
+                          new_num_points: Tuple[int, int]) -> numpy.ndarray:
+    """
+    Moves a wave field from one sub-grid of the full grid to another. Points of the new
+    grid outside of the old grid are set to zero.
+    :param wave_field: Wave field on the old grid. Either (nt, nx) or (nt, ny, nx).
+    :param offset: Index (x, y) of the first point of the old grid in the full grid.
+    :param new_offset: Index (x, y) of the first point of the new grid in the full grid.
+    :param new_num_points: Number of points (nx, ny) of the new grid.
+    :return: Wave field on the new grid.
+    """
+    num_points_t = wave_field.shape[0]
+    if wave_field.ndim == 3:
+        _wave_field = wave_field
+        new_shape = (num_points_t, new_num_points[1], new_num_points[0])
+    else:
+        _wave_field = wave_field[:, numpy.newaxis, :]
+        new_shape = (num_points_t, 1, new_num_points[0])
+    num_points_y, num_points_x = _wave_field.shape[1:]
+
+    # overlap of the old and new grid in full grid indexes
+    start_x = max(offset[0], new_offset[0])
+    stop_x = min(offset[0] + num_points_x, new_offset[0] + new_num_points[0])
+    start_y = max(offset[1], new_offset[1])
+    stop_y = min(offset[1] + num_points_y, new_offset[1] + new_shape[1])
+
+    new_wave_field = numpy.zeros(new_shape, dtype=wave_field.dtype)
+    if stop_x > start_x and stop_y > start_y:
+        new_wave_field[:,
+                       start_y - new_offset[1]:stop_y - new_offset[1],
+                       start_x - new_offset[0]:stop_x - new_offset[0]] = \
+            _wave_field[:,
+                        start_y - offset[1]:stop_y - offset[1],
+                        start_x - offset[0]:stop_x - offset[0]]
+
+    if wave_field.ndim == 2:
+        new_wave_field = new_wave_field[:, 0, :]
+
+    return new_wave_field
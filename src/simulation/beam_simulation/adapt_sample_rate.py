@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+    adapt_sample_rate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Tuple
+
+import numpy
+from scipy.signal import resample
+
+
+def adapt_sample_rate(wave_field: numpy.ndarray,
+                      num_points: int,
+                      threshold: float = -60.0,
+                      nyquist_fraction: float = 0.25) -> Tuple[numpy.ndarray, bool]:
+    """
+    Function that doubles the sample rate of the wave field when the energy near the Nyquist
+    frequency exceeds the threshold. The energy near the Nyquist frequency is the energy of the
+    upper nyquist_fraction of the frequency bins relative to the energy of the wave field.
+    The time window is kept, and the number of samples never exceeds num_points.
+    :param wave_field: Wave field on the current temporal grid. Either (nt, nx) or (nt, ny, nx).
+    :param num_points: Number of samples of the finest temporal grid.
+    :param threshold: The relative energy near the Nyquist frequency, in dB, triggering
+        upsampling.
+    :param nyquist_fraction: Fraction of the frequency bins counted as near the Nyquist frequency.
+    :return: Wave field on the new temporal grid,
+             True if the sample rate was changed.
+    """
+    num_points_t = wave_field.shape[0]
+    if num_points_t >= num_points:
+        return wave_field, False
+
+    energy = _get_spectral_energy(wave_field)
+    if _get_nyquist_energy(energy, energy.size, nyquist_fraction) <= \
+            10.0 ** (threshold / 10.0) * numpy.sum(energy):
+        return wave_field, False
+
+    return resample_time_window(wave_field, min(2 * num_points_t, num_points)), True
+
+
+def find_num_points_t(wave_field: numpy.ndarray,
+                      sample_rate_ratio: int,
+                      threshold: float = -60.0,
+                      nyquist_fraction: float = 0.25) -> int:
+    """
+    Finds the smallest number of samples, down to 1 / sample_rate_ratio of the samples of the
+    wave field, keeping the energy near the new Nyquist frequency, and above it, below the
+    threshold.
+    :param wave_field: Wave field. Either (nt, nx) or (nt, ny, nx).
+    :param sample_rate_ratio: The largest reduction of the sample rate.
+    :param threshold: The largest relative energy near the Nyquist frequency, in dB.
+    :param nyquist_fraction: Fraction of the frequency bins counted as near the Nyquist frequency.
+    :return: Number of samples of the new temporal grid.
+    """
+    num_points_t = wave_field.shape[0]
+    energy = _get_spectral_energy(wave_field)
+    ratio = sample_rate_ratio
+    while ratio > 1:
+        new_num_points = num_points_t // ratio
+        if new_num_points > 1 and \
+                _get_nyquist_energy(energy, new_num_points // 2 + 1, nyquist_fraction) <= \
+                10.0 ** (threshold / 10.0) * numpy.sum(energy):
+            return new_num_points
+        ratio = ratio // 2
+
+    return num_points_t
+
+
+def resample_time_window(wave_field: numpy.ndarray,
+                         new_num_points: int) -> numpy.ndarray:
+    """
+    Resamples a wave field to a new number of samples over the same time window by zero-padding
+    or truncating its spectrum.
+    :param wave_field: Wave field. Either (nt, nx) or (nt, ny, nx).
+    :param new_num_points: Number of samples of the new temporal grid.
+    :return: Wave field on the new temporal grid.
+    """
+    if new_num_points == wave_field.shape[0]:
+        return wave_field
+
+    return resample(wave_field, new_num_points, axis=0)
+
+
+def _get_spectral_energy(wave_field: numpy.ndarray) -> numpy.ndarray:
+    """
+    Returns the energy of each non-negative frequency bin of the wave field.
+    """
+    num_points_t = wave_field.shape[0]
+    spectrum = numpy.fft.rfft(wave_field.reshape((num_points_t, -1)), axis=0)
+
+    return numpy.sum(numpy.abs(spectrum) ** 2, axis=1)
+
+
+def _get_nyquist_energy(energy: numpy.ndarray,
+                        num_bins: int,
+                        nyquist_fraction: float) -> float:
+    """
+    Returns the energy of the upper nyquist_fraction of the first num_bins frequency bins and of
+    all bins above them.
+    """
+    start = num_bins - int(numpy.ceil(nyquist_fraction * num_bins))
+
+    return float(numpy.sum(energy[start:]))
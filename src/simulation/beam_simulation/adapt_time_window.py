@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+    adapt_time_window.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Tuple
+
+import numpy
+
+from simulation.beam_simulation.adapt_axis import adapt_axis
+
+
+def adapt_time_window(wave_field: numpy.ndarray,
+                      offset: int,
+                      num_points: int,
+                      guard_points: int,
+                      energy_fraction: float = 1.0 - 1e-6,
+                      shrink_ratio: float = 0.75) -> Tuple[numpy.ndarray, int, bool]:
+    """
+    Function that trims or extends the retarded-time window to follow the pulse.
+    The temporal extent is the smallest interval containing energy_fraction of the energy of the
+    whole wave field. The window is re-sized to the smallest smooth FFT size containing the
+    extent and guard_points on each side when the pulse reaches the guard band, or when the new
+    window is smaller than shrink_ratio times the current window. The current window is always
+    a sub-window of the full window of num_points samples.
+    :param wave_field: Wave field on the current window. Either (nt, nx) or (nt, ny, nx).
+    :param offset: Index of the first sample of the current window in the full window.
+    :param num_points: Number of samples of the full window.
+    :param guard_points: Number of samples to keep on each side of the pulse.
+    :param energy_fraction: Fraction of the energy defining the extent of the pulse.
+    :param shrink_ratio: The window is only trimmed when it shrinks below this ratio.
+    :return: Wave field on the new window,
+             Offset of the new window in the full window,
+             True if the window was changed.
+    """
+    num_points_t = wave_field.shape[0]
+    energy = numpy.sum(wave_field.reshape((num_points_t, -1)) ** 2, axis=1)
+
+    new_offset, new_num_points = adapt_axis(energy,
+                                            offset,
+                                            num_points,
+                                            guard_points,
+                                            energy_fraction,
+                                            shrink_ratio,
+                                            False)
+
+    if new_offset == offset and new_num_points == num_points_t:
+        return wave_field, offset, False
+
+    _wave_field = regrid_time_window(wave_field, offset, new_offset, new_num_points)
+
+    return _wave_field, new_offset, True
+
+
+def regrid_time_window(wave_field: numpy.ndarray,
+                       offset: int,
+                       new_offset: int,
+                       new_num_points: int) -> numpy.ndarray:
+    """
+    Moves a wave field from one sub-window of the full time window to another. Samples of the
+    new window outside of the old window are set to zero.
+    :param wave_field: Wave field on the old window. Either (nt, nx) or (nt, ny, nx).
+    :param offset: Index of the first sample of the old window in the full window.
+    :param new_offset: Index of the first sample of the new window in the full window.
+    :param new_num_points: Number of samples of the new window.
+    :return: Wave field on the new window.
+    """
+    num_points_t = wave_field.shape[0]
+    start = max(offset, new_offset)
+    stop = min(offset + num_points_t, new_offset + new_num_points)
+
+    new_wave_field = numpy.zeros((new_num_points,) + wave_field.shape[1:], dtype=wave_field.dtype)
+    if stop > start:
+        new_wave_field[start - new_offset:stop - new_offset] = \
+            wave_field[start - offset:stop - offset]
+
+    return new_wave_field
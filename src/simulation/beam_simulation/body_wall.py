@@ -5,92 +5,126 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 import numpy
 
 from simulation.beam_simulation.aberration import aberration
-from simulation.controls.consts import ABERRATION_FROM_DELAY_SCREEN_BODY_WALL
+from simulation.beam_simulation.phantom_sampler import PhantomSampler
+from simulation.controls import consts
 from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
 from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.propagate import propagate
 
 
-def body_wall(control: MainControl,
-              signal: numpy.ndarray,
-              direction: int,
-              equidistant_steps: bool,
-              wave_numbers: Optional[numpy.ndarray] = None,
-              window: Optional[numpy.ndarray] = None,
-              phantom=None):
+def body_wall_steps(control: MainControl,
+                    signal: numpy.ndarray,
+                    direction: int,
+                    window: Optional[numpy.ndarray] = None,
+                    phantom=None,
+                    state: Optional[SimulationState] = None) -> Iterator[numpy.ndarray]:
     """
-    Propagation through a body wall consisting of equidistant delay screens or phantom.
-    TODO: Need more implementation
-    TODO: Need unit tests
+    Propagation through a body wall consisting of equidistant delay screens or phantom, one
+    sub-step at a time.
+    The body wall of thickness control.material.thickness is divided into
+    control.material.num_screens layers with a delay screen at the end of each layer. The
+    layers are propagated in equidistant sub-steps with one wave number operator, and each delay
+    screen is applied by the last sub-step of its layer.
+    The delays of a phantom are sampled one slab ahead of the propagation, see PhantomSampler.
     :param control: Controls.
     :param signal: The signal to be propagated.
     :param direction: Sign determines in positive or negative z-dir.
-    :param equidistant_steps: The flag specifying beam simulation with equidistant steps.
-    :param wave_numbers: Wave number operator.
-    :param window: Window for tapering the solution to zero close to the boundaries.
-        If not specified a window of with a zero region of length 2 * step_size and a raised cosine
-        tapering of length 1.5 * step_size will be used. If window is set to -1, no windowing
-        will be performed.
-    :param phantom: Phantom is a function handle to a function who's input is a (x,y,z)
-        coordinate and output is the local wave speed at the coordinate.
-        The phantom is initialized by a function call with one string argument and finalized with a
-        function call with no input arguments. Initialization is performed by the function.
-    :return: Wave field at the end of the simulation,
-             Temporal RMS beam profile for all frequencies.
-                The profile has dimensions (num_points_y * num_points_x * num_steps * harmonic),
-                possibly with num_points_y as singleton dimension. The index of the
-                harmonic-dimension gives the n'th harmonic profile starting with 0 as the
-                total field.
-             Maximum pressure in the temporal direction. The profile is structured as the
-                RMS profile. The maximum is found as the maximum of the envelope of the signal
-                at each point in space.
-             Signal located at the control.transducer.center_channel index in space.
-                This is the raw signal without any filtering performed for each step.
-             The z-coordinate of each profile and axial pulse.
+    :param window: Window for tapering the solution to zero close to the boundaries, as a vector
+        over the lateral grid. If window is set to -1, no windowing will be performed.
+    :param phantom: Phantom is a vectorized function who's input is arrays of (x,y,z)
+        coordinates and output is the local wave speed at the coordinates.
+    :param state: The state of the run, giving the position, which is updated.
+        Default is a new state at the transducer.
+    :return: Iterator over the wave field after each sub-step. The position of the wave field
+        is the current position of the state.
     """
-    if wave_numbers is not None:
-        _wave_numbers = get_wave_numbers(control, equidistant_steps)
+    if state is None:
+        state = SimulationState(control)
+    num_sub_steps, sub_step_size = get_body_wall_steps(control)
+    if control.simulation.endpoint < control.material.thickness:
+        raise ValueError('The end point must be beyond the body wall')
+    if 0.0 < state.current_position < control.material.thickness:
+        raise ValueError('The body wall must be entered at the transducer')
+
+    # Prepares body wall model, all screens in one pass or the phantom slab by slab
+    sampler = None
+    if control.heterogeneous_medium == consts.ABERRATION_PHANTOM and callable(phantom):
+        sampler = PhantomSampler(control, phantom)
+        delta = None
+    else:
+        delta = aberration(control, phantom)
+
+    # one operator for all sub-steps
+    step_size = state.step_size
+    state.step_size = sub_step_size
+    wave_numbers = get_wave_numbers(control, True, state=state)
+    if window is None or window[0] == -1:
+        _window = None
     else:
-        _wave_numbers = wave_numbers
+        _window = window.reshape(signal.shape[1:])
+
+    _signal = signal
+    try:
+        for screen_index in range(control.material.num_screens):
+            if sampler is not None:
+                screen = sampler.get_delays(screen_index)
+            else:
+                screen = delta[screen_index]
+            for sub_step in range(num_sub_steps):
+                delay_screen = screen if sub_step == num_sub_steps - 1 else None
+                _signal = propagate(control,
+                                    _signal,
+                                    direction,
+                                    True,
+                                    wave_numbers,
+                                    delay_screen=delay_screen,
+                                    state=state)
+                if _window is not None:
+                    _signal = _signal * _window
 
-    # Initiates profiles
-    rms_profile = None
-    max_profile = None
-    ax_pulse = None
-    z_position = None
+                yield _signal
+    finally:
+        # also when the caller stops early
+        state.step_size = step_size
+        if sampler is not None:
+            sampler.close()
 
-    # Initiate variables
-    num_dimensions = control.num_dimensions
-    num_points_x = control.domain.num_points_x
-    num_points_y = control.domain.num_points_y
-    num_points_t = control.domain.num_points_t
-    heterogeneous_medium = control.heterogeneous_medium
-    annular_transducer = control.annular_transducer
-    resolution_x = control.signal.resolution_x
-    resolution_y = control.signal.resolution_y
 
-    step_size = control.simulation.step_size
-    ns = control.material.num_screens
-    thickness = control.material.thickness
-    endpoint = numpy.min(control.simulation.endpoint, thickness)
+def get_body_wall_steps(control: MainControl) -> Tuple[int, float]:
+    """
+    Returns the sub-steps of each layer of the body wall. The sub-steps are no longer than the
+    step size of the simulation.
+    :param control: The controls.
+    :return: Number of sub-steps in each layer,
+             The size of the sub-steps.
+    """
+    layer_thickness = control.material.thickness / control.material.num_screens
+    num_sub_steps = int(numpy.ceil(layer_thickness / control.simulation.step_size - 1e-9))
 
-    # adjust step sizes
-    if heterogeneous_medium == ABERRATION_FROM_DELAY_SCREEN_BODY_WALL or phantom is None:
-        if phantom is None:
-            print('Changing heterogeneous_medium to AberrationFromDelayScreenBodyWall')
-            heterogeneous_medium = ABERRATION_FROM_DELAY_SCREEN_BODY_WALL
-            control.heterogeneous_medium = heterogeneous_medium
+    return num_sub_steps, layer_thickness / num_sub_steps
 
-    dscreen = thickness / ns
-    nsubsteps = numpy.ceil(dscreen / step_size)
-    abstepsize = dscreen / nsubsteps
-    control.simulation.step_size = abstepsize
 
-    # Prepares body wall model
-    delta = aberration(control)
+def get_num_body_wall_steps(control: MainControl,
+                            current_pos: float) -> int:
+    """
+    Returns the number of steps taken in the body wall by a simulation starting at current_pos.
+    A simulation starting beyond the body wall takes no steps in it, and one starting inside it
+    is rejected, since the body wall is propagated through from the transducer.
+    :param control: The controls.
+    :param current_pos: The start position of the simulation.
+    :return: The number of sub-steps of all layers, or 0.
+    """
+    if control.heterogeneous_medium == consts.NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM or \
+            current_pos >= control.material.thickness:
+        return 0
+    if current_pos > 0.0:
+        raise ValueError('The body wall must be entered at the transducer')
+    num_sub_steps, _ = get_body_wall_steps(control)
 
-    raise NotImplementedError
+    return control.material.num_screens * num_sub_steps
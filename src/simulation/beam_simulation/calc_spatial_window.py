@@ -5,6 +5,8 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
+import numpy
+
 from simulation.beam_simulation.get_window import get_window
 
 
@@ -17,7 +19,11 @@ def calc_spatial_window(control,
                         resolution_y,
                         step_size):
     if window is None:
-        _window = control.simulation.num_windows
+        if control.domain.perfect_matching_layer_width > 0:
+            # the absorbing layer replaces the window
+            _window = -1
+        else:
+            _window = control.simulation.num_windows
     else:
         _window = window
     if isinstance(_window, int) and _window > 0:
@@ -26,5 +32,7 @@ def calc_spatial_window(control,
                              _window * step_size,
                              2 * step_size,
                              annular_transducer)
+    elif isinstance(_window, int):
+        _window = numpy.array([-1])
 
     return _window
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+    direct_jump.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.post_processing.export_beam_profile import export_step_profiles
+from simulation.propagation.band_limited import to_band_spectrum, from_band_spectrum
+from simulation.propagation.spectral_pruning import gather_spectrum, scatter_spectrum
+
+
+def direct_jump(control: MainControl,
+                wave_field: numpy.ndarray,
+                positions: List[float],
+                rms_profile: numpy.ndarray,
+                max_profile: numpy.ndarray,
+                ax_pulse: numpy.ndarray,
+                z_coordinate: numpy.ndarray,
+                frequency_indexes: Optional[numpy.ndarray] = None,
+                num_workers: int = 1,
+                propagating_indexes: Optional[numpy.ndarray] = None,
+                state: Optional[SimulationState] = None) -> numpy.ndarray:
+    """
+    Function that computes the wave field at each depth directly from the source plane for
+    linear propagation in a homogeneous medium. The source field is transformed once, and each
+    depth plane is found by one multiplication with exp(-i * kz * (z - z0)) followed by the
+    inverse transforms. The planes are independent and are exported by a pool of threads, see
+    direct_jump_steps.
+    :param control: The controls.
+    :param wave_field: The wave field at the source plane.
+    :param positions: The positions of the depth planes.
+    :param rms_profile: The RMS profile to export to.
+    :param max_profile: The maximum profile to export to.
+    :param ax_pulse: The axial pulse to export to.
+    :param z_coordinate: The z-coordinates to export to.
+    :param frequency_indexes: Indexes of the frequency bins to propagate. Default is all
+        non-negative frequency bins.
+    :param num_workers: The number of threads.
+    :param propagating_indexes: Compressed index map of the components of the spectrum to
+        propagate. Default is all components.
+    :param state: The state of the run. The current position is the position of the source
+        plane, and is set to the last depth plane. Default is a new state at the transducer.
+    :return: The wave field at the last depth plane.
+    """
+    _wave_field = wave_field
+    for step, (_wave_field, profiles) in enumerate(direct_jump_steps(control,
+                                                                     wave_field,
+                                                                     positions,
+                                                                     frequency_indexes,
+                                                                     num_workers,
+                                                                     propagating_indexes,
+                                                                     state), 1):
+        rms_profile[:, :, step], max_profile[:, :, step], ax_pulse[:, step] = profiles
+        z_coordinate[step] = positions[step - 1]
+
+    return _wave_field
+
+
+def direct_jump_steps(control: MainControl,
+                      wave_field: numpy.ndarray,
+                      positions: List[float],
+                      frequency_indexes: Optional[numpy.ndarray] = None,
+                      num_workers: int = 1,
+                      propagating_indexes: Optional[numpy.ndarray] = None,
+                      state: Optional[SimulationState] = None) \
+        -> Iterator[Tuple[numpy.ndarray, Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]]]:
+    """
+    The depth planes of direct_jump in the order of the positions. The planes and their
+    profiles are computed by a pool of threads, at most two planes for each thread ahead of
+    the caller.
+    :param control: The controls.
+    :param wave_field: The wave field at the source plane.
+    :param positions: The positions of the depth planes.
+    :param frequency_indexes: Indexes of the frequency bins to propagate. Default is all
+        non-negative frequency bins.
+    :param num_workers: The number of threads.
+    :param propagating_indexes: Compressed index map of the components of the spectrum to
+        propagate. Default is all components.
+    :param state: The state of the run. The current position is the position of the source
+        plane, and is set to the position of each plane. Default is a new state at the
+        transducer.
+    :return: Iterator over the wave field and the profiles of each plane, see
+        export_step_profiles.
+    """
+    if state is None:
+        state = SimulationState(control)
+    num_points_t = wave_field.shape[0]
+    num_points_y, num_points_x = (1,) * (3 - wave_field.ndim) + wave_field.shape[1:]
+    if frequency_indexes is None:
+        frequency_indexes = numpy.arange(num_points_t // 2 + 1)
+
+    source_position = state.current_position
+    spectrum = to_band_spectrum(wave_field, frequency_indexes)
+    wave_numbers = get_wave_numbers(control,
+                                    False,
+                                    num_points=(num_points_x, num_points_y, num_points_t),
+                                    frequency_indexes=frequency_indexes,
+                                    state=state)
+    wave_numbers = wave_numbers.reshape(spectrum.shape)
+    spectrum_shape = spectrum.shape
+    if propagating_indexes is not None:
+        spectrum = gather_spectrum(spectrum, propagating_indexes)
+        wave_numbers = gather_spectrum(wave_numbers, propagating_indexes)
+
+    def _export_plane(position):
+        _spectrum = spectrum * numpy.exp((-1j * (position - source_position)) * wave_numbers)
+        if propagating_indexes is not None:
+            _spectrum = scatter_spectrum(_spectrum, propagating_indexes, spectrum_shape)
+        _wave_field = from_band_spectrum(_spectrum, frequency_indexes, num_points_t)
+        return _wave_field, export_step_profiles(control, _wave_field, position)
+
+    if num_workers <= 1:
+        for position in positions:
+            plane = _export_plane(position)
+            state.current_position = position
+            yield plane
+        return
+
+    executor = ThreadPoolExecutor(max_workers=num_workers)
+    pending = deque()
+    try:
+        for position in positions:
+            pending.append((position, executor.submit(_export_plane, position)))
+            if len(pending) >= 2 * num_workers:
+                _position, plane = pending.popleft()
+                state.current_position = _position
+                yield plane.result()
+        while pending:
+            _position, plane = pending.popleft()
+            state.current_position = _position
+            yield plane.result()
+    finally:
+        # the planes not yet started are cancelled when the caller stops early
+        for _, plane in pending:
+            plane.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+    get_absorbing_layer.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Optional, Union, Tuple
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
+
+
+def get_absorbing_layer(num_points: Union[int, Tuple[int, int]],
+                        resolution: Union[float, Tuple[float, float]],
+                        layer_width: float,
+                        annular_transducer: bool,
+                        reflection_coefficient: float = 1e-4,
+                        order: int = 2) -> numpy.ndarray:
+    """
+    Function returning the absorption profile of a perfectly matched layer along the lateral
+    boundaries. The absorption grows as sigma_max * (d / layer_width) ^ order with the distance d
+    into the layer, and sigma_max is chosen such that a wave crossing the layer at 45 degrees
+    twice is attenuated by reflection_coefficient. Applied as exp(-sigma * step_size) after
+    each propagation step, the layer absorbs outgoing waves before they wrap around the
+    periodic domain of the angular spectrum.
+    :param num_points: One- or two-element vector with the number of points in
+            (x,y)-direction. If len(num_points) is 1, then num_points[1], or ny, is assumed
+            to be 1.
+    :param resolution: One- or two-element vector with the resolution in the
+            (x,y)-direction. If len(resolution) is 1, the equal resolution in x
+            and y is assumed.
+    :param layer_width: Physical width of the layer on each side of the domain.
+    :param annular_transducer: Flag for annular transducer. Returns the layer at the outer
+            boundary only for 2D axi-symmetric simulations.
+    :param reflection_coefficient: Amplitude left after the wave has crossed the layer twice.
+    :param order: Order of the polynomial absorption profile.
+    :return: Absorption profile in 1/m as a vector ready to be applied to the wave field.
+    """
+    if isinstance(num_points, int):
+        num_points = (num_points, 1)
+    if isinstance(resolution, float):
+        resolution = (resolution, resolution)
+
+    sigma_max = (order + 1) * numpy.log(1.0 / reflection_coefficient) / (2.0 * layer_width)
+
+    sigma_x = _get_layer_profile(num_points[0],
+                                 resolution[0],
+                                 layer_width,
+                                 sigma_max,
+                                 order,
+                                 annular_transducer and num_points[1] == 1)
+    sigma_y = _get_layer_profile(num_points[1],
+                                 resolution[1],
+                                 layer_width,
+                                 sigma_max,
+                                 order,
+                                 False)
+
+    # combine profiles
+    sigma = sigma_y[..., numpy.newaxis] + sigma_x[numpy.newaxis, ...]
+    sigma = sigma.reshape(num_points[0] * num_points[1])
+
+    return sigma
+
+
+def get_absorbing_layer_damping(control: MainControl,
+                                num_points: Tuple[int, int],
+                                step_size: float,
+                                state: Optional[SimulationState] = None) -> numpy.ndarray:
+    """
+    Returns the damping exp(-sigma * step_size) of the absorbing layer of the controls over one
+    step, see get_absorbing_layer. The damping only changes with the grid and the step size, and
+    is cached in the state.
+    :param control: The controls.
+    :param num_points: Number of points (x, y) of the lateral grid.
+    :param step_size: The distance propagated.
+    :param state: The state of the run caching the damping. Default is no caching.
+    :return: The damping as a vector ready to be applied to the wave field.
+    """
+    def _factory():
+        sigma = get_absorbing_layer(num_points,
+                                    (control.signal.resolution_x, control.signal.resolution_y),
+                                    control.domain.perfect_matching_layer_width,
+                                    control.annular_transducer)
+        return numpy.exp(-sigma * step_size)
+
+    if state is None:
+        return _factory()
+
+    return state.get_operator(('absorbing_layer', tuple(num_points), step_size), _factory)
+
+
+def _get_layer_profile(num_points: int,
+                       resolution: float,
+                       layer_width: float,
+                       sigma_max: float,
+                       order: int,
+                       outer_only: bool) -> numpy.ndarray:
+    """
+    Returns the absorption profile along one axis.
+    :param num_points: Number of points along the axis.
+    :param resolution: Resolution along the axis.
+    :param layer_width: Physical width of the layer.
+    :param sigma_max: Absorption at the outer edge of the layer.
+    :param order: Order of the polynomial absorption profile.
+    :param outer_only: Only the upper end of the axis is absorbing (radial axis).
+    :return: Absorption profile along the axis.
+    """
+    if num_points == 1:
+        return numpy.zeros(1)
+
+    index = numpy.arange(num_points)
+    if outer_only:
+        distance_to_edge = (num_points - 1 - index) * resolution
+    else:
+        distance_to_edge = numpy.minimum(index, num_points - 1 - index) * resolution
+    depth = numpy.clip(1.0 - distance_to_edge / layer_width, 0.0, 1.0)
+
+    return sigma_max * depth ** order
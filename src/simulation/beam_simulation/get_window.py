@@ -80,7 +80,7 @@ def get_window(num_points: Union[int, Tuple[int, int]],
     wx = raised_cos(win_length, num_points_of_fall_off_x, total_num_x)
     if total_num_y == 1 and annular_transducer:
         wx = wx[num_points[0]:]
-        total_num_x = total_num_x / 2
+        total_num_x = total_num_x // 2
 
     # create window in y
     if total_num_y == 1:
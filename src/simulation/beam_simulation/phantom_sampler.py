@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+    phantom_sampler.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+
+
+class PhantomSampler:
+    """
+    Samples the sound speed of a phantom on the grid of the simulation, one slab at a time.
+    The body wall is divided into control.material.num_screens slabs, and each slab is sampled
+    on planes no further apart than the lateral resolution. Slabs are built when first requested,
+    the next slab is built in the background while the current one is propagated, and at most
+    control.simulation.num_cached_slabs slabs are kept, evicting the least recently used.
+    The phantom is called once for each slab with broadcastable coordinate arrays of shape
+    (nz, 1, 1), (1, ny, 1) and (1, 1, nx), or rasterized by phantom.sample_grid(x, y, z) with
+    the axes of the slab when the phantom has it.
+    """
+
+    def __init__(self,
+                 control: MainControl,
+                 phantom: Callable[[numpy.ndarray, numpy.ndarray, numpy.ndarray], numpy.ndarray],
+                 prefetch: bool = True):
+        """
+        Constructor
+        :param control: The controls.
+        :param phantom: The phantom, a vectorized function of (x, y, z) returning the sound speed.
+        :param prefetch: Flag for building the next slab in the background.
+        """
+        self._phantom = phantom
+        self._sound_speed = control.material.material.sound_speed
+        self._num_cached_slabs = max(control.simulation.num_cached_slabs, 1)
+
+        # lateral axes, centered at the center channel of the transducer
+        center_channel = control.transducer.center_channel.astype(int) - 1
+        self._x = (numpy.arange(control.domain.num_points_x) - center_channel[0]) * \
+            control.signal.resolution_x
+        if control.num_dimensions == 3:
+            self._y = (numpy.arange(control.domain.num_points_y) - center_channel[1]) * \
+                control.signal.resolution_y
+        else:
+            self._y = numpy.zeros(1)
+
+        # planes at the midpoints of equidistant sub-slabs
+        self._num_slabs = control.material.num_screens
+        self._slab_thickness = control.material.thickness / self._num_slabs
+        self._num_planes = max(int(numpy.ceil(self._slab_thickness /
+                                              control.signal.resolution_x - 1e-9)), 1)
+
+        self._slabs = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if prefetch:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stops the background builds and clears the cached slabs.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._slabs.clear()
+
+    def get_z(self, index: int) -> numpy.ndarray:
+        """
+        Returns the z-coordinates of the planes of a slab.
+        :param index: Index of the slab.
+        :return: The z-coordinates.
+        """
+        plane_thickness = self._slab_thickness / self._num_planes
+        return index * self._slab_thickness + \
+            (numpy.arange(self._num_planes) + 0.5) * plane_thickness
+
+    def get_slab(self, index: int) -> numpy.ndarray:
+        """
+        Returns the sound speed of a slab, and starts building the next slab in the background
+        when prefetching.
+        :param index: Index of the slab.
+        :return: The sound speed as an (num_planes x ny x nx) array.
+        """
+        if not 0 <= index < self._num_slabs:
+            raise IndexError('Slab {} is outside of the body wall'.format(index))
+
+        slab = self._request(index)
+        if self._executor is not None and index + 1 < self._num_slabs:
+            self._request(index + 1)
+
+        return slab.result()
+
+    def get_delays(self, index: int) -> numpy.ndarray:
+        """
+        Returns the time delays of a slab relative to the sound speed of the material,
+        the integral of 1 / c(x, y, z) - 1 / c0 over the slab.
+        :param index: Index of the slab.
+        :return: The time delays in seconds as an (ny x nx) array.
+        """
+        slowness = 1.0 / self.get_slab(index) - 1.0 / self._sound_speed
+
+        return numpy.sum(slowness, axis=0) * (self._slab_thickness / self._num_planes)
+
+    def _request(self, index: int) -> Future:
+        """
+        Returns the cached or pending build of a slab, and evicts the least recently used slabs.
+        """
+        if index in self._slabs:
+            self._slabs.move_to_end(index)
+            return self._slabs[index]
+
+        if self._executor is None:
+            slab = Future()
+            slab.set_result(self._build(index))
+        else:
+            slab = self._executor.submit(self._build, index)
+        self._slabs[index] = slab
+        while len(self._slabs) > self._num_cached_slabs:
+            self._slabs.popitem(last=False)
+
+        return slab
+
+    def _build(self, index: int) -> numpy.ndarray:
+        """
+        Samples the phantom on the planes of a slab.
+        """
+        z = self.get_z(index)
+        shape = (z.size, self._y.size, self._x.size)
+        if hasattr(self._phantom, 'sample_grid'):
+            sound_speed = self._phantom.sample_grid(self._x, self._y, z)
+        else:
+            sound_speed = self._phantom(self._x[numpy.newaxis, numpy.newaxis, :],
+                                        self._y[numpy.newaxis, :, numpy.newaxis],
+                                        z[:, numpy.newaxis, numpy.newaxis])
+        # a constant phantom may return a scalar
+        try:
+            return numpy.broadcast_to(numpy.asarray(sound_speed, dtype=float), shape)
+        except ValueError:
+            raise ValueError('The phantom returned shape {}, expected {}'
+                             .format(numpy.shape(sound_speed), shape)) from None
+
+    @property
+    def num_slabs(self) -> int:
+        return self._num_slabs
+
+    @property
+    def num_planes(self) -> int:
+        return self._num_planes
+
+    @property
+    def x(self) -> numpy.ndarray:
+        return self._x
+
+    @property
+    def y(self) -> numpy.ndarray:
+        return self._y
@@ -5,28 +5,36 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
+from simulation.beam_simulation.step_schedule import StepSchedule
 from simulation.get_wave_numbers import get_wave_numbers
 
 
 def recalculate_wave_numbers(control,
                              wave_numbers,
-                             diff_step_idx,
+                             schedule: StepSchedule,
                              equidistant_steps,
                              index,
                              recalculate,
-                             step_idx):
-    if recalculate:
-        if diff_step_idx[index] != 0:
-            if step_idx[index] == 0:
-                _equidistant_steps = False
-            else:
-                _equidistant_steps = True
-            _wave_numbers = get_wave_numbers(control, _equidistant_steps)
-        else:
-            _equidistant_steps = equidistant_steps
-            _wave_numbers = wave_numbers
-    else:
-        _equidistant_steps = equidistant_steps
-        _wave_numbers = wave_numbers
+                             num_points=None,
+                             frequency_indexes=None,
+                             resolution_t=None,
+                             state=None):
+    """
+    Returns the wave number operator of a step of the schedule, and the flag of the equidistant
+    steps of the operator. The operator of the step before is kept where the schedule reuses it,
+    see StepSchedule.reuses_operator. Otherwise the main steps get the equidistant operator and
+    the other steps the operator without the step size. The step size of the state must be the
+    size of the step.
+    """
+    if not recalculate or schedule.reuses_operator[index]:
+        return wave_numbers, equidistant_steps
+
+    _equidistant_steps = bool(schedule.main_steps[index])
+    _wave_numbers = get_wave_numbers(control,
+                                     _equidistant_steps,
+                                     num_points=num_points,
+                                     frequency_indexes=frequency_indexes,
+                                     resolution_t=resolution_t,
+                                     state=state)
 
     return _wave_numbers, _equidistant_steps
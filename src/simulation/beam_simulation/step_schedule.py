@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+    step_schedule.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import math
+from typing import Sequence
+
+import numpy
+
+# tolerance (m) for a position to coincide with a special point
+TOLERANCE = 1e-14
+
+
+class StepSchedule:
+    """
+    The steps of a simulation beyond the body wall. The main steps have the main step size and
+    may use the equidistant operator. The special steps end at a special point, i.e. a store
+    position or a screen position, and the step after a special step returns to the grid of the
+    main steps. The steps which do not have the main step size use the operator without the step
+    size.
+    """
+
+    def __init__(self,
+                 start_point: float,
+                 step_size: float,
+                 step_sizes: numpy.ndarray,
+                 step_indexes: numpy.ndarray):
+        """
+        Constructor
+        :param start_point: Start point (depth) of the steps.
+        :param step_size: Main step size.
+        :param step_sizes: Size of each step.
+        :param step_indexes: Index of each step, 0 for a main step and -1 for a special step.
+        """
+        self._start_point = start_point
+        self._step_size = step_size
+        self._step_sizes = step_sizes
+        self._step_indexes = step_indexes
+
+    @property
+    def num_steps(self) -> int:
+        return self._step_sizes.size
+
+    @property
+    def start_point(self) -> float:
+        return self._start_point
+
+    @property
+    def step_size(self) -> float:
+        return self._step_size
+
+    @property
+    def step_sizes(self) -> numpy.ndarray:
+        return self._step_sizes
+
+    @property
+    def step_indexes(self) -> numpy.ndarray:
+        return self._step_indexes
+
+    @property
+    def positions(self) -> numpy.ndarray:
+        """
+        The position after each step.
+        """
+        return self._start_point + numpy.cumsum(self._step_sizes)
+
+    @property
+    def step_index_changes(self) -> numpy.ndarray:
+        """
+        The change of the index of each step from the step before, 0 for the first step, as
+        counted by adjust_equidistant_steps.
+        """
+        return numpy.diff(self._step_indexes, prepend=self._step_indexes[:1])
+
+    @property
+    def main_steps(self) -> numpy.ndarray:
+        """
+        Flags of the steps of the main step size, which may use the equidistant operator.
+        """
+        return (self._step_indexes == 0) & \
+            (numpy.abs(self._step_sizes - self._step_size) < TOLERANCE)
+
+    @property
+    def reuses_operator(self) -> numpy.ndarray:
+        """
+        Flags of the steps which reuse the operator of the step before. The main steps share the
+        equidistant operator of the main step size, and the other steps share the operator
+        without the step size. The first step reuses the operator of the main steps.
+        """
+        main_steps = self.main_steps
+
+        return main_steps == numpy.concatenate(([True], main_steps[:-1]))
+
+
+def plan_steps(start_point: float,
+               end_point: float,
+               step_size: float,
+               store_position: Sequence[float] = (),
+               screen_position: Sequence[float] = (),
+               body_wall_thickness: float = 0.0) -> StepSchedule:
+    """
+    Plans the steps of a simulation from a start point to an end point in one pass. The special
+    points, i.e. the store positions and the screen positions, are merged into the main steps,
+    and the steps start beyond the body wall.
+    :param start_point: Start point (depth) of simulation.
+    :param end_point: End point of simulation.
+    :param step_size: Main step size of simulation.
+    :param store_position: Positions to store pulses.
+    :param screen_position: Depth coordinate of aberration screens.
+    :param body_wall_thickness: Thickness of the body wall, which is propagated through
+        separately. 0 if there is no body wall.
+    :return: The schedule of the steps.
+    """
+    start_point = max(start_point, body_wall_thickness)
+    special_points = numpy.unique(numpy.concatenate((numpy.asarray(store_position, dtype=float),
+                                                     numpy.asarray(screen_position,
+                                                                   dtype=float))))
+    special_points = special_points[special_points > start_point]
+    num_special_points = special_points.size
+
+    # at most one step for each main step, special point and return to the grid
+    max_num_steps = max(int(math.ceil((end_point - start_point) / step_size)), 0) + \
+        2 * num_special_points + 1
+    step_sizes = numpy.zeros(max_num_steps)
+    step_indexes = numpy.zeros(max_num_steps, dtype=int)
+
+    # the position is kept in main steps from the start point
+    current_point = start_point
+    num_main_steps = 0.0
+    num_steps = 0
+    special_index = 0
+    while current_point < end_point:
+        if special_index < num_special_points:
+            special_distance = special_points[special_index] - current_point
+        else:
+            special_distance = math.inf
+        if special_distance < step_size:
+            if abs(special_distance) < TOLERANCE:
+                special_index = special_index + 1
+                continue
+            if abs(special_distance - step_size) < TOLERANCE:
+                _step_size = step_size
+            else:
+                _step_size = special_distance
+                step_indexes[num_steps] = -1
+                special_index = special_index + 1
+        elif special_distance - step_size > TOLERANCE:
+            # back to the grid of the main steps
+            _step_size = (math.ceil(num_main_steps) - num_main_steps) * step_size
+            if _step_size < TOLERANCE:
+                _step_size = step_size
+        else:
+            _step_size = step_size
+        step_sizes[num_steps] = _step_size
+        num_steps = num_steps + 1
+        num_main_steps = num_main_steps + _step_size / step_size
+        current_point = start_point + num_main_steps * step_size
+
+    return StepSchedule(start_point, step_size, step_sizes[:num_steps], step_indexes[:num_steps])
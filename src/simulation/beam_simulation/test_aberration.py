@@ -14,7 +14,15 @@ import numpy
 
 from simulation.beam_simulation.aberration import aberration
 from simulation.controls import consts
+from simulation.controls.testing import get_test_control
 from system.material.aberration_phantom import AberrationPhantom
+from system.material.sphere_phantom import SpherePhantom
+
+
+def _get_control(heterogeneous_medium):
+    return get_test_control('test_aberration',
+                            attenuation=False,
+                            heterogeneous_medium=heterogeneous_medium)
 
 
 class TestAberration(unittest.TestCase):
@@ -26,23 +34,44 @@ class TestAberration(unittest.TestCase):
 
         self.assertEqual(numpy.array(0.0), delta)
 
-    def test_WithPhantomAndAberrationFromDelayScreenBodyWall_Exception_NotSupported(self):
-        with self.assertRaises(NotImplementedError):
-            control = Mock()
-            control.heterogeneous_medium = consts.ABERRATION_FROM_DELAY_SCREEN_BODY_WALL
-            aberration(control)
+    def test_WithAberrationFromDelayScreenBodyWall(self):
+        control = _get_control(consts.ABERRATION_FROM_DELAY_SCREEN_BODY_WALL)
+        delta = aberration(control)
+
+        material = control.material
+        self.assertEqual((material.num_screens, 1, control.domain.num_points_x), delta.shape)
+        rms = numpy.sqrt(numpy.mean(delta ** 2, axis=(1, 2)))
+        numpy.testing.assert_allclose(material.delay_screens_amplitude[:, 0] /
+                                      material.material.sound_speed, rms)
+        # the screens are reproducible and differ from each other
+        numpy.testing.assert_array_equal(delta, aberration(control))
+        self.assertGreater(numpy.max(numpy.abs(delta[0] - delta[1])), 0.0)
 
     def test_WithPhantomAndAberrationFromFile_Exception_NotSupported(self):
         with self.assertRaises(NotImplementedError):
             control = Mock()
             control.heterogeneous_medium = consts.ABERRATION_FROM_FILE
-            aberration(control)
+            aberration(control, Mock())
 
-    def test_WithPhantomAndAberrationPhantom_Exception_NotSupported(self):
-        with self.assertRaises(NotImplementedError):
-            control = Mock()
-            control.heterogeneous_medium = consts.ABERRATION_PHANTOM
-            aberration(control)
+    def test_WithPhantomAndAberrationPhantom(self):
+        control = _get_control(consts.ABERRATION_PHANTOM)
+        material = control.material
+        sound_speed = material.material.sound_speed
+        # one sphere covering the center of the first slab
+        radius = 0.5 * material.thickness / material.num_screens
+        phantom = SpherePhantom(numpy.array([[0.0, 0.0, radius, radius]]),
+                                1.1 * sound_speed,
+                                sound_speed)
+        delta = aberration(control, phantom)
+
+        self.assertEqual((material.num_screens, 1, control.domain.num_points_x), delta.shape)
+        center = int(control.transducer.center_channel[0]) - 1
+        self.assertLess(delta[0, 0, center], 0.0)
+        numpy.testing.assert_allclose(delta[0, 0, center],
+                                      2.0 * radius * (1.0 / 1.1 - 1.0) / sound_speed,
+                                      rtol=0.1)
+        numpy.testing.assert_array_equal(0.0, delta[1:])
+        numpy.testing.assert_array_equal(0.0, delta[0, 0, 0])
 
     def test_WithPhantomAndAberrationPhantomCase2_Exception_NotSupported(self):
         with self.assertRaises(NotImplementedError):
@@ -50,8 +79,9 @@ class TestAberration(unittest.TestCase):
             control.heterogeneous_medium = consts.ABERRATION_PHANTOM
             aberration(control, AberrationPhantom(37.0))
 
-    def test_WithoutPhantom_Exception_NotSupported(self):
-        with self.assertRaises(NotImplementedError):
-            control = Mock()
-            control.heterogeneous_medium = consts.NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM
-            aberration(control)
+    def test_WithoutPhantom_DelayScreens(self):
+        control = _get_control(consts.NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM)
+        delta = aberration(control)
+
+        self.assertEqual((control.material.num_screens, 1, control.domain.num_points_x),
+                         delta.shape)
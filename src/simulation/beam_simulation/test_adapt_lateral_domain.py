@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+    test_adapt_lateral_domain.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.adapt_lateral_domain import adapt_lateral_domain, \
+    regrid_lateral_domain
+
+
+def _gaussian_beam(num_points_x, center, width, num_points_t=16):
+    x = numpy.arange(num_points_x)
+    profile = numpy.exp(-((x - center) / width) ** 2)
+    return numpy.sin(numpy.arange(num_points_t))[:, numpy.newaxis] * profile
+
+
+class TestAdaptLateralDomain(unittest.TestCase):
+    def test_narrow_beam_is_cropped(self):
+        wave_field = _gaussian_beam(512, 256, 10)
+        new_wave_field, offset, regridded = adapt_lateral_domain(wave_field,
+                                                                 (0, 0),
+                                                                 (512, 1),
+                                                                 (20, 20))
+        self.assertTrue(regridded)
+        self.assertLess(new_wave_field.shape[1], 512 * 0.75)
+        self.assertEqual(0, new_wave_field.shape[1] % 2)
+        # the beam is kept
+        restored = regrid_lateral_domain(new_wave_field, offset, (0, 0), (512, 1))
+        numpy.testing.assert_array_almost_equal(wave_field, restored, decimal=5)
+
+    def test_grid_is_kept_when_the_beam_fits(self):
+        wave_field = _gaussian_beam(128, 64, 20)
+        new_wave_field, offset, regridded = adapt_lateral_domain(wave_field,
+                                                                 (100, 0),
+                                                                 (512, 1),
+                                                                 (10, 10))
+        self.assertFalse(regridded)
+        self.assertEqual((100, 0), offset)
+        self.assertIs(wave_field, new_wave_field)
+
+    def test_grid_grows_when_the_beam_reaches_the_guard_band(self):
+        wave_field = _gaussian_beam(64, 32, 12)
+        new_wave_field, offset, regridded = adapt_lateral_domain(wave_field,
+                                                                 (224, 0),
+                                                                 (512, 1),
+                                                                 (20, 20))
+        self.assertTrue(regridded)
+        self.assertGreater(new_wave_field.shape[1], 64)
+        self.assertLessEqual(offset[0], 224)
+
+    def test_grid_is_limited_to_the_full_grid(self):
+        wave_field = _gaussian_beam(256, 128, 80)
+        new_wave_field, offset, _ = adapt_lateral_domain(wave_field,
+                                                         (0, 0),
+                                                         (256, 1),
+                                                         (40, 40))
+        self.assertEqual((16, 256), new_wave_field.shape)
+        self.assertEqual((0, 0), offset)
+
+    def test_annular_transducer_keeps_the_axis(self):
+        wave_field = _gaussian_beam(256, 0, 10)
+        new_wave_field, offset, regridded = adapt_lateral_domain(wave_field,
+                                                                 (0, 0),
+                                                                 (256, 1),
+                                                                 (10, 10),
+                                                                 annular_transducer=True)
+        self.assertTrue(regridded)
+        self.assertEqual((0, 0), offset)
+        numpy.testing.assert_array_equal(wave_field[:, :new_wave_field.shape[1]], new_wave_field)
+
+    def test_three_dimensional_regrid(self):
+        wave_field = numpy.arange(4 * 6 * 8, dtype=float).reshape((4, 6, 8))
+        new_wave_field = regrid_lateral_domain(wave_field, (2, 1), (4, 0), (10, 4))
+        self.assertEqual((4, 4, 10), new_wave_field.shape)
+        numpy.testing.assert_array_equal(wave_field[:, :3, 2:], new_wave_field[:, 1:, :6])
+        numpy.testing.assert_array_equal(numpy.zeros((4, 4, 4)), new_wave_field[..., 6:])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    test_adapt_sample_rate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.adapt_sample_rate import adapt_sample_rate, find_num_points_t, \
+    resample_time_window
+
+
+def _gaussian_pulse(num_points_t, frequency, length, num_points_x=8):
+    """
+    Pulse of the given frequency, in cycles per time window, with a Gaussian envelope.
+    """
+    t = numpy.arange(num_points_t) / num_points_t - 0.5
+    pulse = numpy.exp(-(t / length) ** 2) * numpy.cos(2.0 * numpy.pi * frequency * t)
+    return pulse[:, numpy.newaxis] * numpy.ones(num_points_x)
+
+
+class TestAdaptSampleRate(unittest.TestCase):
+    def test_narrow_band_field_is_downsampled(self):
+        wave_field = _gaussian_pulse(480, 24, 0.05)
+        self.assertEqual(120, find_num_points_t(wave_field, 4))
+
+    def test_broad_band_field_is_kept(self):
+        wave_field = _gaussian_pulse(480, 200, 0.05)
+        self.assertEqual(480, find_num_points_t(wave_field, 4))
+
+    def test_round_trip(self):
+        wave_field = _gaussian_pulse(480, 24, 0.05)
+        coarse = resample_time_window(wave_field, 120)
+        self.assertEqual((120, 8), coarse.shape)
+        numpy.testing.assert_array_almost_equal(wave_field[::4], coarse)
+        numpy.testing.assert_array_almost_equal(wave_field, resample_time_window(coarse, 480))
+
+    def test_upsampled_when_energy_is_near_nyquist(self):
+        wave_field = _gaussian_pulse(120, 24, 0.05)
+        new_wave_field, changed = adapt_sample_rate(wave_field, 480)
+        self.assertFalse(changed)
+        self.assertIs(wave_field, new_wave_field)
+
+        wave_field = wave_field + 1e-2 * _gaussian_pulse(120, 52, 0.05)
+        new_wave_field, changed = adapt_sample_rate(wave_field, 480)
+        self.assertTrue(changed)
+        self.assertEqual((240, 8), new_wave_field.shape)
+        numpy.testing.assert_array_almost_equal(wave_field, new_wave_field[::2])
+
+    def test_never_exceeds_the_finest_grid(self):
+        wave_field = _gaussian_pulse(480, 200, 0.05)
+        new_wave_field, changed = adapt_sample_rate(wave_field, 480)
+        self.assertFalse(changed)
+        new_wave_field, changed = adapt_sample_rate(_gaussian_pulse(240, 100, 0.05), 360)
+        self.assertTrue(changed)
+        self.assertEqual(360, new_wave_field.shape[0])
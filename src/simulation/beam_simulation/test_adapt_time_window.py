@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+    test_adapt_time_window.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.adapt_time_window import adapt_time_window, regrid_time_window
+
+
+def _gaussian_pulse(num_points_t, center, length, num_points_x=8):
+    t = numpy.arange(num_points_t)
+    pulse = numpy.exp(-((t - center) / length) ** 2) * numpy.sin(0.5 * t)
+    return pulse[:, numpy.newaxis] * numpy.ones(num_points_x)
+
+
+class TestAdaptTimeWindow(unittest.TestCase):
+    def test_short_pulse_is_trimmed(self):
+        wave_field = _gaussian_pulse(480, 240, 12)
+        new_wave_field, offset, changed = adapt_time_window(wave_field, 0, 480, 30)
+        self.assertTrue(changed)
+        self.assertLess(new_wave_field.shape[0], 480 * 0.75)
+        self.assertEqual(0, new_wave_field.shape[0] % 2)
+        # the pulse is kept
+        restored = regrid_time_window(new_wave_field, offset, 0, 480)
+        numpy.testing.assert_array_almost_equal(wave_field, restored, decimal=5)
+
+    def test_window_is_kept_when_the_pulse_fits(self):
+        wave_field = _gaussian_pulse(128, 64, 20)
+        new_wave_field, offset, changed = adapt_time_window(wave_field, 176, 480, 10)
+        self.assertFalse(changed)
+        self.assertEqual(176, offset)
+        self.assertIs(wave_field, new_wave_field)
+
+    def test_window_is_extended_when_the_pulse_stretches(self):
+        wave_field = _gaussian_pulse(128, 64, 30)
+        new_wave_field, offset, changed = adapt_time_window(wave_field, 176, 480, 30)
+        self.assertTrue(changed)
+        self.assertGreater(new_wave_field.shape[0], 128)
+        self.assertLessEqual(new_wave_field.shape[0], 480)
+        self.assertLess(offset, 176)
+
+    def test_three_dimensional_wave_field(self):
+        wave_field = _gaussian_pulse(480, 200, 12, 12).reshape((480, 3, 4))
+        new_wave_field, offset, changed = adapt_time_window(wave_field, 0, 480, 30)
+        self.assertTrue(changed)
+        self.assertEqual((3, 4), new_wave_field.shape[1:])
+        numpy.testing.assert_array_equal(wave_field[offset:offset + new_wave_field.shape[0]],
+                                         new_wave_field)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+    test_body_wall.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.body_wall import body_wall_steps, get_body_wall_steps, \
+    get_num_body_wall_steps
+from simulation.controls.consts import ABERRATION_FROM_DELAY_SCREEN_BODY_WALL
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.propagation.propagate import propagate
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control():
+    return get_test_control('test_body_wall',
+                            heterogeneous_medium=ABERRATION_FROM_DELAY_SCREEN_BODY_WALL,
+                            end_point=0.04)
+
+
+class TestBodyWall(unittest.TestCase):
+    def test_delay_screen_shifts_the_step(self):
+        control = _get_control()
+        wave_field, _ = pulse_generator(control, 'transducer')
+        delay = 3 * control.signal.resolution_t
+        screen = delay * numpy.ones(control.domain.num_points_x)
+
+        delayed = propagate(control, wave_field, 1, True, delay_screen=screen)
+        reference = propagate(control, wave_field, 1, True)
+        numpy.testing.assert_array_almost_equal(numpy.roll(reference, 3, axis=0), delayed)
+
+    def test_body_wall_steps_through_all_layers(self):
+        control = _get_control()
+        wave_field, _ = pulse_generator(control, 'transducer')
+        num_sub_steps, sub_step_size = get_body_wall_steps(control)
+        num_steps = control.material.num_screens * num_sub_steps
+        state = SimulationState(control)
+
+        positions = []
+        for wave_field in body_wall_steps(control, wave_field, 1, state=state):
+            positions.append(state.current_position)
+            self.assertGreater(numpy.abs(wave_field).max(), 0.0)
+
+        self.assertEqual(wave_field.shape, (control.domain.num_points_t,
+                                            control.domain.num_points_x))
+        self.assertEqual(control.simulation.step_size, state.step_size)
+        self.assertAlmostEqual(control.material.thickness, state.current_position)
+        numpy.testing.assert_allclose(numpy.arange(1, num_steps + 1) * sub_step_size, positions)
+
+    def test_start_inside_the_body_wall_is_rejected(self):
+        control = _get_control()
+        wave_field, _ = pulse_generator(control, 'transducer')
+        num_sub_steps, _ = get_body_wall_steps(control)
+        thickness = control.material.thickness
+        self.assertEqual(control.material.num_screens * num_sub_steps,
+                         get_num_body_wall_steps(control, 0.0))
+        self.assertEqual(0, get_num_body_wall_steps(control, thickness))
+
+        state = SimulationState(control)
+        state.current_position = 0.5 * thickness
+        with self.assertRaises(ValueError):
+            get_num_body_wall_steps(control, state.current_position)
+        with self.assertRaises(ValueError):
+            next(body_wall_steps(control, wave_field, 1, state=state))
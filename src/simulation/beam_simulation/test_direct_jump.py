@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+    test_direct_jump.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.direct_jump import direct_jump, direct_jump_steps
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.propagate import propagate
+
+
+class TestDirectJump(unittest.TestCase):
+    def setUp(self):
+        self.control = get_test_control('test_direct_jump')
+        num_points_t = self.control.domain.num_points_t
+        num_points_x = self.control.domain.num_points_x
+        t = (numpy.arange(num_points_t) - num_points_t // 2) * self.control.signal.resolution_t
+        x = numpy.arange(num_points_x) - num_points_x // 2
+        pulse = numpy.exp(-(t * self.control.signal.transmit_frequency / 2.0) ** 2) * \
+            numpy.cos(2.0 * numpy.pi * self.control.signal.transmit_frequency * t)
+        self.wave_field = pulse[:, numpy.newaxis] * numpy.exp(-(x / 40.0) ** 2)
+
+    def _run(self, num_steps, num_workers):
+        num_points_t, num_points_x = self.wave_field.shape
+        rms_profile = numpy.zeros((1, num_points_x, num_steps + 1, 2))
+        max_profile = numpy.zeros((1, num_points_x, num_steps + 1, 2))
+        ax_pulse = numpy.zeros((num_points_t, num_steps + 1))
+        z_coordinate = numpy.zeros(num_steps + 1)
+        step_size = self.control.simulation.step_size
+        positions = list(step_size * numpy.arange(1, num_steps + 1))
+        self.state = SimulationState(self.control)
+        wave_field = direct_jump(self.control,
+                                 self.wave_field,
+                                 positions,
+                                 rms_profile,
+                                 max_profile,
+                                 ax_pulse,
+                                 z_coordinate,
+                                 num_workers=num_workers,
+                                 state=self.state)
+        return wave_field, rms_profile, ax_pulse, z_coordinate
+
+    def test_matches_sequential_propagation(self):
+        wave_numbers = get_wave_numbers(self.control, True)
+        reference = self.wave_field
+        for _ in range(3):
+            reference = propagate(self.control, reference, 1, True, wave_numbers)
+
+        wave_field, _, _, z_coordinate = self._run(3, 1)
+        numpy.testing.assert_array_almost_equal(reference, wave_field)
+        numpy.testing.assert_array_almost_equal(self.control.simulation.step_size *
+                                                numpy.arange(4), z_coordinate)
+        self.assertAlmostEqual(3 * self.control.simulation.step_size, self.state.current_position)
+
+    def test_threads_give_the_same_profiles(self):
+        wave_field, rms_profile, ax_pulse, _ = self._run(4, 1)
+        threaded_wave_field, threaded_rms_profile, threaded_ax_pulse, _ = self._run(4, 3)
+        numpy.testing.assert_array_equal(wave_field, threaded_wave_field)
+        numpy.testing.assert_array_equal(rms_profile, threaded_rms_profile)
+        numpy.testing.assert_array_equal(ax_pulse, threaded_ax_pulse)
+
+    def test_threads_stop_early(self):
+        step_size = self.control.simulation.step_size
+        state = SimulationState(self.control)
+        planes = direct_jump_steps(self.control,
+                                   self.wave_field,
+                                   list(step_size * numpy.arange(1, 9)),
+                                   num_workers=2,
+                                   state=state)
+        wave_field, _ = next(planes)
+        planes.close()
+        self.assertEqual(self.wave_field.shape, wave_field.shape)
+        self.assertAlmostEqual(step_size, state.current_position)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+    test_get_absorbing_layer.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.get_absorbing_layer import get_absorbing_layer, \
+    get_absorbing_layer_damping
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+
+
+class TestGetAbsorbingLayer(unittest.TestCase):
+    def test_interior_is_not_absorbing(self):
+        sigma = get_absorbing_layer(20, 0.1, 0.5, False)
+        self.assertEqual((20,), sigma.shape)
+        numpy.testing.assert_array_equal(numpy.zeros(8), sigma[6:14])
+
+    def test_symmetric_and_increasing_towards_the_edges(self):
+        sigma = get_absorbing_layer(20, 0.1, 0.5, False)
+        numpy.testing.assert_array_almost_equal(sigma, sigma[::-1])
+        self.assertTrue(numpy.all(numpy.diff(sigma[:6]) < 0))
+        self.assertEqual(numpy.max(sigma), sigma[0])
+
+    def test_reflection_coefficient(self):
+        layer_width = 0.5
+        sigma = get_absorbing_layer(2000, 0.001, layer_width, False, reflection_coefficient=1e-3)
+        # integral through the layer at 45 degrees, back and forth
+        attenuation = numpy.exp(-2.0 * numpy.sum(sigma[:1000]) * 0.001)
+        self.assertAlmostEqual(1e-3, attenuation, places=4)
+
+    def test_annular_transducer_absorbs_at_the_outer_boundary_only(self):
+        sigma = get_absorbing_layer(20, 0.1, 0.5, True)
+        self.assertEqual(0.0, sigma[0])
+        self.assertGreater(sigma[-1], 0.0)
+
+    def test_two_dimensional_layer(self):
+        sigma = get_absorbing_layer((10, 6), (0.1, 0.2), 0.3, False)
+        self.assertEqual((60,), sigma.shape)
+        sigma = sigma.reshape((6, 10))
+        self.assertEqual(0.0, sigma[3, 5])
+        self.assertGreater(sigma[0, 5], 0.0)
+        self.assertGreater(sigma[3, 0], 0.0)
+        self.assertAlmostEqual(sigma[0, 0], sigma[0, 5] + sigma[3, 0])
+
+    def test_damping_is_cached_in_the_state(self):
+        control = get_test_control('test_get_absorbing_layer',
+                                   perfect_matching_layer=True,
+                                   harmonic=2)
+        num_points = (control.domain.num_points_x, 1)
+        step_size = control.simulation.step_size
+        state = SimulationState(control)
+        damping = get_absorbing_layer_damping(control, num_points, step_size, state)
+        self.assertIs(damping, get_absorbing_layer_damping(control, num_points, step_size, state))
+        self.assertFalse(damping.flags.writeable)
+
+        sigma = get_absorbing_layer(num_points,
+                                    (control.signal.resolution_x, control.signal.resolution_y),
+                                    control.domain.perfect_matching_layer_width,
+                                    control.annular_transducer)
+        numpy.testing.assert_array_equal(numpy.exp(-sigma * step_size), damping)
+
+        # a new grid or step size has its own damping
+        half_step = get_absorbing_layer_damping(control, num_points, step_size / 2, state)
+        numpy.testing.assert_allclose(half_step * half_step, damping)
+        self.assertEqual(2, state.num_operators)
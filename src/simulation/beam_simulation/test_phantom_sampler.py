@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+    test_phantom_sampler.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.phantom_sampler import PhantomSampler
+from simulation.controls.consts import ABERRATION_PHANTOM
+from simulation.controls.testing import get_test_control
+from system.material.sphere_phantom import SpherePhantom
+
+
+def _get_control():
+    return get_test_control('test_phantom_sampler',
+                            attenuation=False,
+                            heterogeneous_medium=ABERRATION_PHANTOM)
+
+
+class _CountingPhantom:
+    """
+    Vectorized phantom with a sound speed increasing with z, counting its calls.
+    """
+
+    def __init__(self, sound_speed):
+        self.sound_speed = sound_speed
+        self.num_calls = 0
+
+    def __call__(self, x, y, z):
+        self.num_calls = self.num_calls + 1
+        return self.sound_speed * (1.0 + z) + 0.0 * x + 0.0 * y
+
+
+class TestPhantomSampler(unittest.TestCase):
+    def setUp(self):
+        self.control = _get_control()
+        self.sound_speed = self.control.material.material.sound_speed
+
+    def test_slab_matches_point_samples(self):
+        phantom = _CountingPhantom(self.sound_speed)
+        with PhantomSampler(self.control, phantom, prefetch=False) as sampler:
+            slab = sampler.get_slab(2)
+            z = sampler.get_z(2)
+
+            self.assertEqual((sampler.num_planes, 1, self.control.domain.num_points_x),
+                             slab.shape)
+            self.assertEqual(1, phantom.num_calls)
+            for index in (0, sampler.num_planes - 1):
+                numpy.testing.assert_allclose(self.sound_speed * (1.0 + z[index]), slab[index])
+            self.assertLessEqual(z[1] - z[0], self.control.signal.resolution_x)
+
+    def test_slabs_cover_the_body_wall(self):
+        with PhantomSampler(self.control, _CountingPhantom(self.sound_speed),
+                            prefetch=False) as sampler:
+            z = numpy.concatenate([sampler.get_z(index) for index in range(sampler.num_slabs)])
+            spacing = numpy.diff(z)
+            numpy.testing.assert_allclose(spacing[0], spacing)
+            numpy.testing.assert_allclose(self.control.material.thickness,
+                                          z[-1] + z[0])
+
+    def test_delays_of_constant_phantom(self):
+        material = self.control.material
+        with PhantomSampler(self.control, lambda x, y, z: 1.25 * self.sound_speed,
+                            prefetch=False) as sampler:
+            delays = sampler.get_delays(0)
+
+        expected = material.thickness / material.num_screens * \
+            (1.0 / 1.25 - 1.0) / self.sound_speed
+        numpy.testing.assert_allclose(expected, delays)
+
+    def test_cached_slabs_are_reused_and_evicted(self):
+        phantom = _CountingPhantom(self.sound_speed)
+        num_cached_slabs = self.control.simulation.num_cached_slabs
+        with PhantomSampler(self.control, phantom, prefetch=False) as sampler:
+            sampler.get_slab(0)
+            sampler.get_slab(0)
+            self.assertEqual(1, phantom.num_calls)
+
+            for index in range(sampler.num_slabs):
+                sampler.get_slab(index)
+            num_calls = phantom.num_calls
+            self.assertEqual(sampler.num_slabs, num_calls)
+            sampler.get_slab(sampler.num_slabs - num_cached_slabs + 1)
+            self.assertEqual(num_calls, phantom.num_calls)
+            sampler.get_slab(0)
+            self.assertEqual(num_calls + 1, phantom.num_calls)
+
+    def test_next_slab_is_prefetched(self):
+        phantom = _CountingPhantom(self.sound_speed)
+        with PhantomSampler(self.control, phantom) as sampler:
+            sampler.get_slab(0)
+            sampler.get_slab(1)
+            sampler.close()
+            self.assertEqual(3, phantom.num_calls)
+
+    def test_prefetch_gives_the_same_slabs(self):
+        phantom = SpherePhantom(numpy.array([[0.0, 0.0, 5e-3, 4e-3]]),
+                                1.1 * self.sound_speed,
+                                self.sound_speed)
+        with PhantomSampler(self.control, phantom, prefetch=False) as reference, \
+                PhantomSampler(self.control, phantom) as sampler:
+            for index in range(sampler.num_slabs):
+                numpy.testing.assert_array_equal(reference.get_delays(index),
+                                                 sampler.get_delays(index))
+
+    def test_wrong_shape_Exception(self):
+        with PhantomSampler(self.control, lambda x, y, z: numpy.ones(3),
+                            prefetch=False) as sampler:
+            with self.assertRaises(ValueError):
+                sampler.get_slab(0)
+
+    def test_outside_of_body_wall_Exception(self):
+        with PhantomSampler(self.control, _CountingPhantom(self.sound_speed)) as sampler:
+            with self.assertRaises(IndexError):
+                sampler.get_slab(sampler.num_slabs)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+    test_step_schedule.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.beam_simulation.find_steps import find_steps
+from simulation.beam_simulation.step_schedule import plan_steps
+
+
+class TestStepSchedule(unittest.TestCase):
+    def test_main_steps(self):
+        schedule = plan_steps(0.0, 0.01, 0.001)
+        self.assertEqual(10, schedule.num_steps)
+        numpy.testing.assert_allclose(numpy.full(10, 0.001), schedule.step_sizes)
+        numpy.testing.assert_array_equal(numpy.zeros(10), schedule.step_indexes)
+        numpy.testing.assert_allclose(numpy.arange(1, 11) * 0.001, schedule.positions)
+        self.assertTrue(numpy.all(schedule.reuses_operator))
+
+    def test_special_points(self):
+        schedule = plan_steps(0.0, 0.006, 0.001, [0.0025, 0.004], [0.0045])
+        numpy.testing.assert_allclose([0.001, 0.001, 0.0005, 0.0005, 0.001, 0.0005, 0.0005,
+                                       0.001],
+                                      schedule.step_sizes,
+                                      atol=1e-15)
+        numpy.testing.assert_array_equal([0, 0, -1, 0, 0, -1, 0, 0], schedule.step_indexes)
+        numpy.testing.assert_allclose([0.001, 0.002, 0.0025, 0.003, 0.004, 0.0045, 0.005,
+                                       0.006],
+                                      schedule.positions,
+                                      atol=1e-15)
+        numpy.testing.assert_array_equal([0, 0, -1, 1, 0, -1, 1, 0],
+                                         schedule.step_index_changes)
+        numpy.testing.assert_array_equal([True, True, False, False, True, False, False, True],
+                                         schedule.main_steps)
+
+        # the step back to the grid keeps the operator of the special step before
+        numpy.testing.assert_array_equal([True, True, False, True, False, False, True, False],
+                                         schedule.reuses_operator)
+
+    def test_body_wall(self):
+        schedule = plan_steps(0.0, 0.005, 0.001, [0.002, 0.0035], body_wall_thickness=0.002)
+        self.assertEqual(0.002, schedule.start_point)
+        numpy.testing.assert_allclose([0.001, 0.0005, 0.0005, 0.001],
+                                      schedule.step_sizes,
+                                      atol=1e-15)
+        numpy.testing.assert_array_equal([0, -1, 0, 0], schedule.step_indexes)
+
+        # a run beyond the body wall starts at its own position
+        schedule = plan_steps(0.003, 0.005, 0.001, body_wall_thickness=0.002)
+        numpy.testing.assert_allclose([0.004, 0.005], schedule.positions)
+
+    def test_no_special_points_ahead(self):
+        schedule = plan_steps(0.004, 0.006, 0.001, [0.001, 0.002])
+        numpy.testing.assert_allclose([0.001, 0.001], schedule.step_sizes)
+
+    def test_find_steps(self):
+        num_steps, step_sizes, step_indexes = find_steps(0.0, 0.003, 0.001,
+                                                         numpy.array([0.0015]))
+        self.assertEqual(4, num_steps)
+        numpy.testing.assert_allclose([0.001, 0.0005, 0.0005, 0.001], step_sizes, atol=1e-15)
+        self.assertListEqual([0, -1, 0, 0], step_indexes)
+        self.assertIsInstance(step_sizes, list)
+
+    def test_many_steps(self):
+        schedule = plan_steps(0.0, 0.2, 0.00005, [0.05, 0.100025, 0.15])
+        self.assertEqual(4001, schedule.num_steps)
+        self.assertEqual(1, numpy.count_nonzero(schedule.step_indexes))
+        self.assertAlmostEqual(0.2, schedule.positions[-1], delta=1e-12)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    bounded_cache.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import threading
+from typing import Any, Callable, Hashable
+
+
+class BoundedCache:
+    """
+    Cache in memory of at most max_size values, which may be shared by the runs of several
+    threads. The cache is cleared when it is full. The values are built outside the lock, so
+    two threads may build the same value, and the value of the last one is kept.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Constructor
+        :param max_size: The largest number of cached values.
+        """
+        self._max_size = max_size
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self,
+            key: Hashable,
+            factory: Callable[[], Any]) -> Any:
+        """
+        Returns a cached value, or builds it with factory and caches it.
+        :param key: The key of the value.
+        :param factory: Function building the value.
+        :return: The value.
+        """
+        with self._lock:
+            value = self._values.get(key)
+        if value is None:
+            value = factory()
+            with self._lock:
+                if len(self._values) >= self._max_size:
+                    self._values.clear()
+                self._values[key] = value
+
+        return value
+
+    def clear(self):
+        """
+        Removes all cached values.
+        """
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
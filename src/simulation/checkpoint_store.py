@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+    checkpoint_store.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import hashlib
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy
+
+from simulation.controls.consts import POSITION_HISTORY, PROFILE_HISTORY
+from simulation.result_cache import CACHE_ATTRIBUTES, ResultCache, get_code_version, \
+    update_hash
+
+# bumped whenever the key or the file layout changes
+_CHECKPOINT_VERSION = 2
+
+# attributes of the controls which do not change the propagation up to a depth. The end point
+# and the store positions change the steps, which are keyed separately.
+PREFIX_INDEPENDENT_ATTRIBUTES = frozenset(('_simulation_name',
+                                           '_history',
+                                           '_endpoint',
+                                           '_store_position',
+                                           '_num_workers')) | CACHE_ATTRIBUTES
+
+# names of the profiles of the steps up to a checkpoint, and their axes of the steps
+PROFILE_NAMES = ('rms_profile', 'max_profile', 'ax_pulse', 'z_pos')
+_PROFILE_AXES = (2, 2, 1, 0)
+
+
+class CheckpointStore(ResultCache):
+    """
+    Store of intermediate states of simulations on local disk. A simulation which shares its
+    first steps with an earlier simulation, e.g. one with a shorter end point or other store
+    positions, resumes from the deepest state of the earlier simulation instead of starting at
+    the transducer.
+    The key of a checkpoint covers everything which affects the propagation up to its depth:
+    the controls except the attributes of PREFIX_INDEPENDENT_ATTRIBUTES, the initial wave field,
+    the window, the screen, the phantom, the start position, the step plan and the sizes of the
+    steps taken. A checkpoint holds the state of the wave field after the step and the profiles
+    of the steps since its parent, the checkpoint before it in the same simulation, so each
+    profile is written once. The profiles of all steps up to a checkpoint are rebuilt from the
+    chain of its parents when it is loaded. The files are written and evicted as by
+    ResultCache, and a checkpoint whose chain has been evicted is not used.
+    """
+
+    _FILE_PREFIX = 'checkpoint_'
+
+    def get_keys(self,
+                 control,
+                 wave_field: numpy.ndarray,
+                 window,
+                 screen,
+                 phantom,
+                 state,
+                 step_sizes: Sequence[float],
+                 step_indexes: Sequence[int],
+                 plan: Tuple[bool, bool]) -> Optional[List[Optional[str]]]:
+        """
+        Returns the keys of the checkpoints after each step beyond the body wall.
+        :param control: The controls.
+        :param wave_field: The initial wave field.
+        :param window: The window of the simulation.
+        :param screen: The aberration screen of the simulation.
+        :param phantom: The phantom of the simulation.
+        :param state: The state at the start of the simulation.
+        :param step_sizes: The sizes of the steps beyond the body wall.
+        :param step_indexes: Index of each step, see StepSchedule.
+        :param plan: The flags (recalculate, equidistant_steps) of the steps, see
+            adjust_equidistant_steps.
+        :return: The keys, where the n'th key is the key after n steps beyond the body wall and
+            the first key is None, or None if the simulation can not be keyed.
+        """
+        hasher = hashlib.sha256()
+        update_hash(hasher, (_CHECKPOINT_VERSION, get_code_version()))
+        try:
+            update_hash(hasher,
+                        (control, wave_field, window, screen, phantom, state.current_position,
+                         state.step_size, plan),
+                        PREFIX_INDEPENDENT_ATTRIBUTES)
+        except TypeError:
+            return None
+
+        keys = [None]
+        for step_size, step_index in zip(step_sizes, step_indexes):
+            update_hash(hasher, (step_size, step_index))
+            keys.append(hasher.hexdigest())
+
+        return keys
+
+    def load_checkpoint(self,
+                        keys: Sequence[Optional[str]],
+                        history: int) -> Tuple[int, Optional[Dict[str, numpy.ndarray]]]:
+        """
+        Returns the deepest checkpoint of a simulation.
+        :param keys: The keys of the checkpoints, see get_keys.
+        :param history: The history of the simulation. The profiles of a checkpoint of a
+            simulation with PROFILE_HISTORY are also used for POSITION_HISTORY, which exports
+            no profiles.
+        :return: The number of steps beyond the body wall of the checkpoint and the checkpoint,
+            see save_checkpoint, or 0 and None if there is no checkpoint.
+        """
+        for num_steps in range(len(keys) - 1, 0, -1):
+            if not os.path.exists(self._get_file_name(keys[num_steps])):
+                continue
+            checkpoint = self._load_arrays(keys[num_steps])
+            if checkpoint is None:
+                continue
+            segments = self._load_segments(checkpoint, history)
+            if segments is None:
+                continue
+            for name, axis in zip(PROFILE_NAMES, _PROFILE_AXES):
+                checkpoint[name] = numpy.concatenate([segment[name] for segment in segments],
+                                                     axis=axis)
+            if history == POSITION_HISTORY:
+                for name in PROFILE_NAMES[:-1]:
+                    checkpoint[name] = numpy.zeros_like(checkpoint[name])
+            return num_steps, checkpoint
+
+        return 0, None
+
+    def _load_segments(self,
+                       checkpoint: Dict[str, numpy.ndarray],
+                       history: int) -> Optional[List[Dict[str, numpy.ndarray]]]:
+        """
+        Returns the profiles of the chain of a checkpoint, from the first checkpoint of the
+        simulation to the checkpoint, or None if a parent is missing or the profiles of a
+        checkpoint of the chain can not be used with history.
+        """
+        segments = [checkpoint]
+        parent = str(checkpoint['parent'])
+        while parent:
+            segment = self._load_arrays(parent, PROFILE_NAMES + ('history', 'parent'))
+            if segment is None:
+                return None
+            segments.append(segment)
+            parent = str(segment['parent'])
+
+        for segment in segments:
+            segment_history = int(segment['history'])
+            if segment_history != history and \
+                    (history != POSITION_HISTORY or segment_history != PROFILE_HISTORY):
+                return None
+
+        return segments[::-1]
+
+    def save_checkpoint(self,
+                        key: str,
+                        arrays: Dict[str, object],
+                        profiles: Sequence[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray,
+                                                 float]],
+                        parent: Optional[str] = None):
+        """
+        Writes a checkpoint, unless it is already stored.
+        :param key: The key of the checkpoint, see get_keys.
+        :param arrays: The state of the wave field after the step. Entries which are None are
+            left out.
+        :param profiles: The RMS profile, the maximum profile, the axial pulse and the position
+            of each step after the parent up to and including the step, see SimulationStep.
+        :param parent: The key of the checkpoint before the checkpoint in the simulation, or
+            None if the profiles start at step 0.
+        """
+        if os.path.exists(self._get_file_name(key)):
+            return
+        _arrays = {name: numpy.asarray(array) for name, array in arrays.items()
+                   if array is not None}
+        _arrays['parent'] = numpy.asarray(parent or '')
+        for name, axis, values in zip(PROFILE_NAMES, _PROFILE_AXES, zip(*profiles)):
+            _arrays[name] = numpy.stack(values, axis=axis)
+        self._save_arrays(key, _arrays)
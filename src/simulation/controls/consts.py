@@ -30,3 +30,11 @@ NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM: int = 0
 ABERRATION_FROM_DELAY_SCREEN_BODY_WALL: int = 1
 ABERRATION_FROM_FILE: int = 2
 ABERRATION_PHANTOM: int = 3
+
+# Grid size policies
+LOG2_GRID_SIZE: int = 0
+SMOOTH_GRID_SIZE: int = 1
+
+# Nonlinear solvers
+BURGERS_SOLVER: int = 0
+HARMONIC_SOLVER: int = 1
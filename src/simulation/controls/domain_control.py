@@ -7,13 +7,19 @@
 """
 import numpy
 
+from simulation.controls.consts import LOG2_GRID_SIZE, SMOOTH_GRID_SIZE
 from simulation.controls.log2_round_off import log2_round_off
+from simulation.controls.smooth_round_off import smooth_round_off
 from system.diffraction.diffraction import NoDiffraction, ExactDiffraction, \
     AngularSpectrumDiffraction, PseudoDifferential, \
     FiniteDifferenceTimeDifferenceReduced, FiniteDifferenceTimeDifferenceFull
 from system.diffraction.interfaces import IDiffractionType
 from system.material.interfaces import IMaterial
 
+# padding and layer width in wavelengths when using an absorbing layer
+NUM_LAMBDA_PAD_WITH_LAYER = 5
+NUM_LAMBDA_LAYER = 5
+
 
 class DomainControl:
     """
@@ -32,7 +38,17 @@ class DomainControl:
                  elements_size_elevation: float,
                  image_frequency: float,
                  num_periods: float,
-                 diffraction_type: IDiffractionType):
+                 diffraction_type: IDiffractionType,
+                 grid_size_policy: int = LOG2_GRID_SIZE,
+                 perfect_matching_layer: bool = False):
+        # select rounding of the number of grid points
+        if grid_size_policy == LOG2_GRID_SIZE:
+            round_off = log2_round_off
+        elif grid_size_policy == SMOOTH_GRID_SIZE:
+            round_off = smooth_round_off
+        else:
+            raise ValueError(f'Unknown grid size policy: {grid_size_policy}')
+
         # adjust frequency dependent variables
         frequency_steps = numpy.array([0.1, 0.5, 1.5, 3.0, 6.0, 12.0]) * 1e6
         step_sizes = numpy.array([10, 5, 2.5, 1.25, 0.5, 0.25]) * 1e-3
@@ -86,24 +102,34 @@ class DomainControl:
         else:
             raise ValueError(f'Unknown dimensions: {num_dimensions}')
 
-        omega_x = probe_span_azimuth + 2 * num_lambda_pad * _lambda
-        num_points_x = log2_round_off(omega_x / resolution_x)
+        # replace most of the padding by an absorbing layer
+        if perfect_matching_layer and num_dimensions > 1:
+            num_lambda_pad = NUM_LAMBDA_PAD_WITH_LAYER
+            perfect_matching_layer_width = numpy.maximum(NUM_LAMBDA_LAYER * _lambda,
+                                                         2.0 * step_size)
+        else:
+            perfect_matching_layer_width = 0.0
+
+        omega_x = probe_span_azimuth + \
+            2 * (num_lambda_pad * _lambda + perfect_matching_layer_width)
+        num_points_x = round_off(omega_x / resolution_x)
         if annular_transducer and diffraction_type in (PseudoDifferential,
                                                        FiniteDifferenceTimeDifferenceReduced,
                                                        FiniteDifferenceTimeDifferenceFull):
-            num_points_x = num_points_x / 2
+            num_points_x = num_points_x // 2
         if num_dimensions == 3 and diffraction_type in (NoDiffraction,
                                                         ExactDiffraction,
                                                         AngularSpectrumDiffraction):
-            omega_y = probe_span_elevation + 2 * num_lambda_pad * _lambda
-            num_points_y = log2_round_off(omega_y / resolution_y)
+            omega_y = probe_span_elevation + \
+                2 * (num_lambda_pad * _lambda + perfect_matching_layer_width)
+            num_points_y = round_off(omega_y / resolution_y)
         else:
             num_points_y = 1
         if num_dimensions == 1:
             num_points_x = 1
             num_points_y = 1
 
-        num_points_t = log2_round_off(
+        num_points_t = round_off(
             _num_periods * (num_periods / transmit_frequency) / resolution_t)
 
         # domain and grid specifications
@@ -121,7 +147,8 @@ class DomainControl:
         self._num_points_x = num_points_x
         self._num_points_y = num_points_y
         self._num_points_t = num_points_t
-        self._perfect_matching_layer_width: float = 0.0
+        self._perfect_matching_layer_width: float = perfect_matching_layer_width
+        self._grid_size_policy = grid_size_policy
 
     @property
     def step_size(self) -> float:
@@ -178,3 +205,7 @@ class DomainControl:
     @property
     def perfect_matching_layer_width(self) -> float:
         return self._perfect_matching_layer_width
+
+    @property
+    def grid_size_policy(self) -> int:
+        return self._grid_size_policy
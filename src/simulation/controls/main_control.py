@@ -5,15 +5,15 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
-from typing import Type
+from typing import Optional, Type
 
 import numpy
 
-from simulation.controls.consts import PROFILE_HISTORY
+from simulation.controls.consts import PROFILE_HISTORY, LOG2_GRID_SIZE, BURGERS_SOLVER
 from simulation.controls.domain_control import DomainControl
 from simulation.controls.material_control import MaterialControl
 from simulation.controls.signal_control import SignalControl
-from simulation.controls.simulation_control import SimulationControl
+from simulation.controls.simulation_control import DEFAULT_CACHE_DIRECTORY, SimulationControl
 from simulation.controls.transducer_control import TransducerControl
 from system.diffraction.diffraction import ExactDiffraction, PseudoDifferential
 from system.diffraction.diffraction import NoDiffraction, AngularSpectrumDiffraction
@@ -53,7 +53,20 @@ class MainControl:
                  num_elements_azimuth: int = 64,
                  elements_size_azimuth: float = 3.5e-4,
                  num_elements_elevation: int = 1,
-                 elements_size_elevation: float = 0.012):
+                 elements_size_elevation: float = 0.012,
+                 grid_size_policy: int = LOG2_GRID_SIZE,
+                 perfect_matching_layer: bool = False,
+                 adaptive_lateral_domain: bool = False,
+                 adaptive_time_window: bool = False,
+                 band_limited: bool = False,
+                 direct_jump: bool = False,
+                 spectral_pruning: bool = False,
+                 nonlinear_solver: int = BURGERS_SOLVER,
+                 adaptive_sample_rate: bool = False,
+                 cache_directory: Optional[str] = DEFAULT_CACHE_DIRECTORY,
+                 result_cache_size: int = 2 ** 30,
+                 checkpoint_interval: float = 0.0,
+                 checkpoint_cache_size: int = 2 ** 30):
         """
         Constructor
         :param simulation_name: The simulation name.
@@ -122,6 +135,47 @@ class MainControl:
             For annular transducers, the default element size is 1.3mm.
         :param num_elements_elevation: The number of elements in elevation direction.
         :param elements_size_elevation: The dimension of elements in elevation direction.
+        :param grid_size_policy: Rounding of the number of grid points in x, y and t.
+            0. LOG2_GRID_SIZE. Round to a power of two (one factor may be three).
+            1. SMOOTH_GRID_SIZE. Round up to the smallest even length with prime factors 2, 3
+                and 5 only, which still covers the probe span and padding.
+        :param perfect_matching_layer: Use an absorbing layer along the lateral boundaries.
+            The padding around the probe is then reduced to a few wavelengths and the
+            spatial window is not applied unless specified in the call to the simulation.
+        :param adaptive_lateral_domain: Crop and grow the lateral grid during the simulation to
+            follow the energy footprint of the beam. The profiles are still exported on the
+            full grid given by the domain.
+        :param adaptive_time_window: Trim and extend the retarded-time window during the
+            simulation to follow the temporal energy extent of the pulse. The window never
+            exceeds the number of samples given by the domain.
+        :param band_limited: Propagate only the temporal frequency bins occupied by the initial
+            wave field. Used for linear propagation with ExactDiffraction. The occupied band is
+            given by simulation.band_threshold.
+        :param direct_jump: Compute each depth plane directly from the source plane instead of
+            stepping through the planes. Used for linear propagation with ExactDiffraction in a
+            homogeneous medium. The planes are computed by simulation.num_workers threads, and
+            no spatial window is applied, so the padding of the domain must hold the beam.
+        :param spectral_pruning: Store and propagate only the propagating components of the
+            angular spectrum, kx^2 + ky^2 <= ((1 + simulation.evanescent_margin) * kt)^2.
+            Used together with band_limited or direct_jump.
+        :param nonlinear_solver: The solver of the nonlinear part of the propagation.
+            0. BURGERS_SOLVER. Solve the Burgers equation in the time domain by resampling.
+            1. HARMONIC_SOLVER. Solve for simulation.num_harmonics harmonics in the frequency
+                domain with quadratic coupling. Used for weakly nonlinear propagation.
+        :param adaptive_sample_rate: Start the simulation with simulation.sample_rate_ratio times
+            fewer samples in time, and double the sample rate whenever the energy near the
+            Nyquist frequency exceeds simulation.nyquist_threshold. The sample rate never
+            exceeds the sample frequency given by the domain.
+        :param cache_directory: Directory of the caches on local disk, i.e. the results and the
+            radial eigen decompositions. None for no cache files. Default is a directory in the
+            temporary directory of the system.
+        :param result_cache_size: The largest total size in bytes of the results in the cache
+            directory, see ResultCache. The results are only cached when a simulation is run
+            with use_cache.
+        :param checkpoint_interval: The distance between the checkpoints of a simulation run with
+            use_cache, see simulation_steps. Default is 0, no checkpoints.
+        :param checkpoint_cache_size: The largest total size in bytes of the checkpoints in the
+            cache directory, see CheckpointStore.
         """
         self._simulation_name = simulation_name
         self._harmonic = harmonic
@@ -130,6 +184,13 @@ class MainControl:
         self._attenuation = attenuation
         self._equidistant_steps = equidistant_steps
         self._history = history
+        self._adaptive_lateral_domain = adaptive_lateral_domain
+        self._adaptive_time_window = adaptive_time_window
+        self._band_limited = band_limited
+        self._direct_jump = direct_jump
+        self._spectral_pruning = spectral_pruning
+        self._nonlinear_solver = nonlinear_solver
+        self._adaptive_sample_rate = adaptive_sample_rate
 
         if harmonic > 1:
             _non_linearity = True
@@ -167,7 +228,9 @@ class MainControl:
                                      elements_size_elevation,
                                      image_frequency,
                                      num_periods,
-                                     _diffraction_type)
+                                     _diffraction_type,
+                                     grid_size_policy,
+                                     perfect_matching_layer)
 
         # material control parameters
         self._material = MaterialControl(material, heterogeneous_medium)
@@ -178,7 +241,11 @@ class MainControl:
                                              focus_elevation,
                                              focus_azimuth,
                                              heterogeneous_medium,
-                                             self._material)
+                                             self._material,
+                                             cache_directory,
+                                             result_cache_size,
+                                             checkpoint_interval,
+                                             checkpoint_cache_size)
 
         # signal control parameters
         self._signal = SignalControl(self._domain,
@@ -318,6 +385,62 @@ class MainControl:
         """
         return self._non_linearity
 
+    @property
+    def adaptive_lateral_domain(self) -> bool:
+        """
+        The flag specifying that the lateral grid follows the energy footprint of the beam.
+        :return: True if the lateral grid is adapted during the simulation.
+        """
+        return self._adaptive_lateral_domain
+
+    @property
+    def adaptive_time_window(self) -> bool:
+        """
+        The flag specifying that the retarded-time window follows the pulse.
+        :return: True if the time window is adapted during the simulation.
+        """
+        return self._adaptive_time_window
+
+    @property
+    def band_limited(self) -> bool:
+        """
+        The flag specifying that linear propagation is done in the occupied frequency band only.
+        :return: True if the propagation is band-limited.
+        """
+        return self._band_limited
+
+    @property
+    def direct_jump(self) -> bool:
+        """
+        The flag specifying that each depth plane is computed directly from the source plane.
+        :return: True if the depth planes are computed directly.
+        """
+        return self._direct_jump
+
+    @property
+    def spectral_pruning(self) -> bool:
+        """
+        The flag specifying that evanescent components of the angular spectrum are pruned.
+        :return: True if the angular spectrum is pruned.
+        """
+        return self._spectral_pruning
+
+    @property
+    def nonlinear_solver(self) -> int:
+        """
+        The solver of the nonlinear part of the propagation.
+        :return: BURGERS_SOLVER or HARMONIC_SOLVER.
+        """
+        return self._nonlinear_solver
+
+    @property
+    def adaptive_sample_rate(self) -> bool:
+        """
+        The flag specifying that the sample rate follows the bandwidth of the wave field.
+        :return: True if the sample rate is adaptive.
+        """
+        return self._adaptive_sample_rate
+
     @property
     def domain(self) -> DomainControl:
         """
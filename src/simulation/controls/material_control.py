@@ -12,6 +12,7 @@ import numpy
 from simulation.controls import consts
 from system.material.aberration_phantom import AberrationPhantom
 from system.material.interfaces import IMaterial
+from system.material.material_snapshot import get_material_snapshot
 
 
 class MaterialControl:
@@ -23,8 +24,8 @@ class MaterialControl:
     def __init__(self,
                  material: IMaterial,
                  heterogeneous_medium: int):
-        # material control parameters
-        self._material = material
+        # material control parameters, the properties of the material are evaluated once
+        self._material = get_material_snapshot(material)
         self._thickness = self._get_thickness(material)
         self._offset = self._get_offset()
 
@@ -5,11 +5,18 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
+import os
+import tempfile
+from typing import Optional
+
 import numpy
 
 from simulation.controls.domain_control import DomainControl
 from simulation.controls.material_control import MaterialControl
 
+# directory of the caches on local disk of the controls by default
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), 'beam_simulation_cache')
+
 
 class SimulationControl:
     """
@@ -23,37 +30,49 @@ class SimulationControl:
                  focus_elevation: float,
                  focus_azimuth: float,
                  heterogeneous_medium: int,
-                 material: MaterialControl):
+                 material: MaterialControl,
+                 cache_directory: Optional[str] = DEFAULT_CACHE_DIRECTORY,
+                 result_cache_size: int = 2 ** 30,
+                 checkpoint_interval: float = 0.0,
+                 checkpoint_cache_size: int = 2 ** 30):
+        if result_cache_size < 0:
+            raise ValueError('The size of the result cache must not be negative')
+        if checkpoint_interval < 0.0:
+            raise ValueError('The checkpoint interval must not be negative')
+        if checkpoint_cache_size < 0:
+            raise ValueError('The size of the checkpoint cache must not be negative')
+
         # simulation control parameters
         self._num_windows: int = 2
         self._shock_step: float = 0.5
+        self._footprint_interval: int = 4
+        self._band_threshold: float = -60.0
+        self._num_workers: int = os.cpu_count() or 1
+        self._evanescent_margin: float = 0.1
+        self._num_harmonics: int = 4
+        self._sample_rate_ratio: int = 4
+        self._nyquist_threshold: float = -60.0
+        self._difference_order: int = 4
+        self._cache_directory: Optional[str] = cache_directory
+        self._num_cached_slabs: int = 4
+        self._result_cache_size: int = result_cache_size
+        self._checkpoint_interval: float = checkpoint_interval
+        self._checkpoint_cache_size: int = checkpoint_cache_size
         self._endpoint = end_point
 
         store_position = [focus_elevation, focus_azimuth]
 
         if heterogeneous_medium:
-            store_position = numpy.array([store_position, material.thickness])
+            store_position = numpy.array(store_position + [material.thickness])
         self._store_position = numpy.unique(store_position)
 
+        # the step size of a run may change, see SimulationState
         self._step_size = domain.step_size
-        self._current_position: float = 0.0
 
     @property
     def step_size(self) -> float:
         return self._step_size
 
-    @step_size.setter
-    def step_size(self, value: float):
-        self._step_size = value
-
-    @property
-    def current_position(self) -> float:
-        return self._current_position
-
-    @current_position.setter
-    def current_position(self, value: float):
-        self._current_position = value
-
     @property
     def num_windows(self) -> int:
         return self._num_windows
@@ -62,6 +81,74 @@ class SimulationControl:
     def shock_step(self) -> float:
         return self._shock_step
 
+    @property
+    def footprint_interval(self) -> int:
+        return self._footprint_interval
+
+    @property
+    def band_threshold(self) -> float:
+        return self._band_threshold
+
+    @property
+    def num_workers(self) -> int:
+        return self._num_workers
+
+    @property
+    def evanescent_margin(self) -> float:
+        return self._evanescent_margin
+
+    @property
+    def num_harmonics(self) -> int:
+        return self._num_harmonics
+
+    @property
+    def sample_rate_ratio(self) -> int:
+        return self._sample_rate_ratio
+
+    @property
+    def nyquist_threshold(self) -> float:
+        return self._nyquist_threshold
+
+    @property
+    def difference_order(self) -> int:
+        return self._difference_order
+
+    @property
+    def cache_directory(self) -> Optional[str]:
+        """
+        Directory of the caches on local disk, i.e. the results and the radial eigen
+        decompositions. None for no cache files.
+        """
+        return self._cache_directory
+
+    @property
+    def num_cached_slabs(self) -> int:
+        return self._num_cached_slabs
+
+    @property
+    def result_cache_size(self) -> int:
+        """
+        The largest total size in bytes of the results in the cache directory, see ResultCache.
+        The results are only cached when a simulation is run with use_cache.
+        """
+        return self._result_cache_size
+
+    @property
+    def checkpoint_interval(self) -> float:
+        """
+        The distance between the checkpoints of a simulation run with use_cache, see
+        simulation_steps. Default is 0, no checkpoints.
+        """
+        return self._checkpoint_interval
+
+    @property
+    def checkpoint_cache_size(self) -> int:
+        """
+        The largest total size in bytes of the checkpoints in the cache directory, see
+        CheckpointStore.
+        """
+        return self._checkpoint_cache_size
+
     @property
     def endpoint(self) -> float:
         return self._endpoint
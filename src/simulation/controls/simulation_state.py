@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    simulation_state.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Callable, Hashable
+
+import numpy
+
+from simulation.bounded_cache import BoundedCache
+from simulation.controls.main_control import MainControl
+
+# largest number of cached operators of a run
+MAX_NUM_OPERATORS = 16
+
+
+class SimulationState:
+    """
+    The state of one simulation run, carried through the stepping functions. The controls are
+    configuration only and are never changed by a run, so one MainControl may be shared by
+    several runs, also in threads of the same process, each with its own state.
+    The state holds the current position, the current step size and the operators cached by
+    the run.
+    """
+
+    def __init__(self,
+                 control: MainControl,
+                 current_position: float = 0.0):
+        """
+        Constructor
+        :param control: The controls of the run.
+        :param current_position: The position of the wave field. Default is at the transducer.
+        """
+        self._step_size: float = control.simulation.step_size
+        self._current_position: float = current_position
+        self._operators = BoundedCache(MAX_NUM_OPERATORS)
+
+    def get_operator(self,
+                     key: Hashable,
+                     factory: Callable[[], numpy.ndarray]) -> numpy.ndarray:
+        """
+        Returns a cached operator of the run, or builds it with factory and caches it.
+        The cached operators are read-only.
+        :param key: The key of the operator.
+        :param factory: Function building the operator.
+        :return: The operator.
+        """
+        def _factory():
+            operator = factory()
+            if isinstance(operator, numpy.ndarray):
+                operator.flags.writeable = False
+            return operator
+
+        return self._operators.get(key, _factory)
+
+    @property
+    def step_size(self) -> float:
+        return self._step_size
+
+    @step_size.setter
+    def step_size(self, value: float):
+        self._step_size = value
+
+    @property
+    def current_position(self) -> float:
+        return self._current_position
+
+    @current_position.setter
+    def current_position(self, value: float):
+        self._current_position = value
+
+    @property
+    def num_operators(self) -> int:
+        return len(self._operators)
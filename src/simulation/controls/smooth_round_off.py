@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+    smooth_round_off.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import math
+
+
+def smooth_round_off(input_value):
+    """
+    Function finding the smallest even number, not less than input_value, who's prime
+    factors are only 2, 3 and 5. Such lengths are handled by the FFT as fast as powers of two,
+    and the even length keeps the wave number grids symmetric around zero.
+    """
+    if 0.0 <= input_value <= 2.0:
+        return input_value
+
+    target = math.ceil(input_value)
+    smooth_value = 2 ** math.ceil(math.log2(target))
+
+    # search all 2^a * 3^b * 5^c with a >= 1 below the power of two upper bound
+    power_of_five = 1
+    while power_of_five < smooth_value:
+        power_of_three = power_of_five
+        while power_of_three < smooth_value:
+            candidate = 2 * power_of_three
+            while candidate < target:
+                candidate = candidate * 2
+            smooth_value = min(smooth_value, candidate)
+            power_of_three = power_of_three * 3
+        power_of_five = power_of_five * 5
+
+    return int(smooth_value)
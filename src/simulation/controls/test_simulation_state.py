@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+    test_simulation_state.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls import simulation_state
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+
+
+class TestSimulationState(unittest.TestCase):
+    def setUp(self):
+        self.control = get_test_control('test_simulation_state')
+
+    def test_state_does_not_change_the_control(self):
+        step_size = self.control.simulation.step_size
+        state = SimulationState(self.control, 0.01)
+        state.step_size = step_size / 2
+        state.current_position = state.current_position + state.step_size
+        self.assertEqual(step_size, self.control.simulation.step_size)
+        self.assertAlmostEqual(0.01 + step_size / 2, state.current_position)
+        with self.assertRaises(AttributeError):
+            self.control.simulation.step_size = step_size / 2
+
+    def test_operators_are_cached_read_only(self):
+        state = SimulationState(self.control)
+        calls = []
+
+        def _factory():
+            calls.append(1)
+            return numpy.ones(4)
+
+        operator = state.get_operator('ones', _factory)
+        self.assertIs(operator, state.get_operator('ones', _factory))
+        self.assertEqual(1, len(calls))
+        self.assertFalse(operator.flags.writeable)
+
+        for index in range(simulation_state.MAX_NUM_OPERATORS + 1):
+            state.get_operator(index, _factory)
+        self.assertLessEqual(state.num_operators, simulation_state.MAX_NUM_OPERATORS)
+
+    def test_wave_numbers_follow_the_step_size(self):
+        state = SimulationState(self.control)
+        wave_numbers = get_wave_numbers(self.control, True, state=state)
+        numpy.testing.assert_array_equal(get_wave_numbers(self.control, True), wave_numbers)
+        self.assertIs(wave_numbers, get_wave_numbers(self.control, True, state=state))
+
+        state.step_size = self.control.simulation.step_size / 2
+        half_step = get_wave_numbers(self.control, True, state=state)
+        numpy.testing.assert_array_almost_equal(half_step * half_step, wave_numbers)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+    test_smooth_round_off.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+from simulation.controls.smooth_round_off import smooth_round_off
+
+
+class TestSmoothRoundOff(unittest.TestCase):
+    def test_small_values(self):
+        self.assertEqual(1, smooth_round_off(1))
+        self.assertEqual(2.0, smooth_round_off(2.0))
+
+    def test_smooth_values_are_kept(self):
+        for value in (4, 6, 8, 10, 12, 16, 18, 20, 30, 48, 60, 90, 250, 384, 500, 1000):
+            self.assertEqual(value, smooth_round_off(value))
+
+    def test_rounds_upward(self):
+        self.assertEqual(4, smooth_round_off(3))
+        self.assertEqual(12, smooth_round_off(11))
+        self.assertEqual(12, smooth_round_off(10.5))
+        self.assertEqual(18, smooth_round_off(17))
+        self.assertEqual(270, smooth_round_off(257))
+        self.assertEqual(540, smooth_round_off(513))
+
+    def test_result_is_even_and_five_smooth(self):
+        for value in range(3, 2000):
+            result = smooth_round_off(value)
+            self.assertGreaterEqual(result, value)
+            self.assertEqual(0, result % 2)
+            for factor in (2, 3, 5):
+                while result % factor == 0:
+                    result = result // factor
+            self.assertEqual(1, result)
+
+    def test_never_larger_than_log2_round_up(self):
+        for value in range(3, 2000):
+            self.assertLessEqual(smooth_round_off(value), 2 ** (value - 1).bit_length())
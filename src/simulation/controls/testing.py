@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+    testing.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from simulation.controls.consts import NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM
+from simulation.controls.main_control import MainControl
+from system.diffraction.diffraction import ExactDiffraction
+
+
+def get_test_control(simulation_name: str, **kwargs) -> MainControl:
+    """
+    Returns the controls of the tests and benchmarks. By default the simulation is a linear 2D
+    simulation of the fundamental with attenuation and exact diffraction in a homogeneous
+    medium.
+    :param simulation_name: Name of the simulation.
+    :param kwargs: The arguments of MainControl overriding the defaults.
+    :return: The controls.
+    """
+    arguments = {'num_dimensions': 2,
+                 'diffraction_type': ExactDiffraction,
+                 'non_linearity': False,
+                 'attenuation': True,
+                 'heterogeneous_medium': NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM,
+                 'harmonic': 1}
+    arguments.update(kwargs)
+
+    return MainControl(simulation_name=simulation_name, **arguments)
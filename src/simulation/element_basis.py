@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+    element_basis.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import List, Optional, Tuple, Union
+
+import numpy
+
+from simulation.controls.consts import NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM
+from simulation.controls.main_control import MainControl
+from simulation.post_processing.spectral_snapshots import SpectralSnapshots
+from simulation.simulation import simulation_steps
+from system.transducer.get_focal_curvature import get_focal_curvature
+from system.transducer.get_transducer_indexes import get_transducer_indexes
+from system.transducer.pulse_generator import pulse_generator
+
+
+class ElementBasis:
+    """
+    The wave fields of the single elements of the transducer, for synthesis of the beams of
+    any transmit focus, steering or apodization after the propagation. Linear propagation in a
+    homogeneous medium is linear and invariant to delays, so the beam of a transmit is the sum
+    of the element fields weighted by the apodization and phase shifted by the delays of the
+    elements. The field of each element is propagated once and kept as spectral snapshots,
+    see SpectralSnapshots, and a transmit is synthesized from them by one matrix product for
+    each step.
+    An element transmits the pulse of pulse_generator with unit apodization. The lens of a
+    dimension with one element is part of the element, and the delays of the elements are
+    relative to the lens, see get_element_delays.
+    """
+
+    def __init__(self,
+                 control: MainControl,
+                 region: Optional[Tuple] = None,
+                 band_margin: float = 1.0,
+                 dtype: type = numpy.complex64):
+        """
+        Constructor, which propagates the field of each element.
+        :param control: The controls of the simulations. The propagation must be linear in a
+            homogeneous medium on a fixed grid.
+        :param region: Indexes (y, x) of the points of the region of interest, see
+            SpectralSnapshots. Default is all points.
+        :param band_margin: Width of the band kept above the highest harmonic, see
+            SpectralSnapshots.
+        :param dtype: Type of the stored spectra.
+        """
+        if control.non_linearity or \
+                control.heterogeneous_medium != NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM:
+            raise ValueError('The element basis needs linear propagation in a homogeneous medium')
+        if control.adaptive_lateral_domain or control.adaptive_time_window or \
+                control.adaptive_sample_rate:
+            raise ValueError('The element basis does not support adaptive grids')
+        if control.annular_transducer:
+            raise NotImplementedError
+
+        self._control = control
+        self._region = region
+        self._band_margin = band_margin
+        self._dtype = dtype
+
+        # the points of the transducer surface and their elements
+        index_x, index_y, _, _, _ = get_transducer_indexes(control)
+        self._index_x = index_x
+        self._index_y = index_y
+        transducer = control.transducer
+        self._element_index_x = _get_element_indexes(index_x.size, transducer.num_elements_azimuth)
+        self._element_index_y = _get_element_indexes(index_y.size,
+                                                     transducer.num_elements_elevation)
+
+        # the lens of a dimension with one element
+        sound_speed = control.material.material.sound_speed
+        lens_delays_x = _get_lens_delays(control,
+                                         transducer.focus_azimuth,
+                                         index_x.size,
+                                         transducer.num_elements_azimuth,
+                                         control.signal.resolution_x,
+                                         transducer.elements_size_azimuth) / sound_speed
+        lens_delays_y = _get_lens_delays(control,
+                                         transducer.focus_elevation,
+                                         index_y.size,
+                                         transducer.num_elements_elevation,
+                                         control.signal.resolution_y,
+                                         transducer.elements_size_elevation) / sound_speed
+        self._lens_delays = lens_delays_y[:, numpy.newaxis] + lens_delays_x
+
+        # one entry for each step, with the spectra (num_bins * num_elements * num_points)
+        self._positions: List[float] = []
+        self._spectra: List[numpy.ndarray] = []
+        self._frequency_indexes: Optional[numpy.ndarray] = None
+        self._region_shape: Tuple[int, int] = (0, 0)
+        self._propagate()
+
+    def get_element_field(self, element_y: int, element_x: int) -> numpy.ndarray:
+        """
+        Returns the wave field at the transducer of one element.
+        :param element_y: Index of the element in elevation.
+        :param element_x: Index of the element in azimuth.
+        :return: The wave field, squeezed as the wave field of pulse_generator.
+        """
+        control = self._control
+        num_points_t = control.domain.num_points_t
+        wave_field, _ = pulse_generator(control, 'transducer', no_focusing_flag=True)
+        wave_field = wave_field.reshape((num_points_t, control.domain.num_points_y,
+                                         control.domain.num_points_x))
+        signal = wave_field[:, self._index_y[0], self._index_x[0]]
+
+        # the pulse of each point of the element, delayed by the lens
+        inside_y = numpy.flatnonzero(self._element_index_y == element_y)
+        inside_x = numpy.flatnonzero(self._element_index_x == element_x)
+        lens_delays = self._lens_delays[inside_y[:, numpy.newaxis], inside_x]
+        frequencies = numpy.fft.rfftfreq(num_points_t, control.signal.resolution_t)
+        spectrum = numpy.fft.rfft(signal)[:, numpy.newaxis, numpy.newaxis] * \
+            numpy.exp(2j * numpy.pi * frequencies[:, numpy.newaxis, numpy.newaxis] * lens_delays)
+
+        element_field = numpy.zeros_like(wave_field)
+        element_field[:, self._index_y[inside_y[:, numpy.newaxis]], self._index_x[inside_x]] = \
+            numpy.fft.irfft(spectrum, num_points_t, axis=0)
+
+        return numpy.squeeze(element_field)
+
+    def get_element_delays(self, delta_focus: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns the delays of the elements of a transmit.
+        :param delta_focus: The focusing delays of the points of the transducer surface
+            (ny * nx), e.g. of focus_pulse or pulse_generator, or a batch of delays
+            (num_transmits * ny * nx).
+        :return: The delays of the elements relative to the lens (num_elements_elevation *
+            num_elements_azimuth), or a batch of delays.
+        """
+        return self._to_elements(numpy.asarray(delta_focus, dtype=float) - self._lens_delays)
+
+    def get_element_weights(self, apodization: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns the weights of the elements of a transmit, the mean of the apodization over each
+        element.
+        :param apodization: The apodization of the points of the transducer surface (ny * nx),
+            or (nx) in 2D, or a batch of apodizations (num_transmits * ny * nx).
+        :return: The weights of the elements (num_elements_elevation * num_elements_azimuth),
+            or a batch of weights.
+        """
+        _apodization = numpy.asarray(apodization, dtype=float)
+        if _apodization.ndim == 1:
+            _apodization = _apodization[numpy.newaxis]
+
+        return self._to_elements(_apodization)
+
+    def synthesize(self,
+                   delays: numpy.ndarray,
+                   weights: Optional[numpy.ndarray] = None) \
+            -> Union[SpectralSnapshots, List[SpectralSnapshots]]:
+        """
+        Synthesizes the spectral snapshots of transmits from the element fields.
+        :param delays: The delays (s) of the elements (num_elements_elevation *
+            num_elements_azimuth), see get_element_delays, or a batch of delays
+            (num_transmits * num_elements_elevation * num_elements_azimuth). Positive delays
+            advance the pulse of the element, as the delays of focus_pulse.
+        :param weights: The weights of the elements, see get_element_weights, shaped as the
+            delays. Default is one for all elements.
+        :return: The snapshots of the transmit, or a list of snapshots for a batch.
+        """
+        _delays = numpy.asarray(delays, dtype=float)
+        if _delays.shape[-2:] != self.num_elements:
+            raise ValueError('The delays of {} elements are given, but there are {}'
+                             .format(_delays.shape[-2:], self.num_elements))
+        batch = _delays.ndim == 3
+        _weights = numpy.ones(_delays.shape) if weights is None else \
+            numpy.broadcast_to(numpy.asarray(weights, dtype=float), _delays.shape)
+        num_elements = _delays.shape[-2] * _delays.shape[-1]
+        _delays = _delays.reshape((-1, num_elements))
+        _weights = _weights.reshape((-1, num_elements))
+
+        # the weights of the element spectra (num_bins * num_transmits * num_elements)
+        control = self._control
+        num_points_t = control.domain.num_points_t
+        resolution_t = control.signal.resolution_t
+        frequencies = self._frequency_indexes / (num_points_t * resolution_t)
+        phase_shifts = numpy.exp(2j * numpy.pi * frequencies[:, numpy.newaxis, numpy.newaxis] *
+                                 _delays)
+        element_weights = (_weights * phase_shifts).astype(self._dtype)
+
+        snapshots = [SpectralSnapshots.from_control(control,
+                                                    self._region,
+                                                    band_margin=self._band_margin,
+                                                    dtype=self._dtype)
+                     for _ in range(_delays.shape[0])]
+        shape = (self._frequency_indexes.size,) + self._region_shape
+        for position, spectra in zip(self._positions, self._spectra):
+            transmit_spectra = numpy.matmul(element_weights, spectra)
+            for index, _snapshots in enumerate(snapshots):
+                _snapshots.append(position,
+                                  transmit_spectra[:, index].reshape(shape),
+                                  self._frequency_indexes,
+                                  num_points_t,
+                                  resolution_t)
+
+        if not batch:
+            return snapshots[0]
+
+        return snapshots
+
+    def get_profiles(self,
+                     delays: numpy.ndarray,
+                     weights: Optional[numpy.ndarray] = None,
+                     **kwargs) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the profiles of transmits without propagating again.
+        :param delays: The delays of the elements, see synthesize.
+        :param weights: The weights of the elements, see synthesize.
+        :param kwargs: The filter settings, see SpectralSnapshots.get_profiles.
+        :return: The RMS profile and the maximum profile, see SpectralSnapshots.get_profiles,
+            with a first dimension num_transmits for a batch of transmits.
+        """
+        snapshots = self.synthesize(delays, weights)
+        if isinstance(snapshots, SpectralSnapshots):
+            return snapshots.get_profiles(**kwargs)
+        rms_profiles, max_profiles = zip(*(_snapshots.get_profiles(**kwargs)
+                                           for _snapshots in snapshots))
+
+        return numpy.stack(rms_profiles), numpy.stack(max_profiles)
+
+    def _propagate(self):
+        """
+        Propagates the field of each element and keeps its spectra.
+        """
+        num_elements_y, num_elements_x = self.num_elements
+        for element_y in range(num_elements_y):
+            for element_x in range(num_elements_x):
+                element = element_y * num_elements_x + element_x
+                snapshots = SpectralSnapshots.from_control(self._control,
+                                                           self._region,
+                                                           band_margin=self._band_margin,
+                                                           dtype=self._dtype)
+                for step in simulation_steps(self._control,
+                                             self.get_element_field(element_y, element_x),
+                                             use_cache=False):
+                    snapshots.add(step)
+                if element == 0:
+                    self._positions = list(snapshots.positions)
+                    self._frequency_indexes = snapshots.frequency_indexes[0]
+                    self._region_shape = snapshots.spectra[0].shape[1:]
+                    self._spectra = [numpy.zeros((spectrum.shape[0],
+                                                  num_elements_y * num_elements_x,
+                                                  spectrum[0].size),
+                                                 dtype=self._dtype)
+                                     for spectrum in snapshots.spectra]
+                for spectra, spectrum in zip(self._spectra, snapshots.spectra):
+                    spectra[:, element] = spectrum.reshape((spectrum.shape[0], -1))
+
+    def _to_elements(self, values: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns the mean of values (... * ny * nx) of the points of the transducer surface over
+        each element.
+        """
+        starts_y = numpy.flatnonzero(numpy.diff(self._element_index_y, prepend=-1))
+        starts_x = numpy.flatnonzero(numpy.diff(self._element_index_x, prepend=-1))
+        sums = numpy.add.reduceat(numpy.add.reduceat(values, starts_x, axis=-1), starts_y,
+                                  axis=-2)
+        counts = numpy.bincount(self._element_index_y)[:, numpy.newaxis] * \
+            numpy.bincount(self._element_index_x)
+
+        return sums / counts
+
+    @property
+    def num_elements(self) -> Tuple[int, int]:
+        """
+        The number of elements (elevation, azimuth).
+        """
+        return int(self._element_index_y[-1]) + 1, int(self._element_index_x[-1]) + 1
+
+    @property
+    def element_positions(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        The centres (y, x) of the elements, relative to the centre of the transducer.
+        """
+        return (_get_element_positions(self._element_index_y, self._control.signal.resolution_y),
+                _get_element_positions(self._element_index_x, self._control.signal.resolution_x))
+
+    @property
+    def positions(self) -> numpy.ndarray:
+        return numpy.array(self._positions)
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the stored spectra in bytes.
+        """
+        return sum(spectra.nbytes for spectra in self._spectra)
+
+
+def _get_element_indexes(num_points: int, num_elements: int) -> numpy.ndarray:
+    """
+    Returns the element of each point across the transducer.
+    """
+    num_elements = max(min(num_elements, num_points), 1)
+
+    return numpy.arange(num_points) * num_elements // num_points
+
+
+def _get_element_positions(element_indexes: numpy.ndarray, resolution: float) -> numpy.ndarray:
+    """
+    Returns the centre of each element across the transducer.
+    """
+    positions = (numpy.arange(element_indexes.size) - (element_indexes.size - 1) / 2.0) * \
+        resolution
+
+    return numpy.bincount(element_indexes, positions) / numpy.bincount(element_indexes)
+
+
+def _get_lens_delays(control, focus, num_points, num_elements, resolution, element_size) \
+        -> numpy.ndarray:
+    """
+    Returns the lens curvature of the points across the transducer, as focus_pulse. A dimension
+    with several elements has no lens.
+    """
+    if num_elements > 1 or num_points <= 1:
+        return numpy.zeros(num_points)
+
+    return get_focal_curvature(focus,
+                               num_points,
+                               num_elements,
+                               resolution,
+                               element_size,
+                               focus,
+                               control.annular_transducer,
+                               control.diffraction_type)
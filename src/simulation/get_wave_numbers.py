@@ -5,14 +5,16 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy
 from scipy.signal import hilbert
 
 from simulation.controls.consts import SCALE_FOR_TEMPORAL_VARIABLE, SCALE_FOR_SPATIAL_VARIABLES_Z
 from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
 from simulation.filter.get_frequencies import get_frequencies
+from simulation.propagation.pseudo_differential import get_radial_eigen_decomposition
 from system.diffraction.diffraction import NoDiffraction, ExactDiffraction, \
     AngularSpectrumDiffraction, PseudoDifferential, FiniteDifferenceTimeDifferenceFull, \
     FiniteDifferenceTimeDifferenceReduced
@@ -20,7 +22,11 @@ from system.diffraction.diffraction import NoDiffraction, ExactDiffraction, \
 
 def get_wave_numbers(control: MainControl,
                      equidistant_steps: bool,
-                     wave_number_operator: Optional[bool] = False):
+                     wave_number_operator: Optional[bool] = False,
+                     num_points: Optional[Tuple[int, int, int]] = None,
+                     frequency_indexes: Optional[numpy.ndarray] = None,
+                     resolution_t: Optional[float] = None,
+                     state: Optional[SimulationState] = None):
     """
     Define wave number arrays in Fourier domain used for linear propagation and diffraction
     using the Angular Spectrum method.
@@ -29,23 +35,63 @@ def get_wave_numbers(control: MainControl,
     :param wave_number_operator: Specifies the wave number operator for the classical Angular
         Spectrum Method of Zemp and Cobbold in
         regular coordinates (as opposed to retarded time coordinates).
+    :param num_points: Number of points (x, y, t) of the grid the operator is applied to.
+        Default is the grid given by control.domain.
+    :param frequency_indexes: Indexes, in FFT order, of the temporal frequency bins to build the
+        operator for. The rows of the operator follow the indexes. Default is all bins.
+    :param resolution_t: Sampling interval of the grid the operator is applied to.
+        Default is given by control.signal.
+    :param state: The state of the run, giving the step size of the propagation operator.
+        The operators are cached in the state. Default is the step size of control.simulation
+        and no caching.
     :return: Full complex wave number operator.
-        If control.diffraction_type is set to PseudoDifferential, the wave numbers operator contains
-        three layers, the first is the wave numbers in time and eigenvalues of difference matrix A.
-        The second layer is the inverse eigenvector matrix Q, and the third the matrix Q.
+        If control.diffraction_type is set to PseudoDifferential, the columns of the operator
+        follow the eigenvalues of the radial difference matrix A = Q * diag(eigenvalues) * Q^-1
+        instead of kx. The matrices Q^-1 and Q are given by get_radial_eigen_decomposition.
     """
-    num_points_x = control.domain.num_points_x
-    num_points_y = control.domain.num_points_y
-    num_points_t = control.domain.num_points_t
-    resolution_t = control.signal.resolution_t
+    if num_points is None:
+        num_points = (control.domain.num_points_x,
+                      control.domain.num_points_y,
+                      control.domain.num_points_t)
+    if resolution_t is None:
+        resolution_t = control.signal.resolution_t
+    step_size = control.simulation.step_size if state is None else state.step_size
+
+    def _factory():
+        return _get_wave_numbers(control,
+                                 equidistant_steps,
+                                 wave_number_operator,
+                                 num_points,
+                                 frequency_indexes,
+                                 resolution_t,
+                                 step_size)
+
+    if state is None:
+        return _factory()
+    key = ('wave_numbers', equidistant_steps, wave_number_operator, tuple(num_points),
+           None if frequency_indexes is None else tuple(frequency_indexes), resolution_t,
+           step_size if equidistant_steps else None)
+
+    return state.get_operator(key, _factory)
+
+
+def _get_wave_numbers(control: MainControl,
+                      equidistant_steps: bool,
+                      wave_number_operator: Optional[bool],
+                      num_points: Tuple[int, int, int],
+                      frequency_indexes: Optional[numpy.ndarray],
+                      resolution_t: float,
+                      step_size: float):
+    """
+    Builds the wave number operator, see get_wave_numbers.
+    """
+    num_points_x, num_points_y, num_points_t = num_points
     material = control.material.material
     sound_speed = material.sound_speed
 
     ft = 1 / resolution_t
     df = ft / num_points_t
-    kt = 2.0 * numpy.pi / sound_speed * numpy.arange(-ft / 2,
-                                                     ft / 2,
-                                                     df)
+    kt = 2.0 * numpy.pi / sound_speed * _get_centered_axis(num_points_t, df)
 
     if control.diffraction_type in (NoDiffraction,
                                     ExactDiffraction,
@@ -57,21 +103,28 @@ def get_wave_numbers(control: MainControl,
         if num_points_x == 1:
             kx = 0
         else:
-            kx = 2.0 * numpy.pi * numpy.arange(-fx / 2, fx / 2, dkx)
+            kx = 2.0 * numpy.pi * _get_centered_axis(num_points_x, dkx)
         if num_points_y == 1:
             ky = 0
         else:
-            ky = 2.0 * numpy.pi * numpy.arange(-fy / 2, fy / 2, dky)
+            ky = 2.0 * numpy.pi * _get_centered_axis(num_points_y, dky)
     elif control.diffraction_type is PseudoDifferential:
-        raise NotImplementedError
-    elif control.diffraction_type in (FiniteDifferenceTimeDifferenceReduced,
-                                      FiniteDifferenceTimeDifferenceFull):
+        # the eigenvalues of the radial laplacian replace -kx^2
+        eigenvalues, _, _ = get_radial_eigen_decomposition(
+            num_points_x,
+            control.signal.resolution_x,
+            control.simulation.difference_order,
+            cache_directory=control.simulation.cache_directory)
+    elif control.diffraction_type is FiniteDifferenceTimeDifferenceReduced:
+        # the banded operators are factorized and cached by finite_difference_propagate
+        return numpy.array([])
+    elif control.diffraction_type is FiniteDifferenceTimeDifferenceFull:
         raise NotImplementedError
 
     # calculate attenuation if propagation is linear
     loss = numpy.zeros(kt.size)
     if control.attenuation and control.non_linearity is False:
-        w = get_frequencies(num_points_t, control.signal.resolution_t / (
+        w = get_frequencies(num_points_t, resolution_t / (
                 2.0 * numpy.pi * SCALE_FOR_TEMPORAL_VARIABLE))
         eps_a = material.eps_a
         eps_b = material.eps_b
@@ -94,11 +147,20 @@ def get_wave_numbers(control: MainControl,
                                       indexing='ij')
             kxy2 = kx2 + ky2
             kxy2 = kxy2.reshape((num_points_x * num_points_y, 1))
+        elif control.diffraction_type is PseudoDifferential:
+            kxy2 = -eigenvalues
         elif control.num_dimensions == 2:
             kxy2 = numpy.fft.ifftshift(kx ** 2)
         else:
             kxy2 = 0
-    kt, kxy = numpy.meshgrid(numpy.fft.ifftshift(kt), kxy2, indexing='ij')
+
+    # temporal frequency bins in FFT order
+    kt = numpy.fft.ifftshift(kt)
+    if frequency_indexes is not None:
+        kt = kt[frequency_indexes]
+        loss = loss[frequency_indexes]
+
+    kt, kxy = numpy.meshgrid(kt, kxy2, indexing='ij')
     wave_numbers = numpy.sqrt((kt ** 2 - kxy).astype(complex))
     wave_numbers = numpy.sign(kt) * wave_numbers.real - 1j * wave_numbers.imag
 
@@ -108,18 +170,27 @@ def get_wave_numbers(control: MainControl,
 
     # introduces loss in wave number operator
     if control.attenuation:
-        for index in range(0, num_points_t):
+        for index in range(0, loss.size):
             wave_numbers[index, ...] = wave_numbers[index, ...] - 1j * loss[index]
 
     # convert wave number operator to propagation operator
     if equidistant_steps:
-        step_size = control.simulation.step_size
         if control.non_linearity:
             num_sub_steps = int(numpy.ceil(step_size / control.signal.resolution_z))
             step_size = step_size / num_sub_steps
         wave_numbers = numpy.exp(-1j * wave_numbers * step_size)
 
-    if control.diffraction_type is PseudoDifferential:
-        raise NotImplementedError
-
     return wave_numbers
+
+
+def _get_centered_axis(num_points: int,
+                       resolution: float) -> numpy.ndarray:
+    """
+    Returns an axis of num_points samples centered around zero, ranging from
+    -floor(num_points / 2) * resolution to (ceil(num_points / 2) - 1) * resolution.
+    Counting in integers keeps the length exact for any grid size.
+    :param num_points: Number of points.
+    :param resolution: Distance between the points.
+    :return: The centered axis.
+    """
+    return (numpy.arange(num_points) - num_points // 2) * resolution
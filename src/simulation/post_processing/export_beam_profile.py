@@ -5,14 +5,15 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy
-from scipy.signal import hilbert
+from scipy.signal import hilbert, resample
 
 from simulation.controls.consts import NO_HISTORY, POSITION_HISTORY, \
     PROFILE_HISTORY, FULL_HISTORY, PLANE_HISTORY, PLANE_BY_CHANNEL_HISTORY
 from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
 from simulation.filter.bandpass import bandpass
 
 
@@ -22,7 +23,12 @@ def export_beam_profile(control: MainControl,
                         max_profile: Optional[numpy.ndarray] = None,
                         ax_pulse=None,
                         z_coordinate=None,
-                        step=None):
+                        step=None,
+                        lateral_offset: Tuple[int, int] = (0, 0),
+                        time_offset: int = 0,
+                        position: Optional[float] = None,
+                        resolution_t: Optional[float] = None,
+                        state: Optional[SimulationState] = None):
     """
     exporting beam profiles.
     :param control: The controls.
@@ -33,6 +39,17 @@ def export_beam_profile(control: MainControl,
     :param ax_pulse: For export to an already existing beam profile.
     :param z_coordinate: The z coordinate of existing profiles.
     :param step: The step number. Used to indicate profile index.
+    :param lateral_offset: Index (x, y) of the first point of the wave field in the profiles.
+        Used when the wave field is given on a sub-grid of control.domain.
+    :param time_offset: Index of the first sample of the wave field in the axial pulse.
+        Used when the wave field is given on a sub-window of control.domain. The RMS is
+        always taken over the full window.
+    :param position: The position of the wave field. Default is the current position of the
+        state. Used when the planes are exported in any order. Either the position or the
+        state must be given.
+    :param resolution_t: Sampling interval of the wave field. Default is given by
+        control.signal. The axial pulse is resampled to the sampling interval of control.signal.
+    :param state: The state of the run, giving the position of the wave field.
     :return:
         Temporal RMS beam profile for all frequencies. The profile has
             dimensions (ny * nx * np+1 * num_harm), possibly with ny as singleton dimension.
@@ -49,7 +66,11 @@ def export_beam_profile(control: MainControl,
     file_name = control.simulation_name
 
     history = control.history
-    position = control.simulation.current_position
+    if position is None:
+        if state is None:
+            raise ValueError('The position of the wave field is given by neither the position '
+                             'nor the state')
+        position = state.current_position
     file_name = '{}{}.json'.format(file_name, _get_string_position(position * 1e3))
 
     # stores full field or exits
@@ -66,7 +87,8 @@ def export_beam_profile(control: MainControl,
     center_channel = control.transducer.center_channel.astype(int)
 
     transmit_frequency = control.signal.transmit_frequency
-    resolution_t = control.signal.resolution_t
+    if resolution_t is None:
+        resolution_t = control.signal.resolution_t
     filter = control.signal.filter
 
     # initializing profiles
@@ -83,6 +105,9 @@ def export_beam_profile(control: MainControl,
         num_points_y = 1
     else:
         num_points_t, num_points_y, num_points_x = wave_field.shape
+    # number of samples of the full time window on the temporal grid of the wave field
+    num_points_window = int(round(control.domain.num_points_t * control.signal.resolution_t /
+                                  resolution_t))
     if step is None:
         num_periods = 0
         _z_coordinate = 0
@@ -99,20 +124,35 @@ def export_beam_profile(control: MainControl,
     elif history is PLANE_BY_CHANNEL_HISTORY:
         raise NotImplementedError
     elif history is PROFILE_HISTORY:
-        if num_dimensions == 2:
-            _ax_pulse[:, num_periods] = wave_field[:, center_channel[0, ...]]
+        # remap the wave field to the grid of the profiles
+        offset_x, offset_y = lateral_offset
+        index_y = slice(offset_y, offset_y + num_points_y)
+        index_x = slice(offset_x, offset_x + num_points_x)
+        channel_x = int(center_channel[0]) - offset_x
+        channel_y = int(center_channel[1]) - offset_y if num_dimensions == 3 else 0
+        if 0 <= channel_x < num_points_x and 0 <= channel_y < num_points_y:
+            _ax_pulse[:, num_periods] = 0.0
+            if num_dimensions == 2:
+                pulse = wave_field[:, channel_x]
+            else:
+                pulse = wave_field[:, channel_y, channel_x]
+            if num_points_window != control.domain.num_points_t:
+                pulse = resample(pulse, control.domain.num_points_t)
+            _ax_pulse[time_offset:time_offset + pulse.size, num_periods] = pulse
         else:
-            _ax_pulse[:, num_periods] = wave_field[:, center_channel[1], center_channel[0, ...]]
+            _ax_pulse[:, num_periods] = 0.0
 
         if num_periods == 0:
             _rms_profile = numpy.zeros_like(_rms_profile)
             _max_profile = numpy.zeros_like(_max_profile)
 
         wave_field = wave_field.reshape((num_points_t, num_points_x * num_points_y))
-        _rms = _get_rms(wave_field)
+        _rms = _get_rms(wave_field, num_points_t=num_points_window)
         _max = _get_max(wave_field)
-        _rms_profile[..., num_periods, 0] = _rms.reshape((num_points_y, num_points_x))
-        _max_profile[..., num_periods, 0] = _max.reshape((num_points_y, num_points_x))
+        _rms_profile[index_y, index_x, num_periods, 0] = _rms.reshape((num_points_y,
+                                                                       num_points_x))
+        _max_profile[index_y, index_x, num_periods, 0] = _max.reshape((num_points_y,
+                                                                       num_points_x))
         _z_coordinate[num_periods] = position
 
         # filtering out harmonics
@@ -124,18 +164,56 @@ def export_beam_profile(control: MainControl,
                                      resolution_t,
                                      index * transmit_frequency * filter[harmonic_index],
                                      4)
-            _rms = _get_rms(wave_field)
+            _rms = _get_rms(wave_field, num_points_t=num_points_window)
             _max = _get_max(wave_field)
-            _rms_profile[..., num_periods, harmonic_index + 1] = _rms.reshape((num_points_y,
-                                                                               num_points_x))
-            _max_profile[..., num_periods, harmonic_index + 1] = _max.reshape((num_points_y,
-                                                                               num_points_x))
+            _rms_profile[index_y, index_x, num_periods, harmonic_index + 1] = \
+                _rms.reshape((num_points_y, num_points_x))
+            _max_profile[index_y, index_x, num_periods, harmonic_index + 1] = \
+                _max.reshape((num_points_y, num_points_x))
     elif history is PLANE_HISTORY:
         raise NotImplementedError
 
     return _rms_profile, _max_profile, _ax_pulse, _z_coordinate
 
 
+def export_step_profiles(control: MainControl,
+                         wave_field: numpy.ndarray,
+                         position: float,
+                         lateral_offset: Tuple[int, int] = (0, 0),
+                         time_offset: int = 0,
+                         resolution_t: Optional[float] = None) \
+        -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Exports the beam profiles of one step to new arrays, one row of the profiles of
+    export_beam_profile. Used when the steps are streamed, see simulation_steps.
+    :param control: The controls.
+    :param wave_field: The wave field of the step.
+    :param position: The position of the wave field.
+    :param lateral_offset: Index (x, y) of the first point of the wave field in the profiles.
+    :param time_offset: Index of the first sample of the wave field in the axial pulse.
+    :param resolution_t: Sampling interval of the wave field. Default is given by
+        control.signal.
+    :return: The RMS profile (ny * nx * num_harm),
+             The maximum profile (ny * nx * num_harm),
+             The axial pulse (nt).
+    """
+    shape = (control.domain.num_points_y, control.domain.num_points_x, 1, control.harmonic + 1)
+    rms_profile, max_profile, ax_pulse, _ = \
+        export_beam_profile(control,
+                            wave_field,
+                            numpy.zeros(shape),
+                            numpy.zeros(shape),
+                            numpy.zeros((control.domain.num_points_t, 1)),
+                            numpy.zeros(1),
+                            0,
+                            lateral_offset,
+                            time_offset,
+                            position=position,
+                            resolution_t=resolution_t)
+
+    return rms_profile[:, :, 0], max_profile[:, :, 0], ax_pulse[:, 0]
+
+
 def _get_max(wave_field: numpy.ndarray,
              envelope_flag: bool = True) -> numpy.ndarray:
     """
@@ -153,16 +231,19 @@ def _get_max(wave_field: numpy.ndarray,
 
 
 def _get_rms(wave_field,
-             scale_flag: bool = True):
+             scale_flag: bool = True,
+             num_points_t: Optional[int] = None):
     """
     Returns the RMS pressure profile of a signal.
     :param wave_field: The wave field.
     :param scale_flag: Flag specifying to use the RMS (sqrt(1/N*sum(pulse^2))
         or root of SOS (sqrt(sum(pulse^2)).
+    :param num_points_t: The number of samples N of the RMS. Default is the number of samples
+        of the wave field. Samples outside of the wave field are zero.
     :return: The RMS pressure profile of a signal
     """
     if scale_flag:
-        n = wave_field.shape[0]
+        n = wave_field.shape[0] if num_points_t is None else num_points_t
         rms_pressure_profile = numpy.sqrt(1 / n * numpy.sum(wave_field ** 2, axis=0))
     else:
         rms_pressure_profile = numpy.sqrt(numpy.sum(wave_field ** 2, axis=0))
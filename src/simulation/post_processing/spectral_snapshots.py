@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+    spectral_snapshots.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import math
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.simulation_step import SimulationStep
+
+
+class SpectralSnapshots:
+    """
+    Compact record of the temporal spectra of the wave field of each step of a simulation, for
+    harmonic filtering after the simulation. Only the frequency bins up to the band of the
+    highest harmonic and the points in a region of interest are kept. get_profiles rebuilds the RMS
+    and maximum profiles of export_beam_profile for any filter settings, several settings at a
+    time, without propagating again.
+    The snapshots are recorded from the steps of simulation_steps, see add.
+    """
+
+    def __init__(self,
+                 transmit_frequency: float,
+                 filter: Sequence[float],
+                 num_points: Tuple[int, int, int],
+                 resolution_t: float,
+                 region: Optional[Tuple] = None,
+                 num_harmonics: Optional[int] = None,
+                 band_margin: float = 1.0,
+                 dtype: type = numpy.complex64):
+        """
+        Constructor
+        :param transmit_frequency: The transmit frequency.
+        :param filter: The relative bandwidth of the filter of each harmonic, as given by
+            control.signal.filter. Used as the default filter of get_profiles.
+        :param num_points: Number of points (x, y, t) of the domain.
+        :param resolution_t: Sampling interval of the time window of the domain.
+        :param region: Indexes (y, x), slices or arrays, of the points of the region of interest
+            in the lateral grid of the domain. Default is all points.
+        :param num_harmonics: The number of harmonics kept. Default is one for each filter.
+        :param band_margin: Width of the band kept above the highest harmonic, relative to the
+            transmit frequency. The bins above the band are assumed to be removed by the
+            filters.
+        :param dtype: Type of the stored spectra.
+        """
+        num_points_x, num_points_y, num_points_t = num_points
+        if region is None:
+            region = (slice(None), slice(None))
+        self._transmit_frequency = transmit_frequency
+        self._filter = numpy.array(filter, dtype=float)
+        self._num_points = (num_points_x, num_points_y, num_points_t)
+        self._resolution_t = resolution_t
+        self._index_y = numpy.arange(num_points_y)[region[0]]
+        self._index_x = numpy.arange(num_points_x)[region[1]]
+        self._num_harmonics = self._filter.size if num_harmonics is None else num_harmonics
+        self._band_margin = band_margin
+        self._dtype = dtype
+
+        # one entry for each step
+        self._positions: List[float] = []
+        self._spectra: List[numpy.ndarray] = []
+        self._frequency_indexes: List[numpy.ndarray] = []
+        self._num_points_t: List[int] = []
+        self._step_resolution_t: List[float] = []
+
+    @classmethod
+    def from_control(cls,
+                     control: MainControl,
+                     region: Optional[Tuple] = None,
+                     num_harmonics: Optional[int] = None,
+                     band_margin: float = 1.0,
+                     dtype: type = numpy.complex64) -> 'SpectralSnapshots':
+        """
+        Returns empty snapshots of a simulation. See the constructor for the parameters.
+        :param control: The controls of the simulation.
+        :return: The snapshots.
+        """
+        return cls(control.signal.transmit_frequency,
+                   control.signal.filter,
+                   (control.domain.num_points_x,
+                    control.domain.num_points_y,
+                    control.domain.num_points_t),
+                   control.signal.resolution_t,
+                   region,
+                   control.harmonic if num_harmonics is None else num_harmonics,
+                   band_margin,
+                   dtype)
+
+    @classmethod
+    def load(cls, file_name: str) -> 'SpectralSnapshots':
+        """
+        Reads snapshots written by save.
+        :param file_name: The file name.
+        :return: The snapshots.
+        """
+        with numpy.load(file_name) as file:
+            positions = file['positions']
+            snapshots = cls(float(file['transmit_frequency']),
+                            file['filter'],
+                            tuple(int(num_points) for num_points in file['num_points']),
+                            float(file['resolution_t']),
+                            (file['index_y'], file['index_x']),
+                            int(file['num_harmonics']),
+                            float(file['band_margin']),
+                            file['spectrum_dtype'].dtype.type)
+            for index, position in enumerate(positions):
+                snapshots.append(float(position),
+                                 file['spectrum_{}'.format(index)],
+                                 file['frequency_indexes_{}'.format(index)],
+                                 int(file['num_points_t'][index]),
+                                 float(file['step_resolution_t'][index]))
+
+        return snapshots
+
+    def save(self, file_name: str):
+        """
+        Writes the snapshots to a numpy .npz file.
+        :param file_name: The file name.
+        """
+        arrays = {'transmit_frequency': self._transmit_frequency,
+                  'filter': self._filter,
+                  'num_points': self._num_points,
+                  'resolution_t': self._resolution_t,
+                  'index_y': self._index_y,
+                  'index_x': self._index_x,
+                  'num_harmonics': self._num_harmonics,
+                  'band_margin': self._band_margin,
+                  'spectrum_dtype': numpy.zeros(0, dtype=self._dtype),
+                  'positions': self._positions,
+                  'num_points_t': self._num_points_t,
+                  'step_resolution_t': self._step_resolution_t}
+        for index, (spectrum, frequency_indexes) in enumerate(zip(self._spectra,
+                                                                  self._frequency_indexes)):
+            arrays['spectrum_{}'.format(index)] = spectrum
+            arrays['frequency_indexes_{}'.format(index)] = frequency_indexes
+        numpy.savez(file_name, **arrays)
+
+    def add(self, step: SimulationStep):
+        """
+        Records the spectrum of the wave field of a step.
+        :param step: The step, see simulation_steps. The wave field is taken on the grid of the
+            step, given by its lateral offset and sampling interval.
+        """
+        wave_field = step.wave_field
+        if wave_field.size == 0:
+            raise ValueError('Step {} is restored from a checkpoint and has no wave field. '
+                             'Run the simulation with use_cache=False'.format(step.step))
+        num_points_t = wave_field.shape[0]
+        wave_field = wave_field.reshape((num_points_t, -1, wave_field.shape[-1]))
+
+        # the region on the lateral grid of the step
+        offset_x, offset_y = step.lateral_offset
+        index_y = self._index_y - offset_y
+        index_x = self._index_x - offset_x
+        inside_y = numpy.flatnonzero((index_y >= 0) & (index_y < wave_field.shape[1]))
+        inside_x = numpy.flatnonzero((index_x >= 0) & (index_x < wave_field.shape[2]))
+
+        frequency_indexes = self._get_band(num_points_t, step.resolution_t)
+        spectrum = numpy.zeros((frequency_indexes.size, self._index_y.size, self._index_x.size),
+                               dtype=self._dtype)
+        if inside_y.size > 0 and inside_x.size > 0:
+            region = wave_field[:, index_y[inside_y]][:, :, index_x[inside_x]]
+            spectrum[:, inside_y[:, numpy.newaxis], inside_x] = \
+                numpy.fft.rfft(region, axis=0)[frequency_indexes]
+        self.append(step.position, spectrum, frequency_indexes, num_points_t, step.resolution_t)
+
+    def record(self, steps):
+        """
+        Records the steps of a simulation while passing them on.
+        :param steps: The steps, e.g. simulation_steps(control, wave_field, use_cache=False).
+        :return: Iterator over the steps.
+        """
+        for step in steps:
+            self.add(step)
+            yield step
+
+    def get_profiles(self,
+                     filter: Optional[Union[Sequence[float], numpy.ndarray]] = None,
+                     steepness: Union[float, numpy.ndarray] = 4.0,
+                     attenuation: Union[float, numpy.ndarray] = -6.0,
+                     cascade: bool = True) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Rebuilds the profiles of the steps for filter settings, see bandpass. The RMS is found
+        by Parseval's theorem from the filtered spectrum and the maximum of the envelope from
+        the analytic signal of the filtered spectrum, as export_beam_profile does in time.
+        :param filter: The relative bandwidth of the filter of each harmonic, as
+            control.signal.filter. Either one setting (num_harm) or a batch of settings
+            (num_settings * num_harm). An infinite bandwidth passes the field in the kept band.
+            Default is the filter of the simulation.
+        :param steepness: The steepness of the filters. Either one value, or one value for each
+            setting.
+        :param attenuation: Attenuation (dB) of the filters at the bandwidth. Either one value,
+            or one value for each setting.
+        :param cascade: Flag for filtering each harmonic from the field filtered for the harmonic
+            below, as export_beam_profile does. If False, each harmonic is filtered from the
+            field.
+        :return: The RMS profile (ny * nx * num_steps * num_harm+1),
+                 The maximum profile (ny * nx * num_steps * num_harm+1).
+            The lateral dimensions follow the region. The index of the harmonic-dimension gives
+            the n'th harmonic profile, with 0 as the field in the kept band. A batch of
+            settings adds a first dimension num_settings.
+        """
+        _filter = self._filter if filter is None else numpy.asarray(filter, dtype=float)
+        batch = _filter.ndim == 2
+        _filter = numpy.atleast_2d(_filter)
+        num_settings, num_harmonics = _filter.shape
+        if num_harmonics > self._num_harmonics:
+            raise ValueError('{} harmonics are filtered, but {} are kept'
+                             .format(num_harmonics, self._num_harmonics))
+        _steepness = numpy.broadcast_to(numpy.asarray(steepness, dtype=float), (num_settings,))
+        _attenuation = numpy.broadcast_to(numpy.asarray(attenuation, dtype=float),
+                                          (num_settings,))
+
+        shape = (num_settings, self._index_y.size, self._index_x.size, len(self._spectra),
+                 num_harmonics + 1)
+        rms_profile = numpy.zeros(shape)
+        max_profile = numpy.zeros(shape)
+        num_points_window = self._num_points[2] * self._resolution_t
+        for index, (spectrum, frequency_indexes, num_points_t, resolution_t) in \
+                enumerate(zip(self._spectra, self._frequency_indexes, self._num_points_t,
+                              self._step_resolution_t)):
+            frequencies = frequency_indexes / (num_points_t * resolution_t)
+            response = self._get_response(frequencies,
+                                          _filter,
+                                          _steepness,
+                                          _attenuation,
+                                          cascade)
+
+            # weights of the one-sided spectrum, also of the analytic signal of hilbert
+            weights = numpy.where((frequency_indexes == 0) |
+                                  (2 * frequency_indexes == num_points_t), 1.0, 2.0)
+            filtered = response[:, :, :, numpy.newaxis, numpy.newaxis] * spectrum
+
+            # the RMS over the full time window of the domain
+            energy = numpy.einsum('f,shfyx->shyx', weights, numpy.abs(filtered) ** 2) / \
+                num_points_t
+            _num_points_window = int(round(num_points_window / resolution_t))
+            rms_profile[:, :, :, index] = numpy.moveaxis(numpy.sqrt(energy / _num_points_window),
+                                                         1, -1)
+
+            analytic = numpy.zeros(filtered.shape[:2] + (num_points_t,) + filtered.shape[3:],
+                                   dtype=complex)
+            analytic[:, :, frequency_indexes] = weights[:, numpy.newaxis, numpy.newaxis] * filtered
+            envelope = numpy.abs(numpy.fft.ifft(analytic, axis=2))
+            max_profile[:, :, :, index] = numpy.moveaxis(numpy.max(envelope, axis=2), 1, -1)
+
+        if not batch:
+            return rms_profile[0], max_profile[0]
+
+        return rms_profile, max_profile
+
+    def _get_band(self, num_points_t: int, resolution_t: float) -> numpy.ndarray:
+        """
+        Returns the indexes of the bins of the one-sided spectrum up to the band of the highest
+        harmonic.
+        """
+        frequencies = numpy.fft.rfftfreq(num_points_t, resolution_t) / self._transmit_frequency
+
+        return numpy.flatnonzero(frequencies <= self._num_harmonics + self._band_margin)
+
+    def _get_response(self,
+                      frequencies: numpy.ndarray,
+                      filter: numpy.ndarray,
+                      steepness: numpy.ndarray,
+                      attenuation: numpy.ndarray,
+                      cascade: bool) -> numpy.ndarray:
+        """
+        Returns the frequency response (num_settings * num_harm+1 * num_bins) of the filters of
+        bandpass, with ones for the field at index 0.
+        """
+        num_settings, num_harmonics = filter.shape
+        response = numpy.ones((num_settings, num_harmonics + 1, frequencies.size))
+        alpha = numpy.log(10 ** (attenuation / 20.0))
+        for harmonic_index in range(num_harmonics):
+            center_frequency = (harmonic_index + 1) * self._transmit_frequency
+            bandwidth = center_frequency * filter[:, harmonic_index]
+            _response = numpy.exp(alpha[:, numpy.newaxis] *
+                                  (numpy.abs(frequencies - center_frequency) /
+                                   (bandwidth[:, numpy.newaxis] / 2.0)) **
+                                  steepness[:, numpy.newaxis])
+            _response[bandwidth == math.inf] = 1.0
+            if cascade:
+                _response = _response * response[:, harmonic_index]
+            response[:, harmonic_index + 1] = _response
+
+        return response
+
+    def append(self,
+               position: float,
+               spectrum: numpy.ndarray,
+               frequency_indexes: numpy.ndarray,
+               num_points_t: int,
+               resolution_t: float):
+        """
+        Records the spectrum of a step.
+        :param position: The position of the step.
+        :param spectrum: The one-sided spectrum (num_bins * ny * nx) of the wave field in the
+            region of interest.
+        :param frequency_indexes: Indexes of the bins of the spectrum.
+        :param num_points_t: Number of points in time of the wave field.
+        :param resolution_t: Sampling interval of the wave field.
+        """
+        self._positions.append(position)
+        self._spectra.append(spectrum)
+        self._frequency_indexes.append(frequency_indexes)
+        self._num_points_t.append(num_points_t)
+        self._step_resolution_t.append(resolution_t)
+
+    @property
+    def positions(self) -> numpy.ndarray:
+        return numpy.array(self._positions)
+
+    @property
+    def num_steps(self) -> int:
+        return len(self._spectra)
+
+    @property
+    def spectra(self) -> List[numpy.ndarray]:
+        return self._spectra
+
+    @property
+    def frequency_indexes(self) -> List[numpy.ndarray]:
+        return self._frequency_indexes
+
+    @property
+    def num_harmonics(self) -> int:
+        return self._num_harmonics
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the stored spectra in bytes.
+        """
+        return sum(spectrum.nbytes for spectrum in self._spectra)
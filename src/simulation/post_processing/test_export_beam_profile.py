@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+    test_export_beam_profile.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.post_processing.export_beam_profile import export_beam_profile
+
+
+class TestExportBeamProfile(unittest.TestCase):
+    def setUp(self):
+        self.control = get_test_control('test_export_beam_profile')
+        num_points_x = self.control.domain.num_points_x
+        num_points_t = self.control.domain.num_points_t
+        shape = (1, num_points_x, 2, self.control.harmonic + 1)
+        self.wave_field = numpy.zeros((num_points_t, num_points_x))
+        self.profiles = (numpy.zeros(shape),
+                         numpy.zeros(shape),
+                         numpy.zeros((num_points_t, 2)),
+                         numpy.zeros(2))
+
+    def test_position_of_the_state(self):
+        state = SimulationState(self.control)
+        state.current_position = 0.0125
+        _, _, _, z_coordinate = export_beam_profile(self.control,
+                                                    self.wave_field,
+                                                    *self.profiles,
+                                                    step=1,
+                                                    state=state)
+        self.assertEqual(0.0125, z_coordinate[1])
+
+        _, _, _, z_coordinate = export_beam_profile(self.control,
+                                                    self.wave_field,
+                                                    *self.profiles,
+                                                    step=1,
+                                                    position=0.02,
+                                                    state=state)
+        self.assertEqual(0.02, z_coordinate[1])
+
+    def test_position_is_required(self):
+        with self.assertRaises(ValueError):
+            export_beam_profile(self.control, self.wave_field, *self.profiles, step=1)
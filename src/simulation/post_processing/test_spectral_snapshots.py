@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+    test_spectral_snapshots.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.filter.bandpass import bandpass
+from simulation.post_processing.spectral_snapshots import SpectralSnapshots
+from simulation.simulation import simulation, simulation_steps
+from simulation.simulation_step import SimulationStep
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control():
+    return get_test_control('test_spectral_snapshots',
+                            non_linearity=True,
+                            harmonic=2,
+                            end_point=0.005)
+
+
+def _get_rms(wave_field):
+    return numpy.sqrt(numpy.mean(wave_field ** 2, axis=0))
+
+
+class TestSpectralSnapshots(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.control = _get_control()
+        wave_field, _ = pulse_generator(cls.control, 'transducer')
+        cls.expected = simulation(cls.control, wave_field, use_cache=False)
+        cls.snapshots = SpectralSnapshots.from_control(cls.control)
+        cls.region = (slice(None), slice(100, 200))
+        cls.region_snapshots = SpectralSnapshots.from_control(cls.control, cls.region)
+        cls.wave_field = None
+        steps = simulation_steps(cls.control, wave_field, use_cache=False)
+        for step in cls.region_snapshots.record(cls.snapshots.record(steps)):
+            cls.wave_field = numpy.array(step.wave_field)
+
+    def test_profiles_of_the_simulation(self):
+        rms_profile, max_profile = self.snapshots.get_profiles()
+        self.assertEqual(self.expected[1].shape, rms_profile.shape)
+        self.assertEqual(self.expected[2].shape, max_profile.shape)
+        numpy.testing.assert_allclose(self.expected[4], self.snapshots.positions)
+        for harmonic in (1, 2):
+            numpy.testing.assert_allclose(rms_profile[..., harmonic],
+                                          self.expected[1][..., harmonic],
+                                          rtol=0,
+                                          atol=1e-6 * self.expected[1][..., harmonic].max())
+            numpy.testing.assert_allclose(max_profile[..., harmonic],
+                                          self.expected[2][..., harmonic],
+                                          rtol=0,
+                                          atol=1e-6 * self.expected[2][..., harmonic].max())
+
+    def test_filters_of_the_last_step(self):
+        filter = numpy.array([0.6, 0.3])
+        rms_profile, _ = self.snapshots.get_profiles(filter, 6.0, cascade=False)
+        transmit_frequency = self.control.signal.transmit_frequency
+        for harmonic in (1, 2):
+            filtered, _ = bandpass(self.wave_field.reshape((self.wave_field.shape[0], -1)),
+                                   numpy.array([harmonic * transmit_frequency]),
+                                   self.control.signal.resolution_t,
+                                   harmonic * transmit_frequency * filter[harmonic - 1],
+                                   6.0)
+            expected = _get_rms(filtered).ravel()
+            numpy.testing.assert_allclose(rms_profile[0, :, -1, harmonic],
+                                          expected,
+                                          rtol=0,
+                                          atol=1e-6 * expected.max())
+
+    def test_batch_of_filters(self):
+        filters = numpy.array([[0.5, 0.3], [0.8, 0.2], [0.4, numpy.inf]])
+        steepness = numpy.array([4.0, 2.0, 8.0])
+        rms_profiles, max_profiles = self.snapshots.get_profiles(filters, steepness)
+        self.assertEqual((3,) + self.expected[1].shape, rms_profiles.shape)
+        for filter, _steepness, rms_profile, max_profile in zip(filters, steepness,
+                                                                rms_profiles, max_profiles):
+            expected = self.snapshots.get_profiles(filter, _steepness)
+            numpy.testing.assert_allclose(expected[0], rms_profile)
+            numpy.testing.assert_allclose(expected[1], max_profile)
+
+        # an infinite bandwidth passes the harmonic below
+        numpy.testing.assert_allclose(rms_profiles[2, ..., 1], rms_profiles[2, ..., 2])
+
+        with self.assertRaises(ValueError):
+            self.snapshots.get_profiles([0.5, 0.3, 0.2])
+
+    def test_region_of_interest(self):
+        rms_profile, max_profile = self.snapshots.get_profiles()
+        region_rms_profile, region_max_profile = self.region_snapshots.get_profiles()
+        self.assertEqual((1, 100) + rms_profile.shape[2:], region_rms_profile.shape)
+        numpy.testing.assert_allclose(rms_profile[self.region], region_rms_profile)
+        numpy.testing.assert_allclose(max_profile[self.region], region_max_profile)
+        self.assertLess(self.region_snapshots.size, self.snapshots.size)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'snapshots.npz')
+            self.region_snapshots.save(file_name)
+            snapshots = SpectralSnapshots.load(file_name)
+
+        self.assertEqual(self.region_snapshots.num_steps, snapshots.num_steps)
+        self.assertEqual(self.region_snapshots.num_harmonics, snapshots.num_harmonics)
+        numpy.testing.assert_array_equal(self.region_snapshots.positions, snapshots.positions)
+        for expected, profile in zip(self.region_snapshots.get_profiles([0.7, 0.4]),
+                                     snapshots.get_profiles([0.7, 0.4])):
+            numpy.testing.assert_array_equal(expected, profile)
+
+    def test_restored_step(self):
+        step = SimulationStep(3,
+                              10,
+                              0.003,
+                              self.wave_field[:0],
+                              (numpy.zeros((1, 4, 3)), numpy.zeros((1, 4, 3)), numpy.zeros(8)),
+                              0.0,
+                              0.0,
+                              resolution_t=self.control.signal.resolution_t,
+                              restored=True)
+        with self.assertRaises(ValueError):
+            SpectralSnapshots.from_control(self.control).add(step)
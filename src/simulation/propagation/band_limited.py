@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+    band_limited.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Optional
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
+from simulation.get_wave_numbers import get_wave_numbers
+
+
+def find_frequency_band(wave_field: numpy.ndarray,
+                        threshold: float = -60.0) -> numpy.ndarray:
+    """
+    Function that finds the occupied temporal frequency band of a real wave field.
+    The band is the contiguous range of non-negative frequency bins from the first to the last
+    bin whose energy, summed over space, is within threshold dB of the strongest bin.
+    :param wave_field: The real wave field. Either (nt, nx) or (nt, ny, nx).
+    :param threshold: Threshold in dB relative to the strongest bin.
+    :return: Indexes of the frequency bins of the band in FFT order.
+    """
+    num_points_t = wave_field.shape[0]
+    spectrum = numpy.fft.rfft(wave_field.reshape((num_points_t, -1)), axis=0)
+    energy = numpy.sum(numpy.abs(spectrum) ** 2, axis=1)
+    if numpy.max(energy) <= 0.0:
+        return numpy.arange(energy.size)
+
+    occupied = numpy.nonzero(energy >= numpy.max(energy) * 10.0 ** (threshold / 10.0))[0]
+
+    return numpy.arange(occupied[0], occupied[-1] + 1)
+
+
+def to_band_spectrum(wave_field: numpy.ndarray,
+                     frequency_indexes: numpy.ndarray) -> numpy.ndarray:
+    """
+    Transforms a real wave field to its angular spectrum in the frequency band.
+    :param wave_field: The real wave field. Either (nt, nx) or (nt, ny, nx).
+    :param frequency_indexes: Indexes of the frequency bins of the band.
+    :return: The spectrum (nf, nx) or (nf, ny, nx) over temporal and spatial frequencies.
+    """
+    spectrum = numpy.fft.rfft(wave_field, axis=0)[frequency_indexes]
+    spatial_axes = tuple(range(1, wave_field.ndim))
+
+    return numpy.fft.fftn(spectrum, axes=spatial_axes)
+
+
+def from_band_spectrum(spectrum: numpy.ndarray,
+                       frequency_indexes: numpy.ndarray,
+                       num_points_t: int,
+                       spatial_spectrum: bool = True) -> numpy.ndarray:
+    """
+    Reconstructs the real wave field from its spectrum in the frequency band. Bins outside the
+    band are zero.
+    :param spectrum: The spectrum (nf, nx) or (nf, ny, nx) of the band.
+    :param frequency_indexes: Indexes of the frequency bins of the band.
+    :param num_points_t: The number of samples in time.
+    :param spatial_spectrum: True if the spectrum is over spatial frequencies, False if it
+        is given in space.
+    :return: The real wave field (nt, nx) or (nt, ny, nx).
+    """
+    if spatial_spectrum:
+        spatial_axes = tuple(range(1, spectrum.ndim))
+        spectrum = numpy.fft.ifftn(spectrum, axes=spatial_axes)
+    full_spectrum = numpy.zeros((num_points_t // 2 + 1,) + spectrum.shape[1:], dtype=complex)
+    full_spectrum[frequency_indexes] = spectrum
+
+    return numpy.fft.irfft(full_spectrum, n=num_points_t, axis=0)
+
+
+def band_limited_propagate(control: MainControl,
+                           spectrum: numpy.ndarray,
+                           frequency_indexes: numpy.ndarray,
+                           num_points_t: int,
+                           equidistant_steps: bool,
+                           wave_numbers: Optional[numpy.ndarray] = None,
+                           state: Optional[SimulationState] = None) -> numpy.ndarray:
+    """
+    Function that handles linear propagation of the angular spectrum of a wave field in the
+    occupied frequency band. Only the bins of the band are multiplied by the wave number
+    operator, and no transforms are needed between the steps.
+    :param control: The controls.
+    :param spectrum: The spectrum (nf, nx) or (nf, ny, nx) of the band at position z.
+    :param frequency_indexes: Indexes of the frequency bins of the band.
+    :param num_points_t: The number of samples in time.
+    :param equidistant_steps: The flag specifying beam simulation with equidistant steps.
+    :param wave_numbers: The wave numbers of the band with one row for each bin.
+    :param state: The state of the run, giving the step size and the position, which is
+        updated. Default is a new state at the transducer.
+    :return: The spectrum of the band at position z + step_size.
+    """
+    if state is None:
+        state = SimulationState(control)
+    step_size = state.step_size
+    num_points_y, num_points_x = (1,) * (3 - spectrum.ndim) + spectrum.shape[1:]
+    if wave_numbers is None:
+        wave_numbers = get_wave_numbers(control,
+                                        equidistant_steps,
+                                        num_points=(num_points_x, num_points_y, num_points_t),
+                                        frequency_indexes=frequency_indexes,
+                                        state=state)
+
+    state.current_position = state.current_position + step_size
+
+    if equidistant_steps:
+        propagator = wave_numbers
+    else:
+        propagator = numpy.exp((-1j * step_size) * wave_numbers)
+
+    return spectrum * propagator.reshape(spectrum.shape)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+    difference_matrix.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import numpy
+import scipy.sparse
+
+
+def get_difference_stencil(num_order: int = 4,
+                           differential_order: int = 2) -> numpy.ndarray:
+    """
+    Returns weights for a central difference stencil.
+    :param num_order: Numerical order of the difference scheme.
+        Default is forth order central differencing.
+    :param differential_order: Differential order. Default is the stencil for the
+        second order differential. First order is possible.
+    :return: Difference stencil as a row vector.
+    """
+    if num_order not in (2, 4):
+        print('Unrecognized numerical order. Using fourth order differencing')
+        return get_difference_stencil(4, differential_order)
+
+    if differential_order == 1:
+        if num_order == 2:
+            difference_stencil = numpy.array([-1.0, 0.0, 1.0]) / 2.0
+        else:
+            difference_stencil = numpy.array([1.0, -8.0, 0.0, 8.0, -1.0]) / 12.0
+    elif differential_order == 2:
+        if num_order == 2:
+            difference_stencil = numpy.array([1.0, -2.0, 1.0])
+        else:
+            difference_stencil = numpy.array([-1.0, 16.0, -30.0, 16.0, -1.0]) / 12.0
+    else:
+        print('Unrecognized differential order, Using second order differential')
+        difference_stencil = get_difference_stencil(num_order, 2)
+
+    return difference_stencil
+
+
+def get_difference_matrix(num_points: int = 8,
+                          resolution: float = 1.0,
+                          order: int = 4,
+                          annular_transducer: bool = False,
+                          left_boundary: str = 'symmetric') -> scipy.sparse.csr_matrix:
+    """
+    The function returns a differencing matrix based on a finite difference
+    scheme of desired order. The laplacian may either be d^2/dx^2 or d^2/dr^2+1/r d/dr.
+    Points outside of the grid are zero, except at the left boundary of the radial laplacian.
+    :param num_points: Number of points. Default 8 for example purposes.
+    :param resolution: Resolution in space. Default is one for example purposes.
+    :param order: Numerical order of the difference scheme, 2 or 4.
+    :param annular_transducer: Flag for rotational symmetry. The radial laplacian is used on
+        the points r = i * resolution, where the first point is on the axis. On the axis the
+        laplacian is 2 * d^2/dr^2.
+    :param left_boundary: The left boundary of the radial laplacian may be either 'symmetric'
+        or 'reflective'. The outer (right) boundary is assumed to always be reflective.
+    :return: Difference matrix.
+    """
+    half_width = order // 2
+    offsets = numpy.arange(-half_width, half_width + 1)
+    stencil = get_difference_stencil(order, 2) / resolution ** 2
+    if annular_transducer:
+        r = numpy.arange(1, num_points) * resolution
+        first_stencil = get_difference_stencil(order, 1) / resolution
+        weights = numpy.zeros((num_points, offsets.size))
+        weights[0] = 2.0 * stencil
+        weights[1:] = stencil[numpy.newaxis, :] + \
+            first_stencil[numpy.newaxis, :] / r[:, numpy.newaxis]
+    else:
+        weights = numpy.repeat(stencil[numpy.newaxis, :], num_points, axis=0)
+
+    rows = numpy.repeat(numpy.arange(num_points), offsets.size)
+    columns = (numpy.arange(num_points)[:, numpy.newaxis] + offsets[numpy.newaxis, :]).reshape(-1)
+    weights = weights.reshape(-1)
+
+    # mirror the points left of r = 0, p(-r) = p(r)
+    if annular_transducer and left_boundary == 'symmetric':
+        columns = numpy.abs(columns)
+
+    inside = (columns >= 0) & (columns < num_points)
+    matrix = scipy.sparse.coo_matrix((weights[inside], (rows[inside], columns[inside])),
+                                     shape=(num_points, num_points))
+
+    return matrix.tocsr()
+
+
+def make_banded(matrix,
+                num_lower: int,
+                num_upper: int) -> numpy.ndarray:
+    """
+    Returns the diagonals of a matrix on LAPACK banded form, banded[num_upper + i - j, j] =
+    matrix[i, j].
+    :param matrix: Dense or sparse matrix to be treated.
+    :param num_lower: Number of sub-diagonals.
+    :param num_upper: Number of super-diagonals.
+    :return: The matrix on banded form.
+    """
+    _matrix = scipy.sparse.csr_matrix(matrix)
+    num_points = _matrix.shape[1]
+    banded = numpy.zeros((num_lower + num_upper + 1, num_points), dtype=_matrix.dtype)
+    for offset in range(-num_lower, num_upper + 1):
+        diagonal = _matrix.diagonal(offset)
+        if offset >= 0:
+            banded[num_upper - offset, offset:offset + diagonal.size] = diagonal
+        else:
+            banded[num_upper - offset, :diagonal.size] = diagonal
+
+    return banded
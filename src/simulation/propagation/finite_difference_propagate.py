@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+    finite_difference_propagate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Optional, Tuple
+
+import numpy
+import scipy.linalg.lapack
+import scipy.sparse
+from scipy.signal import hilbert
+
+from simulation.bounded_cache import BoundedCache
+from simulation.controls.consts import SCALE_FOR_SPATIAL_VARIABLES_Z, SCALE_FOR_TEMPORAL_VARIABLE
+from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
+from simulation.filter.get_frequencies import get_frequencies
+from simulation.propagation.difference_matrix import get_difference_matrix, make_banded
+
+# factorizations by (num_points, resolution, order, step_size, annular_transducer,
+# num_points_t, resolution_t, sound_speed)
+# the cache is shared by the runs of all threads
+_factorizations = BoundedCache(16)
+
+
+def finite_difference_propagate(control: MainControl,
+                                wave: numpy.ndarray,
+                                direction: int,
+                                resolution_t: Optional[float] = None,
+                                state: Optional[SimulationState] = None) -> numpy.ndarray:
+    """
+    Function that handles diffraction of 3D wave field in z-direction with the parabolic
+    approximation, dP/dz = -i / (2 * k) * laplacian(P) for each temporal frequency.
+    The laplacian is a banded finite difference matrix of order simulation.difference_order,
+    and the step is taken with the Crank-Nicolson scheme,
+    (I + i * dz / (4 * k) * A) P(z + dz) = (I - i * dz / (4 * k) * A) P(z).
+    The systems of all temporal frequencies are stacked into one banded system, which is
+    factorized once for each grid and step size and solved in one batch. In 3D the x and y
+    directions are solved in turn.
+    Frequency dependent attenuation is applied when propagation is linear.
+    :param control: The controls.
+    :param wave: Wave at position z. Either (nt, nx) or (nt, ny, nx).
+    :param direction: Direction of propagation.
+        1 - positive z-direction
+        -1 - negative z-direction
+    :param resolution_t: Sampling interval of the wave. Default is given by control.signal.
+    :param state: The state of the run, giving the step size. Default is the step size of
+        control.simulation.
+    :return: The resulting field after propagation.
+    """
+    num_points_t = wave.shape[0]
+    if resolution_t is None:
+        resolution_t = control.signal.resolution_t
+    step_size = control.simulation.step_size if state is None else state.step_size
+    step_size = numpy.sign(direction) * step_size
+    order = control.simulation.difference_order
+    sound_speed = control.material.material.sound_speed
+
+    _wave = numpy.fft.rfft(wave, axis=0)
+    if _wave.ndim == 2:
+        _wave = _wave[:, numpy.newaxis, :]
+    num_points_f, num_points_y, num_points_x = _wave.shape
+
+    # diffraction in x-direction, and then in y-direction
+    for axis, num_points, resolution in ((2, num_points_x, control.signal.resolution_x),
+                                         (1, num_points_y, control.signal.resolution_y)):
+        if num_points == 1:
+            continue
+        matrix, lu, pivots = get_crank_nicolson_factorization(num_points,
+                                                              resolution,
+                                                              order,
+                                                              step_size,
+                                                              control.annular_transducer,
+                                                              num_points_t,
+                                                              resolution_t,
+                                                              sound_speed)
+        # stack the frequencies along the solved direction
+        _wave = numpy.moveaxis(_wave, axis, 1)
+        other_shape = _wave.shape[2:]
+        _wave = _wave.reshape((num_points_f * num_points, -1))
+        _wave, info = scipy.linalg.lapack.zgbtrs(lu,
+                                                 order // 2,
+                                                 order // 2,
+                                                 matrix @ _wave,
+                                                 pivots)
+        _wave = _wave.reshape((num_points_f, num_points) + other_shape)
+        _wave = numpy.moveaxis(_wave, 1, axis)
+
+    # attenuation
+    if control.attenuation and control.non_linearity is False:
+        material = control.material.material
+        w = get_frequencies(num_points_t,
+                            resolution_t / (2.0 * numpy.pi * SCALE_FOR_TEMPORAL_VARIABLE))
+        loss = material.eps_a * numpy.conj(hilbert(numpy.abs(w) ** material.eps_b)) / \
+            SCALE_FOR_SPATIAL_VARIABLES_Z
+        attenuation = numpy.exp(-loss[:num_points_f] * abs(step_size))
+        _wave = _wave * attenuation[:, numpy.newaxis, numpy.newaxis]
+
+    return numpy.fft.irfft(_wave.reshape((num_points_f,) + wave.shape[1:]), num_points_t, axis=0)
+
+
+def get_crank_nicolson_factorization(num_points: int,
+                                     resolution: float,
+                                     order: int,
+                                     step_size: float,
+                                     annular_transducer: bool,
+                                     num_points_t: int,
+                                     resolution_t: float,
+                                     sound_speed: float) \
+        -> Tuple[scipy.sparse.csr_matrix, numpy.ndarray, numpy.ndarray]:
+    """
+    Returns the Crank-Nicolson step of the parabolic approximation for all non-negative
+    temporal frequencies as one stacked system, with index f * num_points + x. The explicit
+    half step is returned as a sparse matrix and the implicit half step as a banded LU
+    factorization. The factorizations are cached.
+    :param num_points: Number of points in the solved direction.
+    :param resolution: Resolution in the solved direction.
+    :param order: Numerical order of the difference scheme.
+    :param step_size: The step size.
+    :param annular_transducer: Flag for rotational symmetry.
+    :param num_points_t: Number of points in time.
+    :param resolution_t: Sampling interval.
+    :param sound_speed: The sound speed.
+    :return: The explicit half step (I - i * beta * A),
+             The LU factorization of (I + i * beta * A) on LAPACK banded form,
+             The pivot indexes of the factorization.
+    """
+    key = (num_points, resolution, order, step_size, annular_transducer,
+           num_points_t, resolution_t, sound_speed)
+
+    return _factorizations.get(key, lambda: _get_crank_nicolson_factorization(*key))
+
+
+def _get_crank_nicolson_factorization(num_points: int,
+                                      resolution: float,
+                                      order: int,
+                                      step_size: float,
+                                      annular_transducer: bool,
+                                      num_points_t: int,
+                                      resolution_t: float,
+                                      sound_speed: float) \
+        -> Tuple[scipy.sparse.csr_matrix, numpy.ndarray, numpy.ndarray]:
+    """
+    Builds the factorization, see get_crank_nicolson_factorization.
+    """
+    half_width = order // 2
+    difference_matrix = get_difference_matrix(num_points, resolution, order, annular_transducer)
+
+    # beta = dz / (4 * k), the zero frequency is not propagated
+    num_points_f = num_points_t // 2 + 1
+    k = 2.0 * numpy.pi / sound_speed * numpy.arange(num_points_f) / (num_points_t * resolution_t)
+    beta = numpy.zeros(num_points_f)
+    beta[1:] = step_size / (4.0 * k[1:])
+
+    identity = scipy.sparse.identity(num_points, format='csr')
+    explicit = scipy.sparse.block_diag([identity - 1j * b * difference_matrix for b in beta],
+                                       format='csr')
+
+    # stacked banded matrix, the blocks do not couple within the band
+    banded = make_banded(difference_matrix, half_width, half_width).astype(complex)
+    implicit = numpy.zeros((3 * half_width + 1, num_points_f * num_points), dtype=complex)
+    for index, b in enumerate(beta):
+        columns = slice(index * num_points, (index + 1) * num_points)
+        implicit[half_width:, columns] = 1j * b * banded
+        implicit[2 * half_width, columns] = implicit[2 * half_width, columns] + 1.0
+    lu, pivots, info = scipy.linalg.lapack.zgbtrf(implicit, half_width, half_width)
+    if info != 0:
+        raise ValueError('The Crank-Nicolson matrix is singular')
+
+    return explicit, lu, pivots
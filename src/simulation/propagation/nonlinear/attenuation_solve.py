@@ -19,20 +19,20 @@ def attenuation_solve(sample_points,
     """
     Imposing frequency dependent attenuation on the wave field.
     :param sample_points: Sampling points in time of the pulse.
-    :param pulse: The pulse given at sampling times.
-    :param resolution_z: Spatial step.
+    :param pulse: The pulse given at sampling times. Either (nt,) or (nt, num columns).
+    :param resolution_z: Spatial step. Either a scalar or one for each column.
     :param eps_a: Attenuation constant.
     :param eps_b: Attenuation exponent
     :return: The propagated pulse at sampling times.
     """
     resolution_t = sample_points[1] - sample_points[0]
     _pulse = numpy.array(pulse)
-    num_points_t = numpy.max(_pulse.shape)
+    num_points_t = _pulse.shape[0]
     loss = 2 * numpy.pi * get_frequencies(num_points_t, resolution_t)
 
     # prepare attenuation coefficients
-    loss = eps_a * numpy.conj(hilbert(numpy.abs(loss) ** eps_b)) * resolution_z
-    loss = numpy.exp(-loss)
+    loss = eps_a * numpy.conj(hilbert(numpy.abs(loss) ** eps_b))
+    loss = numpy.exp(-loss.reshape((num_points_t,) + (1,) * (_pulse.ndim - 1)) * resolution_z)
 
     pulse_f = numpy.fft.fftn(_pulse, axes=(0,))
     propagated_pulse_f = loss * pulse_f
@@ -15,19 +15,22 @@ def burgers_solve(time_span,
                   resolution_z):
     """
     Non-linear distortion of periodic pressure pulse with original time sampling.
+    The pulses may be given as the columns of a (nt x num columns) array, each with its own step
+    size.
     :param time_span: Scaled time span.
-    :param pressure: Pressure.
+    :param pressure: Pressure. Either (nt,) or (nt, num columns).
     :param permutation: Permutation to be introduced.
     :param eps_n: Coefficient of non-linearity.
-    :param resolution_z: Step size.
+    :param resolution_z: Step size. Either a scalar or one for each column.
     :return: Perturbed wave field.
     """
     num_points_t = numpy.max(time_span.shape)
     resolution_t = time_span[1] - time_span[0]
     num_points = (time_span[num_points_t - 1] - time_span[0]) + resolution_t
+    _time_span = time_span.reshape((num_points_t,) + (1,) * (pressure.ndim - 1))
 
     # introduce permutation
-    t2 = time_span - eps_n * resolution_z * permutation
+    t2 = _time_span - eps_n * resolution_z * permutation
 
     # extends by periodicity
     idt = int(numpy.floor(num_points_t / 10))
@@ -53,24 +56,32 @@ def _get_linear(time_span: numpy.ndarray,
                 equidistant_time_span: numpy.ndarray) -> numpy.ndarray:
     """
     Re-samples a not equidistant t1 with corresponding pressure values p1 to an equidistant time
-    span t2 through interpolation.
-    :param time_span: Perturbed monotonic time span
+    span t2 through interpolation. The columns of t1 and p1 are re-sampled together by offsetting
+    each column, so that all columns form one increasing sequence searched in one pass.
+    :param time_span: Perturbed monotonic time span. Either (n,) or (n, num columns).
     :param pressure_values: Pressure values at t1.
     :param equidistant_time_span: Equidistant monotonic time span.
     :return: Pressure values at t2
     """
-    num_t2 = numpy.max(equidistant_time_span.shape)
-    index_t2 = 2
+    shape = (equidistant_time_span.size,) + pressure_values.shape[1:]
+    num_points = time_span.shape[0]
+    _time_span = time_span.reshape((num_points, -1))
+    _pressure_values = pressure_values.reshape((num_points, -1))
+    num_columns = _pressure_values.shape[1]
+    _time_span = numpy.broadcast_to(_time_span, (num_points, num_columns))
 
-    pressure_values_t2 = []
-    for index in range(num_t2):
-        while equidistant_time_span[index] > time_span[index_t2]:
-            index_t2 = index_t2 + 1
-        index_t1 = index_t2 - 1
-        dp_dt = (pressure_values[index_t2] - pressure_values[index_t1]) / \
-                (time_span[index_t2] - time_span[index_t1])
-        pressure_values_t2.append(
-            pressure_values[index_t1] +
-            (equidistant_time_span[index] - time_span[index_t1]) * dp_dt)
+    width = max(numpy.max(_time_span), numpy.max(equidistant_time_span)) - \
+        min(numpy.min(_time_span), numpy.min(equidistant_time_span)) + 1.0
+    offsets = width * numpy.arange(num_columns)
+    indexes = numpy.searchsorted((_time_span + offsets).T.reshape(-1),
+                                 (equidistant_time_span[:, numpy.newaxis] + offsets).T,
+                                 side='left').T
+    indexes = numpy.clip(indexes - num_points * numpy.arange(num_columns), 2, num_points - 1)
 
-    return numpy.array(pressure_values_t2)
+    index_t1 = indexes - 1
+    t1 = numpy.take_along_axis(_time_span, index_t1, axis=0)
+    p1 = numpy.take_along_axis(_pressure_values, index_t1, axis=0)
+    dp_dt = (numpy.take_along_axis(_pressure_values, indexes, axis=0) - p1) / \
+            (numpy.take_along_axis(_time_span, indexes, axis=0) - t1)
+
+    return (p1 + (equidistant_time_span[:, numpy.newaxis] - t1) * dp_dt).reshape(shape)
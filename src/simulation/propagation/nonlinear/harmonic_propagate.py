@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+    harmonic_propagate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Optional
+
+import numpy
+from scipy.signal import hilbert
+
+from simulation.beam_simulation.get_absorbing_layer import get_absorbing_layer_damping
+from simulation.controls.consts import SCALE_FOR_SPATIAL_VARIABLES_Z, SCALE_FOR_TEMPORAL_VARIABLE
+from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
+from simulation.filter.get_frequencies import get_frequencies
+from simulation.get_wave_numbers import get_wave_numbers
+
+
+def harmonic_propagate(control: MainControl,
+                       wave: numpy.ndarray,
+                       direction: int,
+                       equidistant_steps: bool,
+                       wave_numbers=None,
+                       resolution_t: Optional[float] = None,
+                       state: Optional[SimulationState] = None) -> numpy.ndarray:
+    """
+    Handles weakly nonlinear propagation of 3D wave field in z-direction in the frequency
+    domain. Only the temporal frequency bins up to simulation.num_harmonics harmonics of the
+    transmit frequency are kept. Each sub-step applies the angular spectrum operator of the
+    kept bins, the quadratic coupling between the bins and the attenuation.
+    The coupling integrates the Burgers equation dp/dz = eps_n * p * dp/dt written in the
+    frequency domain, dP/dz = (eps_n / 2) * i * w * F[p^2], with a fourth order Runge-Kutta
+    step. The product p^2 is formed on a time grid just fine enough to avoid aliasing into the
+    kept bins, so no shock-limited sub-steps are taken.
+    :param control: The Controls.
+    :param wave: Wave at initial position.
+    :param direction: Direction of propagation.
+        1 - positive z-direction
+        -1 - negative z-direction
+    :param equidistant_steps: The flag specifying beam simulation with equidistant steps.
+    :param wave_numbers: 3D wave numbers. Default is given by the control with retarded time.
+    :param resolution_t: Sampling interval of the wave. Default is given by control.signal.
+    :param state: The state of the run, giving the step size. Default is a new state.
+    :return: The resulting field after propagation.
+    """
+    if state is None:
+        state = SimulationState(control)
+    # the grid is given by the wave, which may be a sub-grid of control.domain
+    num_points_t = wave.shape[0]
+    if wave.ndim == 3:
+        num_points_y, num_points_x = wave.shape[1:]
+    else:
+        num_points_y = 1
+        num_points_x = wave.shape[1]
+    spatial_axes = tuple(range(1, wave.ndim))
+    if resolution_t is None:
+        resolution_t = control.signal.resolution_t
+
+    # preparation of variables
+    material = control.material.material
+    if not material.is_regular:
+        raise NotImplementedError
+    step_size = state.step_size
+    num_sub_steps = int(numpy.ceil(step_size / control.signal.resolution_z))
+    resolution_z = step_size / num_sub_steps
+
+    # the kept frequency bins and the time grid of the quadratic term
+    frequency_indexes = get_harmonic_indexes(control, num_points_t, resolution_t)
+    num_bins = frequency_indexes.size
+    num_points_product = min(num_points_t, 3 * num_bins + 1 + (3 * num_bins + 1) % 2)
+    w = 2.0 * numpy.pi * frequency_indexes / \
+        (num_points_t * resolution_t / SCALE_FOR_TEMPORAL_VARIABLE)
+    w = w.reshape((num_bins,) + (1,) * (wave.ndim - 1))
+
+    # diffraction operator of the kept bins
+    if wave_numbers is None or wave_numbers.size == 0:
+        _wave_numbers = get_wave_numbers(control,
+                                         equidistant_steps,
+                                         num_points=(num_points_x, num_points_y, num_points_t),
+                                         frequency_indexes=frequency_indexes,
+                                         resolution_t=resolution_t,
+                                         state=state)
+    else:
+        _wave_numbers = wave_numbers[frequency_indexes, :num_points_x * num_points_y]
+    if not equidistant_steps:
+        _wave_numbers = numpy.exp((-1j * direction * resolution_z) * _wave_numbers)
+    elif direction < 0:
+        _wave_numbers = numpy.conj(_wave_numbers)
+    _wave_numbers = _wave_numbers.reshape((num_bins,) + wave.shape[1:])
+
+    # local attenuation and absorbing layer of one sub-step
+    attenuation = numpy.ones((num_bins,) + (1,) * (wave.ndim - 1))
+    if control.attenuation:
+        loss = 2.0 * numpy.pi * get_frequencies(num_points_t,
+                                                resolution_t / SCALE_FOR_TEMPORAL_VARIABLE)
+        loss = material.eps_a * numpy.conj(hilbert(numpy.abs(loss) ** material.eps_b))
+        loss = loss * resolution_z / SCALE_FOR_SPATIAL_VARIABLES_Z
+        attenuation = numpy.exp(-loss[frequency_indexes]).reshape(attenuation.shape)
+    if control.domain.perfect_matching_layer_width > 0:
+        damping = get_absorbing_layer_damping(control,
+                                              (num_points_x, num_points_y),
+                                              resolution_z,
+                                              state)
+        attenuation = attenuation * damping.reshape(wave.shape[1:])
+
+    eps_n = material.eps_n
+    coupling = direction * eps_n / 2.0 * (resolution_z / SCALE_FOR_SPATIAL_VARIABLES_Z) * 1j * w
+
+    def _get_derivative(spectrum):
+        pressure = numpy.fft.irfft(spectrum, num_points_product, axis=0) * \
+            (num_points_product / num_points_t)
+        squared = numpy.fft.rfft(pressure ** 2, axis=0)[:num_bins] * \
+            (num_points_t / num_points_product)
+        return coupling * squared
+
+    _spectrum = numpy.fft.rfft(wave, axis=0)[:num_bins]
+    for _ in range(num_sub_steps):
+        # diffraction
+        _spectrum = numpy.fft.ifftn(numpy.fft.fftn(_spectrum, axes=spatial_axes) * _wave_numbers,
+                                    axes=spatial_axes)
+
+        # quadratic coupling between the harmonics
+        if eps_n != 0.0:
+            k1 = _get_derivative(_spectrum)
+            k2 = _get_derivative(_spectrum + k1 / 2.0)
+            k3 = _get_derivative(_spectrum + k2 / 2.0)
+            k4 = _get_derivative(_spectrum + k3)
+            _spectrum = _spectrum + (k1 + 2.0 * k2 + 2.0 * k3 + k4) / 6.0
+
+        # attenuation and absorbing boundaries
+        _spectrum = _spectrum * attenuation
+
+    return numpy.fft.irfft(_spectrum, num_points_t, axis=0)
+
+
+def get_harmonic_indexes(control: MainControl,
+                         num_points_t: int,
+                         resolution_t: Optional[float] = None) -> numpy.ndarray:
+    """
+    Returns the indexes of the non-negative frequency bins up to half a transmit frequency above
+    the highest harmonic solved for, simulation.num_harmonics.
+    :param control: The controls.
+    :param num_points_t: Number of points in time.
+    :param resolution_t: Sampling interval. Default is given by control.signal.
+    :return: The indexes of the kept frequency bins.
+    """
+    if resolution_t is None:
+        resolution_t = control.signal.resolution_t
+    cutoff = (control.simulation.num_harmonics + 0.5) * control.signal.transmit_frequency
+    num_bins = int(numpy.ceil(cutoff * resolution_t * num_points_t)) + 1
+
+    return numpy.arange(min(num_bins, num_points_t // 2 + 1))
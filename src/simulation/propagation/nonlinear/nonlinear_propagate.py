@@ -5,11 +5,13 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
+from typing import Optional
+
 import numpy
-import scipy.sparse
 
 from simulation.controls.consts import SCALE_FOR_SPATIAL_VARIABLES_Z, SCALE_FOR_TEMPORAL_VARIABLE
 from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
 from simulation.get_wave_numbers import get_wave_numbers
 from simulation.propagation import propagate
 from simulation.propagation.nonlinear.attenuation_solve import attenuation_solve
@@ -17,6 +19,7 @@ from simulation.propagation.nonlinear.burgers_solve import burgers_solve
 from system.diffraction.diffraction import NoDiffraction, ExactDiffraction, \
     AngularSpectrumDiffraction, PseudoDifferential, \
     FiniteDifferenceTimeDifferenceReduced, FiniteDifferenceTimeDifferenceFull
+from system.material.material_map import MaterialMap
 from system.material.muscle import Muscle
 
 
@@ -27,7 +30,9 @@ def nonlinear_propagate(control: MainControl,
                         wave_numbers=None,
                         eps_n=None,
                         eps_a=None,
-                        eps_b=None):
+                        eps_b=None,
+                        resolution_t: Optional[float] = None,
+                        state: Optional[SimulationState] = None):
     """
     Handles nonlinear propagation of 3D wave field in z-direction
     using an operator splitting method.
@@ -42,44 +47,48 @@ def nonlinear_propagate(control: MainControl,
         Default is given by the material specified in the control.
     :param eps_a: Used to specify frequency dependant loss.
     :param eps_b: Used to specify frequency dependant loss.
+    :param resolution_t: Sampling interval of the wave. Default is given by control.signal.
+    :param state: The state of the run, giving the step size and the position.
+        Default is a new state at the transducer.
     :return: The resulting field after propagation.
     """
+    if state is None:
+        state = SimulationState(control)
+
+    # the grid is given by the wave, which may be a sub-grid of control.domain
+    num_points_t = wave.shape[0]
+    if wave.ndim == 3:
+        num_points_y, num_points_x = wave.shape[1:]
+    else:
+        num_points_y = 1
+        num_points_x = wave.shape[1]
+
+    if resolution_t is None:
+        resolution_t = control.signal.resolution_t
+
     # initialization
-    if wave_numbers is None:
-        _wave_numbers = get_wave_numbers(control, equidistant_steps)
+    if wave_numbers is None or wave_numbers.size == 0:
+        _wave_numbers = get_wave_numbers(control,
+                                         equidistant_steps,
+                                         num_points=(num_points_x, num_points_y, num_points_t),
+                                         resolution_t=resolution_t,
+                                         state=state)
     else:
         _wave_numbers = wave_numbers
 
-    if _wave_numbers.size == 0:
-        _wave_numbers = get_wave_numbers(control, equidistant_steps)
-
     # preparation of variables
     material = control.material.material
 
-    # scaling sound speed
-    sound_speed = material.sound_speed / SCALE_FOR_SPATIAL_VARIABLES_Z * SCALE_FOR_TEMPORAL_VARIABLE
     # scale sampling to micro seconds
-    resolution_t = control.signal.resolution_t / SCALE_FOR_TEMPORAL_VARIABLE
-    # resolution_x scaled to centimeter
-    resolution_x = control.signal.resolution_x / SCALE_FOR_SPATIAL_VARIABLES_Z
-    # resolution_y scaled to centimeter
-    resolution_y = control.signal.resolution_y / SCALE_FOR_SPATIAL_VARIABLES_Z
+    resolution_t = resolution_t / SCALE_FOR_TEMPORAL_VARIABLE
     # resolution_z scaled to centimeter
     resolution_z = control.signal.resolution_z / SCALE_FOR_SPATIAL_VARIABLES_Z
 
-    num_dimensions = control.num_dimensions
-    num_points_x = control.domain.num_points_x
-    num_points_y = control.domain.num_points_y
-    num_points_t = control.domain.num_points_t
-
-    annular_transducer = control.annular_transducer
     shock_step = control.simulation.shock_step
-    step_size = control.simulation.step_size
-    perfect_matching_layer_width = control.domain.perfect_matching_layer_width
+    step_size = state.step_size
 
     num_sub_steps = int(numpy.ceil((step_size / SCALE_FOR_SPATIAL_VARIABLES_Z) / resolution_z))
     resolution_z = (step_size / SCALE_FOR_SPATIAL_VARIABLES_Z) / num_sub_steps
-    d = (sound_speed / 2) * (resolution_t / 2) * resolution_z
     t_span = numpy.linspace(resolution_t,
                             num_points_t *
                             resolution_t + resolution_t,
@@ -90,35 +99,15 @@ def nonlinear_propagate(control: MainControl,
     non_linearity = control.non_linearity
     attenuation = control.attenuation
 
-    # prepare PML and FD matrices
-    if perfect_matching_layer_width > 0:
-        a = d * _get_difference_matrix(2 * perfect_matching_layer_width,
-                                       resolution_x,
-                                       4)
-
-    if diffraction_type == FiniteDifferenceTimeDifferenceReduced or \
-            diffraction_type == FiniteDifferenceTimeDifferenceFull:
-        if numpy.abs(_wave_numbers[4] - d) > 1e-12:
-            # find difference matrix A
-            ax = d * _get_difference_matrix(num_points_x,
-                                            resolution_x,
-                                            4,
-                                            annular_transducer)
-            bx = numpy.eye(num_points_x) + ax
-            dx = numpy.eye(num_points_x) - ax
-            dx_inv = numpy.inv(dx)
-
-            if diffraction_type == FiniteDifferenceTimeDifferenceReduced:
-                # Make matrices banded
-                bx_banded = _make_banded(bx, numpy.arange(-2, 2, dtype=int))
-                dx_inv_banded = _make_banded(dx_inv, numpy.arange(-10, 10, dtype=int))
-            elif diffraction_type == FiniteDifferenceTimeDifferenceFull:
-                raise NotImplementedError
+    # the banded FD matrices are factorized and cached by finite_difference_propagate
+    if diffraction_type == FiniteDifferenceTimeDifferenceFull:
+        raise NotImplementedError
     elif diffraction_type in (NoDiffraction,
                               ExactDiffraction,
                               AngularSpectrumDiffraction,
-                              PseudoDifferential):
-        control.simulation.step_size = resolution_z * SCALE_FOR_SPATIAL_VARIABLES_Z
+                              PseudoDifferential,
+                              FiniteDifferenceTimeDifferenceReduced):
+        state.step_size = resolution_z * SCALE_FOR_SPATIAL_VARIABLES_Z
 
     _wave = wave
 
@@ -127,21 +116,17 @@ def nonlinear_propagate(control: MainControl,
         # diffraction
         if diffraction_type in (ExactDiffraction,
                                 AngularSpectrumDiffraction,
-                                PseudoDifferential):
+                                PseudoDifferential,
+                                FiniteDifferenceTimeDifferenceReduced):
             _wave = propagate.propagate(control,
                                         _wave,
                                         2 * direction,
                                         equidistant_steps,
-                                        _wave_numbers)
-        elif diffraction_type in (FiniteDifferenceTimeDifferenceReduced,
-                                  FiniteDifferenceTimeDifferenceFull):
-            raise NotImplementedError
+                                        _wave_numbers,
+                                        resolution_t * SCALE_FOR_TEMPORAL_VARIABLE,
+                                        state=state)
 
-        # perfectly matching layers, absorbing boundaries
-        if perfect_matching_layer_width > 0:
-            if control.num_dimensions == 2:
-                _wave = _wave.reshape((num_points_x, 1, num_points_t))
-                raise NotImplementedError
+        # perfectly matching layers, absorbing boundaries, are applied by propagate
 
         # Nonlinear and attenuation
         if non_linearity or attenuation:
@@ -151,89 +136,41 @@ def nonlinear_propagate(control: MainControl,
                                                  shock_step,
                                                  material,
                                                  non_linearity,
-                                                 attenuation)
+                                                 attenuation,
+                                                 state.current_position)
 
     # set step_size back to normal
-    if diffraction_type in (ExactDiffraction, AngularSpectrumDiffraction):
-        control.simulation.step_size = step_size
+    if diffraction_type in (ExactDiffraction,
+                            AngularSpectrumDiffraction,
+                            PseudoDifferential,
+                            FiniteDifferenceTimeDifferenceReduced):
+        state.step_size = step_size
 
     return _wave
 
 
-def _get_difference_stencil(num_order: int = 4,
-                            differential_order: int = 2):
-    """
-    Returns weights for a difference stencil.
-    :param num_order: Numerical order of the difference scheme.
-        Default is forth order central differencing.
-    :param differential_order: Differential order. Default is the stencil for the
-        second order differential. First order is possible.
-    :return: Difference stencil as a row vector.
-    """
-    if differential_order == 1:
-        if num_order == 2:
-            difference_stencil = numpy.array([-1.0, 0.0, 1.0]) / 2.0
-        elif num_order == 4:
-            difference_stencil = numpy.array([1.0, -8.0, 0.0, 8.0, -1.0]) / 12.0
-        else:
-            print('Unrecognized numerical order. Using fourth order differencing')
-            difference_stencil = _get_difference_stencil(differential_order, 4)
-    elif differential_order == 2:
-        if num_order == 2:
-            difference_stencil = numpy.array([-1.0, 2.0, -1.0])
-        elif num_order == 4:
-            difference_stencil = numpy.array([-1.0, 16.0, -30.0, 16.0, -1.0]) / 12.0
-        else:
-            print('Unrecognized numerical order. Using fourth order differencing')
-            difference_stencil = _get_difference_stencil(differential_order, 4)
-    else:
-        print('Unrecognized differential order, Using second order differential')
-        difference_stencil = _get_difference_stencil(2, num_order)
-
-    return difference_stencil
-
-
-def _get_difference_matrix(num_points: int = 8,
-                           resolution: int = 1,
-                           order: int = 4,
-                           annular_transducer: bool = False,
-                           left_boundary='symmetric'):
-    """
-    The function returns a differencing matrix based on a finite difference
-    scheme of desired order. The laplacian may either be d^2/dx^2 or d^2/dr^2+1/r d/dr.
-    :param num_points: Number of points. Default 8 for example purposes.
-    :param resolution: Resolution in space. Default is one for example purposes.
-    :param order: Flag for rotational symmetry. Default is False.
-    :param annular_transducer:
-    :param left_boundary: The left boundary may be either 'symmetric' or 'reflective'.
-        The outer (right) boundary is assumed to always be reflective.
-    :return: Difference matrix.
-    """
-    col = numpy.ones((num_points, 1))
-    d = _get_difference_stencil(order, 2)
-    a = scipy.sparse.spdiags(col * d,
-                             numpy.arange(-order / 2, order / 2, dtype=int),
-                             num_points,
-                             num_points)
-    raise NotImplementedError
-
-
 def _nonlinear_attenuation_split(scaled_time_span,
                                  wave_field,
                                  resolution_z,
                                  shock_step,
                                  material=Muscle(37),
                                  non_linearity=True,
-                                 attenuation=True):
+                                 attenuation=True,
+                                 position=0.0):
     """
-    Implements a loop over the spatial direction with calls to BurgersSplit.
+    Implements the Burgers and attenuation splitting over the spatial direction for all columns
+    of the wave field. The columns are grouped by material, and each group is solved as one
+    array with the coefficients of its material. Each column takes its own steps, limited by
+    the distance to shock formation.
     :param scaled_time_span: Scaled time span
     :param wave_field: Wave field.
     :param resolution_z: resolution_z.
     :param shock_step: Shock step.
-    :param material: Material used. If not specified, MUSCLE is assumed.
+    :param material: Material used. If not specified, MUSCLE is assumed. A MaterialMap gives
+        the material of each column.
     :param non_linearity: non linearity.
     :param attenuation: attenuation.
+    :param position: The depth of the wave field, selecting the layer of a MaterialMap.
     :return: Perturbed and attenuated wave field.
     """
     # Initiation of sizes
@@ -247,33 +184,29 @@ def _nonlinear_attenuation_split(scaled_time_span,
         _wave_field = wave_field
 
     # Check material
-    is_regular = material.is_regular
-    eps_n = material.eps_n
-    eps_a = material.eps_a
-    eps_b = material.eps_b
-
-    for index in range(num_points_x * num_points_y):
-        num_step = 0
-        temp = _wave_field[:, index]
-        dz_tmp = resolution_z
-        while dz_tmp > 0:
-            z_step = numpy.minimum(dz_tmp,
-                                   shock_step * _get_shock_dist(scaled_time_span, temp, eps_n))
-            dz_tmp = dz_tmp - z_step
-            num_step = num_step + 1
-            if is_regular:
-                # for regular materials
-                if non_linearity and attenuation is False:
-                    temp = burgers_solve(scaled_time_span, temp, temp, eps_n, z_step)
-                elif non_linearity and attenuation:
-                    temp = burgers_solve(scaled_time_span, temp, temp, eps_n, z_step / 2)
-                    temp = attenuation_solve(scaled_time_span, temp, z_step, eps_a, eps_b)
-                    temp = burgers_solve(scaled_time_span, temp, temp, eps_n, z_step / 2)
-                elif non_linearity is False and attenuation:
-                    temp = attenuation_solve(scaled_time_span, temp, z_step, eps_a, eps_b)
-            else:
-                raise NotImplementedError
-        _wave_field[:, index] = temp
+    if material.is_regular:
+        groups = [(material.eps_n, material.eps_a, material.eps_b, slice(None))]
+    elif isinstance(material, MaterialMap):
+        if material.labels.shape[1:] != (num_points_y, num_points_x):
+            raise ValueError('The material map does not match the lateral grid')
+        groups = [(material.eps_n_table[label],
+                   material.eps_a_table[label],
+                   material.eps_b_table[label],
+                   columns)
+                  for label, columns in material.get_groups(position)]
+    else:
+        raise NotImplementedError
+
+    for eps_n, eps_a, eps_b, columns in groups:
+        _wave_field[:, columns] = _split_columns(scaled_time_span,
+                                                 _wave_field[:, columns],
+                                                 resolution_z,
+                                                 shock_step,
+                                                 eps_n,
+                                                 eps_a,
+                                                 eps_b,
+                                                 non_linearity,
+                                                 attenuation)
 
     if num_dimensions == 3:
         _wave_field = _wave_field.reshape((num_points_t, num_points_y, num_points_x))
@@ -281,61 +214,62 @@ def _nonlinear_attenuation_split(scaled_time_span,
     return _wave_field
 
 
+def _split_columns(scaled_time_span,
+                   columns,
+                   resolution_z,
+                   shock_step,
+                   eps_n,
+                   eps_a,
+                   eps_b,
+                   non_linearity,
+                   attenuation):
+    """
+    Solves the splitting of the columns of one material. The columns still stepping are solved
+    together, each with its own step size.
+    :return: The perturbed and attenuated columns.
+    """
+    _columns = numpy.array(columns)
+    dz_tmp = numpy.full(_columns.shape[1], resolution_z)
+    active = numpy.flatnonzero(dz_tmp > 0)
+    while active.size > 0:
+        temp = _columns[:, active]
+        z_step = numpy.minimum(dz_tmp[active],
+                               shock_step * _get_shock_dist(scaled_time_span, temp, eps_n))
+        dz_tmp[active] = dz_tmp[active] - z_step
+        if non_linearity and attenuation is False:
+            temp = burgers_solve(scaled_time_span, temp, temp, eps_n, z_step)
+        elif non_linearity and attenuation:
+            temp = burgers_solve(scaled_time_span, temp, temp, eps_n, z_step / 2)
+            temp = attenuation_solve(scaled_time_span, temp, z_step, eps_a, eps_b)
+            temp = burgers_solve(scaled_time_span, temp, temp, eps_n, z_step / 2)
+        elif non_linearity is False and attenuation:
+            temp = attenuation_solve(scaled_time_span, temp, z_step, eps_a, eps_b)
+        _columns[:, active] = temp
+        active = active[dz_tmp[active] > 0]
+
+    return _columns
+
+
 def _get_shock_dist(time_span,
                     pressure,
                     eps_n):
     """
     Calculates the approximated distance until shock formation for a regular pulse.
     :param time_span: Time span.
-    :param pressure: Pressure at time points
+    :param pressure: Pressure at time points. Either (nt,) or (nt, num columns).
     :param eps_n: Coefficient of non-linearity.
-    :return:
+    :return: The shock distance, one for each column.
     """
     resolution_t = numpy.diff(time_span)
     if numpy.min(resolution_t) <= 0.0:
-        return 0.0
+        return numpy.zeros(pressure.shape[1:])
 
     # calculate shock distance
-    dp_dt_max = numpy.max(numpy.diff(pressure) / resolution_t)
-    if dp_dt_max > 0.0 and eps_n != 0.0:
-        shock_dist = 1 / (eps_n * dp_dt_max)
-    else:
-        shock_dist = numpy.inf
+    resolution_t = resolution_t.reshape((-1,) + (1,) * (pressure.ndim - 1))
+    dp_dt_max = numpy.max(numpy.diff(pressure, axis=0) / resolution_t, axis=0)
+    shock_dist = numpy.full(dp_dt_max.shape, numpy.inf)
+    if eps_n != 0.0:
+        forming = dp_dt_max > 0.0
+        shock_dist[forming] = 1 / (eps_n * dp_dt_max[forming])
 
     return shock_dist
-
-
-# TODO remove Matlab form
-def _make_banded(
-        vector_a: numpy.ndarray,
-        vector_d: numpy.ndarray = None,
-        row_major: bool = False) -> numpy.ndarray:
-    """
-    Returning the diagonals of vector_a specified in vector_d on BLAS banded matrix form.
-    :param vector_a:  Matrix to be treated. The matrix is assumed to be of
-        standard, column major, Matlab form.
-    :param vector_d: Diagonals on vector form (-kl:ku) where 0 denotes main
-        diagonal, -kl denotes the kl'th sub-diagonal and ku the ku'th super-diagonal
-    :param row_major: Used if the matrix is supposed to be in row-major storage (C-style).
-    :return: The vector_a on banded form.
-    """
-    if vector_d is None:
-        m, n = vector_a.shape
-        _vector_d = numpy.range(-m + 1, n - 1, dtype=int)
-    else:
-        _vector_d = vector_d
-
-    num_points_x = numpy.min(vector_a.shape)
-    banded = numpy.zeros((numpy.max(_vector_d.shape), num_points_x))
-
-    for index in range(_vector_d):
-        diag = numpy.diag(vector_a, _vector_d[index])
-        idd = numpy.range(numpy.max(diag.shape))
-        stidx = numpy.max(numpy.sign(_vector_d[index]) * (num_points_x - numpy.max(diag.shape)),
-                          0)
-        banded[index, idd + stidx] = diag
-
-    if row_major:
-        banded = banded.T
-
-    return banded
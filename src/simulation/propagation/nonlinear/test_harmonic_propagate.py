@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+    test_harmonic_propagate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.consts import HARMONIC_SOLVER, SCALE_FOR_SPATIAL_VARIABLES_Z, \
+    SCALE_FOR_TEMPORAL_VARIABLE
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.nonlinear.harmonic_propagate import harmonic_propagate, \
+    get_harmonic_indexes
+from simulation.propagation.propagate import propagate
+
+
+class TestHarmonicPropagate(unittest.TestCase):
+    def setUp(self):
+        self.control = get_test_control('test_harmonic_propagate',
+                                        non_linearity=True,
+                                        attenuation=False,
+                                        harmonic=2,
+                                        nonlinear_solver=HARMONIC_SOLVER)
+        self.num_points_t = self.control.domain.num_points_t
+        self.frequency = self.control.signal.transmit_frequency
+        self.t = (numpy.arange(self.num_points_t) - self.num_points_t // 2) * \
+            self.control.signal.resolution_t
+
+    def _pulse(self, t, amplitude):
+        return amplitude * numpy.exp(-(t * self.frequency / 2.0) ** 2) * \
+            numpy.cos(2.0 * numpy.pi * self.frequency * t)
+
+    def test_indexes_cover_the_harmonics(self):
+        indexes = get_harmonic_indexes(self.control, self.num_points_t)
+        resolution_f = 1.0 / (self.num_points_t * self.control.signal.resolution_t)
+        self.assertGreaterEqual(indexes[-1] * resolution_f,
+                                (self.control.simulation.num_harmonics + 0.5) * self.frequency)
+        numpy.testing.assert_array_equal(numpy.arange(indexes.size), indexes)
+
+    def test_plane_wave_matches_burgers_characteristics(self):
+        amplitude = 1e-6
+        wave = numpy.repeat(self._pulse(self.t, amplitude)[:, numpy.newaxis], 4, axis=1)
+        num_steps = 4
+        for _ in range(num_steps):
+            wave = propagate(self.control, wave, 1, True)
+
+        # exact solution p(z, t) = p(0, t + eps_n * z * p) before shock formation
+        up_sampling = 32
+        t = (numpy.arange(self.num_points_t * up_sampling) -
+             self.num_points_t * up_sampling // 2) * \
+            self.control.signal.resolution_t / up_sampling
+        pulse = self._pulse(t, amplitude)
+        t = t / SCALE_FOR_TEMPORAL_VARIABLE
+        z = num_steps * self.control.simulation.step_size / SCALE_FOR_SPATIAL_VARIABLES_Z
+        reference = numpy.interp(t, t - self.control.material.material.eps_n * z * pulse, pulse)
+        reference = reference[::up_sampling]
+
+        # the bins above the kept harmonics are dropped
+        num_bins = get_harmonic_indexes(self.control, self.num_points_t).size
+        reference = numpy.fft.rfft(reference)[:num_bins]
+        spectrum = numpy.fft.rfft(wave[:, 0])
+        self.assertGreater(numpy.max(numpy.abs(reference[num_bins // 3:])), 1e-2 * amplitude)
+        numpy.testing.assert_allclose(reference, spectrum[:num_bins], atol=1e-3 * amplitude)
+        numpy.testing.assert_array_almost_equal(wave[:, 0], wave[:, 3])
+
+    def test_weak_field_matches_linear_propagation(self):
+        num_points_x = 64
+        x = numpy.arange(num_points_x) - num_points_x // 2
+        wave = self._pulse(self.t, 1e-12)[:, numpy.newaxis] * numpy.exp(-(x / 8.0) ** 2)
+
+        wave_numbers = get_wave_numbers(self.control,
+                                        True,
+                                        num_points=(num_points_x, 1, self.num_points_t))
+        num_sub_steps = int(numpy.ceil(self.control.simulation.step_size /
+                                       self.control.signal.resolution_z))
+        reference = wave
+        for _ in range(num_sub_steps):
+            reference = propagate(self.control, reference, 2, True, wave_numbers)
+
+        numpy.testing.assert_allclose(reference,
+                                      harmonic_propagate(self.control, wave, 1, True,
+                                                         wave_numbers),
+                                      atol=1e-6 * numpy.max(numpy.abs(wave)))
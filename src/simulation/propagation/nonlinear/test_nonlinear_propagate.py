@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+    test_nonlinear_propagate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+# nonlinear_propagate is imported through propagate
+from simulation.propagation import propagate  # noqa: F401
+from simulation.propagation.nonlinear.nonlinear_propagate import _nonlinear_attenuation_split
+from system.material.aberration_phantom import AberrationPhantom
+from system.material.fat import Fat
+from system.material.material_map import MaterialMap
+from system.material.muscle import Muscle
+
+
+class TestNonlinearAttenuationSplit(unittest.TestCase):
+    def setUp(self):
+        num_points_t = 256
+        resolution_t = 0.02
+        self.t = numpy.linspace(resolution_t, (num_points_t + 1) * resolution_t, num_points_t)
+        t = self.t - numpy.mean(self.t)
+        amplitude = numpy.linspace(0.2, 1.0, 12) * 2e-3
+        pulse = numpy.exp(-(t / 0.5) ** 2) * numpy.sin(4.0 * numpy.pi * t)
+        self.wave = pulse[:, numpy.newaxis] * amplitude
+
+    def _column_split(self, column, material):
+        return _nonlinear_attenuation_split(self.t, column[:, numpy.newaxis].copy(), 0.05, 0.5,
+                                            material, True, True)[:, 0]
+
+    def test_material_map_matches_each_material(self):
+        materials = [Muscle(37.0), Fat(37.0), AberrationPhantom(37.0)]
+        labels = numpy.array([[0, 1, 2, 1, 0, 2, 2, 1, 0, 0, 1, 2]])
+        wave = _nonlinear_attenuation_split(self.t, self.wave.copy(), 0.05, 0.5,
+                                            MaterialMap(materials, labels), True, True)
+
+        for index, label in enumerate(labels[0]):
+            numpy.testing.assert_allclose(self._column_split(self.wave[:, index],
+                                                             materials[label]),
+                                          wave[:, index],
+                                          atol=1e-12)
+
+    def test_regular_material_matches_each_column(self):
+        wave = _nonlinear_attenuation_split(self.t, self.wave.copy(), 0.05, 0.5, Muscle(37.0),
+                                            True, True)
+
+        for index in (0, 5, 11):
+            numpy.testing.assert_allclose(self._column_split(self.wave[:, index], Muscle(37.0)),
+                                          wave[:, index],
+                                          atol=1e-12)
+
+    def test_3d_material_map(self):
+        materials = [Muscle(37.0), Fat(37.0)]
+        labels = numpy.array([[0, 1, 1], [1, 0, 0], [0, 0, 1], [1, 1, 0]])
+        wave = self.wave.reshape((-1, 4, 3))
+        split = _nonlinear_attenuation_split(self.t, wave.copy(), 0.05, 0.5,
+                                             MaterialMap(materials, labels), True, True)
+
+        self.assertEqual(wave.shape, split.shape)
+        numpy.testing.assert_allclose(self._column_split(wave[:, 1, 0], Fat(37.0)),
+                                      split[:, 1, 0],
+                                      atol=1e-12)
+
+    def test_mismatched_map_Exception(self):
+        with self.assertRaises(ValueError):
+            _nonlinear_attenuation_split(self.t, self.wave.copy(), 0.05, 0.5,
+                                         MaterialMap([Muscle(37.0)], numpy.zeros((1, 5))),
+                                         True, True)
@@ -9,9 +9,15 @@ from typing import Optional
 
 import numpy
 
+from simulation.beam_simulation.get_absorbing_layer import get_absorbing_layer_damping
+from simulation.controls.consts import HARMONIC_SOLVER
 from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
 from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.finite_difference_propagate import finite_difference_propagate
+from simulation.propagation.nonlinear.harmonic_propagate import harmonic_propagate
 from simulation.propagation.nonlinear.nonlinear_propagate import nonlinear_propagate
+from simulation.propagation.pseudo_differential import get_radial_eigen_decomposition
 from system.diffraction.diffraction import ExactDiffraction, AngularSpectrumDiffraction, \
     PseudoDifferential, \
     FiniteDifferenceTimeDifferenceReduced, FiniteDifferenceTimeDifferenceFull
@@ -21,7 +27,10 @@ def propagate(control: MainControl,
               wave: numpy.ndarray,
               direction: int,
               equidistant_steps: bool,
-              wave_numbers: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+              wave_numbers: Optional[numpy.ndarray] = None,
+              resolution_t: Optional[float] = None,
+              delay_screen: Optional[numpy.ndarray] = None,
+              state: Optional[SimulationState] = None) -> numpy.ndarray:
     """
     Function that handles propagation of 3D wave field in z-direction using the method of
     angular spectrum. The function will forward the handling of propagation to
@@ -34,47 +43,71 @@ def propagate(control: MainControl,
         For the values +/-2 linear propagation is chosen even if control.non_linearity is True.
     :param equidistant_steps: The flag specifying beam simulation with equidistant steps.
     :param wave_numbers: The wave numbers for the whole region.
+    :param resolution_t: Sampling interval of the wave. Default is given by control.signal.
+    :param delay_screen: Time delays in seconds, one for each lateral grid point, applied to the
+        wave after the step. For linear angular spectrum propagation the delays are applied as
+        phase shifts while the wave is in the temporal frequency domain.
+    :param state: The state of the run, giving the step size and the position, which is
+        updated. Default is a new state at the transducer.
     :return: The resulting field after propagation: wave(x,y,z+step_size,t)
     """
-    if wave_numbers is None:
-        _wave_numbers = get_wave_numbers(control, equidistant_steps)
-    else:
-        _wave_numbers = wave_numbers
-
+    if state is None:
+        state = SimulationState(control)
     diffraction_type = control.diffraction_type
     non_linearity = control.non_linearity
     attenuation = control.attenuation
-    step_size = control.simulation.step_size
+    step_size = state.step_size
 
-    num_points_x = control.domain.num_points_x
-    num_points_y = control.domain.num_points_y
-    num_points_t = control.domain.num_points_t
+    # the grid is given by the wave, which may be a sub-grid of control.domain
+    num_points_t = wave.shape[0]
+    if wave.ndim == 3:
+        num_points_y, num_points_x = wave.shape[1:]
+    else:
+        num_points_y = 1
+        num_points_x = wave.shape[1]
+    num_points = (num_points_x, num_points_y, num_points_t)
+
+    if wave_numbers is None:
+        _wave_numbers = get_wave_numbers(control,
+                                         equidistant_steps,
+                                         num_points=num_points,
+                                         resolution_t=resolution_t,
+                                         state=state)
+    else:
+        _wave_numbers = wave_numbers
 
     # Update position and chose propagation mode
     if direction > 0:
-        control.simulation.current_position = control.simulation.current_position + step_size
+        state.current_position = state.current_position + step_size
     elif direction < 0:
-        control.simulation.current_position = control.simulation.current_position - step_size
+        state.current_position = state.current_position - step_size
     if (diffraction_type == ExactDiffraction or
         diffraction_type == AngularSpectrumDiffraction or
         diffraction_type == PseudoDifferential) and \
             (non_linearity is False or abs(direction) == 2):
         # Linear propagation and exact diffraction
         if _wave_numbers.size == 0:
-            _wave_numbers = get_wave_numbers(control, equidistant_steps)
+            _wave_numbers = get_wave_numbers(control,
+                                             equidistant_steps,
+                                             num_points=num_points,
+                                             resolution_t=resolution_t,
+                                             state=state)
 
         # Forward spatial transform
         if diffraction_type == ExactDiffraction or diffraction_type == AngularSpectrumDiffraction:
             if control.num_dimensions == 3:
-                _wave = numpy.fft.fftn(wave, axes=(2,))
-                _wave = numpy.fft.fftn(wave, axes=(1,))
+                _wave = numpy.fft.fftn(wave, axes=(1, 2))
                 _wave = _wave.reshape((num_points_t, num_points_x * num_points_y))
             else:
                 _wave = numpy.fft.fftn(wave, axes=(1,))
         elif diffraction_type == PseudoDifferential:
-            # TODO Need to complete
-            tmp = _wave_numbers[:, num_points_x:]
-            raise NotImplementedError
+            # transform to the eigenvectors of the radial laplacian
+            _, inverse_eigenvectors, eigenvectors = get_radial_eigen_decomposition(
+                num_points_x,
+                control.signal.resolution_x,
+                control.simulation.difference_order,
+                cache_directory=control.simulation.cache_directory)
+            _wave = wave @ inverse_eigenvectors.T
         else:
             _wave = wave
 
@@ -89,7 +122,7 @@ def propagate(control: MainControl,
             else:
                 _wave = _wave * numpy.exp(
                     (-1j * step_size) * numpy.squeeze(
-                        _wave_numbers[:num_points_t, :num_points_x * num_points_y, 0]))
+                        _wave_numbers[:num_points_t, :num_points_x * num_points_y]))
         elif diffraction_type is AngularSpectrumDiffraction:
             raise NotImplementedError
             kx = _wave_numbers[:num_points_x, 0]
@@ -109,34 +142,135 @@ def propagate(control: MainControl,
                     _wave[:, index] = _wave[:, index] * numpy.exp((-1j * step_size) * kz)
                     index = index + 1
 
-        # Backward temporal FFT
-        _wave = numpy.fft.ifftn(_wave, axes=(0,))
+        # Backward temporal FFT, which follows the delay screen when there is one
+        if delay_screen is None:
+            _wave = numpy.fft.ifftn(_wave, axes=(0,))
 
         # Backward spatial transform
         if diffraction_type in (ExactDiffraction,
                                 AngularSpectrumDiffraction):
             if control.num_dimensions == 3:
                 _wave = _wave.reshape((num_points_t, num_points_y, num_points_x))
-                _wave = numpy.fft.ifftn(_wave, axes=(1,))
-                _wave = numpy.fft.ifftn(_wave, axes=(2,))
+                _wave = numpy.fft.ifftn(_wave, axes=(1, 2))
             else:
                 _wave = numpy.fft.ifftn(_wave, axes=(1,))
-            _wave = _wave.real
         elif diffraction_type is PseudoDifferential:
-            _wave = _wave.real
-            raise NotImplementedError
+            if delay_screen is None:
+                _wave = _wave.real
+            _wave = _wave @ eigenvectors.T
         elif diffraction_type in (FiniteDifferenceTimeDifferenceReduced,
                                   FiniteDifferenceTimeDifferenceFull) or \
                 (non_linearity or attenuation):
             # Nonlinear propagation in external function
             raise NotImplementedError
+
+        # delay screen as a phase shift of each temporal frequency
+        if delay_screen is not None:
+            _wave = _wave * _get_delay_phase(delay_screen.reshape(_wave.shape[1:]),
+                                             num_points_t,
+                                             resolution_t or control.signal.resolution_t)
+            _wave = numpy.fft.ifftn(_wave, axes=(0,))
+        _wave = _wave.real
+
+        # absorbing layer along the lateral boundaries
+        if control.domain.perfect_matching_layer_width > 0:
+            _wave = _apply_absorbing_layer(control, _wave, step_size, state)
+    elif diffraction_type is FiniteDifferenceTimeDifferenceReduced and \
+            (non_linearity is False or abs(direction) == 2):
+        # Linear propagation and banded finite difference diffraction
+        _wave = finite_difference_propagate(control, wave, direction, resolution_t, state)
+        if delay_screen is not None:
+            _wave = _apply_delay_screen(_wave,
+                                        delay_screen,
+                                        resolution_t or control.signal.resolution_t)
+
+        # absorbing layer along the lateral boundaries
+        if control.domain.perfect_matching_layer_width > 0:
+            _wave = _apply_absorbing_layer(control, _wave, step_size, state)
     elif diffraction_type in (FiniteDifferenceTimeDifferenceReduced,
                               FiniteDifferenceTimeDifferenceFull) or \
             (non_linearity or attenuation):
         # Nonlinear propagation in external function
-        _wave = nonlinear_propagate(control, wave, direction, equidistant_steps, _wave_numbers)
+        if control.nonlinear_solver == HARMONIC_SOLVER and \
+                diffraction_type in (ExactDiffraction, AngularSpectrumDiffraction):
+            _wave = harmonic_propagate(control,
+                                       wave,
+                                       direction,
+                                       equidistant_steps,
+                                       _wave_numbers,
+                                       resolution_t=resolution_t,
+                                       state=state)
+        else:
+            _wave = nonlinear_propagate(control,
+                                        wave,
+                                        direction,
+                                        equidistant_steps,
+                                        _wave_numbers,
+                                        resolution_t=resolution_t,
+                                        state=state)
+        if delay_screen is not None:
+            _wave = _apply_delay_screen(_wave,
+                                        delay_screen,
+                                        resolution_t or control.signal.resolution_t)
     else:
         print('Propagation type must be specified')
         exit(-1)
 
     return _wave
+
+
+def _apply_absorbing_layer(control: MainControl,
+                           wave: numpy.ndarray,
+                           step_size: float,
+                           state: SimulationState) -> numpy.ndarray:
+    """
+    Attenuates the wave field inside the absorbing layer along the lateral boundaries
+    according to the distance propagated.
+    :param control: The controls.
+    :param wave: Wave field after the diffraction step.
+    :param step_size: The distance propagated.
+    :param state: The state of the run caching the damping of the layer.
+    :return: The attenuated wave field.
+    """
+    if wave.ndim == 3:
+        num_points_y, num_points_x = wave.shape[1:]
+    else:
+        num_points_y = 1
+        num_points_x = wave.shape[1]
+    damping = get_absorbing_layer_damping(control, (num_points_x, num_points_y), step_size, state)
+
+    return wave * damping.reshape(wave.shape[1:])
+
+
+def _get_delay_phase(delay_screen: numpy.ndarray,
+                     num_points_t: int,
+                     resolution_t: float) -> numpy.ndarray:
+    """
+    Returns the phase shifts exp(-i * w * delay) of all temporal frequencies, in FFT order,
+    delaying the wave by the delay screen.
+    :param delay_screen: Time delays with the shape of the lateral grid.
+    :param num_points_t: Number of points in time.
+    :param resolution_t: Sampling interval.
+    :return: The phase shifts with the shape (num_points_t,) + delay_screen.shape.
+    """
+    w = 2.0 * numpy.pi * numpy.fft.fftfreq(num_points_t, resolution_t)
+
+    return numpy.exp(-1j * w.reshape((-1,) + (1,) * delay_screen.ndim) * delay_screen)
+
+
+def _apply_delay_screen(wave: numpy.ndarray,
+                        delay_screen: numpy.ndarray,
+                        resolution_t: float) -> numpy.ndarray:
+    """
+    Delays the wave by the delay screen with a phase shift in the temporal frequency domain.
+    :param wave: Wave field. Either (nt, nx) or (nt, ny, nx).
+    :param delay_screen: Time delays in seconds, one for each lateral grid point.
+    :param resolution_t: Sampling interval of the wave.
+    :return: The delayed wave field.
+    """
+    num_points_t = wave.shape[0]
+    phase = _get_delay_phase(delay_screen.reshape(wave.shape[1:]), num_points_t, resolution_t)
+
+    return numpy.fft.irfft(numpy.fft.rfft(wave, axis=0) * phase[:num_points_t // 2 + 1],
+                           num_points_t,
+                           axis=0)
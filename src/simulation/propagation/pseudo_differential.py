@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+    pseudo_differential.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import hashlib
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import numpy
+
+from simulation.bounded_cache import BoundedCache
+from simulation.propagation.difference_matrix import get_difference_matrix
+
+# bumped whenever the decomposition or the file layout changes
+_CACHE_VERSION = 1
+
+# eigen decompositions by (num_points, resolution, order, left_boundary), shared by the runs of
+# all threads
+_eigen_decompositions = BoundedCache(16)
+
+
+def get_radial_eigen_decomposition(num_points: int,
+                                   resolution: float,
+                                   order: int = 4,
+                                   left_boundary: str = 'symmetric',
+                                   cache_directory: Optional[str] = None) \
+        -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Returns the eigen decomposition A = Q * diag(eigenvalues) * Q^-1 of the radial laplacian
+    d^2/dr^2 + 1/r d/dr on the points r = i * resolution. The eigenvalues take the place of
+    -(kx^2 + ky^2) in the angular spectrum, and Q^-1 and Q replace the forward and backward
+    spatial transforms of a rotationally symmetric field. The decompositions are cached in
+    memory, and in cache_directory when it is given. Files in the cache directory are named by
+    a hash of the parameters, are written atomically so they may be shared by several
+    processes, and are memory mapped when loaded.
+    :param num_points: Number of points in the radial direction.
+    :param resolution: Resolution in the radial direction.
+    :param order: Numerical order of the difference scheme.
+    :param left_boundary: The left boundary of the radial laplacian, see get_difference_matrix.
+    :param cache_directory: Directory of the cache files. Default is no cache files.
+    :return: The eigenvalues,
+             The inverse eigenvector matrix Q^-1,
+             The eigenvector matrix Q.
+    """
+    key = (num_points, resolution, order, left_boundary)
+
+    return _eigen_decompositions.get(key,
+                                     lambda: _get_radial_eigen_decomposition(key, cache_directory))
+
+
+def _get_radial_eigen_decomposition(key: tuple,
+                                    cache_directory: Optional[str]) \
+        -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Loads or builds the eigen decomposition of the parameters of key, see
+    get_radial_eigen_decomposition.
+    """
+    num_points, resolution, order, left_boundary = key
+    file_name = None
+    decomposition = None
+    if cache_directory is not None:
+        file_name = os.path.join(cache_directory,
+                                 'radial_eigen_decomposition_{}.npy'.format(_get_hash(key)))
+        decomposition = _load(file_name, num_points)
+
+    if decomposition is None:
+        difference_matrix = get_difference_matrix(num_points,
+                                                  resolution,
+                                                  order,
+                                                  annular_transducer=True,
+                                                  left_boundary=left_boundary).toarray()
+        eigenvalues, eigenvectors = numpy.linalg.eig(difference_matrix)
+        # the radial laplacian is similar to a symmetric matrix, so the spectrum is real
+        eigenvalues = numpy.minimum(eigenvalues.real, 0.0)
+        eigenvectors = eigenvectors.real
+        decomposition = numpy.concatenate((eigenvalues[numpy.newaxis, :],
+                                           numpy.linalg.inv(eigenvectors),
+                                           eigenvectors))
+        if file_name is not None:
+            _save(file_name, decomposition)
+
+    return (decomposition[0],
+            decomposition[1:num_points + 1],
+            decomposition[num_points + 1:])
+
+
+def _get_hash(key: tuple) -> str:
+    """
+    Returns a hash of the parameters of a decomposition. The resolution is hashed by its exact
+    binary representation.
+    """
+    num_points, resolution, order, left_boundary = key
+    parameters = '{:d},{:d},{},{:d},{}'.format(_CACHE_VERSION,
+                                               int(num_points),
+                                               float(resolution).hex(),
+                                               int(order),
+                                               left_boundary)
+
+    return hashlib.sha256(parameters.encode('utf-8')).hexdigest()
+
+
+def _load(file_name: str,
+          num_points: int) -> Optional[numpy.ndarray]:
+    """
+    Memory maps a cached decomposition. Returns None if the file is missing or unreadable.
+    """
+    try:
+        decomposition = numpy.load(file_name, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if decomposition.shape != (2 * num_points + 1, num_points):
+        return None
+
+    return decomposition
+
+
+def _save(file_name: str,
+          decomposition: numpy.ndarray):
+    """
+    Writes a decomposition to a temporary file which is then renamed, so that other processes
+    never read a partially written file.
+    """
+    directory = os.path.dirname(file_name)
+    temporary_name = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as file:
+            temporary_name = file.name
+            numpy.save(file, decomposition)
+        os.replace(temporary_name, file_name)
+    except OSError as error:
+        print('Could not write {}: {}'.format(file_name, error))
+        if temporary_name is not None and os.path.exists(temporary_name):
+            os.remove(temporary_name)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+    spectral_pruning.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Tuple
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+
+
+def get_propagating_indexes(control: MainControl,
+                            frequency_indexes: numpy.ndarray,
+                            num_points: Tuple[int, int, int],
+                            evanescent_margin: float = 0.1) -> numpy.ndarray:
+    """
+    Function returning the compressed index map of the propagating part of the angular spectrum
+    of a frequency band. A component is kept if kx^2 + ky^2 <= ((1 + evanescent_margin) * kt)^2.
+    Components outside the cone are evanescent, and those beyond the margin decay to nothing
+    within a step, so they are neither stored nor propagated.
+    :param control: The controls.
+    :param frequency_indexes: Indexes of the non-negative frequency bins of the band.
+    :param num_points: Number of points (x, y, t) of the grid.
+    :param evanescent_margin: Relative margin outside the cone of propagating waves.
+    :return: Flat indexes of the kept components of the spectrum (nf, ny * nx) of the band.
+    """
+    num_points_x, num_points_y, num_points_t = num_points
+    resolution_t = control.signal.resolution_t
+    sound_speed = control.material.material.sound_speed
+
+    kt = 2.0 * numpy.pi / sound_speed * frequency_indexes / (num_points_t * resolution_t)
+    kx = 2.0 * numpy.pi * numpy.fft.fftfreq(num_points_x, control.signal.resolution_x)
+    ky = 2.0 * numpy.pi * numpy.fft.fftfreq(num_points_y, control.signal.resolution_y)
+    kxy2 = (ky[:, numpy.newaxis] ** 2 + kx[numpy.newaxis, :] ** 2).reshape(-1)
+
+    propagating = kxy2[numpy.newaxis, :] <= ((1.0 + evanescent_margin) * kt[:, numpy.newaxis]) ** 2
+
+    return numpy.flatnonzero(propagating)
+
+
+def gather_spectrum(spectrum: numpy.ndarray,
+                    propagating_indexes: numpy.ndarray) -> numpy.ndarray:
+    """
+    Gathers the propagating components of the spectrum of a band.
+    :param spectrum: The spectrum (nf, nx) or (nf, ny, nx) of the band.
+    :param propagating_indexes: The compressed index map.
+    :return: The propagating components as a vector.
+    """
+    return spectrum.reshape(-1)[propagating_indexes]
+
+
+def scatter_spectrum(values: numpy.ndarray,
+                     propagating_indexes: numpy.ndarray,
+                     shape: Tuple[int, ...]) -> numpy.ndarray:
+    """
+    Scatters the propagating components back into the spectrum of a band. The pruned
+    components are zero.
+    :param values: The propagating components as a vector.
+    :param propagating_indexes: The compressed index map.
+    :param shape: The shape (nf, nx) or (nf, ny, nx) of the spectrum of the band.
+    :return: The spectrum of the band.
+    """
+    spectrum = numpy.zeros(int(numpy.prod(shape)), dtype=complex)
+    spectrum[propagating_indexes] = values
+
+    return spectrum.reshape(shape)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+    test_band_limited.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.consts import POSITION_HISTORY, PROFILE_HISTORY
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.band_limited import find_frequency_band, to_band_spectrum, \
+    from_band_spectrum, band_limited_propagate
+from simulation.propagation.propagate import propagate
+from simulation.simulation import simulation_steps
+
+
+def _gaussian_pulse(num_points_t, num_points_x, frequency_index, length):
+    t = numpy.arange(num_points_t) - num_points_t // 2
+    x = numpy.arange(num_points_x) - num_points_x // 2
+    pulse = numpy.exp(-(t / length) ** 2) * numpy.cos(2.0 * numpy.pi * frequency_index * t /
+                                                      num_points_t)
+    return pulse[:, numpy.newaxis] * numpy.exp(-(x / (0.1 * num_points_x)) ** 2)
+
+
+class TestBandLimited(unittest.TestCase):
+    def test_band_is_around_the_center_frequency(self):
+        wave_field = _gaussian_pulse(256, 16, 40, 16)
+        band = find_frequency_band(wave_field, -40.0)
+        self.assertLess(band[0], 40)
+        self.assertGreater(band[-1], 40)
+        self.assertLess(band.size, 256 // 4)
+        numpy.testing.assert_array_equal(numpy.arange(band[0], band[-1] + 1), band)
+
+    def test_lower_threshold_gives_wider_band(self):
+        wave_field = _gaussian_pulse(256, 16, 40, 16)
+        self.assertGreater(find_frequency_band(wave_field, -80.0).size,
+                           find_frequency_band(wave_field, -40.0).size)
+
+    def test_round_trip(self):
+        wave_field = _gaussian_pulse(256, 16, 40, 16)
+        band = find_frequency_band(wave_field, -120.0)
+        spectrum = to_band_spectrum(wave_field, band)
+        self.assertEqual((band.size, 16), spectrum.shape)
+        numpy.testing.assert_array_almost_equal(wave_field,
+                                                from_band_spectrum(spectrum, band, 256))
+
+    def test_propagation_matches_full_spectrum(self):
+        control = get_test_control('test_band_limited')
+        num_points_t = control.domain.num_points_t
+        num_points_x = control.domain.num_points_x
+        frequency_index = int(round(control.signal.transmit_frequency *
+                                    control.signal.resolution_t * num_points_t))
+        wave_field = _gaussian_pulse(num_points_t, num_points_x, frequency_index, 20)
+
+        reference = propagate(control, wave_field, 1, True, get_wave_numbers(control, True))
+
+        state = SimulationState(control)
+        band = find_frequency_band(wave_field, -120.0)
+        spectrum = band_limited_propagate(control,
+                                          to_band_spectrum(wave_field, band),
+                                          band,
+                                          num_points_t,
+                                          True,
+                                          state=state)
+        self.assertAlmostEqual(control.simulation.step_size, state.current_position)
+        numpy.testing.assert_array_almost_equal(reference,
+                                                from_band_spectrum(spectrum, band, num_points_t))
+
+    def test_time_signals_are_reconstructed_when_needed(self):
+        wave_fields = {}
+        for history in (PROFILE_HISTORY, POSITION_HISTORY):
+            control = get_test_control('test_band_limited',
+                                       end_point=0.005,
+                                       history=history,
+                                       band_limited=True)
+            num_points_t = control.domain.num_points_t
+            num_points_x = control.domain.num_points_x
+            frequency_index = int(round(control.signal.transmit_frequency *
+                                        control.signal.resolution_t * num_points_t))
+            wave_field = _gaussian_pulse(num_points_t, num_points_x, frequency_index, 20)
+            steps = simulation_steps(control, wave_field, use_cache=False)
+            wave_fields[history] = [numpy.array(step.wave_field) for step in steps]
+
+        self.assertEqual(len(wave_fields[PROFILE_HISTORY]), len(wave_fields[POSITION_HISTORY]))
+        for expected, wave_field in zip(wave_fields[PROFILE_HISTORY],
+                                        wave_fields[POSITION_HISTORY]):
+            numpy.testing.assert_array_equal(expected, wave_field)
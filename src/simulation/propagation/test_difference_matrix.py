@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+    test_difference_matrix.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.propagation.difference_matrix import get_difference_stencil, \
+    get_difference_matrix, make_banded
+
+
+class TestDifferenceMatrix(unittest.TestCase):
+    def test_stencils_differentiate_polynomials(self):
+        x = numpy.arange(-2.0, 3.0)
+        for order in (2, 4):
+            half_width = order // 2
+            points = x[2 - half_width:3 + half_width]
+            self.assertAlmostEqual(2.0, get_difference_stencil(order, 2) @ points ** 2)
+            self.assertAlmostEqual(1.0, get_difference_stencil(order, 1) @ points)
+        self.assertAlmostEqual(0.0, get_difference_stencil(4, 2) @ x ** 3)
+
+    def test_laplacian_of_parabola(self):
+        resolution = 0.5
+        x = numpy.arange(32) * resolution
+        matrix = get_difference_matrix(32, resolution, 4)
+        numpy.testing.assert_array_almost_equal(2.0 * numpy.ones(28), (matrix @ x ** 2)[2:-2])
+
+    def test_radial_laplacian_of_parabola(self):
+        # d^2/dr^2 + 1/r d/dr of r^2 is 4, also on the axis by symmetry
+        resolution = 0.5
+        r = numpy.arange(32) * resolution
+        matrix = get_difference_matrix(32, resolution, 4, annular_transducer=True)
+        numpy.testing.assert_array_almost_equal(4.0 * numpy.ones(30), (matrix @ r ** 2)[:-2])
+
+    def test_banded_form(self):
+        matrix = get_difference_matrix(10, 1.0, 4).toarray()
+        banded = make_banded(matrix, 2, 2)
+        self.assertEqual((5, 10), banded.shape)
+        for i in range(10):
+            for j in range(max(0, i - 2), min(10, i + 3)):
+                self.assertEqual(matrix[i, j], banded[2 + i - j, j])
+        self.assertEqual(0.0, banded[0, 0])
+        self.assertEqual(0.0, banded[4, 9])
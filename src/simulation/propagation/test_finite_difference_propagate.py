@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+    test_finite_difference_propagate.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.propagation.finite_difference_propagate import finite_difference_propagate, \
+    get_crank_nicolson_factorization
+from simulation.propagation.propagate import propagate
+from system.diffraction.diffraction import ExactDiffraction, FiniteDifferenceTimeDifferenceReduced
+
+
+def _get_control(diffraction_type):
+    return get_test_control('test_finite_difference_propagate', diffraction_type=diffraction_type)
+
+
+def _get_beam(control):
+    num_points_t = control.domain.num_points_t
+    num_points_x = control.domain.num_points_x
+    frequency = control.signal.transmit_frequency
+    t = (numpy.arange(num_points_t) - num_points_t // 2) * control.signal.resolution_t
+    x = (numpy.arange(num_points_x) - num_points_x // 2) * control.signal.resolution_x
+    pulse = numpy.exp(-(t * frequency / 2.0) ** 2) * numpy.cos(2.0 * numpy.pi * frequency * t)
+    return pulse[:, numpy.newaxis] * numpy.exp(-(x / 3e-3) ** 2)
+
+
+class TestFiniteDifferencePropagate(unittest.TestCase):
+    def test_matches_angular_spectrum_for_paraxial_beam(self):
+        control = _get_control(FiniteDifferenceTimeDifferenceReduced)
+        reference_control = _get_control(ExactDiffraction)
+        wave = _get_beam(control)
+        reference = wave
+        state = SimulationState(control)
+        reference_state = SimulationState(reference_control)
+        for _ in range(4):
+            wave = propagate(control, wave, 1, True, state=state)
+            reference = propagate(reference_control, reference, 1, True, state=reference_state)
+        self.assertLess(numpy.linalg.norm(wave - reference) / numpy.linalg.norm(reference), 1e-3)
+        self.assertAlmostEqual(reference_state.current_position, state.current_position)
+
+    def test_backward_step_inverts_forward_step(self):
+        control = _get_control(FiniteDifferenceTimeDifferenceReduced)
+        wave = _get_beam(control)
+        state = SimulationState(control)
+        state.step_size = 1e-3
+        forward = finite_difference_propagate(control, wave, 1, state=state)
+        self.assertGreater(numpy.max(numpy.abs(forward - wave)), 1e-2)
+
+        control = get_test_control('test_finite_difference_propagate',
+                                   diffraction_type=FiniteDifferenceTimeDifferenceReduced,
+                                   attenuation=False)
+        state = SimulationState(control)
+        state.step_size = 1e-3
+        forward = finite_difference_propagate(control, wave, 1, state=state)
+        numpy.testing.assert_array_almost_equal(
+            wave, finite_difference_propagate(control, forward, -1, state=state))
+
+    def test_factorization_is_cached(self):
+        factorization = get_crank_nicolson_factorization(64, 1e-4, 4, 1e-3, False, 128, 2.5e-8,
+                                                         1540.0)
+        self.assertIs(factorization,
+                      get_crank_nicolson_factorization(64, 1e-4, 4, 1e-3, False, 128, 2.5e-8,
+                                                       1540.0))
+        self.assertEqual((65 * 64, 65 * 64), factorization[0].shape)
+        self.assertEqual((7, 65 * 64), factorization[1].shape)
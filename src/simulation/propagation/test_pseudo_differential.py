@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    test_pseudo_differential.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.propagation.propagate import propagate
+from simulation.propagation import pseudo_differential
+from simulation.propagation.pseudo_differential import get_radial_eigen_decomposition
+from system.diffraction.diffraction import PseudoDifferential
+
+
+class TestPseudoDifferential(unittest.TestCase):
+    def test_eigen_decomposition(self):
+        eigenvalues, inverse_eigenvectors, eigenvectors = get_radial_eigen_decomposition(32, 0.5)
+        self.assertTrue(numpy.all(eigenvalues <= 0.0))
+        numpy.testing.assert_array_almost_equal(numpy.eye(32),
+                                                eigenvectors @ inverse_eigenvectors)
+        self.assertIs(eigenvectors, get_radial_eigen_decomposition(32, 0.5)[2])
+
+    def test_cache_files_are_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as cache_directory:
+            eigenvalues, inverse_eigenvectors, eigenvectors = \
+                get_radial_eigen_decomposition(24, 0.25, cache_directory=cache_directory)
+            self.assertEqual(1, len(os.listdir(cache_directory)))
+
+            # a new process only finds the file
+            pseudo_differential._eigen_decompositions.clear()
+            cached = get_radial_eigen_decomposition(24, 0.25, cache_directory=cache_directory)
+            self.assertIsInstance(cached[2].base, numpy.memmap)
+            numpy.testing.assert_array_equal(eigenvalues, cached[0])
+            numpy.testing.assert_array_equal(inverse_eigenvectors, cached[1])
+            numpy.testing.assert_array_equal(eigenvectors, cached[2])
+
+            # other parameters give other files
+            get_radial_eigen_decomposition(24, 0.25, order=2, cache_directory=cache_directory)
+            get_radial_eigen_decomposition(24, 0.5, cache_directory=cache_directory)
+            self.assertEqual(3, len(os.listdir(cache_directory)))
+            pseudo_differential._eigen_decompositions.clear()
+
+    def test_matches_angular_spectrum_of_circular_beam(self):
+        control = get_test_control('test_pseudo_differential',
+                                   attenuation=False,
+                                   annular_transducer=True)
+        self.assertIs(PseudoDifferential, control.diffraction_type)
+
+        num_points_t = 64
+        num_points_r = 96
+        frequency = control.signal.transmit_frequency
+        resolution = control.signal.resolution_x
+        t = (numpy.arange(num_points_t) - num_points_t // 2) * control.signal.resolution_t
+        pulse = numpy.exp(-(t * frequency / 1.5) ** 2) * numpy.cos(2.0 * numpy.pi * frequency * t)
+
+        def _beam(r):
+            return pulse.reshape((-1,) + (1,) * r.ndim) * numpy.exp(-(r / 1.5e-3) ** 2)
+
+        wave = _beam(numpy.arange(num_points_r) * resolution)
+        for _ in range(4):
+            wave = propagate(control, wave, 1, True)
+
+        # angular spectrum of the same beam on a full square grid
+        x = (numpy.arange(2 * num_points_r) - num_points_r) * resolution
+        reference = numpy.fft.fftn(_beam(numpy.hypot(x[:, numpy.newaxis], x)))
+        kt = 2.0 * numpy.pi * numpy.fft.fftfreq(num_points_t, control.signal.resolution_t) / \
+            control.material.material.sound_speed
+        kx = 2.0 * numpy.pi * numpy.fft.fftfreq(2 * num_points_r, resolution)
+        kt = kt[:, numpy.newaxis, numpy.newaxis]
+        kz = numpy.sqrt((kt ** 2 - kx[:, numpy.newaxis] ** 2 - kx ** 2).astype(complex))
+        kz = numpy.sign(kt) * kz.real - 1j * kz.imag - kt
+        distance = 4 * control.simulation.step_size
+        reference = numpy.fft.ifftn(reference * numpy.exp(-1j * kz * distance)).real
+        reference = reference[:, num_points_r, num_points_r:]
+
+        self.assertLess(numpy.linalg.norm(wave - reference) / numpy.linalg.norm(reference), 1e-3)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+    test_spectral_pruning.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.get_wave_numbers import get_wave_numbers
+from simulation.propagation.band_limited import find_frequency_band, to_band_spectrum, \
+    from_band_spectrum, band_limited_propagate
+from simulation.propagation.spectral_pruning import get_propagating_indexes, gather_spectrum, \
+    scatter_spectrum
+
+
+class TestSpectralPruning(unittest.TestCase):
+    def setUp(self):
+        self.control = get_test_control('test_spectral_pruning')
+        num_points_t = self.control.domain.num_points_t
+        num_points_x = self.control.domain.num_points_x
+        t = (numpy.arange(num_points_t) - num_points_t // 2) * self.control.signal.resolution_t
+        x = numpy.arange(num_points_x) - num_points_x // 2
+        pulse = numpy.exp(-(t * self.control.signal.transmit_frequency / 2.0) ** 2) * \
+            numpy.cos(2.0 * numpy.pi * self.control.signal.transmit_frequency * t)
+        self.wave_field = pulse[:, numpy.newaxis] * numpy.exp(-(x / 40.0) ** 2)
+
+    def test_zero_frequency_keeps_only_plane_wave(self):
+        num_points = (self.control.domain.num_points_x, 1, self.control.domain.num_points_t)
+        indexes = get_propagating_indexes(self.control, numpy.array([0]), num_points)
+        numpy.testing.assert_array_equal([0], indexes)
+
+    def test_wider_margin_keeps_more(self):
+        num_points = (self.control.domain.num_points_x, 1, self.control.domain.num_points_t)
+        band = find_frequency_band(self.wave_field)
+        narrow = get_propagating_indexes(self.control, band, num_points, 0.0)
+        wide = get_propagating_indexes(self.control, band, num_points, 0.5)
+        self.assertLess(narrow.size, wide.size)
+        self.assertTrue(numpy.all(numpy.isin(narrow, wide)))
+
+    def test_round_trip(self):
+        spectrum = numpy.arange(12, dtype=complex).reshape(3, 4)
+        indexes = numpy.array([1, 5, 6, 11])
+        values = gather_spectrum(spectrum, indexes)
+        numpy.testing.assert_array_equal([1, 5, 6, 11], values)
+        pruned = scatter_spectrum(values, indexes, spectrum.shape)
+        numpy.testing.assert_array_equal(spectrum.reshape(-1)[indexes], pruned.reshape(-1)[indexes])
+        self.assertEqual(0, numpy.count_nonzero(numpy.delete(pruned.reshape(-1), indexes)))
+
+    def test_pruned_propagation_matches_full_spectrum(self):
+        num_points_t, num_points_x = self.wave_field.shape
+        band = find_frequency_band(self.wave_field)
+        spectrum = to_band_spectrum(self.wave_field, band)
+        wave_numbers = get_wave_numbers(self.control,
+                                        True,
+                                        num_points=(num_points_x, 1, num_points_t),
+                                        frequency_indexes=band)
+
+        reference = band_limited_propagate(self.control, spectrum, band, num_points_t, True,
+                                           wave_numbers)
+
+        indexes = get_propagating_indexes(self.control, band, (num_points_x, 1, num_points_t))
+        self.assertLess(indexes.size, spectrum.size)
+        pruned = band_limited_propagate(self.control,
+                                        gather_spectrum(spectrum, indexes),
+                                        band,
+                                        num_points_t,
+                                        True,
+                                        gather_spectrum(wave_numbers, indexes))
+        pruned = scatter_spectrum(pruned, indexes, spectrum.shape)
+
+        reference = from_band_spectrum(reference, band, num_points_t)
+        numpy.testing.assert_array_almost_equal(reference,
+                                                from_band_spectrum(pruned, band, num_points_t))
@@ -5,13 +5,15 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
+from simulation.controls.consts import LOG2_GRID_SIZE, SMOOTH_GRID_SIZE
 
 
 def reporting_simulation_type(non_linearity,
                               num_dimensions,
                               num_points_t,
                               num_points_x,
-                              num_points_y):
+                              num_points_y,
+                              grid_size_policy=LOG2_GRID_SIZE):
     if non_linearity:
         non_linearity_str = 'non-linear'
     else:
@@ -20,5 +22,9 @@ def reporting_simulation_type(non_linearity,
         dimensions_str = f'{num_points_x}X * {num_points_t}T'
     else:
         dimensions_str = f'{num_points_x}X * {num_points_y}Y * {num_points_t}T'
+    if grid_size_policy == SMOOTH_GRID_SIZE:
+        grid_str = '5-smooth grid'
+    else:
+        grid_str = 'power of two grid'
 
-    print(f'Starting {non_linearity_str} simulation of size {dimensions_str}')
+    print(f'Starting {non_linearity_str} simulation of size {dimensions_str} ({grid_str})')
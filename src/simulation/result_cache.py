@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+    result_cache.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import hashlib
+import os
+import tempfile
+import types
+from typing import Dict, FrozenSet, Optional, Sequence, Tuple
+
+import numpy
+import scipy
+
+# bumped whenever the key or the file layout changes
+_CACHE_VERSION = 1
+
+# names of the arrays of a result, in the order returned by simulation
+RESULT_NAMES = ('wave_field', 'rms_profile', 'max_profile', 'ax_pulse', 'z_pos')
+
+# attributes of the controls which configure the caches and do not change the results
+CACHE_ATTRIBUTES = frozenset(('_cache_directory',
+                              '_result_cache_size',
+                              '_checkpoint_interval',
+                              '_checkpoint_cache_size'))
+
+# the packages whose source is part of the code version
+_SOURCE_PACKAGES = ('simulation', 'system')
+
+_code_version: Optional[str] = None
+
+
+class ResultCache:
+    """
+    Cache of the results of whole simulations on local disk. A result is keyed by a hash of
+    the full configuration of the controls except CACHE_ATTRIBUTES, the initial wave field,
+    the window, the screen, the phantom, the start position and the code version. Each result
+    is one file, written atomically so that several processes may read and write the cache at
+    the same time. When the files exceed the size of the cache, the least recently used files
+    are removed.
+    """
+
+    # the files of the cache are named <prefix><key>.npz
+    _FILE_PREFIX = 'result_'
+
+    def __init__(self,
+                 directory: str,
+                 max_size: int):
+        """
+        Constructor
+        :param directory: Directory of the cache files.
+        :param max_size: The largest total size of the cache files in bytes.
+        """
+        self._directory = directory
+        self._max_size = max_size
+
+    def get_key(self,
+                control,
+                wave_field: numpy.ndarray,
+                window=None,
+                screen=None,
+                phantom=None,
+                position: float = 0.0) -> Optional[str]:
+        """
+        Returns the key of a simulation.
+        :param control: The controls.
+        :param wave_field: The initial wave field.
+        :param window: The window of the simulation.
+        :param screen: The aberration screen of the simulation.
+        :param phantom: The phantom of the simulation.
+        :param position: The start position.
+        :return: The key, or None if the simulation can not be keyed, e.g. when the phantom is
+            a function.
+        """
+        hasher = hashlib.sha256()
+        update_hash(hasher, (_CACHE_VERSION, get_code_version()))
+        try:
+            update_hash(hasher,
+                        (control, wave_field, window, screen, phantom, position),
+                        CACHE_ATTRIBUTES)
+        except TypeError:
+            return None
+
+        return hasher.hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[numpy.ndarray, ...]]:
+        """
+        Returns a cached result. Returns None if the result is missing or unreadable.
+        :param key: The key of the simulation.
+        :return: The wave field, the RMS profile, the maximum profile, the axial pulse and the
+            z-coordinates, as returned by simulation.
+        """
+        arrays = self._load_arrays(key)
+        if arrays is None or any(name not in arrays for name in RESULT_NAMES):
+            return None
+
+        return tuple(arrays[name] for name in RESULT_NAMES)
+
+    def save(self,
+             key: str,
+             result: Tuple[numpy.ndarray, ...]):
+        """
+        Writes a result to a temporary file which is then renamed, so that other processes
+        never read a partially written file, and evicts the least recently used results.
+        :param key: The key of the simulation.
+        :param result: The result, as returned by simulation.
+        """
+        self._save_arrays(key, dict(zip(RESULT_NAMES, result)))
+
+    def _load_arrays(self,
+                     key: str,
+                     names: Optional[Sequence[str]] = None) -> Optional[Dict[str, numpy.ndarray]]:
+        """
+        Returns the arrays of a cache file, or None if the file is missing or unreadable.
+        Only the arrays of names are read when names are given.
+        """
+        file_name = self._get_file_name(key)
+        try:
+            with numpy.load(file_name) as file:
+                arrays = {name: file[name] for name in (file.files if names is None else names)}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # the access time orders the eviction
+        try:
+            os.utime(file_name)
+        except OSError:
+            pass
+
+        return arrays
+
+    def _save_arrays(self,
+                     key: str,
+                     arrays: Dict[str, numpy.ndarray]):
+        """
+        Writes the arrays of a cache file atomically, see save.
+        """
+        file_name = self._get_file_name(key)
+        temporary_name = None
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self._directory, suffix='.tmp',
+                                             delete=False) as file:
+                temporary_name = file.name
+                numpy.savez(file, **arrays)
+            os.replace(temporary_name, file_name)
+        except OSError as error:
+            print('Could not write {}: {}'.format(file_name, error))
+            if temporary_name is not None and os.path.exists(temporary_name):
+                os.remove(temporary_name)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used results until the cache fits its size. Files removed
+        by other processes at the same time are skipped.
+        """
+        files = []
+        for entry in _scan(self._directory, self._FILE_PREFIX):
+            try:
+                status = entry.stat()
+            except OSError:
+                continue
+            files.append((status.st_mtime, status.st_size, entry.path))
+
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in sorted(files):
+            if size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size = size - file_size
+
+    def _get_file_name(self, key: str) -> str:
+        return os.path.join(self._directory, '{}{}.npz'.format(self._FILE_PREFIX, key))
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        size = 0
+        for entry in _scan(self._directory, self._FILE_PREFIX):
+            try:
+                size = size + entry.stat().st_size
+            except OSError:
+                pass
+
+        return size
+
+
+def get_code_version() -> str:
+    """
+    Returns a hash of the source of the simulation, and of the versions of numpy and scipy.
+    The tests are not part of the source.
+    :return: The code version.
+    """
+    global _code_version
+    if _code_version is None:
+        hasher = hashlib.sha256()
+        update_hash(hasher, (numpy.__version__, scipy.__version__))
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for package in _SOURCE_PACKAGES:
+            for directory, directories, file_names in os.walk(os.path.join(root, package)):
+                directories.sort()
+                for file_name in sorted(file_names):
+                    if not file_name.endswith('.py') or file_name.startswith('test_'):
+                        continue
+                    path = os.path.join(directory, file_name)
+                    update_hash(hasher, os.path.relpath(path, root))
+                    with open(path, 'rb') as file:
+                        update_hash(hasher, file.read())
+        _code_version = hasher.hexdigest()
+
+    return _code_version
+
+
+def _scan(directory: str, prefix: str):
+    """
+    Returns the files of a cache directory.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return []
+
+    return [entry for entry in entries
+            if entry.name.startswith(prefix) and entry.name.endswith('.npz')]
+
+
+def update_hash(hasher, value, excluded: FrozenSet[str] = frozenset()):
+    """
+    Updates a hash with a value. Numbers are hashed by their exact representation, arrays by
+    their type, shape and data, and objects by their class and attributes. Raises TypeError
+    for values which can not be hashed, e.g. functions.
+    :param hasher: The hash, e.g. hashlib.sha256().
+    :param value: The value.
+    :param excluded: Names of attributes of objects, at any depth, which are not hashed.
+    """
+    if value is None:
+        hasher.update(b'N')
+    elif isinstance(value, (bool, numpy.bool_)):
+        hasher.update(b'B1' if value else b'B0')
+    elif isinstance(value, (int, numpy.integer)):
+        hasher.update('I{:d};'.format(int(value)).encode('utf-8'))
+    elif isinstance(value, (float, numpy.floating)):
+        hasher.update('F{};'.format(float(value).hex()).encode('utf-8'))
+    elif isinstance(value, (complex, numpy.complexfloating)):
+        hasher.update('C{},{};'.format(float(value.real).hex(),
+                                       float(value.imag).hex()).encode('utf-8'))
+    elif isinstance(value, str):
+        update_hash(hasher, value.encode('utf-8'))
+    elif isinstance(value, bytes):
+        hasher.update('S{:d};'.format(len(value)).encode('utf-8'))
+        hasher.update(value)
+    elif isinstance(value, numpy.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError('Arrays of objects can not be hashed')
+        hasher.update('A{}{};'.format(value.dtype.str, value.shape).encode('utf-8'))
+        hasher.update(numpy.ascontiguousarray(value).data)
+    elif isinstance(value, (tuple, list)):
+        hasher.update('L{:d};'.format(len(value)).encode('utf-8'))
+        for item in value:
+            update_hash(hasher, item, excluded)
+    elif isinstance(value, dict):
+        hasher.update('D{:d};'.format(len(value)).encode('utf-8'))
+        for name in sorted(value, key=str):
+            update_hash(hasher, str(name))
+            update_hash(hasher, value[name], excluded)
+    elif isinstance(value, type):
+        update_hash(hasher, 'T' + value.__module__ + '.' + value.__qualname__)
+    elif hasattr(value, '__dict__') and \
+            not isinstance(value, (types.FunctionType, types.MethodType)):
+        update_hash(hasher, 'O' + type(value).__module__ + '.' + type(value).__qualname__)
+        attributes = {name: attribute for name, attribute in vars(value).items()
+                      if name not in excluded}
+        update_hash(hasher, attributes, excluded)
+    else:
+        raise TypeError('{} can not be hashed'.format(type(value).__name__))
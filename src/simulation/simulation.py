@@ -5,37 +5,68 @@
     :copyright (C) 2020  Jaeho
     :license: GPL-3.0
 """
+import functools
+import os
 import time
-from typing import Tuple, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Tuple, List, Optional, Sequence
 
 import numpy
 import scipy.sparse
 
+from simulation.beam_simulation.adapt_sample_rate import adapt_sample_rate, find_num_points_t, \
+    resample_time_window
+from simulation.beam_simulation.adapt_lateral_domain import adapt_lateral_domain, \
+    regrid_lateral_domain
+from simulation.beam_simulation.adapt_time_window import adapt_time_window, \
+    regrid_time_window
 from simulation.beam_simulation.adjust_equidistant_steps import adjust_equidistant_steps
 from simulation.beam_simulation.calc_spatial_window import calc_spatial_window
-from simulation.beam_simulation.find_steps import find_steps
-from simulation.beam_simulation.propagate_through_body_wall import propagate_through_body_wall
+from simulation.beam_simulation.body_wall import body_wall_steps, get_num_body_wall_steps
+from simulation.beam_simulation.direct_jump import direct_jump_steps
 from simulation.beam_simulation.recalculate_wave_numbers import recalculate_wave_numbers
+from simulation.beam_simulation.step_schedule import StepSchedule, plan_steps
+from simulation.checkpoint_store import CheckpointStore
+from simulation.controls.consts import NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM
 from simulation.controls.consts import NO_HISTORY
+from simulation.controls.consts import POSITION_HISTORY
 from simulation.controls.consts import PROFILE_HISTORY
 from simulation.controls.main_control import MainControl
+from simulation.controls.simulation_state import SimulationState
 from simulation.estimate_eta import estimate_eta
 from simulation.get_wave_numbers import get_wave_numbers
-from simulation.post_processing.export_beam_profile import export_beam_profile
+from simulation.beam_simulation.get_absorbing_layer import get_absorbing_layer_damping
+from simulation.post_processing.export_beam_profile import export_step_profiles
+from simulation.propagation.band_limited import find_frequency_band, to_band_spectrum, \
+    from_band_spectrum, band_limited_propagate
 from simulation.propagation.propagate import propagate
+from simulation.propagation.spectral_pruning import get_propagating_indexes, gather_spectrum, \
+    scatter_spectrum
 from simulation.reporting_simulation_type import reporting_simulation_type
+from simulation.result_cache import ResultCache
+from simulation.simulation_step import SimulationStep
+from simulation.stopping_criteria.interfaces import IStoppingCriterion
+from system.diffraction.diffraction import ExactDiffraction
 
 
 def simulation(control: MainControl,
                wave_field: numpy.ndarray,
                screen=numpy.array([]),
                window=None,
-               phantom=None):
+               phantom=None,
+               state: Optional[SimulationState] = None,
+               stopping_criteria: Optional[Sequence[IStoppingCriterion]] = None,
+               use_cache: bool = False):
     """
     Function that simulates propagation from the transducer to a certain distance.
     The function will depending on the kind of propagation (linear or non-linear)
     return the rms beam profile and the maximum temporal pressure for the fundamental
     and the 2nd harmonic component. The profiles are calculated for each step.
+    The simulation consumes the steps of simulation_steps, and holds the profiles of all steps.
+    With use_cache, the results are cached in the results directory of
+    control.simulation.cache_directory, so a simulation which has already been run is loaded,
+    see ResultCache. A simulation which shares its first steps with an earlier simulation
+    resumes from the deepest checkpoint of the earlier simulation, see simulation_steps.
     :param control: Controls for simulation.
     :param wave_field: Initial wave field at transducer.
     :param screen: Aberration screen used for correction of transmit ultrasound beam
@@ -44,10 +75,17 @@ def simulation(control: MainControl,
         cosine tapering og length _window * step_size will be used. By default, _window=2.
         If _window is set to -1, no windowing will be performed.
         Overrides whatever specified in control.simulation.num_windows.
-    :param phantom: Phantom is a function handle to a function who's input is a (x,y,z) coordinate
-        and output is the local wave speed at the coordinate.
-        The phantom is initialized by a function call with one string argument and finalized with
-        a function call with no input arguments. Initialization is performed by the function.
+    :param phantom: Phantom is a vectorized function who's input is arrays of (x,y,z)
+        coordinates and output is the local wave speed at the coordinates, e.g. a SpherePhantom.
+        The phantom is sampled slab by slab on the grid of the body wall.
+    :param state: The state of the run, giving the start position. Default is a new state at
+        the transducer. The control is not changed by the simulation, so several simulations
+        may share it, each with its own state, see run_simulations.
+    :param stopping_criteria: Criteria for stopping before the end point, see
+        simulation_steps. The profiles end at the last step when the simulation is stopped.
+        Simulations with stopping criteria are not cached.
+    :param use_cache: Flag for loading and storing the result in the result cache, and the
+        checkpoints of the simulation. Default is to run the simulation without the caches.
     :return: Wave field at the end of the simulation,
              Temporal RMS beam profile for all frequencies.
                 The profile has dimensions (num_points_y * num_points_x * num_steps * harmonic),
@@ -61,161 +99,833 @@ def simulation(control: MainControl,
                 This is the raw signal without any filtering performed for each step.
              The z-coordinate of each profile and axial pulse.
     """
+    cache, key = _get_result_cache(control, wave_field, screen, window, phantom, state,
+                                   use_cache and not stopping_criteria)
+    if key is not None:
+        result = cache.load(key)
+        if result is not None:
+            print('Loaded the result of {} from the cache'.format(control.simulation_name))
+            if state is not None and result[4].size > 0:
+                state.current_position = float(result[4][-1])
+            return result
+
+    rms_profile, max_profile, ax_pulse, z_pos = (numpy.array([]),) * 4
+    step = None
+    for step in simulation_steps(control,
+                                 wave_field,
+                                 screen,
+                                 window,
+                                 phantom,
+                                 state,
+                                 stopping_criteria,
+                                 use_cache):
+        if step.step == 0:
+            rms_profile, max_profile, ax_pulse, z_pos = _get_beam_profiles(control,
+                                                                           step.num_steps)
+        if control.history != NO_HISTORY:
+            rms_profile[:, :, step.step] = step.rms_profile
+            max_profile[:, :, step.step] = step.max_profile
+            ax_pulse[:, step.step] = step.ax_pulse
+            z_pos[step.step] = step.position
+
+    # trim the profiles of a simulation stopped early
+    if control.history != NO_HISTORY and step.step + 1 < z_pos.size:
+        num_steps = step.step + 1
+        rms_profile = rms_profile[:, :, :num_steps]
+        max_profile = max_profile[:, :, :num_steps]
+        ax_pulse = ax_pulse[:, :num_steps]
+        z_pos = z_pos[:num_steps]
+
+    # saving the last profiles
+    if control.history == PROFILE_HISTORY:
+        print(f'[DUMMY] Saving the last profiles to {control.simulation_name}.json')
+
+    result = _get_domain_wave_field(control, step), rms_profile, max_profile, ax_pulse, z_pos
+    if key is not None:
+        cache.save(key, result)
+
+    return result
+
+
+def simulation_steps(control: MainControl,
+                     wave_field: numpy.ndarray,
+                     screen=numpy.array([]),
+                     window=None,
+                     phantom=None,
+                     state: Optional[SimulationState] = None,
+                     stopping_criteria: Optional[Sequence[IStoppingCriterion]] = None,
+                     use_cache: bool = False) -> Iterator[SimulationStep]:
+    """
+    Simulates propagation from the transducer to a certain distance one step at a time.
+    A record of each step is yielded as soon as the step is done, starting with step 0 at the
+    start position, followed by the steps in the body wall and the steps beyond it. The caller
+    may write the records to disk, plot them or stop early, and only the current wave field is
+    held by the iterator, and the profiles of the steps since the last checkpoint when the
+    simulation is checkpointed. See simulation for the parameters.
+    The stopping criteria are evaluated from the profiles of each step, and the iteration ends
+    with the first step where one of them is met. The profiles are only exported with
+    PROFILE_HISTORY, so the criteria need control.history to be PROFILE_HISTORY.
+    With use_cache and a positive control.simulation.checkpoint_interval, the state of the wave
+    field is checkpointed every checkpoint interval beyond the body wall and at the last step,
+    in the checkpoints directory of control.simulation.cache_directory. A simulation which
+    takes the same steps as an earlier
+    simulation up to a checkpoint, e.g. one with a shorter end point, resumes from the deepest
+    such checkpoint. The steps up to the checkpoint are restored from the checkpoint, see
+    CheckpointStore. Direct jumps compute each plane from the source plane and are not
+    checkpointed.
+    :param control: Controls for simulation.
+    :param wave_field: Initial wave field at transducer.
+    :param screen: Aberration screen used for correction of transmit ultrasound beam
+    :param window: Window for tapering the solution to zero close to the boundaries.
+    :param phantom: Phantom is a vectorized function who's input is arrays of (x,y,z)
+        coordinates and output is the local wave speed at the coordinates.
+    :param state: The state of the run, giving the start position. Default is a new state at
+        the transducer.
+    :param stopping_criteria: Criteria for stopping before the end point, e.g.
+        FocalMaximumPassed. Default is to stop at the end point.
+    :param use_cache: Flag for resuming from and storing checkpoints. Default is no
+        checkpoints.
+    :return: Iterator over the steps of the simulation.
+    """
+    if not stopping_criteria:
+        yield from _simulation_steps(control, wave_field, screen, window, phantom, state,
+                                     use_cache)
+        return
+    if control.history != PROFILE_HISTORY:
+        raise ValueError('The stopping criteria are evaluated from the profiles, which are only '
+                         'exported with PROFILE_HISTORY')
+
+    steps = _simulation_steps(control, wave_field, screen, window, phantom, state, use_cache)
+
+    try:
+        for step in steps:
+            # all criteria follow every step
+            met = [criterion for criterion in stopping_criteria if criterion(step)]
+            yield step
+            if met:
+                print('Stopped at {:.1f} mm, {}'.format(step.position * 1e3, met[0].description))
+                return
+    finally:
+        steps.close()
+
+
+def _simulation_steps(control: MainControl,
+                      wave_field: numpy.ndarray,
+                      screen,
+                      window,
+                      phantom,
+                      state: Optional[SimulationState],
+                      use_cache: bool) -> Iterator[SimulationStep]:
+    """
+    The steps of simulation_steps without the stopping criteria. The steps start at the start
+    position or the checkpoint, pass the body wall, and continue by direct jumps or by the
+    sequential steps.
+    """
+    if state is None:
+        state = SimulationState(control)
+    band_limited, direct = _get_propagation_modes(control, screen, window)
+
     # calculate number of propagation steps beyond the body wall
-    current_pos = control.simulation.current_position
-    end_point = control.simulation.endpoint
-    step_size = control.simulation.step_size
-    store_pos = control.simulation.store_position
-    equidistant_steps = control.equidistant_steps
-
-    num_steps, step_sizes, step_idx = _calc_steps(control,
-                                                  current_pos,
-                                                  end_point,
-                                                  step_size,
-                                                  store_pos)
+    current_pos = state.current_position
+    schedule = _plan_steps(control,
+                           current_pos,
+                           control.simulation.endpoint,
+                           control.simulation.step_size,
+                           control.simulation.store_position)
+    num_steps = schedule.num_steps
+    num_body_wall_steps = get_num_body_wall_steps(control, current_pos)
+    total_steps = num_body_wall_steps + num_steps
 
     # adjust equidistant_steps size flag
-    diff_step_idx, equidistant_steps, recalculate = \
+    _, equidistant_steps, recalculate = \
         adjust_equidistant_steps(control.diffraction_type,
-                                 equidistant_steps,
+                                 control.equidistant_steps,
                                  num_steps,
-                                 step_idx)
+                                 schedule.step_indexes)
 
-    # sets sizes
-    num_points_x = control.domain.num_points_x
-    num_points_y = control.domain.num_points_y
-    num_points_t = control.domain.num_points_t
-    non_linearity = control.non_linearity
-    annular_transducer = control.annular_transducer
-    history = control.history
-    num_dimensions = control.num_dimensions
-    resolution_x = control.signal.resolution_x
-    resolution_y = control.signal.resolution_y
-
-    # initializing variables
-    if screen.size != 0:
-        raise NotImplementedError
-    file_name = control.simulation_name
+    # the states beyond the body wall are checkpointed, see CheckpointStore
+    checkpoints, checkpoint_keys = _get_checkpoints(control,
+                                                    wave_field,
+                                                    screen,
+                                                    window,
+                                                    phantom,
+                                                    state,
+                                                    use_cache and not direct,
+                                                    schedule.step_sizes[:num_steps - 1],
+                                                    schedule.step_indexes[:num_steps - 1],
+                                                    (recalculate, equidistant_steps))
+    num_restored_steps, checkpoint = 0, None
+    if checkpoint_keys is not None:
+        num_restored_steps, checkpoint = checkpoints.load_checkpoint(checkpoint_keys,
+                                                                     control.history)
 
-    wave_numbers = get_wave_numbers(control, equidistant_steps)
+    # the profiles of the steps since the last checkpoint, the parent of the next checkpoint
+    profiles = [] if checkpoint_keys is not None else None
+    parent_key = checkpoint_keys[num_restored_steps] if checkpoint is not None else None
 
+    wave_numbers = get_wave_numbers(control, equidistant_steps, state=state)
+    operator_step_size = state.step_size
     times_for_eta = [0.0] * (num_steps + 1)
-    lap_time_for_eta = 0.0
-    step_index = 0
 
     # calculate spatial _window
     _window = calc_spatial_window(control,
                                   window,
-                                  annular_transducer,
-                                  num_points_x,
-                                  num_points_y,
-                                  resolution_x,
-                                  resolution_y,
-                                  step_size)
+                                  control.annular_transducer,
+                                  control.domain.num_points_x,
+                                  control.domain.num_points_y,
+                                  control.signal.resolution_x,
+                                  control.signal.resolution_y,
+                                  control.simulation.step_size)
 
     # reporting simulation type
-    reporting_simulation_type(non_linearity,
-                              num_dimensions,
-                              num_points_t,
-                              num_points_x,
-                              num_points_y)
-
-    # calculating beam profiles
-    ax_pulse, max_profile, rms_profile, z_pos = _calc_beam_profiles(control,
-                                                                    history,
-                                                                    num_points_t,
-                                                                    num_points_x,
-                                                                    num_points_y,
-                                                                    num_steps,
-                                                                    step_index,
-                                                                    wave_field)
+    reporting_simulation_type(control.non_linearity,
+                              control.num_dimensions,
+                              control.domain.num_points_t,
+                              control.domain.num_points_x,
+                              control.domain.num_points_y,
+                              control.domain.grid_size_policy)
+
+    # the start position, or the steps up to the checkpoint
+    step, _wave_field = yield from _start_steps(control,
+                                                wave_field,
+                                                checkpoint,
+                                                total_steps,
+                                                profiles,
+                                                state)
 
     # Propagating through body wall
-    ax_pulse, max_profile, rms_profile, _wave_field, z_pos = \
-        propagate_through_body_wall(control,
-                                    phantom,
-                                    wave_numbers,
-                                    ax_pulse,
-                                    current_pos,
+    if num_body_wall_steps > 0 and checkpoint is None:
+        step, _wave_field = yield from _body_wall_simulation_steps(control,
+                                                                   step,
+                                                                   _wave_field,
+                                                                   _window,
+                                                                   phantom,
+                                                                   profiles,
+                                                                   state)
+
+    # propagate the occupied frequency band and the propagating part of the angular spectrum
+    band, _spectrum, wave_numbers = _get_band(control,
+                                              _wave_field,
+                                              checkpoint,
+                                              (band_limited, direct),
+                                              equidistant_steps,
+                                              wave_numbers,
+                                              state)
+
+    # the grid and the operator of the start position or the checkpoint
+    grid = ((0, 0), 0, control.signal.resolution_t)
+    first_index = 0
+    if checkpoint is not None:
+        grid, wave_numbers, equidistant_steps, operator_step_size = \
+            _restore_grid(control, checkpoint, band, state)
+        first_index = num_restored_steps
+    elif control.adaptive_sample_rate:
+        _wave_field, grid, wave_numbers = _start_sample_rate(control,
+                                                             _wave_field,
+                                                             equidistant_steps,
+                                                             state)
+
+    # computing all depth planes directly from the source plane, or propagating the rest of
+    # the distance one step at a time
+    if direct:
+        yield from _direct_jump_simulation_steps(control,
+                                                 schedule,
+                                                 step,
+                                                 _wave_field,
+                                                 band,
+                                                 times_for_eta,
+                                                 state)
+    else:
+        yield from _sequential_steps(control,
+                                     schedule,
+                                     recalculate,
+                                     first_index,
+                                     step,
+                                     (_wave_field, _spectrum),
+                                     (wave_numbers, equidistant_steps, operator_step_size),
+                                     grid,
+                                     band,
+                                     window,
+                                     (checkpoints, checkpoint_keys, profiles, parent_key),
+                                     times_for_eta,
+                                     state)
+
+    print('Simulation finished in {:.2f} min using an average of {} sec per step.'
+          .format(times_for_eta[-2] / 60.0, numpy.mean(numpy.diff(times_for_eta[:-2]))))
+
+
+def run_simulations(control: MainControl,
+                    wave_fields: Sequence[numpy.ndarray],
+                    num_workers: Optional[int] = None,
+                    phantom=None,
+                    use_cache: bool = False) -> List[tuple]:
+    """
+    Runs one simulation for each initial wave field in a pool of threads of the same process.
+    The simulations share the control, which is not changed by a run, and each simulation has
+    its own state. The FFTs and matrix products of the steps release the GIL, so the runs
+    overlap when there are several cores.
+    :param control: Controls for all simulations.
+    :param wave_fields: The initial wave fields at the transducer, e.g. one for each focus.
+    :param num_workers: The number of threads. Default is control.simulation.num_workers.
+    :param phantom: The phantom of all simulations, see simulation.
+    :param use_cache: Flag for using the result cache, see simulation.
+    :return: The results of simulation, in the order of the wave fields.
+    """
+    if num_workers is None:
+        num_workers = control.simulation.num_workers
+
+    def _run(wave_field):
+        return simulation(control,
+                          wave_field,
+                          phantom=phantom,
+                          state=SimulationState(control),
+                          use_cache=use_cache)
+
+    if num_workers > 1 and len(wave_fields) > 1:
+        with ThreadPoolExecutor(max_workers=min(num_workers, len(wave_fields))) as executor:
+            return list(executor.map(_run, wave_fields))
+
+    return [_run(wave_field) for wave_field in wave_fields]
+
+
+def _plan_steps(control, current_pos, end_point, step_size, store_pos) -> StepSchedule:
+    """
+    Returns the steps of a simulation beyond the body wall.
+    """
+    body_wall_thickness = 0.0
+    if control.heterogeneous_medium != NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM:
+        body_wall_thickness = control.material.thickness
+
+    return plan_steps(current_pos,
+                      end_point,
+                      step_size,
+                      store_pos,
+                      body_wall_thickness=body_wall_thickness)
+
+
+def _get_propagation_modes(control, screen, window) -> Tuple[bool, bool]:
+    """
+    Returns the flags of the band-limited propagation and of the direct jumps of a simulation,
+    checking that the modes of the controls can be combined.
+    """
+    if screen.size != 0:
+        raise NotImplementedError
+    if control.adaptive_lateral_domain and isinstance(window, numpy.ndarray):
+        raise ValueError('The window must be a scalar when the lateral domain is adaptive')
+    band_limited = control.band_limited and control.non_linearity is False and \
+        control.diffraction_type is ExactDiffraction
+    if band_limited and (control.adaptive_lateral_domain or control.adaptive_time_window):
+        raise ValueError('The band-limited propagation does not support adaptive grids')
+    direct = control.direct_jump and control.non_linearity is False and \
+        control.diffraction_type is ExactDiffraction and \
+        control.heterogeneous_medium == NO_ABERRATION_AND_HOMOGENEOUS_MEDIUM
+    if direct and (control.adaptive_lateral_domain or control.adaptive_time_window):
+        raise ValueError('The direct jump does not support adaptive grids')
+    if control.adaptive_sample_rate and (band_limited or direct or control.adaptive_time_window):
+        raise ValueError('The adaptive sample rate does not support band-limited propagation, '
+                         'direct jumps or adaptive time windows')
+
+    return band_limited, direct
+
+
+def _start_steps(control, wave_field, checkpoint, num_steps, profiles, state):
+    """
+    The step at the start position, or the steps restored up to the checkpoint. Returns the
+    last step and its wave field.
+    """
+    if checkpoint is not None:
+        print('Resuming from the checkpoint at {:.1f} mm'.format(
+            float(checkpoint['position']) * 1e3))
+        for step in _get_restored_steps(control, checkpoint, num_steps):
+            yield step
+        state.current_position = float(checkpoint['position'])
+        return step, checkpoint['wave_field']
+
+    step = _get_step(control, 0, num_steps, state.current_position, wave_field, time.time(), 0.0)
+    if profiles is not None:
+        profiles.append(_get_step_profiles(step))
+    yield step
+
+    return step, wave_field
+
+
+def _body_wall_simulation_steps(control, step, wave_field, window, phantom, profiles, state):
+    """
+    The steps through the body wall following the step at the start position, see
+    body_wall_steps. Returns the last step and its wave field.
+    """
+    print('Entering body wall')
+    start_time = time.time()
+    _wave_field = wave_field
+    for _wave_field in body_wall_steps(control, wave_field, 1, window, phantom, state):
+        step = _get_step(control, step.step + 1, step.num_steps, state.current_position,
+                         _wave_field, start_time, step.total_time)
+        if profiles is not None:
+            profiles.append(_get_step_profiles(step))
+        yield step
+        start_time = time.time()
+    print('Done with body wall')
+
+    return step, _wave_field
+
+
+def _get_band(control, wave_field, checkpoint, modes, equidistant_steps, wave_numbers, state):
+    """
+    Returns the band of the propagation, i.e. the indexes of the occupied frequency band and of
+    the propagating part of the angular spectrum, or None when they are not used, together with
+    the spectrum of the band and the operator of the band. The band of a checkpoint is
+    restored from the checkpoint.
+    """
+    band_limited, direct = modes
+    num_points_x = control.domain.num_points_x
+    num_points_y = control.domain.num_points_y
+    num_points_t = control.domain.num_points_t
+
+    # propagate the angular spectrum of the occupied frequency band only
+    frequency_indexes, spectrum = None, None
+    if band_limited:
+        if checkpoint is None:
+            frequency_indexes = find_frequency_band(wave_field,
+                                                    control.simulation.band_threshold)
+            spectrum = to_band_spectrum(wave_field, frequency_indexes)
+        else:
+            frequency_indexes = checkpoint['frequency_indexes']
+            spectrum = checkpoint['spectrum']
+        wave_numbers = get_wave_numbers(control,
+                                        equidistant_steps,
+                                        frequency_indexes=frequency_indexes,
+                                        state=state)
+        print('Propagating {} of {} frequency bins'.format(frequency_indexes.size, num_points_t))
+
+    # store and propagate the propagating part of the angular spectrum only
+    propagating_indexes = None
+    if control.spectral_pruning and (band_limited or direct):
+        band = frequency_indexes if band_limited else numpy.arange(num_points_t // 2 + 1)
+        propagating_indexes = get_propagating_indexes(control,
+                                                      band,
+                                                      (num_points_x, num_points_y, num_points_t),
+                                                      control.simulation.evanescent_margin)
+        print('Pruned {:.1f} % of the k-space of the {}X * {}Y * {}F grid'.format(
+            100.0 * (1.0 - propagating_indexes.size / (band.size * num_points_x * num_points_y)),
+            num_points_x,
+            num_points_y,
+            band.size))
+        if band_limited:
+            if checkpoint is None:
+                spectrum = gather_spectrum(spectrum, propagating_indexes)
+            wave_numbers = gather_spectrum(wave_numbers, propagating_indexes)
+
+    return (frequency_indexes, propagating_indexes), spectrum, wave_numbers
+
+
+def _start_sample_rate(control, wave_field, equidistant_steps, state):
+    """
+    Returns the wave field resampled to the samples needed by its bandwidth, its grid and its
+    operator.
+    """
+    num_points_t = control.domain.num_points_t
+    current_num_points_t = find_num_points_t(wave_field,
+                                             control.simulation.sample_rate_ratio,
+                                             control.simulation.nyquist_threshold)
+    _wave_field = resample_time_window(wave_field, current_num_points_t)
+    resolution_t = num_points_t * control.signal.resolution_t / current_num_points_t
+    wave_numbers = get_wave_numbers(control,
                                     equidistant_steps,
-                                    history,
-                                    max_profile,
-                                    rms_profile,
-                                    wave_field,
-                                    _window,
-                                    z_pos)
-
-    # Make window into sparse matrix
-    _window = _make_window_into_sparse_matrix(_window)
-
-    # Propagating the rest of the distance
-    for index in range(num_steps - 1):
-        step_index = step_index + 1
+                                    num_points=(control.domain.num_points_x,
+                                                control.domain.num_points_y,
+                                                current_num_points_t),
+                                    resolution_t=resolution_t,
+                                    state=state)
+    print('Starting with {} of {} samples in time'.format(current_num_points_t, num_points_t))
+
+    return _wave_field, ((0, 0), 0, resolution_t), wave_numbers
+
+
+def _restore_grid(control, checkpoint, band, state):
+    """
+    Returns the grid of the wave field of a checkpoint, i.e. the lateral offset, the time offset
+    and the sampling interval, and the operator of the checkpoint with the flag of its
+    equidistant steps and its step size.
+    """
+    frequency_indexes, propagating_indexes = band
+    resolution_t = float(checkpoint['resolution_t'])
+    grid = (tuple(int(offset) for offset in checkpoint['lateral_offset']),
+            int(checkpoint['time_offset']),
+            resolution_t)
+    equidistant_steps = bool(checkpoint['equidistant_steps'])
+    operator_step_size = float(checkpoint['operator_step_size'])
+    state.step_size = operator_step_size
+    wave_numbers = get_wave_numbers(control,
+                                    equidistant_steps,
+                                    num_points=_get_num_points(checkpoint['wave_field']),
+                                    frequency_indexes=frequency_indexes,
+                                    resolution_t=resolution_t,
+                                    state=state)
+    if frequency_indexes is not None and propagating_indexes is not None:
+        wave_numbers = gather_spectrum(wave_numbers, propagating_indexes)
+    state.step_size = float(checkpoint['step_size'])
+
+    return grid, wave_numbers, equidistant_steps, operator_step_size
+
+
+def _direct_jump_simulation_steps(control, schedule, step, wave_field, band, times_for_eta,
+                                  state):
+    """
+    The steps of a direct jump, computing all depth planes directly from the wave field of the
+    last step, see direct_jump_steps.
+    """
+    frequency_indexes, propagating_indexes = band
+    num_steps = schedule.num_steps
+    start_time = time.time()
+    positions = state.current_position + numpy.cumsum(schedule.step_sizes[:num_steps - 1])
+    planes = direct_jump_steps(control,
+                               wave_field,
+                               list(positions),
+                               frequency_indexes,
+                               control.simulation.num_workers,
+                               propagating_indexes,
+                               state)
+    for index, (_wave_field, profiles) in enumerate(planes):
+        step = _get_step(control, step.step + 1, step.num_steps, state.current_position,
+                         _wave_field, start_time, step.total_time, profiles=profiles)
+        times_for_eta[index + 1] = times_for_eta[index] + step.elapsed_time
+        yield step
         start_time = time.time()
 
-        # recalculate wave number operator
-        wave_numbers, equidistant_steps = \
-            recalculate_wave_numbers(control,
-                                     wave_numbers,
-                                     diff_step_idx,
-                                     equidistant_steps,
-                                     index,
-                                     recalculate,
-                                     step_idx)
+
+def _sequential_steps(control,
+                      schedule,
+                      recalculate,
+                      first_index,
+                      step,
+                      fields,
+                      operator,
+                      grid,
+                      band,
+                      window,
+                      checkpointing,
+                      times_for_eta,
+                      state):
+    """
+    The steps propagating the wave field of the last step to the end point one step at a time,
+    from the step first_index of the schedule. The grid follows the beam where it is adaptive,
+    and the checkpoints are saved while the steps are taken.
+    :param fields: The wave field and the spectrum of the band of the last step.
+    :param operator: The operator of the last step, the flag of its equidistant steps and its
+        step size.
+    :param grid: The lateral offset, the time offset and the sampling interval of the wave field.
+    :param checkpointing: The checkpoint store, the keys of the checkpoints, the profiles since
+        the last checkpoint and the key of the last checkpoint.
+    """
+    num_steps = schedule.num_steps
+    num_sequential_steps = num_steps - 1
+    _wave_field, _spectrum = fields
+    wave_numbers, equidistant_steps, operator_step_size = operator
+    lateral_offset, time_offset, resolution_t = grid
+    frequency_indexes = band[0]
+    checkpoints, checkpoint_keys, profiles, parent_key = checkpointing
+    num_points = _get_num_points(_wave_field)
+    band_shape = None
+    if frequency_indexes is not None:
+        band_shape = (frequency_indexes.size,) + _wave_field.shape[1:]
+    _window = _get_sparse_window(control, window, num_points)
+    guard_points = (_get_guard_points(control, window), _get_guard_points_t(control))
+    lap_time_for_eta = 0.0
+
+    for index in range(first_index, num_sequential_steps):
+        start_time = time.time()
+
+        # follow the beam with the grid
+        _wave_field, (lateral_offset, time_offset, resolution_t), regridded, resampled = \
+            _adapt_grid(control,
+                        _wave_field,
+                        index,
+                        (lateral_offset, time_offset, resolution_t),
+                        guard_points,
+                        state)
+        if regridded or resampled:
+            num_points = _get_num_points(_wave_field)
+        if regridded:
+            _window = _get_sparse_window(control, window, num_points)
+
+        # the operator of the step is built for the size of the step
+        state.step_size = float(schedule.step_sizes[index])
+        wave_numbers, equidistant_steps, rebuilt = \
+            _get_step_wave_numbers(control,
+                                   schedule,
+                                   index,
+                                   recalculate,
+                                   regridded or resampled,
+                                   (wave_numbers, equidistant_steps),
+                                   (num_points, resolution_t),
+                                   band,
+                                   state)
+        if rebuilt:
+            operator_step_size = state.step_size
 
         # Propagation
-        control.simulation.step_size = step_sizes[index]
-        _wave_field = propagate(control,
-                                _wave_field,
-                                direction=1,
-                                equidistant_steps=equidistant_steps,
-                                wave_numbers=wave_numbers)
-
-        # windowing of solution
-        _wave_field = _solution_windowing(num_dimensions,
-                                          num_points_t,
-                                          num_points_x,
-                                          num_points_y,
-                                          _wave_field,
-                                          _window)
+        if frequency_indexes is not None:
+            _spectrum, _wave_field = _band_limited_step(control,
+                                                        _spectrum,
+                                                        band,
+                                                        band_shape,
+                                                        equidistant_steps,
+                                                        wave_numbers,
+                                                        _window,
+                                                        state)
+        else:
+            _wave_field = propagate(control,
+                                    _wave_field,
+                                    direction=1,
+                                    equidistant_steps=equidistant_steps,
+                                    wave_numbers=wave_numbers,
+                                    resolution_t=resolution_t,
+                                    state=state)
+
+            # windowing of solution
+            _wave_field = _solution_windowing(control.num_dimensions,
+                                              num_points[2],
+                                              num_points[0],
+                                              num_points[1],
+                                              _wave_field,
+                                              _window)
 
         # calculate beam profiles
-        rms_profile, max_profile, ax_pulse, z_pos = export_beam_profile(control,
-                                                                        _wave_field,
-                                                                        rms_profile,
-                                                                        max_profile,
-                                                                        ax_pulse,
-                                                                        z_pos,
-                                                                        step_index)
-
-        elapsed_time = time.time() - start_time
-        times_for_eta[index + 1] = times_for_eta[index] + elapsed_time
+        step = _get_step(control, step.step + 1, step.num_steps, state.current_position,
+                         _wave_field, start_time, step.total_time, lateral_offset, time_offset,
+                         resolution_t)
+        times_for_eta[index + 1] = times_for_eta[index] + step.elapsed_time
         lap_time_for_eta = estimate_eta(times_for_eta, num_steps, index, lap_time_for_eta)
 
-    print('Simulation finished in {:.2f} min using an average of {} sec per step.'
-          .format(times_for_eta[-2] / 60.0, numpy.mean(numpy.diff(times_for_eta[:-2]))))
+        # checkpoint before the caller may stop
+        if checkpoint_keys is not None:
+            profiles.append(_get_step_profiles(step))
+            if index + 1 == num_sequential_steps or \
+                    _is_checkpoint_due(control, state.current_position, state.step_size):
+                _save_checkpoint(control,
+                                 checkpoints,
+                                 checkpoint_keys[index + 1],
+                                 step,
+                                 (_spectrum, frequency_indexes),
+                                 (operator_step_size, equidistant_steps),
+                                 profiles,
+                                 parent_key,
+                                 state)
+                profiles = []
+                parent_key = checkpoint_keys[index + 1]
+        yield step
+
+
+def _adapt_grid(control, wave_field, index, grid, guard_points, state):
+    """
+    Follows the footprint of the beam, the pulse in retarded time and the bandwidth of the wave
+    field, where the grid is adaptive. Returns the wave field on the new grid, the new grid, and
+    the flags of a new lateral grid and of a new temporal grid.
+    """
+    lateral_offset, time_offset, resolution_t = grid
+    num_points_t = control.domain.num_points_t
+    footprint_step = index % control.simulation.footprint_interval == 0
+
+    # follow the footprint of the beam
+    regridded = False
+    if control.adaptive_lateral_domain and footprint_step:
+        wave_field, lateral_offset, regridded = \
+            adapt_lateral_domain(wave_field,
+                                 lateral_offset,
+                                 (control.domain.num_points_x, control.domain.num_points_y),
+                                 guard_points[0],
+                                 annular_transducer=control.annular_transducer)
+
+    # follow the pulse in retarded time
+    resampled = False
+    if control.adaptive_time_window and footprint_step:
+        wave_field, time_offset, resampled = adapt_time_window(wave_field,
+                                                               time_offset,
+                                                               num_points_t,
+                                                               guard_points[1])
+
+    # follow the bandwidth of the wave field
+    if control.adaptive_sample_rate:
+        wave_field, resampled = adapt_sample_rate(wave_field,
+                                                  num_points_t,
+                                                  control.simulation.nyquist_threshold)
+        if resampled:
+            current_num_points_t = wave_field.shape[0]
+            resolution_t = num_points_t * control.signal.resolution_t / current_num_points_t
+            print('Upsampled to {} of {} samples in time at {:.1f} mm'.format(
+                current_num_points_t,
+                num_points_t,
+                state.current_position * 1e3))
+
+    return wave_field, (lateral_offset, time_offset, resolution_t), regridded, resampled
+
+
+def _get_step_wave_numbers(control,
+                           schedule,
+                           index,
+                           recalculate,
+                           regridded,
+                           operator,
+                           grid,
+                           band,
+                           state):
+    """
+    Returns the operator of a step of the schedule, the flag of its equidistant steps, and the
+    flag of an operator built for the step. The operator is resampled to a new grid, and
+    recalculated where the schedule does not reuse it, see recalculate_wave_numbers. The step
+    size of the state must be the size of the step.
+    """
+    wave_numbers, equidistant_steps = operator
+    num_points, resolution_t = grid
+    frequency_indexes, propagating_indexes = band
+
+    # resample wave number operator to the new grid
+    if regridded:
+        wave_numbers = get_wave_numbers(control,
+                                        equidistant_steps,
+                                        num_points=num_points,
+                                        resolution_t=resolution_t,
+                                        state=state)
+
+    # recalculate wave number operator where the schedule does not reuse it
+    wave_numbers, equidistant_steps = recalculate_wave_numbers(control,
+                                                               wave_numbers,
+                                                               schedule,
+                                                               equidistant_steps,
+                                                               index,
+                                                               recalculate,
+                                                               num_points=num_points,
+                                                               frequency_indexes=frequency_indexes,
+                                                               resolution_t=resolution_t,
+                                                               state=state)
+    rebuilt = regridded or (recalculate and not schedule.reuses_operator[index])
+    if frequency_indexes is not None and propagating_indexes is not None and \
+            wave_numbers.size != propagating_indexes.size:
+        wave_numbers = gather_spectrum(wave_numbers, propagating_indexes)
+
+    return wave_numbers, equidistant_steps, rebuilt
+
+
+def _band_limited_step(control,
+                       spectrum,
+                       band,
+                       band_shape,
+                       equidistant_steps,
+                       wave_numbers,
+                       window,
+                       state):
+    """
+    Propagates the spectrum of the frequency band one step and windows it. Returns the spectrum
+    and a function reconstructing the wave field, since the time signals are only reconstructed
+    when they are needed.
+    """
+    frequency_indexes, propagating_indexes = band
+    num_points_t = control.domain.num_points_t
+    _spectrum = band_limited_propagate(control,
+                                       spectrum,
+                                       frequency_indexes,
+                                       num_points_t,
+                                       equidistant_steps,
+                                       wave_numbers,
+                                       state)
+
+    # windowing of solution
+    if propagating_indexes is not None:
+        _spectrum = scatter_spectrum(_spectrum, propagating_indexes, band_shape)
+    _spectrum, _spatial_spectrum = _band_limited_windowing(control, _spectrum, window, state)
+    if _spatial_spectrum is None:
+        wave_field = functools.partial(from_band_spectrum,
+                                       _spectrum,
+                                       frequency_indexes,
+                                       num_points_t)
+    else:
+        wave_field = functools.partial(from_band_spectrum,
+                                       _spatial_spectrum,
+                                       frequency_indexes,
+                                       num_points_t,
+                                       spatial_spectrum=False)
+    if propagating_indexes is not None:
+        _spectrum = gather_spectrum(_spectrum, propagating_indexes)
+
+    return _spectrum, wave_field
 
-    # saving the last profiles
-    if history == PROFILE_HISTORY:
-        print(f'[DUMMY] Saving the last profiles to {file_name}.json')
 
-    return _wave_field, rms_profile, max_profile, ax_pulse, z_pos
+def _save_checkpoint(control, checkpoints, key, step, band_spectrum, operator, profiles,
+                     parent_key, state):
+    """
+    Saves the checkpoint of a step with the profiles of the steps since the parent checkpoint.
+    """
+    spectrum, frequency_indexes = band_spectrum
+    operator_step_size, equidistant_steps = operator
+    checkpoints.save_checkpoint(key,
+                                {'wave_field': step.wave_field,
+                                 'spectrum': spectrum,
+                                 'frequency_indexes': frequency_indexes,
+                                 'position': state.current_position,
+                                 'step_size': state.step_size,
+                                 'operator_step_size': operator_step_size,
+                                 'equidistant_steps': equidistant_steps,
+                                 'lateral_offset': step.lateral_offset,
+                                 'time_offset': step.time_offset,
+                                 'resolution_t': step.resolution_t,
+                                 'history': control.history},
+                                profiles,
+                                parent_key)
+
+
+def _get_num_points(wave_field) -> Tuple[int, int, int]:
+    """
+    Returns the number of points (x, y, t) of the grid of a wave field.
+    """
+    num_points_y, num_points_x = (1,) * (3 - wave_field.ndim) + wave_field.shape[1:]
+
+    return num_points_x, num_points_y, wave_field.shape[0]
+
+
+def _get_sparse_window(control, window, num_points):
+    """
+    Returns the spatial window of a lateral grid as a sparse matrix, see calc_spatial_window.
+    """
+    _window = calc_spatial_window(control,
+                                  window,
+                                  control.annular_transducer,
+                                  num_points[0],
+                                  num_points[1],
+                                  control.signal.resolution_x,
+                                  control.signal.resolution_y,
+                                  control.simulation.step_size)
 
+    return _make_window_into_sparse_matrix(_window)
 
-def _calc_steps(control, current_pos, end_point, step_size, store_pos) \
-        -> Tuple[int, List[float], List[int]]:
-    if control.heterogeneous_medium and \
-            control.simulation.current_position < control.material.thickness:
-        num_steps, step_sizes, step_idx = find_steps(control.material.thickness,
-                                                     end_point,
-                                                     step_size,
-                                                     store_pos)
+
+def _get_guard_points(control, window) -> Tuple[int, int]:
+    """
+    Returns the number of points (x, y) kept between the footprint of the beam and the lateral
+    boundaries of an adaptive grid. The guard band holds the window or absorbing layer and the
+    spreading of the beam until the footprint is checked again.
+    """
+    step_size = control.domain.step_size
+    layer_width = control.domain.perfect_matching_layer_width
+    if window is None and layer_width > 0:
+        boundary_width = layer_width
     else:
-        num_steps, step_sizes, step_idx = find_steps(current_pos,
-                                                     end_point,
-                                                     step_size,
-                                                     store_pos)
-    return num_steps, step_sizes, step_idx,
+        num_windows = control.simulation.num_windows if window is None else window
+        boundary_width = (num_windows + 2) * step_size if num_windows > 0 else 0.0
+        boundary_width = max(boundary_width, layer_width)
+    guard_width = boundary_width + control.simulation.footprint_interval * step_size
+
+    return (int(numpy.ceil(guard_width / control.signal.resolution_x)),
+            int(numpy.ceil(guard_width / control.signal.resolution_y)))
+
+
+def _get_guard_points_t(control) -> int:
+    """
+    Returns the number of samples kept between the pulse and the ends of an adaptive time
+    window. The guard band holds one pulse length on each side.
+    """
+    pulse_length = control.signal.num_periods / control.signal.transmit_frequency
+
+    return int(numpy.ceil(pulse_length / control.signal.resolution_t))
 
 
 def _make_window_into_sparse_matrix(window):
@@ -232,8 +942,7 @@ def _solution_windowing(num_dimensions,
                         num_points_y,
                         wave_field,
                         window):
-    if window.data[0, 0] != -1:
-        # TODO check and improve usage of this condition of 'if'
+    if scipy.sparse.issparse(window):
         if num_dimensions == 3:
             wave_field = wave_field.reshape((num_points_t, num_points_x * num_points_y))
         wave_field = wave_field * window
@@ -242,18 +951,196 @@ def _solution_windowing(num_dimensions,
     return wave_field
 
 
-def _calc_beam_profiles(control,
-                        history,
-                        num_points_t,
-                        num_points_x,
-                        num_points_y,
-                        num_steps,
-                        step_index,
-                        wave_field):
-    if history != NO_HISTORY:
+def _band_limited_windowing(control,
+                            spectrum,
+                            window,
+                            state):
+    """
+    Applies the window and absorbing layer to the spectrum of the frequency band. The window is
+    applied in space, and the windowed spectrum is returned together with its values in space
+    for reconstructing the time signals, or None when there is no window.
+    """
+    layer_width = control.domain.perfect_matching_layer_width
+    if not scipy.sparse.issparse(window) and layer_width <= 0:
+        return spectrum, None
+
+    spatial_axes = tuple(range(1, spectrum.ndim))
+    _spectrum = numpy.fft.ifftn(spectrum, axes=spatial_axes)
+    if scipy.sparse.issparse(window):
+        _spectrum = _spectrum * window.diagonal().reshape(spectrum.shape[1:])
+    if layer_width > 0:
+        num_points_y, num_points_x = (1,) * (3 - spectrum.ndim) + spectrum.shape[1:]
+        damping = get_absorbing_layer_damping(control,
+                                              (num_points_x, num_points_y),
+                                              state.step_size,
+                                              state)
+        _spectrum = _spectrum * damping.reshape(spectrum.shape[1:])
+
+    return numpy.fft.fftn(_spectrum, axes=spatial_axes), _spectrum
+
+
+def _get_result_cache(control, wave_field, screen, window, phantom, state, use_cache) \
+        -> Tuple[Optional[ResultCache], Optional[str]]:
+    """
+    Returns the result cache and the key of a simulation, or None when the result is not
+    cached.
+    """
+    cache_directory = control.simulation.cache_directory
+    if not use_cache or cache_directory is None or control.simulation.result_cache_size <= 0:
+        return None, None
+    cache = ResultCache(os.path.join(cache_directory, 'results'),
+                        control.simulation.result_cache_size)
+    position = 0.0 if state is None else state.current_position
+
+    return cache, cache.get_key(control, wave_field, window, screen, phantom, position)
+
+
+def _get_checkpoints(control,
+                     wave_field,
+                     screen,
+                     window,
+                     phantom,
+                     state,
+                     use_cache,
+                     step_sizes,
+                     step_indexes,
+                     plan) -> Tuple[Optional[CheckpointStore], Optional[List[Optional[str]]]]:
+    """
+    Returns the checkpoint store and the keys of the checkpoints of a simulation, or None when
+    the simulation is not checkpointed.
+    """
+    cache_directory = control.simulation.cache_directory
+    if not use_cache or cache_directory is None or \
+            control.simulation.checkpoint_interval <= 0 or \
+            control.simulation.checkpoint_cache_size <= 0:
+        return None, None
+    checkpoints = CheckpointStore(os.path.join(cache_directory, 'checkpoints'),
+                                  control.simulation.checkpoint_cache_size)
+    keys = checkpoints.get_keys(control,
+                                wave_field,
+                                window,
+                                screen,
+                                phantom,
+                                state,
+                                step_sizes,
+                                step_indexes,
+                                plan)
+
+    return checkpoints, keys
+
+
+def _is_checkpoint_due(control, position, step_size) -> bool:
+    """
+    Returns True when the step from position - step_size to position passes a multiple of the
+    checkpoint interval.
+    """
+    interval = control.simulation.checkpoint_interval
+    if interval <= 0:
+        return False
+    tolerance = 1e-6 * interval
+
+    return numpy.floor((position + tolerance) / interval) > \
+        numpy.floor((position - step_size + tolerance) / interval)
+
+
+def _get_restored_steps(control, checkpoint, num_steps) -> Iterator[SimulationStep]:
+    """
+    Returns the records of the steps up to a checkpoint. Only the last step has the wave field
+    of the checkpoint.
+    """
+    wave_field = checkpoint['wave_field']
+    z_pos = checkpoint['z_pos']
+    for step_index in range(z_pos.size):
+        profiles = (checkpoint['rms_profile'][:, :, step_index],
+                    checkpoint['max_profile'][:, :, step_index],
+                    checkpoint['ax_pulse'][:, step_index])
+        if step_index < z_pos.size - 1:
+            yield SimulationStep(step_index, num_steps, float(z_pos[step_index]),
+                                 wave_field[:0], profiles, 0.0, 0.0,
+                                 resolution_t=control.signal.resolution_t, restored=True)
+        else:
+            yield SimulationStep(step_index, num_steps, float(z_pos[step_index]),
+                                 wave_field, profiles, 0.0, 0.0,
+                                 tuple(int(offset) for offset in checkpoint['lateral_offset']),
+                                 int(checkpoint['time_offset']),
+                                 float(checkpoint['resolution_t']),
+                                 restored=True)
+
+
+def _get_step_profiles(step):
+    """
+    Returns the profiles and the position of a step, as stored by a checkpoint.
+    """
+    return step.rms_profile, step.max_profile, step.ax_pulse, step.position
+
+
+def _get_step(control,
+              step_index,
+              num_steps,
+              position,
+              wave_field,
+              start_time,
+              total_time,
+              lateral_offset=(0, 0),
+              time_offset=0,
+              resolution_t=None,
+              profiles=None) -> SimulationStep:
+    """
+    Returns the record of a step, exporting the profiles of the step when they are not given.
+    The time of the step is counted from start_time. A wave field given as a function is only
+    evaluated when the profiles need it, i.e. on export steps and store positions.
+    """
+    if profiles is None and callable(wave_field) and control.history == POSITION_HISTORY and \
+            not _is_store_position(control, position):
+        profiles = _get_empty_profiles(control)
+    elif profiles is None:
+        if callable(wave_field):
+            wave_field = wave_field()
+        profiles = export_step_profiles(control,
+                                        wave_field,
+                                        position,
+                                        lateral_offset,
+                                        time_offset,
+                                        resolution_t)
+    elapsed_time = time.time() - start_time
+
+    return SimulationStep(step_index,
+                          num_steps,
+                          position,
+                          wave_field,
+                          profiles,
+                          elapsed_time,
+                          total_time + elapsed_time,
+                          lateral_offset,
+                          time_offset,
+                          resolution_t or control.signal.resolution_t)
+
+
+def _is_store_position(control, position) -> bool:
+    """
+    Returns True when the pulse is stored at position, see export_beam_profile.
+    """
+    store_position = control.simulation.store_position
+
+    return store_position.size != 0 and numpy.min(numpy.abs(store_position - position)) < 1e-12
+
+
+def _get_empty_profiles(control):
+    """
+    Returns the profiles of a step which are not exported, as export_step_profiles.
+    """
+    shape = (control.domain.num_points_y, control.domain.num_points_x, control.harmonic + 1)
+
+    return numpy.zeros(shape), numpy.zeros(shape), numpy.zeros(control.domain.num_points_t)
+
+
+def _get_beam_profiles(control, num_steps):
+    if control.history != NO_HISTORY:
+        num_points_y = control.domain.num_points_y
+        num_points_x = control.domain.num_points_x
         rms_profile = numpy.zeros((num_points_y, num_points_x, num_steps, control.harmonic + 1))
         max_profile = numpy.zeros((num_points_y, num_points_x, num_steps, control.harmonic + 1))
-        ax_pulse = numpy.zeros((num_points_t, num_steps))
+        ax_pulse = numpy.zeros((control.domain.num_points_t, num_steps))
         z_pos = numpy.zeros(num_steps)
     else:
         rms_profile = numpy.array([])
@@ -261,13 +1148,31 @@ def _calc_beam_profiles(control,
         ax_pulse = numpy.array([])
         z_pos = numpy.array([])
 
-    step_index = 0
-    rms_profile, max_profile, ax_pulse, z_pos = export_beam_profile(control,
-                                                                    wave_field,
-                                                                    rms_profile,
-                                                                    max_profile,
-                                                                    ax_pulse,
-                                                                    z_pos,
-                                                                    step_index)
+    return rms_profile, max_profile, ax_pulse, z_pos
 
-    return ax_pulse, max_profile, rms_profile, z_pos
+
+def _get_domain_wave_field(control, step):
+    """
+    Returns the wave field of a step on the full grid of the domain.
+    """
+    num_points_x = control.domain.num_points_x
+    num_points_y = control.domain.num_points_y
+    num_points_t = control.domain.num_points_t
+    wave_field = numpy.array(step.wave_field)
+    current_num_points_t = wave_field.shape[0]
+    current_num_points_y, current_num_points_x = (1,) * (3 - wave_field.ndim) + \
+        wave_field.shape[1:]
+
+    if current_num_points_t != num_points_t and control.adaptive_sample_rate:
+        wave_field = resample_time_window(wave_field, num_points_t)
+        current_num_points_t = num_points_t
+    if step.lateral_offset != (0, 0) or current_num_points_x != num_points_x or \
+            current_num_points_y != num_points_y:
+        wave_field = regrid_lateral_domain(wave_field,
+                                           step.lateral_offset,
+                                           (0, 0),
+                                           (num_points_x, num_points_y))
+    if step.time_offset != 0 or current_num_points_t != num_points_t:
+        wave_field = regrid_time_window(wave_field, step.time_offset, 0, num_points_t)
+
+    return wave_field
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+    simulation_step.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Callable, Tuple, Union
+
+import numpy
+
+
+class SimulationStep:
+    """
+    Record of one step of a simulation, yielded by simulation_steps. The wave field is a
+    read-only view of the field of the simulation, which is only valid until the next step is
+    requested, and is given on the current sub-grid of the domain, see lateral_offset and
+    time_offset. The profiles are the rows of the profiles returned by simulation.
+    The steps of a simulation resumed from a checkpoint are restored from the checkpoint, and
+    only the last restored step has a wave field, see CheckpointStore.
+    The wave field of a band-limited run is reconstructed from its spectrum when it is first
+    requested.
+    """
+
+    def __init__(self,
+                 step: int,
+                 num_steps: int,
+                 position: float,
+                 wave_field: Union[numpy.ndarray, Callable[[], numpy.ndarray]],
+                 profiles: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray],
+                 elapsed_time: float,
+                 total_time: float,
+                 lateral_offset: Tuple[int, int] = (0, 0),
+                 time_offset: int = 0,
+                 resolution_t: float = 0.0,
+                 restored: bool = False):
+        """
+        Constructor
+        :param step: Index of the step, starting with 0 at the start position.
+        :param num_steps: The number of steps of the simulation, including step 0.
+        :param position: The position of the wave field.
+        :param wave_field: The wave field of the step, or a function returning it.
+        :param profiles: The RMS profile (ny * nx * num_harm), the maximum profile
+            (ny * nx * num_harm) and the axial pulse (nt) of the step.
+        :param elapsed_time: The time of the step in seconds.
+        :param total_time: The time of the simulation up to and including the step in seconds.
+        :param lateral_offset: Index (x, y) of the first point of the wave field in the domain.
+        :param time_offset: Index of the first sample of the wave field in the time window.
+        :param resolution_t: Sampling interval of the wave field.
+        :param restored: Flag for a step restored from a checkpoint.
+        """
+        self._step = step
+        self._num_steps = num_steps
+        self._position = position
+        self._wave_field = None
+        self._get_wave_field = wave_field
+        if not callable(wave_field):
+            self._set_wave_field(wave_field)
+        self._rms_profile, self._max_profile, self._ax_pulse = profiles
+        self._elapsed_time = elapsed_time
+        self._total_time = total_time
+        self._lateral_offset = lateral_offset
+        self._time_offset = time_offset
+        self._resolution_t = resolution_t
+        self._restored = restored
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @property
+    def num_steps(self) -> int:
+        return self._num_steps
+
+    @property
+    def position(self) -> float:
+        return self._position
+
+    @property
+    def wave_field(self) -> numpy.ndarray:
+        if self._wave_field is None:
+            self._set_wave_field(self._get_wave_field())
+        return self._wave_field
+
+    @property
+    def rms_profile(self) -> numpy.ndarray:
+        return self._rms_profile
+
+    @property
+    def max_profile(self) -> numpy.ndarray:
+        return self._max_profile
+
+    @property
+    def ax_pulse(self) -> numpy.ndarray:
+        return self._ax_pulse
+
+    @property
+    def elapsed_time(self) -> float:
+        return self._elapsed_time
+
+    @property
+    def total_time(self) -> float:
+        return self._total_time
+
+    @property
+    def lateral_offset(self) -> Tuple[int, int]:
+        return self._lateral_offset
+
+    @property
+    def time_offset(self) -> int:
+        return self._time_offset
+
+    @property
+    def resolution_t(self) -> float:
+        return self._resolution_t
+
+    @property
+    def restored(self) -> bool:
+        return self._restored
+
+    def _set_wave_field(self, wave_field: numpy.ndarray):
+        self._wave_field = wave_field.view()
+        self._wave_field.flags.writeable = False
+        self._get_wave_field = None
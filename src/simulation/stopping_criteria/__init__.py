@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+    stopping criteria
+    ~~~~~~~~~~~~~~~~~
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
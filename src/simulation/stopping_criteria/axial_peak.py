@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+    axial_peak.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from abc import abstractmethod
+
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.simulation_step import SimulationStep
+from simulation.stopping_criteria.interfaces import IStoppingCriterion, get_axis_index
+
+
+class AxialPeak(IStoppingCriterion):
+    """
+    Base of the criteria which stop when a profile on the axis has passed its peak, and has
+    dropped below a fraction of the peak. The peak must be beyond the start.
+    """
+
+    def __init__(self,
+                 control: MainControl,
+                 harmonic: int,
+                 fraction: float):
+        """
+        Constructor
+        :param control: The controls of the run.
+        :param harmonic: The harmonic of the profile, 0 for the total field, 1 for the
+            fundamental and so on.
+        :param fraction: The fraction of the peak to drop below.
+        """
+        self._index = get_axis_index(control) + (harmonic,)
+        self._fraction = fraction
+        self._start = 0.0
+        self._peak = 0.0
+
+    def __call__(self, step: SimulationStep) -> bool:
+        value = self._get_profile(step)[self._index]
+        if step.step == 0:
+            self._start = value
+            self._peak = value
+        self._peak = max(self._peak, value)
+
+        return self._peak > self._start and value < self._fraction * self._peak
+
+    @abstractmethod
+    def _get_profile(self, step: SimulationStep) -> numpy.ndarray:
+        """
+        Returns the profile of a step which is followed on the axis.
+        """
+
+    @property
+    def peak(self) -> float:
+        return self._peak
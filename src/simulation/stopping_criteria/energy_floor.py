@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+    energy_floor.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import numpy
+
+from simulation.simulation_step import SimulationStep
+from simulation.stopping_criteria.interfaces import IStoppingCriterion
+
+
+class EnergyFloor(IStoppingCriterion):
+    """
+    Stops when the total energy of the wave field drops below a floor relative to the energy
+    at the start. The energy is the sum of the squared RMS profile of the total field.
+    """
+
+    def __init__(self,
+                 threshold: float = -20.0):
+        """
+        Constructor
+        :param threshold: The floor in dB relative to the energy of step 0.
+        """
+        self._floor = 10.0 ** (threshold / 10.0)
+        self._energy = 0.0
+
+    def __call__(self, step: SimulationStep) -> bool:
+        energy = numpy.sum(step.rms_profile[..., 0] ** 2)
+        if step.step == 0:
+            self._energy = energy
+
+        return energy < self._floor * self._energy
+
+    @property
+    def description(self) -> str:
+        return 'the energy has dropped below the floor'
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+    focal_maximum_passed.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.simulation_step import SimulationStep
+from simulation.stopping_criteria.axial_peak import AxialPeak
+
+
+class FocalMaximumPassed(AxialPeak):
+    """
+    Stops when the maximum pressure on the axis has passed its peak, the focal maximum, and
+    has dropped below a fraction of the peak.
+    """
+
+    def __init__(self,
+                 control: MainControl,
+                 fraction: float = 0.5,
+                 harmonic: int = 0):
+        """
+        Constructor
+        :param control: The controls of the run.
+        :param fraction: The fraction of the peak to drop below.
+        :param harmonic: The profile of the maximum, 0 for the total field, 1 for the
+            fundamental and so on.
+        """
+        super().__init__(control, harmonic, fraction)
+
+    def _get_profile(self, step: SimulationStep) -> numpy.ndarray:
+        return step.max_profile
+
+    @property
+    def description(self) -> str:
+        return 'the focal maximum has passed'
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+    harmonic_peak.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+import numpy
+
+from simulation.controls.main_control import MainControl
+from simulation.simulation_step import SimulationStep
+from simulation.stopping_criteria.axial_peak import AxialPeak
+
+
+class HarmonicPeak(AxialPeak):
+    """
+    Stops when the RMS amplitude of a harmonic on the axis has peaked, and has dropped below a
+    fraction of the peak. The harmonic must be exported, control.harmonic >= harmonic.
+    """
+
+    def __init__(self,
+                 control: MainControl,
+                 harmonic: int = 2,
+                 fraction: float = 0.9):
+        """
+        Constructor
+        :param control: The controls of the run.
+        :param harmonic: The harmonic, 1 for the fundamental, 2 for the 2nd harmonic and so on.
+        :param fraction: The fraction of the peak to drop below.
+        """
+        if not 1 <= harmonic <= control.harmonic:
+            raise ValueError('Harmonic {} is not exported, control.harmonic is {}'
+                             .format(harmonic, control.harmonic))
+        super().__init__(control, harmonic, fraction)
+
+    def _get_profile(self, step: SimulationStep) -> numpy.ndarray:
+        return step.rms_profile
+
+    @property
+    def description(self) -> str:
+        return 'the harmonic has peaked'
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+    interfaces.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+from simulation.controls.main_control import MainControl
+from simulation.simulation_step import SimulationStep
+
+
+class IStoppingCriterion(ABC):
+    """
+    Criterion for stopping a simulation before the end point. The criterion is called with the
+    record of each step, and is evaluated from the profiles of the step. A criterion follows
+    the steps of one run, and is reset by step 0, so one criterion may be used by one run at a
+    time.
+    """
+
+    @abstractmethod
+    def __call__(self, step: SimulationStep) -> bool:
+        """
+        Evaluates the criterion after a step.
+        :param step: The record of the step.
+        :return: True if the simulation should stop after the step.
+        """
+
+    @property
+    @abstractmethod
+    def description(self) -> str:
+        """
+        Get the description of the criterion, used when a simulation is stopped
+        :return: The description
+        """
+
+
+def get_axis_index(control: MainControl) -> Tuple[int, int]:
+    """
+    Returns the index (y, x) of the axis of the transducer in the profiles of a step.
+    The center channel is 1-based, as in get_transducer_indexes and PhantomSampler. The axial
+    pulse of export_beam_profile is taken at the center channel used as a 0-based index
+    instead, one point beside the axis.
+    :param control: The controls.
+    :return: The index of the axis.
+    """
+    center_channel = control.transducer.center_channel.astype(int) - 1
+    channel_y = int(center_channel[1]) if control.num_dimensions == 3 else 0
+
+    return channel_y, int(center_channel[0])
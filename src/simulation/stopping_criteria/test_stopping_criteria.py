@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+    test_stopping_criteria.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.simulation_step import SimulationStep
+from simulation.stopping_criteria.energy_floor import EnergyFloor
+from simulation.stopping_criteria.focal_maximum_passed import FocalMaximumPassed
+from simulation.stopping_criteria.harmonic_peak import HarmonicPeak
+from simulation.stopping_criteria.interfaces import get_axis_index
+
+
+class TestStoppingCriteria(unittest.TestCase):
+    def setUp(self):
+        self.control = get_test_control('test_stopping_criteria', harmonic=2)
+        self.axis = get_axis_index(self.control)
+
+    def _get_steps(self, axis_values, harmonic):
+        shape = (1, self.control.domain.num_points_x, self.control.harmonic + 1)
+        steps = []
+        for index, value in enumerate(axis_values):
+            profile = numpy.zeros(shape)
+            profile[self.axis + (harmonic,)] = value
+            steps.append(SimulationStep(index, len(axis_values), index * 1e-3,
+                                        numpy.zeros((4, shape[1])),
+                                        (profile, profile, numpy.zeros(4)), 0.0, 0.0))
+        return steps
+
+    def _get_stop(self, criterion, steps):
+        return [step.step for step in steps if criterion(step)][:1]
+
+    def test_axis_index(self):
+        # the axis is the zero of the centered lateral grid, and the first point of a radial grid
+        self.assertEqual((0, self.control.domain.num_points_x // 2), self.axis)
+
+        control = get_test_control('test_stopping_criteria', annular_transducer=True, harmonic=2)
+        self.assertEqual((0, 0), get_axis_index(control))
+
+    def test_focal_maximum_passed(self):
+        steps = self._get_steps([1.0, 2.0, 4.0, 3.0, 1.9, 1.0], 0)
+        self.assertEqual([4], self._get_stop(FocalMaximumPassed(self.control), steps))
+        self.assertEqual([3], self._get_stop(FocalMaximumPassed(self.control, 0.8), steps))
+
+        # no maximum beyond the start
+        steps = self._get_steps([4.0, 3.0, 1.0], 0)
+        self.assertEqual([], self._get_stop(FocalMaximumPassed(self.control), steps))
+
+    def test_harmonic_peak(self):
+        steps = self._get_steps([0.1, 0.05, 0.5, 1.0, 0.95, 0.85], 2)
+        criterion = HarmonicPeak(self.control)
+        self.assertEqual([5], self._get_stop(criterion, steps))
+        self.assertEqual(1.0, criterion.peak)
+
+        # reset by step 0
+        self.assertEqual([5], self._get_stop(criterion, steps))
+
+        with self.assertRaises(ValueError):
+            HarmonicPeak(self.control, 3)
+
+    def test_energy_floor(self):
+        steps = self._get_steps([1.0, 0.8, 0.5, 0.3, 0.1], 0)
+        self.assertEqual([3], self._get_stop(EnergyFloor(-10.0), steps))
+        self.assertEqual([], self._get_stop(EnergyFloor(-30.0), steps))
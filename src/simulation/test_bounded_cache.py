@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+    test_bounded_cache.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import threading
+import unittest
+
+from simulation.bounded_cache import BoundedCache
+
+
+class TestBoundedCache(unittest.TestCase):
+    def test_values_are_built_once(self):
+        cache = BoundedCache(4)
+        calls = []
+
+        def _factory():
+            calls.append(1)
+            return [len(calls)]
+
+        value = cache.get('key', _factory)
+        self.assertIs(value, cache.get('key', _factory))
+        self.assertEqual(1, len(calls))
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+        self.assertEqual([2], cache.get('key', _factory))
+
+    def test_size_is_bounded(self):
+        cache = BoundedCache(4)
+        for index in range(10):
+            cache.get(index, lambda: index)
+            self.assertLessEqual(len(cache), cache.max_size)
+        self.assertEqual(9, cache.get(9, lambda: None))
+
+    def test_threads_share_the_cache(self):
+        cache = BoundedCache(8)
+        values = []
+
+        def _run():
+            for index in range(100):
+                values.append(cache.get(index % 4, lambda: index % 4))
+
+        threads = [threading.Thread(target=_run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(400, len(values))
+        self.assertEqual(4, len(cache))
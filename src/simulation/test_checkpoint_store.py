@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+    test_checkpoint_store.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from simulation.checkpoint_store import CheckpointStore
+from simulation.controls.consts import POSITION_HISTORY, PROFILE_HISTORY
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation, simulation_steps
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control(end_point, history=PROFILE_HISTORY, **kwargs):
+    return get_test_control('test_checkpoint_store', history=history, end_point=end_point, **kwargs)
+
+
+def _get_profiles(first_step, num_steps):
+    return [(numpy.full((1, 4, 2), step), numpy.full((1, 4, 2), -step), numpy.arange(8.0),
+             0.001 * step) for step in range(first_step, num_steps)]
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = CheckpointStore(self.directory.name, 2 ** 20)
+        self.control = _get_control(0.02)
+        self.wave_field = numpy.arange(12.0).reshape((3, 4))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _get_keys(self, control, step_sizes, wave_field=None):
+        if wave_field is None:
+            wave_field = self.wave_field
+        return self.store.get_keys(control,
+                                   wave_field,
+                                   None,
+                                   numpy.array([]),
+                                   None,
+                                   SimulationState(control),
+                                   step_sizes,
+                                   [0] * len(step_sizes),
+                                   (True, False))
+
+    def test_keys_follow_the_steps(self):
+        keys = self._get_keys(self.control, [0.001, 0.001, 0.001])
+        self.assertEqual(4, len(keys))
+        self.assertIsNone(keys[0])
+        self.assertEqual(3, len(set(keys[1:])))
+
+        # the end point changes the steps only
+        longer_keys = self._get_keys(_get_control(0.05), [0.001, 0.001, 0.001, 0.001])
+        self.assertEqual(keys, longer_keys[:4])
+        self.assertNotEqual(keys[2], self._get_keys(self.control, [0.001, 0.0005])[2])
+        self.assertNotEqual(keys[1], self._get_keys(self.control, [0.001],
+                                                    2.0 * self.wave_field)[1])
+
+    def _save_checkpoints(self, keys, history=PROFILE_HISTORY):
+        # each checkpoint holds the profiles of the steps since the checkpoint before it
+        for first_step, num_steps, parent in ((0, 1, None), (2, 3, keys[1])):
+            self.store.save_checkpoint(keys[num_steps],
+                                       {'wave_field': num_steps * self.wave_field,
+                                        'spectrum': None,
+                                        'history': history},
+                                       _get_profiles(first_step, num_steps + 1),
+                                       parent)
+
+    def test_load_the_deepest_checkpoint(self):
+        keys = self._get_keys(self.control, [0.001] * 4)
+        self.assertEqual((0, None), self.store.load_checkpoint(keys, PROFILE_HISTORY))
+        self._save_checkpoints(keys)
+
+        num_steps, checkpoint = self.store.load_checkpoint(keys, PROFILE_HISTORY)
+        self.assertEqual(3, num_steps)
+        self.assertNotIn('spectrum', checkpoint)
+        numpy.testing.assert_array_equal(3 * self.wave_field, checkpoint['wave_field'])
+        self.assertEqual((1, 4, 4, 2), checkpoint['rms_profile'].shape)
+        numpy.testing.assert_array_equal([0.0, 1.0, 2.0, 3.0],
+                                         checkpoint['rms_profile'][0, 0, :, 0])
+        self.assertEqual((8, 4), checkpoint['ax_pulse'].shape)
+        numpy.testing.assert_array_equal([0.0, 0.001, 0.002, 0.003], checkpoint['z_pos'])
+
+        # no profiles are exported with the position history
+        num_steps, checkpoint = self.store.load_checkpoint(keys, POSITION_HISTORY)
+        self.assertEqual(3, num_steps)
+        self.assertFalse(numpy.any(checkpoint['rms_profile']))
+        numpy.testing.assert_array_equal([0.0, 0.001, 0.002, 0.003], checkpoint['z_pos'])
+
+    def test_checkpoints_without_their_chain_are_not_used(self):
+        keys = self._get_keys(self.control, [0.001] * 4)
+        self._save_checkpoints(keys, POSITION_HISTORY)
+        self.assertEqual((0, None), self.store.load_checkpoint(keys, PROFILE_HISTORY))
+
+        os.remove(os.path.join(self.directory.name, 'checkpoint_{}.npz'.format(keys[1])))
+        self.assertEqual((0, None), self.store.load_checkpoint(keys, POSITION_HISTORY))
+
+    def test_extended_simulation_resumes_from_a_checkpoint(self):
+        control = _get_control(0.02, cache_directory=self.directory.name)
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+        # checkpoints are opt-in
+        list(simulation_steps(control, wave_field, use_cache=True))
+        self.assertEqual([], os.listdir(self.directory.name))
+
+        with self.assertRaises(ValueError):
+            _get_control(0.02, checkpoint_interval=-0.005)
+        control = _get_control(0.02, cache_directory=self.directory.name,
+                               checkpoint_interval=0.005)
+        list(simulation_steps(control, wave_field, use_cache=True))
+        checkpoint_directory = os.path.join(self.directory.name, 'checkpoints')
+        self.assertEqual(4, len(os.listdir(checkpoint_directory)))
+
+        longer_control = _get_control(0.03, cache_directory=self.directory.name,
+                                      checkpoint_interval=0.005)
+        expected = simulation(longer_control, wave_field)
+        steps = list(simulation_steps(longer_control, wave_field, use_cache=True))
+        self.assertEqual(7, len(os.listdir(checkpoint_directory)))
+
+        restored = [step for step in steps if step.restored]
+        self.assertGreater(len(restored), 1)
+        self.assertEqual(list(range(len(restored))), [step.step for step in restored])
+        self.assertEqual(0, restored[0].wave_field.size)
+        self.assertGreater(restored[-1].wave_field.size, 0)
+        self.assertEqual(list(range(expected[4].size)), [step.step for step in steps])
+        for step in steps:
+            numpy.testing.assert_array_equal(expected[1][:, :, step.step], step.rms_profile)
+            numpy.testing.assert_array_equal(expected[2][:, :, step.step], step.max_profile)
+            numpy.testing.assert_array_equal(expected[3][:, step.step], step.ax_pulse)
+            self.assertEqual(expected[4][step.step], step.position)
+        numpy.testing.assert_array_equal(expected[0], steps[-1].wave_field)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+    test_element_basis.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.element_basis import ElementBasis
+from simulation.simulation import simulation
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control(non_linearity=False):
+    return get_test_control('test_element_basis',
+                            non_linearity=non_linearity,
+                            end_point=0.005,
+                            num_elements_azimuth=8,
+                            elements_size_azimuth=1.4e-3)
+
+
+class TestElementBasis(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.control = _get_control()
+        cls.basis = ElementBasis(cls.control)
+
+    def _assert_profiles(self, expected, profiles):
+        for expected_profile, profile in zip(expected, profiles):
+            numpy.testing.assert_allclose(profile[..., 1],
+                                          expected_profile[..., 1],
+                                          rtol=0,
+                                          atol=1e-6 * expected_profile[..., 1].max())
+
+    def test_elements(self):
+        self.assertEqual((1, 8), self.basis.num_elements)
+        numpy.testing.assert_allclose(numpy.arange(-3.5, 4.0) * 1.4e-3,
+                                      self.basis.element_positions[1])
+        wave_field, _ = pulse_generator(self.control, 'transducer', no_focusing_flag=True)
+        element_fields = [self.basis.get_element_field(0, element) for element in range(8)]
+        numpy.testing.assert_allclose(wave_field, sum(element_fields), atol=1e-12)
+        for element_field in element_fields:
+            self.assertEqual(11, numpy.count_nonzero(numpy.any(element_field != 0, axis=0)))
+
+        weights = self.basis.get_element_weights(numpy.repeat(numpy.arange(8.0), 11))
+        numpy.testing.assert_allclose([numpy.arange(8.0)], weights)
+
+    def test_focused_transmit(self):
+        wave_field, delta_focus = pulse_generator(self.control, 'transducer')
+        expected = simulation(self.control, wave_field, use_cache=False)
+        delays = self.basis.get_element_delays(delta_focus)
+        self.assertEqual((1, 8), delays.shape)
+        numpy.testing.assert_allclose(delays[0], delays[0, ::-1])
+
+        snapshots = self.basis.synthesize(delays)
+        numpy.testing.assert_allclose(expected[4], snapshots.positions)
+        self._assert_profiles(expected[1:3], snapshots.get_profiles())
+
+    def test_batch_of_steered_transmits(self):
+        sound_speed = self.control.material.material.sound_speed
+        delays = numpy.array([self.basis.element_positions[1] * numpy.sin(angle) / sound_speed
+                              for angle in (-0.2, 0.0, 0.3)])[:, numpy.newaxis]
+        delays = delays - numpy.min(delays, axis=-1, keepdims=True)
+        weights = numpy.hanning(10)[1:-1]
+        rms_profiles, max_profiles = self.basis.get_profiles(delays, weights)
+        self.assertEqual(3, rms_profiles.shape[0])
+
+        # the steered transmit from the delayed element fields
+        num_points_t = self.control.domain.num_points_t
+        frequencies = numpy.fft.rfftfreq(num_points_t, self.control.signal.resolution_t)
+        wave_field = 0.0
+        for element in range(8):
+            spectrum = numpy.fft.rfft(self.basis.get_element_field(0, element), axis=0)
+            wave_field = wave_field + weights[element] * numpy.fft.irfft(
+                spectrum * numpy.exp(2j * numpy.pi * frequencies[:, numpy.newaxis] *
+                                     delays[2, 0, element]), num_points_t, axis=0)
+        expected = simulation(self.control, wave_field, use_cache=False)
+        self._assert_profiles(expected[1:3], (rms_profiles[2], max_profiles[2]))
+
+        with self.assertRaises(ValueError):
+            self.basis.synthesize(numpy.zeros((1, 4)))
+
+    def test_nonlinear_propagation(self):
+        with self.assertRaises(ValueError):
+            ElementBasis(_get_control(True))
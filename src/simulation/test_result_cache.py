@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+    test_result_cache.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from simulation.result_cache import ResultCache
+from simulation.simulation import simulation
+from system.material.sphere_phantom import SpherePhantom
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control(end_point=0.01, **kwargs):
+    return get_test_control('test_result_cache', end_point=end_point, **kwargs)
+
+
+def _get_result(value, size=1000):
+    return tuple(numpy.full(size, value + index) for index in range(5))
+
+
+def _write_and_read(directory, index):
+    cache = ResultCache(directory, 2 ** 30)
+    key = 'shared' if index % 2 == 0 else 'key{}'.format(index)
+    cache.save(key, _get_result(7.0, 100000))
+    result = cache.load(key)
+    return result is not None and all(numpy.all(array == 7.0 + index)
+                                      for index, array in enumerate(result))
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name, 2 ** 20)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_is_stable(self):
+        control = _get_control()
+        wave_field = numpy.ones((4, 8))
+        key = self.cache.get_key(control, wave_field)
+        self.assertEqual(key, self.cache.get_key(_get_control(), wave_field.copy()))
+        self.assertNotEqual(key, self.cache.get_key(_get_control(0.02), wave_field))
+        self.assertNotEqual(key, self.cache.get_key(control, 2 * wave_field))
+        self.assertNotEqual(key, self.cache.get_key(control, wave_field, window=-1))
+        self.assertNotEqual(key, self.cache.get_key(control, wave_field, position=0.01))
+
+        phantom = SpherePhantom([(0.0, 0.0, 0.01, 0.002)], 1600.0, 1540.0)
+        self.assertEqual(self.cache.get_key(control, wave_field, phantom=phantom),
+                         self.cache.get_key(control, wave_field,
+                                            phantom=SpherePhantom([(0.0, 0.0, 0.01, 0.002)],
+                                                                  1600.0, 1540.0)))
+        self.assertIsNone(self.cache.get_key(control, wave_field, phantom=lambda x, y, z: 1540.0))
+
+        # the settings of the caches do not change the results
+        control = _get_control(cache_directory=self.directory.name, result_cache_size=2 ** 20)
+        self.assertEqual(key, self.cache.get_key(control, wave_field))
+        with self.assertRaises(ValueError):
+            _get_control(result_cache_size=-1)
+
+    def test_save_and_load(self):
+        self.assertIsNone(self.cache.load('missing'))
+        result = _get_result(1.0)
+        self.cache.save('key', result)
+        for expected, array in zip(result, self.cache.load('key')):
+            numpy.testing.assert_array_equal(expected, array)
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = ResultCache(self.directory.name, 100000)
+        for index in range(3):
+            cache.save('key{}'.format(index), _get_result(index, 750))
+            time.sleep(0.01)
+        self.assertLessEqual(cache.size, 100000)
+        self.assertIsNotNone(cache.load('key0'))
+        cache.save('key3', _get_result(3, 750))
+
+        self.assertIsNotNone(cache.load('key0'))
+        self.assertIsNone(cache.load('key1'))
+        self.assertIsNotNone(cache.load('key3'))
+        self.assertLessEqual(cache.size, 100000)
+
+    def test_processes_share_the_cache(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(_write_and_read, [self.directory.name] * 8, range(8)))
+        self.assertTrue(all(results))
+        names = os.listdir(self.directory.name)
+        self.assertEqual(5, len(names))
+        self.assertFalse(any(name.endswith('.tmp') for name in names))
+
+    def test_simulation_loads_the_cached_result(self):
+        control = _get_control(cache_directory=self.directory.name)
+        wave_field, _ = pulse_generator(control, 'transducer')
+        expected = simulation(control, wave_field)
+        self.assertEqual([], os.listdir(self.directory.name))
+        simulation(control, wave_field, use_cache=True)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = simulation(control, wave_field, use_cache=True)
+        self.assertIn('from the cache', output.getvalue())
+        self.assertEqual(1, len(os.listdir(os.path.join(self.directory.name, 'results'))))
+        for expected_array, array in zip(expected, result):
+            numpy.testing.assert_array_equal(expected_array, array)
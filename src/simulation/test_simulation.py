@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+    test_simulation.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from simulation.controls.consts import POSITION_HISTORY
+from simulation.controls.simulation_state import SimulationState
+from simulation.controls.testing import get_test_control
+from simulation.simulation import simulation, run_simulations, simulation_steps
+from simulation.stopping_criteria.focal_maximum_passed import FocalMaximumPassed
+from system.transducer.pulse_generator import pulse_generator
+
+
+def _get_control(non_linearity, end_point, direct_jump=False, **kwargs):
+    return get_test_control('test_simulation',
+                            non_linearity=non_linearity,
+                            pulse_amplitude=0.05,
+                            end_point=end_point,
+                            direct_jump=direct_jump,
+                            **kwargs)
+
+
+class TestSimulationSteps(unittest.TestCase):
+    def test_steps_give_the_profiles_of_simulation(self):
+        for direct_jump in (False, True):
+            control = _get_control(False, 0.02, direct_jump)
+            wave_field, _ = pulse_generator(control, 'transducer')
+            _, rms_profile, max_profile, ax_pulse, z_pos = simulation(control,
+                                                                      wave_field,
+                                                                      use_cache=False)
+
+            steps = list(simulation_steps(control, wave_field, use_cache=False))
+            self.assertEqual(list(range(z_pos.size)), [step.step for step in steps])
+            self.assertTrue(all(step.num_steps == z_pos.size for step in steps))
+            for step in steps:
+                numpy.testing.assert_array_equal(rms_profile[:, :, step.step], step.rms_profile)
+                numpy.testing.assert_array_equal(max_profile[:, :, step.step], step.max_profile)
+                numpy.testing.assert_array_equal(ax_pulse[:, step.step], step.ax_pulse)
+                self.assertEqual(z_pos[step.step], step.position)
+                self.assertGreaterEqual(step.total_time, step.elapsed_time)
+
+    def test_stop_early(self):
+        for direct_jump in (False, True):
+            control = _get_control(False, 0.02, direct_jump)
+            wave_field, _ = pulse_generator(control, 'transducer')
+            state = SimulationState(control)
+            steps = simulation_steps(control, wave_field, state=state, use_cache=False)
+            for step in steps:
+                if step.step == 3:
+                    break
+            steps.close()
+            self.assertAlmostEqual(3 * control.simulation.step_size, step.position)
+            self.assertAlmostEqual(step.position, state.current_position)
+            self.assertFalse(step.wave_field.flags.writeable)
+
+    def test_stopping_criteria_trim_the_profiles(self):
+        control = _get_control(False, 0.08)
+        wave_field, _ = pulse_generator(control, 'transducer')
+        expected = simulation(control, wave_field, use_cache=False)
+
+        criterion = FocalMaximumPassed(control, 0.8)
+        result = simulation(control, wave_field, stopping_criteria=[criterion], use_cache=False)
+        num_steps = result[4].size
+        self.assertLess(num_steps, expected[4].size)
+        self.assertGreater(result[4][-1], control.transducer.focus_azimuth)
+        numpy.testing.assert_array_equal(expected[1][:, :, :num_steps], result[1])
+        numpy.testing.assert_array_equal(expected[2][:, :, :num_steps], result[2])
+        numpy.testing.assert_array_equal(expected[3][:, :num_steps], result[3])
+        numpy.testing.assert_array_equal(expected[4][:num_steps], result[4])
+        self.assertEqual(expected[0].shape, result[0].shape)
+
+    def test_stopping_criteria_need_the_profiles(self):
+        control = _get_control(False, 0.02, history=POSITION_HISTORY)
+        wave_field, _ = pulse_generator(control, 'transducer')
+        with self.assertRaises(ValueError):
+            simulation(control,
+                       wave_field,
+                       stopping_criteria=[FocalMaximumPassed(control)],
+                       use_cache=False)
+
+    def test_store_position_between_the_main_steps(self):
+        control = _get_control(False, 0.03, focus_azimuth=0.02, focus_elevation=0.02)
+        wave_field, _ = pulse_generator(control, 'transducer')
+        expected = simulation(control, wave_field, window=-1, use_cache=False)
+
+        # the linear steps to and from the store position add up to a main step
+        control = _get_control(False, 0.03, focus_azimuth=0.0203, focus_elevation=0.0203)
+        result = simulation(control, wave_field, window=-1, use_cache=False)
+        on_grid = numpy.abs(result[4] - 0.0203) > 1e-12
+        self.assertEqual(1, numpy.count_nonzero(~on_grid))
+        numpy.testing.assert_allclose(expected[4], result[4][on_grid], rtol=0, atol=1e-12)
+        numpy.testing.assert_allclose(expected[0], result[0], rtol=0,
+                                      atol=1e-12 * numpy.abs(expected[0]).max())
+        numpy.testing.assert_allclose(expected[1], result[1][:, :, on_grid], rtol=0,
+                                      atol=1e-12 * numpy.abs(expected[1]).max())
+
+
+class TestRunSimulations(unittest.TestCase):
+    def _assert_results_equal(self, expected, result):
+        self.assertEqual(len(expected), len(result))
+        for expected_array, array in zip(expected, result):
+            numpy.testing.assert_array_equal(expected_array, array)
+
+    def test_concurrent_runs_match_sequential_runs(self):
+        control = _get_control(False, 0.02)
+        wave_field, _ = pulse_generator(control, 'transducer')
+        step_size = control.simulation.step_size
+        wave_fields = [wave_field, 2.0 * wave_field, numpy.roll(wave_field, 5, axis=1)]
+
+        expected = [simulation(control, _wave_field, use_cache=False)
+                    for _wave_field in wave_fields]
+        results = run_simulations(control, wave_fields, num_workers=3, use_cache=False)
+
+        self.assertEqual(len(wave_fields), len(results))
+        for _expected, result in zip(expected, results):
+            self._assert_results_equal(_expected, result)
+        self.assertEqual(step_size, control.simulation.step_size)
+
+    def test_concurrent_nonlinear_runs_share_the_control(self):
+        control = _get_control(True, 0.0025)
+        wave_field, _ = pulse_generator(control, 'transducer')
+
+        expected = simulation(control, wave_field, use_cache=False)
+        results = run_simulations(control, [wave_field, wave_field], num_workers=2,
+                                  use_cache=False)
+
+        for result in results:
+            self._assert_results_equal(expected, result)
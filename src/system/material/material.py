@@ -131,4 +131,9 @@ class BaseMaterial(IMaterial):
                                kind=kind,
                                fill_value='extrapolate')
 
-        return interp_func(self._temperature).item()
+        # one value for each temperature when the material is made for many temperatures
+        values = interp_func(self._temperature)
+        if values.ndim == 0:
+            return values.item()
+
+        return values
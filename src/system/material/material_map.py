@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+    material_map.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy
+
+from system.material.interfaces import IMaterial
+from system.material.material_snapshot import get_material_snapshot
+
+
+class MaterialMap(IMaterial):
+    """
+    Spatially varying material given by a label for each lateral column of the grid.
+    The labels index a list of materials, and may change in depth as a set of layers, e.g. fat
+    on top of muscle. The coefficients eps_n, eps_a and eps_b of each material are tabulated
+    once, and the columns are grouped by label once for each layer, so that the nonlinear and
+    attenuation steps treat each group as one array with its own coefficients.
+    The properties of the map as a material are the properties of the first material, which is
+    used where one sound speed is needed, e.g. for diffraction.
+    """
+
+    def __init__(self,
+                 materials: Sequence[IMaterial],
+                 labels: numpy.ndarray,
+                 depths: Optional[Sequence[float]] = None):
+        """
+        Constructor
+        :param materials: The materials indexed by the labels.
+        :param labels: The material label of each column, either as an (ny x nx) array or as an
+            (num_layers x ny x nx) array of layers.
+        :param depths: The depth where each layer starts, increasing. Default is one layer
+            starting at zero.
+        """
+        self._materials = [get_material_snapshot(material) for material in materials]
+        self._labels = numpy.asarray(labels, dtype=int)
+        if self._labels.ndim == 2:
+            self._labels = self._labels[numpy.newaxis]
+        if depths is None:
+            depths = [0.0]
+        self._depths = numpy.asarray(depths, dtype=float)
+        if self._depths.size != self._labels.shape[0]:
+            raise ValueError('One depth is needed for each layer of labels')
+        if numpy.min(self._labels) < 0 or numpy.max(self._labels) >= len(self._materials):
+            raise ValueError('The labels must index the materials')
+
+        # coefficient tables, one entry for each label
+        self._eps_n = numpy.array([material.eps_n for material in self._materials])
+        self._eps_a = numpy.array([material.eps_a for material in self._materials])
+        self._eps_b = numpy.array([material.eps_b for material in self._materials])
+
+        self._groups = [_group_columns(layer) for layer in self._labels]
+
+    def get_layer(self, position: float) -> int:
+        """
+        Returns the layer of labels at a depth.
+        :param position: The depth.
+        :return: Index of the layer.
+        """
+        return max(int(numpy.searchsorted(self._depths, position, side='right')) - 1, 0)
+
+    def get_groups(self, position: float) -> List[Tuple[int, numpy.ndarray]]:
+        """
+        Returns the columns of each label at a depth. The columns are indexes of the flattened
+        (ny x nx) lateral grid.
+        :param position: The depth.
+        :return: A list of the label and the columns of the label, for the labels present.
+        """
+        return self._groups[self.get_layer(position)]
+
+    @property
+    def materials(self) -> List[IMaterial]:
+        return self._materials
+
+    @property
+    def labels(self) -> numpy.ndarray:
+        return self._labels
+
+    @property
+    def depths(self) -> numpy.ndarray:
+        return self._depths
+
+    @property
+    def eps_n_table(self) -> numpy.ndarray:
+        return self._eps_n
+
+    @property
+    def eps_a_table(self) -> numpy.ndarray:
+        return self._eps_a
+
+    @property
+    def eps_b_table(self) -> numpy.ndarray:
+        return self._eps_b
+
+    @property
+    def constant_of_attenuation(self) -> float:
+        """
+        Get the constant of the attenuation of the first material
+        :return: The constant of the attenuation
+        """
+        return self._materials[0].constant_of_attenuation
+
+    @property
+    def exponent_of_attenuation(self) -> float:
+        """
+        Get the exponent of the attenuation of the first material
+        :return: The exponent of the attenuation
+        """
+        return self._materials[0].exponent_of_attenuation
+
+    @property
+    def non_linearity_coefficient(self) -> float:
+        """
+        Get the coefficient of non-linearity of the first material
+        :return: The coefficient of non-linearity
+        """
+        return self._materials[0].non_linearity_coefficient
+
+    @property
+    def mass_density(self) -> float:
+        """
+        Get the density of the first material
+        :return: The density
+        """
+        return self._materials[0].mass_density
+
+    @property
+    def sound_speed(self) -> float:
+        """
+        Get the sound speed of the first material
+        :return: sound speed
+        """
+        return self._materials[0].sound_speed
+
+    @property
+    def eps_a(self) -> float:
+        """
+        Get the coefficient eps_a of the first material
+        :return: The coefficient eps_a
+        """
+        return float(self._eps_a[0])
+
+    @property
+    def eps_b(self) -> float:
+        """
+        Get the coefficient eps_b of the first material
+        :return: The coefficient eps_b
+        """
+        return float(self._eps_b[0])
+
+    @property
+    def eps_n(self) -> float:
+        """
+        Get the coefficient eps_n of the first material
+        :return: The coefficient eps_n
+        """
+        return float(self._eps_n[0])
+
+    @property
+    def compressibility(self) -> float:
+        """
+        Get the compressibility of the first material
+        :return: The compressibility
+        """
+        return self._materials[0].compressibility
+
+    @property
+    def is_regular(self) -> bool:
+        """
+        A material map is not regular, the coefficients vary between the columns
+        :return: False
+        """
+        return False
+
+
+def _group_columns(labels: numpy.ndarray) -> List[Tuple[int, numpy.ndarray]]:
+    """
+    Groups the flattened columns of a layer by label with one stable sort.
+    """
+    _labels = labels.reshape(-1)
+    order = numpy.argsort(_labels, kind='stable')
+    unique_labels, starts = numpy.unique(_labels[order], return_index=True)
+    ends = numpy.append(starts[1:], order.size)
+
+    return [(int(label), order[start:end])
+            for label, start, end in zip(unique_labels, starts, ends)]
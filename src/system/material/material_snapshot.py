@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+    material_snapshot.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import List, Type
+
+import numpy
+
+from system.material.interfaces import IMaterial
+from system.material.material import BaseMaterial
+
+
+class MaterialSnapshot(BaseMaterial):
+    """
+    Immutable snapshot of a material at one temperature. The measured properties are evaluated
+    once, and the derived coefficients compressibility, eps_a, eps_b and eps_n are computed once
+    from them. Snapshots are equal when their material and values are equal, and are hashable so
+    that they may be used in the keys of cached operators.
+    """
+
+    def __init__(self,
+                 name: str,
+                 temperature: float,
+                 sound_speed: float,
+                 mass_density: float,
+                 constant_of_attenuation: float,
+                 exponent_of_attenuation: float,
+                 non_linearity_coefficient: float):
+        """
+        Constructor
+        :param name: Name of the material.
+        :param temperature: The temperature.
+        :param sound_speed: The sound speed.
+        :param mass_density: The density.
+        :param constant_of_attenuation: The constant of the attenuation.
+        :param exponent_of_attenuation: The exponent of the attenuation.
+        :param non_linearity_coefficient: The coefficient of non-linearity.
+        """
+        values = (float(sound_speed),
+                  float(mass_density),
+                  float(constant_of_attenuation),
+                  float(exponent_of_attenuation),
+                  float(non_linearity_coefficient))
+        object.__setattr__(self, '_temperature', float(temperature))
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_values', values)
+        # derived coefficients by the formulas of BaseMaterial, eps_n reads the compressibility
+        object.__setattr__(self, '_derived', (BaseMaterial.compressibility.fget(self),))
+        object.__setattr__(self, '_derived', self._derived + (BaseMaterial.eps_a.fget(self),
+                                                              BaseMaterial.eps_b.fget(self),
+                                                              BaseMaterial.eps_n.fget(self)))
+
+    @classmethod
+    def from_material(cls, material: BaseMaterial) -> 'MaterialSnapshot':
+        """
+        Takes a snapshot of a material at its temperature.
+        :param material: The material.
+        :return: The snapshot.
+        """
+        return cls(type(material).__name__,
+                   material._temperature,
+                   material.sound_speed,
+                   material.mass_density,
+                   material.constant_of_attenuation,
+                   material.exponent_of_attenuation,
+                   material.non_linearity_coefficient)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('MaterialSnapshot is immutable')
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MaterialSnapshot) and self._get_key() == other._get_key()
+
+    def __hash__(self) -> int:
+        return hash(self._get_key())
+
+    def __repr__(self) -> str:
+        return 'MaterialSnapshot({}, {})'.format(self._name, self._temperature)
+
+    def _get_key(self) -> tuple:
+        return (self._name, self._temperature) + self._values
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def temperature(self) -> float:
+        return self._temperature
+
+    @property
+    def sound_speed(self) -> float:
+        """
+        Get the sound speed
+        :return: sound speed
+        """
+        return self._values[0]
+
+    @property
+    def mass_density(self) -> float:
+        """
+        Get the density
+        :return: The density
+        """
+        return self._values[1]
+
+    @property
+    def constant_of_attenuation(self) -> float:
+        """
+        Get the constant of the attenuation
+        :return: The constant of the attenuation
+        """
+        return self._values[2]
+
+    @property
+    def exponent_of_attenuation(self) -> float:
+        """
+        Get the exponent of the attenuation
+        :return: The exponent of the attenuation
+        """
+        return self._values[3]
+
+    @property
+    def non_linearity_coefficient(self) -> float:
+        """
+        Get the coefficient of non-linearity
+        :return: The coefficient of non-linearity
+        """
+        return self._values[4]
+
+    @property
+    def compressibility(self) -> float:
+        """
+        Get the compressibility
+        :return: The compressibility
+        """
+        return self._derived[0]
+
+    @property
+    def eps_a(self) -> float:
+        """
+        Get the coefficient eps_a of material
+        :return: The coefficient eps_a of material
+        """
+        return self._derived[1]
+
+    @property
+    def eps_b(self) -> float:
+        """
+        Get the coefficient eps_b of material
+        :return: The coefficient eps_b of material
+        """
+        return self._derived[2]
+
+    @property
+    def eps_n(self) -> float:
+        """
+        Get the coefficient eps_n of material
+        :return: The coefficient eps_n of material
+        """
+        return self._derived[3]
+
+
+def get_material_snapshots(material_type: Type[BaseMaterial],
+                           temperatures: numpy.ndarray) -> List[MaterialSnapshot]:
+    """
+    Takes snapshots of a material at many temperatures. Each measured property is interpolated
+    at all temperatures in one pass.
+    :param material_type: The class of the material, e.g. Muscle.
+    :param temperatures: The temperatures.
+    :return: The snapshots, one for each temperature.
+    """
+    _temperatures = numpy.atleast_1d(numpy.asarray(temperatures, dtype=float))
+    material = material_type(_temperatures)
+    values = numpy.broadcast_arrays(_temperatures,
+                                    material.sound_speed,
+                                    material.mass_density,
+                                    material.constant_of_attenuation,
+                                    material.exponent_of_attenuation,
+                                    material.non_linearity_coefficient)
+
+    return [MaterialSnapshot(material_type.__name__, *row) for row in zip(*values)]
+
+
+def get_material_snapshot(material: IMaterial) -> IMaterial:
+    """
+    Returns a snapshot of a regular material. Snapshots and materials which are not regular
+    are returned as they are.
+    :param material: The material.
+    :return: The snapshot.
+    """
+    if isinstance(material, MaterialSnapshot) or not material.is_regular or \
+            not isinstance(material, BaseMaterial):
+        return material
+
+    return MaterialSnapshot.from_material(material)
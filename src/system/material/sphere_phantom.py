@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+    sphere_phantom.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+from typing import Union
+
+import numpy
+
+
+class SpherePhantom:
+    """
+    Aberration phantom of spherical inclusions in a homogeneous background. The phantom is a
+    vectorized callable giving the sound speed at arrays of (x, y, z) coordinates.
+    The spheres are indexed by a bucket grid in z, so that only the spheres overlapping the
+    buckets of the requested points are tested.
+    """
+
+    def __init__(self,
+                 spheres: numpy.ndarray,
+                 sound_speed: Union[float, numpy.ndarray],
+                 background_sound_speed: float,
+                 bucket_size: float = 0.0):
+        """
+        Constructor
+        :param spheres: The spheres as an (num spheres x 4) array where the columns are sorted
+            as [x y z R].
+        :param sound_speed: The sound speed inside the spheres. Either one value for all spheres
+            or one value for each sphere. Where spheres overlap, the last sphere is used.
+        :param background_sound_speed: The sound speed outside of the spheres.
+        :param bucket_size: The length of the buckets in z. Default is the largest diameter.
+        """
+        self._spheres = numpy.asarray(spheres, dtype=float).reshape((-1, 4))
+        num_spheres = self._spheres.shape[0]
+        self._sound_speed = numpy.broadcast_to(numpy.asarray(sound_speed, dtype=float),
+                                               (num_spheres,)).copy()
+        self._background_sound_speed = background_sound_speed
+
+        # bucket grid in z, each sphere is listed in every bucket it overlaps
+        z = self._spheres[:, 2]
+        radius = self._spheres[:, 3]
+        if bucket_size <= 0.0:
+            bucket_size = 2.0 * numpy.max(radius) if num_spheres > 0 else 1.0
+        self._bucket_size = bucket_size
+        self._z_start = numpy.min(z - radius) if num_spheres > 0 else 0.0
+        first_bucket = self._get_bucket(z - radius)
+        last_bucket = self._get_bucket(z + radius)
+        num_buckets = int(numpy.max(last_bucket)) + 1 if num_spheres > 0 else 0
+        self._buckets = [[] for _ in range(num_buckets)]
+        for index in range(num_spheres):
+            for bucket in range(first_bucket[index], last_bucket[index] + 1):
+                self._buckets[bucket].append(index)
+        self._buckets = [numpy.array(bucket, dtype=int) for bucket in self._buckets]
+
+    def __call__(self,
+                 x: numpy.ndarray,
+                 y: numpy.ndarray,
+                 z: numpy.ndarray) -> numpy.ndarray:
+        """
+        Returns the sound speed at the points (x, y, z). The coordinates are broadcast against
+        each other.
+        :param x: The x-coordinates.
+        :param y: The y-coordinates.
+        :param z: The z-coordinates.
+        :return: The sound speed with the broadcast shape of the coordinates.
+        """
+        x, y, z = numpy.broadcast_arrays(*(numpy.asarray(v, dtype=float) for v in (x, y, z)))
+        sound_speed = numpy.full(x.shape, self._background_sound_speed)
+        buckets = self._get_bucket(z)
+        for bucket in numpy.unique(buckets):
+            if bucket < 0 or bucket >= len(self._buckets):
+                continue
+            points = buckets == bucket
+            _x = x[points]
+            _y = y[points]
+            _z = z[points]
+            _sound_speed = sound_speed[points]
+            for index in self._buckets[bucket]:
+                sphere_x, sphere_y, sphere_z, radius = self._spheres[index]
+                inside = (_x - sphere_x) ** 2 + (_y - sphere_y) ** 2 + (_z - sphere_z) ** 2 <= \
+                    radius ** 2
+                _sound_speed[inside] = self._sound_speed[index]
+            sound_speed[points] = _sound_speed
+
+        return sound_speed
+
+    def sample_grid(self,
+                    x: numpy.ndarray,
+                    y: numpy.ndarray,
+                    z: numpy.ndarray) -> numpy.ndarray:
+        """
+        Rasterizes the phantom on the grid given by the axes x, y and z. Each sphere is only
+        evaluated inside its bounding box on the grid.
+        :param x: The x-axis, increasing.
+        :param y: The y-axis, increasing.
+        :param z: The z-axis, increasing.
+        :return: The sound speed as an (nz x ny x nx) array.
+        """
+        sound_speed = numpy.full((z.size, y.size, x.size), self._background_sound_speed)
+        if len(self._buckets) == 0 or z.size == 0:
+            return sound_speed
+
+        first_bucket = max(int(self._get_bucket(z[0])), 0)
+        last_bucket = min(int(self._get_bucket(z[-1])), len(self._buckets) - 1)
+        if first_bucket > last_bucket:
+            return sound_speed
+        candidates = numpy.unique(numpy.concatenate(self._buckets[first_bucket:last_bucket + 1]))
+
+        # spheres are drawn in order, so the last sphere wins where spheres overlap
+        for index in candidates.astype(int):
+            sphere_x, sphere_y, sphere_z, radius = self._spheres[index]
+            box_x = _get_bounding_box(x, sphere_x, radius)
+            box_y = _get_bounding_box(y, sphere_y, radius)
+            box_z = _get_bounding_box(z, sphere_z, radius)
+            inside = (x[box_x] - sphere_x) ** 2 + \
+                ((y[box_y] - sphere_y) ** 2)[:, numpy.newaxis] + \
+                ((z[box_z] - sphere_z) ** 2)[:, numpy.newaxis, numpy.newaxis] <= radius ** 2
+            sound_speed[box_z, box_y, box_x][inside] = self._sound_speed[index]
+
+        return sound_speed
+
+    def _get_bucket(self, z):
+        return numpy.floor((numpy.asarray(z) - self._z_start) / self._bucket_size).astype(int)
+
+    @property
+    def spheres(self) -> numpy.ndarray:
+        return self._spheres
+
+    @property
+    def background_sound_speed(self) -> float:
+        return self._background_sound_speed
+
+
+def _get_bounding_box(axis: numpy.ndarray, center: float, radius: float) -> slice:
+    """
+    Returns the points of an increasing axis from center - radius to center + radius, both
+    included as the points on the surface of a sphere are inside of it.
+    """
+    return slice(int(numpy.searchsorted(axis, center - radius, side='left')),
+                 int(numpy.searchsorted(axis, center + radius, side='right')))
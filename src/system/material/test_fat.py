@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+    test_fat.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+from system.material.fat import Fat
+
+
+class TestFat(unittest.TestCase):
+    def setUp(self):
+        self.fat = Fat(37.0)
+
+    def test_wave_speed(self):
+        self.assertAlmostEqual(1478.0, self.fat.sound_speed)
+
+    def test_mass_density(self):
+        self.assertAlmostEqual(950.0, self.fat.mass_density)
+
+    def test_non_linearity_coefficient(self):
+        self.assertAlmostEqual(6.0, self.fat.non_linearity_coefficient)
+
+    def test_constant_of_attenuation(self):
+        self.assertAlmostEqual(0.6, self.fat.constant_of_attenuation)
+
+    def test_exponent_of_attenuation(self):
+        self.assertAlmostEqual(1.0, self.fat.exponent_of_attenuation)
+
+    def test_is_regular(self):
+        self.assertTrue(self.fat.is_regular)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    test_material_map.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from system.material.aberration_phantom import AberrationPhantom
+from system.material.fat import Fat
+from system.material.material_map import MaterialMap
+from system.material.muscle import Muscle
+
+
+class TestMaterialMap(unittest.TestCase):
+    def setUp(self):
+        self.materials = [Muscle(37.0), Fat(37.0), AberrationPhantom(37.0)]
+        self.labels = numpy.array([[[1, 0, 2, 1],
+                                    [0, 0, 1, 2]],
+                                   [[0, 0, 0, 0],
+                                    [0, 0, 0, 0]]])
+        self.material_map = MaterialMap(self.materials, self.labels, [0.0, 0.01])
+
+    def test_coefficient_tables(self):
+        for label, material in enumerate(self.materials):
+            self.assertAlmostEqual(material.eps_n, self.material_map.eps_n_table[label])
+            self.assertAlmostEqual(material.eps_a, self.material_map.eps_a_table[label])
+            self.assertAlmostEqual(material.eps_b, self.material_map.eps_b_table[label])
+
+    def test_groups_cover_the_columns(self):
+        groups = self.material_map.get_groups(0.005)
+        self.assertListEqual([0, 1, 2], [label for label, _ in groups])
+        for label, columns in groups:
+            self.assertTrue(numpy.all(self.labels[0].reshape(-1)[columns] == label))
+        columns = numpy.sort(numpy.concatenate([columns for _, columns in groups]))
+        numpy.testing.assert_array_equal(numpy.arange(8), columns)
+
+    def test_layers_by_depth(self):
+        self.assertEqual(0, self.material_map.get_layer(-1.0))
+        self.assertEqual(0, self.material_map.get_layer(0.0))
+        self.assertEqual(1, self.material_map.get_layer(0.01))
+        groups = self.material_map.get_groups(0.02)
+        self.assertEqual(1, len(groups))
+        numpy.testing.assert_array_equal(numpy.arange(8), groups[0][1])
+
+    def test_material_of_the_map(self):
+        self.assertFalse(self.material_map.is_regular)
+        self.assertAlmostEqual(Muscle(37.0).sound_speed, self.material_map.sound_speed)
+        self.assertAlmostEqual(Muscle(37.0).eps_n, self.material_map.eps_n)
+
+    def test_wrong_labels_Exception(self):
+        with self.assertRaises(ValueError):
+            MaterialMap(self.materials, numpy.array([[0, 3]]))
+        with self.assertRaises(ValueError):
+            MaterialMap(self.materials, self.labels)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    test_material_snapshot.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from system.material.aberration_phantom import AberrationPhantom
+from system.material.material_map import MaterialMap
+from system.material.material_snapshot import MaterialSnapshot, get_material_snapshot, \
+    get_material_snapshots
+from system.material.muscle import Muscle
+
+_PROPERTIES = ('sound_speed', 'mass_density', 'constant_of_attenuation',
+               'exponent_of_attenuation', 'non_linearity_coefficient', 'compressibility',
+               'eps_a', 'eps_b', 'eps_n')
+
+
+class TestMaterialSnapshot(unittest.TestCase):
+    def test_snapshot_matches_material(self):
+        for material in (Muscle(37.0), Muscle(38.5), AberrationPhantom(25.0)):
+            snapshot = MaterialSnapshot.from_material(material)
+            for name in _PROPERTIES:
+                self.assertAlmostEqual(getattr(material, name), getattr(snapshot, name),
+                                       msg=name)
+            self.assertTrue(snapshot.is_regular)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = MaterialSnapshot.from_material(Muscle(37.0))
+        with self.assertRaises(AttributeError):
+            snapshot.sound_speed = 1500.0
+        with self.assertRaises(AttributeError):
+            snapshot._values = ()
+
+    def test_snapshot_is_hashable(self):
+        operators = {MaterialSnapshot.from_material(Muscle(37.0)): 'muscle'}
+
+        self.assertEqual('muscle', operators[MaterialSnapshot.from_material(Muscle(37.0))])
+        self.assertNotIn(MaterialSnapshot.from_material(Muscle(38.0)), operators)
+        self.assertNotIn(MaterialSnapshot.from_material(AberrationPhantom(37.0)), operators)
+
+    def test_temperature_sweep(self):
+        temperatures = numpy.linspace(35.0, 40.0, 11)
+        snapshots = get_material_snapshots(Muscle, temperatures)
+
+        self.assertEqual(temperatures.size, len(snapshots))
+        for temperature, snapshot in zip(temperatures, snapshots):
+            self.assertEqual(snapshot, MaterialSnapshot.from_material(Muscle(temperature)))
+
+    def test_get_material_snapshot(self):
+        snapshot = get_material_snapshot(Muscle(37.0))
+        self.assertIsInstance(snapshot, MaterialSnapshot)
+        self.assertIs(snapshot, get_material_snapshot(snapshot))
+        material_map = MaterialMap([Muscle(37.0)], numpy.zeros((1, 4)))
+        self.assertIs(material_map, get_material_snapshot(material_map))
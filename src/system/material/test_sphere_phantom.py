@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+    test_sphere_phantom.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import unittest
+
+import numpy
+
+from system.material.sphere_phantom import SpherePhantom
+
+
+def _brute_force(spheres, sound_speed, background_sound_speed, x, y, z):
+    result = numpy.full(numpy.broadcast(x, y, z).shape, background_sound_speed)
+    for (sphere_x, sphere_y, sphere_z, radius), c in zip(spheres, sound_speed):
+        inside = (x - sphere_x) ** 2 + (y - sphere_y) ** 2 + (z - sphere_z) ** 2 <= radius ** 2
+        result[inside] = c
+    return result
+
+
+class TestSpherePhantom(unittest.TestCase):
+    def setUp(self):
+        random = numpy.random.RandomState(7)
+        num_spheres = 40
+        self.spheres = numpy.column_stack((random.uniform(-5e-3, 5e-3, num_spheres),
+                                           random.uniform(-5e-3, 5e-3, num_spheres),
+                                           random.uniform(0.0, 2e-2, num_spheres),
+                                           random.uniform(2e-4, 2e-3, num_spheres)))
+        self.sound_speed = random.uniform(1400.0, 1700.0, num_spheres)
+        self.phantom = SpherePhantom(self.spheres, self.sound_speed, 1540.0, bucket_size=1e-3)
+        self.x = numpy.linspace(-6e-3, 6e-3, 41)
+        self.y = numpy.linspace(-6e-3, 6e-3, 37)
+        self.z = numpy.linspace(-1e-3, 2.1e-2, 53)
+
+    def test_call_matches_brute_force(self):
+        x = self.x[numpy.newaxis, numpy.newaxis, :]
+        y = self.y[numpy.newaxis, :, numpy.newaxis]
+        z = self.z[:, numpy.newaxis, numpy.newaxis]
+        numpy.testing.assert_array_equal(
+            _brute_force(self.spheres, self.sound_speed, 1540.0, x, y, z),
+            self.phantom(x, y, z))
+
+    def test_sample_grid_matches_call(self):
+        numpy.testing.assert_array_equal(
+            self.phantom(self.x[numpy.newaxis, numpy.newaxis, :],
+                         self.y[numpy.newaxis, :, numpy.newaxis],
+                         self.z[:, numpy.newaxis, numpy.newaxis]),
+            self.phantom.sample_grid(self.x, self.y, self.z))
+
+    def test_grid_outside_of_spheres(self):
+        z = numpy.array([0.5, 0.6])
+        numpy.testing.assert_array_equal(1540.0, self.phantom.sample_grid(self.x, self.y, z))
+
+    def test_no_spheres(self):
+        phantom = SpherePhantom(numpy.zeros((0, 4)), 1500.0, 1540.0)
+        numpy.testing.assert_array_equal(1540.0, phantom(self.x, 0.0, 0.0))
+        numpy.testing.assert_array_equal(1540.0, phantom.sample_grid(self.x, self.y, self.z))
+
+    def test_grid_points_on_the_surface(self):
+        # the axes and the sphere are exact in binary, so the poles are on the surface
+        phantom = SpherePhantom(numpy.array([[0.0, 0.0, 0.0, 0.25]]), 1500.0, 1540.0)
+        axis = numpy.arange(-1.0, 1.25, 0.25)
+        expected = phantom(axis[numpy.newaxis, numpy.newaxis, :],
+                           axis[numpy.newaxis, :, numpy.newaxis],
+                           axis[:, numpy.newaxis, numpy.newaxis])
+        self.assertEqual(7, numpy.count_nonzero(expected == 1500.0))
+        numpy.testing.assert_array_equal(expected, phantom.sample_grid(axis, axis, axis))
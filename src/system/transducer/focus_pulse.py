@@ -65,8 +65,7 @@ def focus_pulse(control,
     if num_wave_field_x == 1:
         num_wave_field_x = num_wave_field_y
         num_wave_field_y = 1
-    if num_wave_field_x >= numpy.max(surface_indexes_x) \
-            and num_wave_field_y >= numpy.max(surface_indexes_y):
+    if num_wave_field_x > surface_indexes_x.size or num_wave_field_y > surface_indexes_y.size:
         raise NotImplementedError
     else:
         surface_indexes_x = range(num_wave_field_x)
@@ -76,10 +75,10 @@ def focus_pulse(control,
     num_surface_y = len(surface_indexes_y)
 
     # calculate focusing
-    if annular_transducer:
+    if annular_transducer and num_surface_y > 1:
         raise NotImplementedError
     else:
-        # straight forward rectangular transducer
+        # straight forward rectangular transducer, or the radius of an annular transducer
         focal_curvature_x = get_focal_curvature(focus_azimuth,
                                                 num_surface_x,
                                                 num_elements_azimuth,
@@ -23,11 +23,12 @@ def get_focal_curvature(focal_depth,
                         element_size: Optional[float] = None,
                         lens_focal_depth: Optional[float] = math.inf,
                         annular_transducer: Optional[bool] = False,
-                        diffraction_type: Optional[IDiffractionType] = ExactDiffraction) \
-        -> numpy.ndarray:
+                        diffraction_type: Optional[IDiffractionType] = ExactDiffraction,
+                        steering_angle=0.0) -> numpy.ndarray:
     """
     Calculates focal curvature.
-    :param focal_depth: Focal depth for delay focusing.
+    :param focal_depth: Focal depth for delay focusing, or an array of focal depths. The
+        curvatures of several focal depths are found at once.
     :param num_points: Number of points across transducer.
     :param num_elements: Number of elements.
     :param resolution_x: Resolution across transducer.
@@ -39,21 +40,29 @@ def get_focal_curvature(focal_depth,
         a full wave equation and spherical focal curvature is assumed.
         For diffraction_type is one of FiniteDifferenceTimeDifferenceReduced or
         FiniteDifferenceTimeDifferenceFull, a parabolic approximation is assumed.
-    :return:
+    :param steering_angle: Steering angle (rad) for delay focusing, or an array of steering
+        angles, broadcast with the focal depths. The focal point is at the focal depth along
+        the steered direction, and a positive angle steers towards positive x.
+    :return: The curvature of each point (num_points), or of each focal depth and point
+        (num_foci * num_points) for arrays.
     """
     if element_size is None:
         _element_size = num_points * resolution_x / num_elements
     else:
         _element_size = element_size
 
+    _focal_depth, _steering_angle = numpy.broadcast_arrays(numpy.asarray(focal_depth, dtype=float),
+                                                           numpy.asarray(steering_angle,
+                                                                         dtype=float))
+
     # if number of points is one
     if num_points <= 1:
-        return numpy.array(0, dtype=float)
+        return numpy.zeros(_focal_depth.shape)
 
     # use delay focusing for more than one element
     if num_elements > 1:
-        if focal_depth == math.inf:
-            rd = numpy.zeros((num_points, 1))
+        if numpy.all(_focal_depth == math.inf) and numpy.all(_steering_angle == 0.0):
+            rd = numpy.zeros(_focal_depth.shape + (num_points,))
         else:
             nsprel = numpy.round(element_size / resolution_x)
             if annular_transducer:
@@ -71,20 +80,26 @@ def get_focal_curvature(focal_depth,
                     a = a[int(numpy.ceil(nsprel / 2)):] + resolution_x / 2
                 else:
                     a = a[int(numpy.floor(nsprel / 2)):]
-            if diffraction_type in (NoDiffraction,
-                                    ExactDiffraction,
-                                    AngularSpectrumDiffraction,
-                                    PseudoDifferential):
-                rd = numpy.sqrt(a ** 2 + focal_depth ** 2) - focal_depth
-            else:
-                rd = a ** 2 / (2 * focal_depth)
+            depth = _focal_depth[..., numpy.newaxis]
+            sine = numpy.sin(_steering_angle)[..., numpy.newaxis]
+            cosine = numpy.cos(_steering_angle)[..., numpy.newaxis]
+            with numpy.errstate(invalid='ignore'):
+                if diffraction_type in (NoDiffraction,
+                                        ExactDiffraction,
+                                        AngularSpectrumDiffraction,
+                                        PseudoDifferential):
+                    rd = numpy.sqrt((a - depth * sine) ** 2 + (depth * cosine) ** 2) - depth
+                else:
+                    rd = a ** 2 * cosine ** 2 / (2 * depth) - a * sine
+            # plane waves for infinite focal depths
+            rd = numpy.where(depth == math.inf, -a * sine, rd)
     else:
-        rd = numpy.zeros(num_points)
+        rd = numpy.zeros(_focal_depth.shape + (num_points,))
 
-    x = numpy.arange(numpy.max(rd.shape))
-    xi = numpy.linspace(0, numpy.max(rd.shape) - 1, num_points)
-    interpolation_function = scipy.interpolate.interp1d(x.T, rd, kind='nearest')
-    rd = interpolation_function(xi.T)
+    x = numpy.arange(rd.shape[-1])
+    xi = numpy.linspace(0, rd.shape[-1] - 1, num_points)
+    interpolation_function = scipy.interpolate.interp1d(x, rd, kind='nearest')
+    rd = interpolation_function(xi)
 
     # use eventual lens focusing
     if lens_focal_depth is not math.inf and lens_focal_depth != 0.0:
@@ -106,6 +121,6 @@ def get_focal_curvature(focal_depth,
         r1 = 0
 
     r = rd + r1
-    r = r - numpy.min(r)
+    r = r - numpy.min(r, axis=-1, keepdims=True)
 
     return r
@@ -58,7 +58,7 @@ def get_transducer_indexes(control: MainControl):
     # set up indices
     if annular_transducer and num_dimensions == 2:
         index_xs = numpy.arange(0, numpy.ceil(ndx / 2)) + center_channel[0]
-        index_ys = numpy.array(1)
+        index_ys = numpy.array([1])
     else:
         index_xs = numpy.arange(-numpy.floor(ndx / 2), numpy.ceil(ndx / 2)) + center_channel[0]
         index_ys = numpy.arange(-numpy.floor(ndy / 2), numpy.ceil(ndy / 2)) + center_channel[1]
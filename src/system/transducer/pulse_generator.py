@@ -6,16 +6,24 @@
     :license: GPL-3.0
 """
 import sys
+from typing import Tuple
 
 import numpy
 import scipy.signal
 from scipy.signal import hilbert
 
+from simulation.bounded_cache import BoundedCache
 from simulation.controls.main_control import MainControl
 from simulation.filter.bandpass import bandpass
 from system.transducer.focus_pulse import focus_pulse
+from system.transducer.get_focal_curvature import get_focal_curvature
 from system.transducer.get_transducer_indexes import get_transducer_indexes
 
+# spectra of the unit pulses and apodization windows of batch_pulse_generator, by their
+# parameters
+_pulse_spectra = BoundedCache(16)
+_apodization_windows = BoundedCache(64)
+
 
 def pulse_generator(control: MainControl,
                     source: str = 'transducer',
@@ -69,17 +77,10 @@ def pulse_generator(control: MainControl,
     else:
         _lens_focusing = lens_focusing
 
-    transmit_frequency = control.signal.transmit_frequency
     amplitude = control.signal.amplitude
-    bandwidth = control.signal.bandwidth
-    num_periods = control.signal.num_periods
     num_points_x = control.domain.num_points_x
     num_points_y = control.domain.num_points_y
     num_points_t = control.domain.num_points_t
-    resolution_x = control.signal.resolution_x
-    resolution_y = control.signal.resolution_y
-    resolution_t = control.signal.resolution_t
-    sound_speed = control.material.material.sound_speed
     annular_transducer = control.annular_transducer
 
     # set length of transducer
@@ -91,53 +92,7 @@ def pulse_generator(control: MainControl,
         _lens_focusing = _lens_focusing * numpy.array([1, 1])
 
     # generate _signal
-    if isinstance(signal, str):
-        if str.lower(signal) == 'gaussian':
-            t, tp, _signal, nrm = _gaussian(resolution_t,
-                                            transmit_frequency,
-                                            num_periods,
-                                            num_points_t)
-        elif str.lower(signal) == 'cosine':
-            t = numpy.arange(-num_points_t / 2, num_points_t / 2) * resolution_t
-            tp = num_periods / transmit_frequency
-            ntp = int(numpy.round(tp / resolution_t))
-            tp = numpy.arange(-numpy.ceil(ntp / 2),
-                              numpy.floor(ntp / 2) + 1) * resolution_t
-            sigp = numpy.cos(2.0 * numpy.pi * transmit_frequency * tp) * \
-                   numpy.cos(numpy.pi * transmit_frequency / num_periods * tp)
-            _signal = numpy.zeros(t.size)
-            index = numpy.where(t < tp[0])[0]
-            _signal[index[-1]: index[-1] + ntp + 1] = sigp
-            _signal, _ = bandpass(_signal,
-                                  transmit_frequency,
-                                  resolution_t,
-                                  bandwidth,
-                                  4)
-            nrm = numpy.max(numpy.abs(hilbert(_signal)))
-        else:
-            print('pulse not specified - uses gaussian')
-            t, tp, _signal, nrm = _gaussian(resolution_t, transmit_frequency,
-                                            num_periods, num_points_t)
-    else:
-        _signal = signal
-        nrm = numpy.max(numpy.abs(hilbert(_signal)))
-
-    _signal = _signal / nrm * amplitude
-
-    # adjust length of _signal
-    if _signal.size < num_points_t:
-        ntzp = (num_points_t - _signal.size) / 2
-        _signal = numpy.concatenate(
-            (numpy.zeros(int((numpy.ceil(ntzp)))), _signal.reshape(_signal.size),
-             numpy.zeros(int((numpy.floor(ntzp))))))
-    elif _signal.size > 1.1 * num_points_t:
-        print(
-            'Increase your number of spatial grid points.\nMaximum truncation '
-            'of _signal vector is 10 percent.')
-        sys.exit(-1)
-    else:
-        nttr = int(numpy.ceil((_signal.size - num_points_t) / 2.0))
-        _signal = _signal[nttr:num_points_t + nttr]
+    _signal = _get_pulse(control, signal) * amplitude
 
     if control.num_dimensions == 1:
         return _signal
@@ -149,8 +104,6 @@ def pulse_generator(control: MainControl,
         raise NotImplementedError
     elif source == 'transducer':
         # generating pulse from transducer
-        control.simulation.current_position = 0.0
-
         # calculate apodization
         if isinstance(apodization, str):
             raise NotImplementedError
@@ -193,6 +146,246 @@ def pulse_generator(control: MainControl,
     return _signal, delta_focus
 
 
+def batch_pulse_generator(control: MainControl,
+                          focus_azimuth=None,
+                          focus_elevation=None,
+                          steering_azimuth=0.0,
+                          steering_elevation=0.0,
+                          amplitude=None,
+                          apodization=0,
+                          signal: str = 'gaussian') -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Generates the wave fields of a batch of transmits from the transducer, as pulse_generator
+    does for one transmit. The spectrum of the pulse and the apodization windows are cached,
+    and the focal delays of all transmits are applied as one phase shift in the frequency
+    domain. The settings are broadcast to the number of transmits.
+    Delay focusing and steering apply to a dimension with several elements. A dimension with
+    one element has a lens at the focal depth of the controls, as in pulse_generator.
+    :param control: Control for simulation.
+    :param focus_azimuth: Focal depth of each transmit in azimuth. An infinite depth gives a
+        plane wave. Default is control.transducer.focus_azimuth.
+    :param focus_elevation: Focal depth of each transmit in elevation. Default is
+        control.transducer.focus_elevation.
+    :param steering_azimuth: Steering angle (rad) of each transmit in azimuth, see
+        get_focal_curvature.
+    :param steering_elevation: Steering angle (rad) of each transmit in elevation.
+    :param amplitude: Amplitude of each transmit. Default is control.signal.amplitude.
+    :param apodization: Cut-off of the tukey apodization of each transmit, see
+        pulse_generator. Either one value for x and y, or pairs (num_transmits * 2) for x and y.
+    :param signal: The transmitted signal, 'gaussian' or 'cosine', see pulse_generator.
+    :return: The wave fields (num_transmits * nt * nx) in 2D and (num_transmits * nt * ny * nx)
+                in 3D, e.g. for run_simulations,
+             The focal delays of the points of the transducer surface (num_transmits * ny * nx).
+    """
+    if control.num_dimensions == 1:
+        raise NotImplementedError
+    transducer = control.transducer
+    annular_transducer = control.annular_transducer
+    num_points_x = control.domain.num_points_x
+    num_points_y = control.domain.num_points_y
+    num_points_t = control.domain.num_points_t
+
+    # broadcast the settings
+    if focus_azimuth is None:
+        focus_azimuth = transducer.focus_azimuth
+    if focus_elevation is None:
+        focus_elevation = transducer.focus_elevation
+    if amplitude is None:
+        amplitude = control.signal.amplitude
+    _apodization = numpy.asarray(apodization, dtype=float)
+    if _apodization.ndim < 2:
+        _apodization = numpy.stack((_apodization, _apodization), axis=-1)
+    settings = (focus_azimuth, focus_elevation, steering_azimuth, steering_elevation, amplitude)
+    shape = numpy.broadcast_shapes(_apodization.shape[:-1],
+                                   *(numpy.shape(setting) for setting in settings))
+    if len(shape) > 1:
+        raise ValueError('The settings must be scalars or vectors of one value for each transmit')
+    num_transmits = int(numpy.prod(shape))
+    _focus_azimuth, _focus_elevation, _steering_azimuth, _steering_elevation, _amplitude = \
+        (numpy.broadcast_to(numpy.asarray(setting, dtype=float), shape).reshape(num_transmits)
+         for setting in settings)
+    _apodization = numpy.broadcast_to(_apodization, shape + (2,)).reshape((num_transmits, 2))
+    if annular_transducer and (numpy.any(_steering_azimuth != 0.0) or
+                               numpy.any(_steering_elevation != 0.0)):
+        raise ValueError('Annular transducers can not be steered')
+
+    # focal delays of all transmits
+    index_x, index_y, _, _, _ = get_transducer_indexes(control)
+    delays_x = _get_focal_delays(control,
+                                 _focus_azimuth,
+                                 _steering_azimuth,
+                                 index_x.size,
+                                 transducer.num_elements_azimuth,
+                                 control.signal.resolution_x,
+                                 transducer.elements_size_azimuth,
+                                 transducer.focus_azimuth)
+    delays_y = _get_focal_delays(control,
+                                 _focus_elevation,
+                                 _steering_elevation,
+                                 index_y.size,
+                                 transducer.num_elements_elevation,
+                                 control.signal.resolution_y,
+                                 transducer.elements_size_elevation,
+                                 transducer.focus_elevation)
+    delta_focus = delays_y[:, :, numpy.newaxis] + delays_x[:, numpy.newaxis, :]
+
+    # the apodized and delayed pulses of the points of the transducer surface
+    windows = numpy.stack([_get_apodization_window(index_x.size,
+                                                   index_y.size,
+                                                   tuple(setting),
+                                                   annular_transducer)
+                           for setting in _apodization])
+    frequencies = numpy.fft.rfftfreq(num_points_t, control.signal.resolution_t)
+    spectra = (_amplitude[:, numpy.newaxis, numpy.newaxis] * windows)[:, numpy.newaxis] * \
+        _get_pulse_spectrum(control, signal)[:, numpy.newaxis, numpy.newaxis] * \
+        numpy.exp(2j * numpy.pi * frequencies[:, numpy.newaxis, numpy.newaxis] *
+                  delta_focus[:, numpy.newaxis])
+
+    # create full domain
+    wave_fields = numpy.zeros((num_transmits, num_points_t, num_points_y, num_points_x))
+    wave_fields[:, :, slice(index_y[0], index_y[-1] + 1), slice(index_x[0], index_x[-1] + 1)] = \
+        numpy.fft.irfft(spectra, num_points_t, axis=1)
+    if control.num_dimensions == 2:
+        wave_fields = wave_fields[:, :, 0]
+
+    return wave_fields, delta_focus
+
+
+def _get_focal_delays(control: MainControl,
+                      focal_depths: numpy.ndarray,
+                      steering_angles: numpy.ndarray,
+                      num_points: int,
+                      num_elements: int,
+                      resolution: float,
+                      element_size: float,
+                      lens_focal_depth: float) -> numpy.ndarray:
+    """
+    Returns the focal delays (num_transmits * num_points) across the transducer, as
+    focus_pulse. A dimension with one element has a lens at lens_focal_depth.
+    """
+    if num_elements == 1:
+        curvature = get_focal_curvature(lens_focal_depth,
+                                        num_points,
+                                        num_elements,
+                                        resolution,
+                                        element_size,
+                                        lens_focal_depth,
+                                        control.annular_transducer,
+                                        control.diffraction_type)
+    else:
+        curvature = get_focal_curvature(focal_depths,
+                                        num_points,
+                                        num_elements,
+                                        resolution,
+                                        element_size,
+                                        0.0,
+                                        control.annular_transducer,
+                                        control.diffraction_type,
+                                        steering_angles)
+    curvature = numpy.broadcast_to(numpy.reshape(curvature, (-1, num_points)),
+                                   (focal_depths.size, num_points))
+
+    return curvature / control.material.material.sound_speed
+
+
+def _get_pulse_spectrum(control: MainControl, signal: str) -> numpy.ndarray:
+    """
+    Returns the spectrum of the one-sided FFT of the unit pulse of pulse_generator.
+    """
+    key = (str.lower(signal),
+           control.signal.transmit_frequency,
+           control.signal.bandwidth,
+           control.signal.num_periods,
+           control.signal.resolution_t,
+           control.domain.num_points_t)
+
+    return _pulse_spectra.get(key, lambda: numpy.fft.rfft(_get_pulse(control, signal)))
+
+
+def _get_apodization_window(num_points_x: int,
+                            num_points_y: int,
+                            cutoff_percentage: Tuple[float, float],
+                            annular_transducer: bool) -> numpy.ndarray:
+    """
+    Returns the tukey apodization window (ny * nx) of the transducer surface, see
+    _get_apodization.
+    """
+    key = (num_points_x, num_points_y, cutoff_percentage, annular_transducer)
+    _cutoff_percentage = cutoff_percentage[0] if num_points_y == 1 else list(cutoff_percentage)
+
+    def _factory():
+        return _get_apodization(num_points_x,
+                                num_points_y,
+                                'tukey',
+                                _cutoff_percentage,
+                                annular_transducer).reshape((num_points_y, num_points_x))
+
+    return _apodization_windows.get(key, _factory)
+
+
+def _get_pulse(control: MainControl, signal='gaussian') -> numpy.ndarray:
+    """
+    Returns the transmitted signal of pulse_generator with unit amplitude, fitted to the time
+    window of the domain.
+    """
+    transmit_frequency = control.signal.transmit_frequency
+    bandwidth = control.signal.bandwidth
+    num_periods = control.signal.num_periods
+    num_points_t = control.domain.num_points_t
+    resolution_t = control.signal.resolution_t
+
+    # generate _signal
+    if isinstance(signal, str):
+        if str.lower(signal) == 'gaussian':
+            t, tp, _signal, nrm = _gaussian(resolution_t,
+                                            transmit_frequency,
+                                            num_periods,
+                                            num_points_t)
+        elif str.lower(signal) == 'cosine':
+            t = numpy.arange(-num_points_t / 2, num_points_t / 2) * resolution_t
+            tp = num_periods / transmit_frequency
+            ntp = int(numpy.round(tp / resolution_t))
+            tp = numpy.arange(-numpy.ceil(ntp / 2),
+                              numpy.floor(ntp / 2) + 1) * resolution_t
+            sigp = numpy.cos(2.0 * numpy.pi * transmit_frequency * tp) * \
+                   numpy.cos(numpy.pi * transmit_frequency / num_periods * tp)
+            _signal = numpy.zeros(t.size)
+            index = numpy.where(t < tp[0])[0]
+            _signal[index[-1]: index[-1] + ntp + 1] = sigp
+            _signal, _ = bandpass(_signal,
+                                  transmit_frequency,
+                                  resolution_t,
+                                  bandwidth,
+                                  4)
+            nrm = numpy.max(numpy.abs(hilbert(_signal)))
+        else:
+            print('pulse not specified - uses gaussian')
+            t, tp, _signal, nrm = _gaussian(resolution_t, transmit_frequency,
+                                            num_periods, num_points_t)
+    else:
+        _signal = signal
+        nrm = numpy.max(numpy.abs(hilbert(_signal)))
+
+    _signal = _signal / nrm
+
+    # adjust length of _signal
+    if _signal.size < num_points_t:
+        ntzp = (num_points_t - _signal.size) / 2
+        _signal = numpy.concatenate(
+            (numpy.zeros(int((numpy.ceil(ntzp)))), _signal.reshape(_signal.size),
+             numpy.zeros(int((numpy.floor(ntzp))))))
+    elif _signal.size > 1.1 * num_points_t:
+        print(
+            'Increase your number of spatial grid points.\nMaximum truncation '
+            'of _signal vector is 10 percent.')
+        sys.exit(-1)
+    else:
+        nttr = int(numpy.ceil((_signal.size - num_points_t) / 2.0))
+        _signal = _signal[nttr:num_points_t + nttr]
+
+    return _signal
+
+
 def _gaussian(resolution_t, transmit_frequency, num_periods, num_points_t):
     t = numpy.arange(-num_points_t / 2, num_points_t / 2) * resolution_t
     tp = num_periods / transmit_frequency
@@ -248,11 +441,13 @@ def _get_apodization(num_points_x: int,
     if annular_transducer:
         if num_points_y == 1:
             # get apodization for axis-symmetric simulations
+            if isinstance(cutoff_percentage, (list, numpy.ndarray)):
+                cutoff_percentage = cutoff_percentage[0]
             apodization_x = _get_apodization(2 * num_points_x - 1,
                                              1,
                                              apodization_type,
-                                             cutoff_percentage[0])
-            apodization = apodization_x[num_points_x:]
+                                             cutoff_percentage)
+            apodization = apodization_x[num_points_x - 1:]
         elif num_points_x == num_points_y:
             # get apodization for annual transducer in full 3D
             raise NotImplementedError
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+    test_pulse_generator.py
+
+    :copyright (C) 2020  Jaeho
+    :license: GPL-3.0
+"""
+# pylint: disable-all
+
+import math
+import unittest
+
+import numpy
+
+from simulation.controls.testing import get_test_control
+from system.transducer.get_focal_curvature import get_focal_curvature
+from system.transducer.pulse_generator import batch_pulse_generator, pulse_generator
+
+
+def _get_control(num_dimensions=2, **kwargs):
+    return get_test_control('test_pulse_generator',
+                            num_dimensions=num_dimensions,
+                            **kwargs,
+                            harmonic=2)
+
+
+class TestBatchPulseGenerator(unittest.TestCase):
+    def _assert_fields(self, expected, wave_field):
+        numpy.testing.assert_allclose(wave_field, expected, rtol=0,
+                                      atol=1e-12 * numpy.abs(expected).max())
+
+    def test_transmit_of_the_controls(self):
+        control = _get_control()
+        wave_field, delta_focus = pulse_generator(control, 'transducer')
+        wave_fields, delta_focuses = batch_pulse_generator(control)
+        self.assertEqual((1,) + wave_field.shape, wave_fields.shape)
+        self._assert_fields(wave_field, wave_fields[0])
+        numpy.testing.assert_allclose(delta_focus, delta_focuses[0], rtol=0, atol=1e-18)
+
+    def test_batch_of_transmits(self):
+        focal_depths = [0.03, 0.06, math.inf]
+        amplitudes = [0.5, 2.0, 1.0]
+        apodizations = [0, 1, 1]
+        wave_fields, delta_focuses = batch_pulse_generator(_get_control(),
+                                                           focus_azimuth=focal_depths,
+                                                           amplitude=amplitudes,
+                                                           apodization=apodizations)
+        self.assertEqual(3, wave_fields.shape[0])
+        for index in range(3):
+            control = _get_control(focus_azimuth=focal_depths[index],
+                                   pulse_amplitude=amplitudes[index])
+            wave_field, delta_focus = pulse_generator(control, 'transducer',
+                                                      apodization=apodizations[index])
+            self._assert_fields(wave_field, wave_fields[index])
+            numpy.testing.assert_allclose(delta_focus, delta_focuses[index], rtol=0, atol=1e-18)
+
+    def test_steered_transmits(self):
+        control = _get_control()
+        wave_fields, _ = batch_pulse_generator(control, steering_azimuth=[-0.2, 0.2])
+        self._assert_fields(wave_fields[0], wave_fields[1, :, ::-1])
+
+        # a steered plane wave has linear delays across the elements of 3 points
+        _, delta_focuses = batch_pulse_generator(control, math.inf, steering_azimuth=0.2)
+        numpy.testing.assert_allclose(numpy.diff(delta_focuses[0, 0, 1::3], 2), 0.0, atol=1e-18)
+
+        curvature = get_focal_curvature(numpy.array([0.03, math.inf]), 16, 4, 1e-4, 4e-4,
+                                        steering_angle=0.1)
+        self.assertEqual((2, 16), curvature.shape)
+        for index, focal_depth in enumerate((0.03, math.inf)):
+            numpy.testing.assert_allclose(
+                get_focal_curvature(focal_depth, 16, 4, 1e-4, 4e-4, steering_angle=0.1),
+                curvature[index])
+
+    def test_three_dimensions(self):
+        control = _get_control(3)
+        wave_field, delta_focus = pulse_generator(control, 'transducer', apodization=[0, 1])
+        wave_fields, delta_focuses = batch_pulse_generator(control,
+                                                           focus_azimuth=[0.04, 0.06],
+                                                           apodization=[[0, 1]])
+        self.assertEqual((2,) + wave_field.shape, wave_fields.shape)
+        self._assert_fields(wave_field, wave_fields[1])
+        numpy.testing.assert_allclose(delta_focus, delta_focuses[1], rtol=0, atol=1e-18)
+
+        # the lens in elevation is the same for all transmits
+        numpy.testing.assert_allclose(delta_focuses[0] - delta_focuses[0, :1],
+                                      delta_focuses[1] - delta_focuses[1, :1], rtol=0,
+                                      atol=1e-18)